@@ -0,0 +1,166 @@
+"""Initial auth schema
+
+Revision ID: 5a1f3c9e2b7d
+Revises: 
+Create Date: 2026-10-19 12:00:00.000000+00:00
+
+Таблицы раньше создавались metadata.create_all при старте сервиса, поэтому
+в существующих базах они уже есть - такие таблицы пропускаются, а отличия
+старой схемы доводит следующая ревизия.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '5a1f3c9e2b7d'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _timestamps(*names: str):
+    return [
+        sa.Column(name, sa.DateTime(timezone=True), server_default=sa.text('now()'))
+        for name in names
+    ]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    existing = set(sa.inspect(op.get_bind()).get_table_names())
+
+    if 'users' not in existing:
+        op.create_table(
+            'users',
+            sa.Column('id', sa.UUID(), primary_key=True),
+            sa.Column('username', sa.String(50), nullable=False, unique=True),
+            sa.Column('email', sa.String(255), unique=True),
+            sa.Column('phone', sa.String(20), unique=True),
+            sa.Column('first_name', sa.String(100)),
+            sa.Column('last_name', sa.String(100)),
+            sa.Column('avatar_url', sa.String(500)),
+            sa.Column('password_hash', sa.String(255)),
+            sa.Column('role', sa.String(20), nullable=False),
+            sa.Column('is_active', sa.Boolean()),
+            sa.Column('is_verified', sa.Boolean()),
+            sa.Column('token_version', sa.Integer(), nullable=False, server_default='0'),
+            sa.Column('language_code', sa.String(10)),
+            sa.Column('timezone', sa.String(50)),
+            *_timestamps('created_at', 'updated_at'),
+            sa.Column('last_login_at', sa.DateTime(timezone=True)),
+            sa.Column('metadata', postgresql.JSONB()),
+        )
+        op.create_index('idx_users_username', 'users', ['username'])
+        op.create_index('idx_users_email', 'users', ['email'])
+        op.create_index('idx_users_role', 'users', ['role'])
+        op.create_index('idx_users_created_at', 'users', ['created_at'])
+
+    if 'auth_providers' not in existing:
+        op.create_table(
+            'auth_providers',
+            sa.Column('id', sa.UUID(), primary_key=True),
+            sa.Column('user_id', sa.UUID(), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+            sa.Column('provider', sa.String(20), nullable=False),
+            sa.Column('provider_user_id', sa.String(255), nullable=False),
+            sa.Column('provider_username', sa.String(255)),
+            sa.Column('provider_data', postgresql.JSONB()),
+            sa.Column('is_primary', sa.Boolean()),
+            *_timestamps('created_at', 'updated_at'),
+            sa.UniqueConstraint('provider', 'provider_user_id', name='uq_provider_user'),
+        )
+        op.create_index('idx_auth_providers_user_id', 'auth_providers', ['user_id'])
+        op.create_index('idx_auth_providers_provider', 'auth_providers', ['provider'])
+
+    if 'user_sessions' not in existing:
+        op.create_table(
+            'user_sessions',
+            sa.Column('id', sa.UUID(), primary_key=True),
+            sa.Column('user_id', sa.UUID(), sa.ForeignKey('users.id', ondelete='CASCADE'), nullable=False),
+            sa.Column('access_token_hash', sa.String(64), nullable=False),
+            sa.Column('refresh_token_hash', sa.String(64), nullable=False),
+            sa.Column('device_info', postgresql.JSONB()),
+            sa.Column('ip_address', postgresql.INET()),
+            sa.Column('user_agent', sa.Text()),
+            sa.Column('status', sa.String(20), nullable=False),
+            sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+            *_timestamps('created_at', 'last_activity', 'updated_at', 'last_activity_at'),
+        )
+        op.create_index('idx_user_sessions_user_id', 'user_sessions', ['user_id'])
+        op.create_index('uq_user_sessions_refresh_token_hash', 'user_sessions', ['refresh_token_hash'], unique=True)
+        op.create_index(
+            'idx_user_sessions_user_active_created', 'user_sessions',
+            ['user_id', sa.text('created_at DESC')],
+            postgresql_where=sa.text("status = 'active'")
+        )
+        op.create_index('idx_user_sessions_expires_at', 'user_sessions', ['expires_at'])
+        op.create_index('idx_user_sessions_status', 'user_sessions', ['status'])
+
+    if 'auth_logs' not in existing:
+        op.create_table(
+            'auth_logs',
+            sa.Column('id', sa.UUID(), primary_key=True),
+            sa.Column('user_id', sa.UUID(), sa.ForeignKey('users.id', ondelete='SET NULL')),
+            sa.Column('action', sa.String(50), nullable=False),
+            sa.Column('provider', sa.String(20)),
+            sa.Column('ip_address', postgresql.INET()),
+            sa.Column('user_agent', sa.Text()),
+            sa.Column('success', sa.Boolean(), nullable=False),
+            sa.Column('error_message', sa.Text()),
+            sa.Column('metadata', postgresql.JSONB()),
+            *_timestamps('created_at'),
+        )
+        op.create_index('idx_auth_logs_user_id', 'auth_logs', ['user_id'])
+        op.create_index('idx_auth_logs_action', 'auth_logs', ['action'])
+        op.create_index('idx_auth_logs_created_at', 'auth_logs', ['created_at'])
+        op.create_index('idx_auth_logs_success', 'auth_logs', ['success'])
+        op.create_index('idx_auth_logs_ip_address', 'auth_logs', ['ip_address'])
+
+    if 'ip_restrictions' not in existing:
+        op.create_table(
+            'ip_restrictions',
+            sa.Column('id', sa.UUID(), primary_key=True),
+            sa.Column('ip_address', postgresql.INET(), nullable=False, unique=True),
+            sa.Column('failed_attempts', sa.Integer()),
+            sa.Column('blocked_until', sa.DateTime(timezone=True)),
+            *_timestamps('first_attempt_at', 'last_attempt_at', 'created_at', 'updated_at'),
+        )
+        op.create_index('idx_ip_restrictions_ip_address', 'ip_restrictions', ['ip_address'])
+        op.create_index('idx_ip_restrictions_blocked_until', 'ip_restrictions', ['blocked_until'])
+
+    if 'permissions' not in existing:
+        op.create_table(
+            'permissions',
+            sa.Column('id', sa.UUID(), primary_key=True),
+            sa.Column('name', sa.String(100), nullable=False, unique=True),
+            sa.Column('description', sa.Text()),
+            sa.Column('resource', sa.String(50), nullable=False),
+            sa.Column('action', sa.String(50), nullable=False),
+            *_timestamps('created_at'),
+            sa.UniqueConstraint('resource', 'action', name='uq_resource_action'),
+        )
+        op.create_index('idx_permissions_resource', 'permissions', ['resource'])
+        op.create_index('idx_permissions_action', 'permissions', ['action'])
+
+    if 'role_permissions' not in existing:
+        op.create_table(
+            'role_permissions',
+            sa.Column('id', sa.UUID(), primary_key=True),
+            sa.Column('role', sa.String(20), nullable=False),
+            sa.Column('permission_id', sa.UUID(), sa.ForeignKey('permissions.id', ondelete='CASCADE'), nullable=False),
+            *_timestamps('created_at'),
+            sa.UniqueConstraint('role', 'permission_id', name='uq_role_permission'),
+        )
+        op.create_index('idx_role_permissions_role', 'role_permissions', ['role'])
+        op.create_index('idx_role_permissions_permission_id', 'role_permissions', ['permission_id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in (
+        'role_permissions', 'permissions', 'ip_restrictions', 'auth_logs',
+        'user_sessions', 'auth_providers', 'users',
+    ):
+        op.drop_table(table)
@@ -0,0 +1,72 @@
+"""Upgrade legacy create_all schema
+
+Revision ID: 8c4e2d7a9f13
+Revises: 5a1f3c9e2b7d
+Create Date: 2026-10-19 12:01:00.000000+00:00
+
+Бывшие ручные скрипты migrate_session_token_hashes.sql и
+migrate_user_token_version.sql. Все шаги идемпотентны: на базе, созданной
+предыдущей ревизией, ничего не меняют.
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '8c4e2d7a9f13'
+down_revision: Union[str, Sequence[str], None] = '5a1f3c9e2b7d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Версия токенов пользователя (отзыв всех выданных access токенов)
+    op.execute("ALTER TABLE users ADD COLUMN IF NOT EXISTS token_version INTEGER NOT NULL DEFAULT 0")
+
+    # Раньше в *_token_hash попадали сами токены - хешируем их (хеш sha256 в hex = 64 символа)
+    op.execute("""
+UPDATE user_sessions
+SET access_token_hash = encode(sha256(convert_to(access_token_hash, 'UTF8')), 'hex')
+WHERE length(access_token_hash) <> 64
+""")
+    op.execute("""
+UPDATE user_sessions
+SET refresh_token_hash = encode(sha256(convert_to(COALESCE(refresh_token_hash, id::text), 'UTF8')), 'hex')
+WHERE refresh_token_hash IS NULL OR length(refresh_token_hash) <> 64
+""")
+    # Одинаковые refresh токены (выданы в одну секунду) - оставляем самую новую сессию
+    op.execute("""
+UPDATE user_sessions s
+SET status = 'revoked', refresh_token_hash = encode(sha256(convert_to(s.id::text, 'UTF8')), 'hex')
+FROM (
+    SELECT id, row_number() OVER (PARTITION BY refresh_token_hash ORDER BY created_at DESC) AS rn
+    FROM user_sessions
+) d
+WHERE s.id = d.id AND d.rn > 1
+""")
+    op.execute("ALTER TABLE user_sessions ALTER COLUMN access_token_hash TYPE VARCHAR(64)")
+    op.execute("ALTER TABLE user_sessions ALTER COLUMN refresh_token_hash TYPE VARCHAR(64)")
+    op.execute("ALTER TABLE user_sessions ALTER COLUMN refresh_token_hash SET NOT NULL")
+
+    # Сырые токены больше не храним
+    op.execute("DROP INDEX IF EXISTS idx_user_sessions_token")
+    op.execute("DROP INDEX IF EXISTS idx_user_sessions_refresh_token")
+    op.execute("ALTER TABLE user_sessions DROP COLUMN IF EXISTS session_token")
+    op.execute("ALTER TABLE user_sessions DROP COLUMN IF EXISTS refresh_token")
+    op.execute("""
+CREATE UNIQUE INDEX IF NOT EXISTS uq_user_sessions_refresh_token_hash
+ON user_sessions (refresh_token_hash)
+""")
+    op.execute("""
+CREATE INDEX IF NOT EXISTS idx_user_sessions_user_active_created
+ON user_sessions (user_id, created_at DESC)
+WHERE status = 'active'
+""")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Хеши токенов обратно в токены не превращаются
+    pass
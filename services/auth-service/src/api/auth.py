@@ -6,6 +6,7 @@ from fastapi import APIRouter, HTTPException, Depends, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from datetime import datetime, timedelta
 from typing import Optional
+from uuid import uuid4
 import logging
 
 from ..core.config import settings
@@ -25,6 +26,17 @@ security = HTTPBearer()
 logger = logging.getLogger(__name__)
 
 
+TOKEN_DATA_CLAIMS = ("user_id", "session_id", "tv")
+
+
+def build_token_data(user, session_id) -> dict:
+    """Payload для access/refresh токенов новой сессии"""
+    token_data = {"user_id": str(user['id']), "session_id": str(session_id)}
+    if settings.JWT_EMBED_USER_STATE:
+        token_data["tv"] = user['token_version']
+    return token_data
+
+
 async def get_auth_service() -> AuthService:
     """Dependency для получения Auth Service"""
     return AuthService(database)
@@ -45,11 +57,8 @@ async def get_google_service() -> GoogleAuthService:
 
 async def get_jwt_manager() -> JWTManager:
     """Dependency для получения JWT Manager"""
-    return JWTManager(
-        secret_key=settings.JWT_SECRET_KEY,
-        algorithm=settings.JWT_ALGORITHM,
-        access_token_expire_minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
-    )
+    from ..core.security import jwt_manager
+    return jwt_manager
 
 
 @router.post("/telegram", response_model=AuthResponse)
@@ -75,15 +84,14 @@ async def telegram_auth(
         user = await auth_service.get_or_create_telegram_user(telegram_data)
         
         # Генерируем токены
-        access_token = jwt_manager.create_access_token(
-            data={"user_id": str(user['id'])}
-        )
-        refresh_token = jwt_manager.create_refresh_token(
-            data={"user_id": str(user['id'])}
-        )
+        session_id = uuid4()
+        token_data = build_token_data(user, session_id)
+        access_token = jwt_manager.create_access_token(data=token_data)
+        refresh_token = jwt_manager.create_refresh_token(data=token_data)
         
         # Создаем сессию с токенами
         session = await auth_service.create_session(
+            session_id=session_id,
             user_id=user['id'],
             access_token=access_token,
             refresh_token=refresh_token,
@@ -156,15 +164,14 @@ async def google_auth(
         user = await auth_service.get_or_create_google_user(google_data)
         
         # Генерируем токены
-        access_token = jwt_manager.create_access_token(
-            data={"user_id": str(user['id'])}
-        )
-        refresh_token = jwt_manager.create_refresh_token(
-            data={"user_id": str(user['id'])}
-        )
+        session_id = uuid4()
+        token_data = build_token_data(user, session_id)
+        access_token = jwt_manager.create_access_token(data=token_data)
+        refresh_token = jwt_manager.create_refresh_token(data=token_data)
         
         # Создаем сессию с токенами
         session = await auth_service.create_session(
+            session_id=session_id,
             user_id=user['id'],
             access_token=access_token,
             refresh_token=refresh_token,
@@ -219,43 +226,32 @@ async def refresh_token(
 ):
     """Обновление access токена используя refresh токен"""
     try:
-        # Валидируем refresh токен
+        # Валидируем refresh токен (подпись и срок - локально, без БД)
         payload = jwt_manager.decode_refresh_token(request.refresh_token)
         user_id = payload.get("user_id")
-        session_id = payload.get("session_id")
         
-        if not user_id or not session_id:
+        if not user_id:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid refresh token"
             )
         
-        # Проверяем сессию
-        session = await auth_service.get_session(session_id)
-        if not session or session.refresh_token != request.refresh_token:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Invalid session"
-            )
+        # Генерируем новые токены (tv не меняется: отзыв всех сессий
+        # или отключение пользователя делают ротацию невозможной)
+        token_data = {key: payload[key] for key in TOKEN_DATA_CLAIMS if key in payload}
+        access_token = jwt_manager.create_access_token(data=token_data)
+        new_refresh_token = jwt_manager.create_refresh_token(data=token_data)
         
-        # Получаем пользователя
-        user = await auth_service.get_user(user_id)
+        # Один запрос: поиск сессии по хешу, ротация токенов и данные пользователя
+        user = await auth_service.rotate_session(
+            user_id, request.refresh_token, access_token, new_refresh_token
+        )
         if not user:
             raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="User not found"
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid session"
             )
-        
-        # Генерируем новые токены
-        access_token = jwt_manager.create_access_token(
-            data={"user_id": str(user.id), "session_id": str(session.id)}
-        )
-        new_refresh_token = jwt_manager.create_refresh_token(
-            data={"user_id": str(user.id), "session_id": str(session.id)}
-        )
-        
-        # Обновляем токены в сессии
-        await auth_service.update_session_tokens(session.id, access_token, new_refresh_token)
+        user.pop("session_id", None)
         
         return AuthResponse(
             access_token=access_token,
@@ -386,15 +382,14 @@ async def register_user(
         user = await auth_service.create_user(user_data)
         
         # Генерируем токены
-        access_token = jwt_manager.create_access_token(
-            data={"user_id": str(user['id'])}
-        )
-        refresh_token = jwt_manager.create_refresh_token(
-            data={"user_id": str(user['id'])}
-        )
+        session_id = uuid4()
+        token_data = build_token_data(user, session_id)
+        access_token = jwt_manager.create_access_token(data=token_data)
+        refresh_token = jwt_manager.create_refresh_token(data=token_data)
         
         # Создаем сессию
         session = await auth_service.create_session(
+            session_id=session_id,
             user_id=user['id'],
             access_token=access_token,
             refresh_token=refresh_token,
@@ -441,6 +436,15 @@ async def login_user(
     jwt_manager: JWTManager = Depends(get_jwt_manager)
 ):
     """Логин пользователя с email/username и password"""
+    ip_address = http_request.client.host if http_request.client else None
+    
+    # Проверка блокировки идет до поиска пользователя и не обращается к БД
+    if not await auth_service.check_ip_restrictions(ip_address, request.email):
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many failed login attempts, try again later"
+        )
+    
     try:
         # Ищем пользователя по email или username
         user = None
@@ -450,6 +454,7 @@ async def login_user(
             user = await auth_service.get_user_by_username(request.email)
         
         if not user:
+            await auth_service.record_failed_attempt(ip_address, request.email)
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid credentials"
@@ -468,6 +473,7 @@ async def login_user(
         logger.info(f"Password hash: {user_dict.get('password_hash')}")
         
         if not password_manager.verify_password(request.password, user_dict.get('password_hash')):
+            await auth_service.record_failed_attempt(ip_address, request.email)
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid credentials"
@@ -480,16 +486,17 @@ async def login_user(
                 detail="Account is disabled"
             )
         
+        await auth_service.clear_failed_attempts(ip_address, request.email)
+        
         # Генерируем токены
-        access_token = jwt_manager.create_access_token(
-            data={"user_id": str(user_dict['id'])}
-        )
-        refresh_token = jwt_manager.create_refresh_token(
-            data={"user_id": str(user_dict['id'])}
-        )
+        session_id = uuid4()
+        token_data = build_token_data(user_dict, session_id)
+        access_token = jwt_manager.create_access_token(data=token_data)
+        refresh_token = jwt_manager.create_refresh_token(data=token_data)
         
         # Создаем сессию
         session = await auth_service.create_session(
+            session_id=session_id,
             user_id=user_dict['id'],
             access_token=access_token,
             refresh_token=refresh_token,
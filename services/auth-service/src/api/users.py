@@ -11,7 +11,8 @@ import logging
 from ..core.config import settings
 from ..models.schemas import (
     UserResponse, UserUpdate, UserProfile, SessionResponse,
-    ErrorResponse, UserPermissions
+    ErrorResponse, UserPermissions, UserBatchRequest, UserBatchResponse,
+    UserPublicProfile
 )
 from ..services.auth import AuthService
 from ..core.security import JWTManager
@@ -50,14 +51,21 @@ async def get_current_user(
                 detail="Invalid token: user_id not found"
             )
         
-        # Получаем пользователя
-        user = await auth_service.get_user(UUID(user_id))
+        # Получаем пользователя (через кэш)
+        user = await auth_service.get_user_cached(UUID(user_id))
         if not user:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail="User not found"
             )
         
+        # Токен выдан до отзыва всех сессий
+        if "tv" in payload and payload["tv"] != user.get('token_version', 0):
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Token has been revoked"
+            )
+        
         if not user.get('is_active'):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -356,6 +364,30 @@ async def get_users(
         )
 
 
+@router.post("/batch", response_model=UserBatchResponse)
+async def get_users_batch(
+    request: UserBatchRequest,
+    current_user: dict = Depends(get_current_active_user),
+    auth_service: AuthService = Depends(get_auth_service)
+):
+    """Публичные профили нескольких пользователей (имена и аватары для других сервисов)"""
+    try:
+        rows = await auth_service.get_user_profiles(request.user_ids)
+        users = [UserPublicProfile(**row) for row in rows]
+        
+        found = {user.id for user in users}
+        missing = [user_id for user_id in dict.fromkeys(request.user_ids) if user_id not in found]
+        
+        return UserBatchResponse(users=users, missing=missing)
+        
+    except Exception as e:
+        logger.error(f"Get users batch error: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Failed to get users"
+        )
+
+
 @router.get("/{user_id}", response_model=UserResponse)
 async def get_user(
     user_id: UUID,
@@ -1,20 +1,83 @@
 """
 Подключение к базе данных
+
+Один асинхронный стек: пул asyncpg через библиотеку databases. Схема БД
+создается миграциями Alembic (alembic upgrade head), а не при импорте или
+старте сервиса.
 """
 
-import asyncpg
+import json
+import re
+from typing import Any, Dict, List, Mapping, Optional, Sequence
+
 import databases
-from sqlalchemy import create_engine, MetaData
-from sqlalchemy.ext.declarative import declarative_base
 from .config import settings
 
-# SQLAlchemy настройка
-engine = create_engine(settings.DATABASE_URL, echo=True)
-metadata = MetaData()
-Base = declarative_base()
+# Databases библиотека для async работы (пул asyncpg)
+database = databases.Database(
+    settings.DATABASE_URL,
+    min_size=settings.DB_POOL_MIN_SIZE,
+    max_size=settings.DB_POOL_MAX_SIZE,
+    command_timeout=settings.DB_COMMAND_TIMEOUT_SECONDS,
+    statement_cache_size=settings.DB_STATEMENT_CACHE_SIZE,
+    max_inactive_connection_lifetime=settings.DB_MAX_INACTIVE_CONNECTION_LIFETIME_SECONDS
+)
+
+
+# :name, но не ::cast
+_NAMED_PARAM_RE = re.compile(r"(?<![:\w]):([A-Za-z_]\w*)")
+
+
+class CompiledQuery:
+    """
+    Горячий запрос, один раз переведенный в позиционный вид asyncpg ($1, $2, ...)
+    
+    databases на каждый вызов заворачивает строку в text() и компилирует ее
+    через SQLAlchemy. Скомпилированный запрос выполняется сразу на
+    asyncpg-соединении текущей задачи (в том числе внутри db.transaction()),
+    а asyncpg кэширует подготовленный statement на соединении.
+    
+    Строки возвращаются словарями; JSONB-колонки из json_columns декодируются.
+    """
+    
+    def __init__(self, sql: str, json_columns: Sequence[str] = ()):
+        names: List[str] = []
+        
+        def to_positional(match: "re.Match") -> str:
+            name = match.group(1)
+            if name not in names:
+                names.append(name)
+            return f"${names.index(name) + 1}"
+        
+        self.sql = _NAMED_PARAM_RE.sub(to_positional, sql)
+        self.params = tuple(names)
+        self.json_columns = tuple(json_columns)
+    
+    def _args(self, values: Optional[Mapping[str, Any]]) -> List[Any]:
+        values = values or {}
+        return [values[name] for name in self.params]
+    
+    def _row(self, record) -> Dict[str, Any]:
+        row = dict(record)
+        for column in self.json_columns:
+            if isinstance(row.get(column), str):
+                row[column] = json.loads(row[column])
+        return row
+    
+    async def fetch_one(
+        self, db: databases.Database, values: Optional[Mapping[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
+        async with db.connection() as connection:
+            record = await connection.raw_connection.fetchrow(self.sql, *self._args(values))
+        return self._row(record) if record is not None else None
+    
+    async def fetch_all(
+        self, db: databases.Database, values: Optional[Mapping[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        async with db.connection() as connection:
+            records = await connection.raw_connection.fetch(self.sql, *self._args(values))
+        return [self._row(record) for record in records]
 
-# Databases библиотека для async работы
-database = databases.Database(settings.DATABASE_URL)
 
 async def connect_database():
     """Подключение к базе данных"""
@@ -40,24 +103,3 @@ async def disconnect_database():
     """Отключение от базы данных"""
     await database.disconnect()
     print("🔌 Auth Service disconnected from database")
-
-async def create_tables():
-    """Создание таблиц если их нет"""
-    from ..models.database import metadata
-    
-    print("🔧 Creating Auth Service database tables...")
-    
-    # Используем прямое подключение для создания таблиц
-    metadata.create_all(engine)
-    
-    # Получаем список созданных таблиц
-    query = """
-    SELECT table_name 
-    FROM information_schema.tables 
-    WHERE table_schema = 'public'
-    ORDER BY table_name
-    """
-    
-    result = await database.fetch_all(query)
-    table_names = [row[0] for row in result]
-    print(f"✅ Auth Service database tables created: {table_names}")
\ No newline at end of file
@@ -0,0 +1,239 @@
+"""
+Ключи подписи JWT для Auth Service
+
+Токены подписываются асимметрично (ES256 или EdDSA), в заголовке токена
+указывается kid ключа. Публичные части ключей отдаются в
+/.well-known/jwks.json: остальные сервисы проверяют подпись локально,
+без общего секрета и без запросов в auth-service.
+
+Ключи хранятся PEM-файлами <kid>.pem в JWT_KEYS_DIR (общий том для всех
+воркеров). Новый ключ создается раз в rotation_days; старые ключи остаются
+в JWKS, пока подписанные ими токены могут быть действительны. Без
+JWT_KEYS_DIR ключ генерируется в памяти процесса - только для разработки.
+
+Ключи читаются и создаются в load() на старте приложения (lifespan), а не
+при импорте модуля: ошибка доступа к JWT_KEYS_DIR видна в логе старта.
+"""
+
+import os
+import secrets
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519
+from jwt.algorithms import ECAlgorithm, OKPAlgorithm
+
+from .config import settings
+
+
+SUPPORTED_ALGORITHMS = ("ES256", "EdDSA")
+
+
+class SigningKey:
+    """Ключ подписи: kid, алгоритм, закрытый и открытый ключ"""
+
+    def __init__(self, kid: str, algorithm: str, private_key, created_at: float):
+        self.kid = kid
+        self.algorithm = algorithm
+        self.private_key = private_key
+        self.public_key = private_key.public_key()
+        self.created_at = created_at
+
+    @classmethod
+    def generate(cls, algorithm: str, created_at: float) -> "SigningKey":
+        if algorithm == "ES256":
+            private_key = ec.generate_private_key(ec.SECP256R1())
+        elif algorithm == "EdDSA":
+            private_key = ed25519.Ed25519PrivateKey.generate()
+        else:
+            raise ValueError(f"Unsupported JWT algorithm: {algorithm}")
+
+        stamp = datetime.fromtimestamp(created_at, timezone.utc).strftime("%Y%m%d%H%M%S")
+        return cls(f"{stamp}-{secrets.token_hex(4)}", algorithm, private_key, created_at)
+
+    @classmethod
+    def from_pem(cls, kid: str, pem: bytes, created_at: float) -> "SigningKey":
+        private_key = serialization.load_pem_private_key(pem, password=None)
+        if isinstance(private_key, ec.EllipticCurvePrivateKey):
+            algorithm = "ES256"
+        elif isinstance(private_key, ed25519.Ed25519PrivateKey):
+            algorithm = "EdDSA"
+        else:
+            raise ValueError(f"Unsupported key type in {kid}.pem")
+        return cls(kid, algorithm, private_key, created_at)
+
+    def to_pem(self) -> bytes:
+        return self.private_key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.NoEncryption()
+        )
+
+    def to_jwk(self) -> Dict[str, Any]:
+        """Публичная часть ключа в формате JWK"""
+        if self.algorithm == "ES256":
+            jwk = ECAlgorithm.to_jwk(self.public_key, as_dict=True)
+        else:
+            jwk = OKPAlgorithm.to_jwk(self.public_key, as_dict=True)
+        jwk.update({"kid": self.kid, "alg": self.algorithm, "use": "sig"})
+        return jwk
+
+
+class KeyRing:
+    """
+    Набор ключей подписи с ротацией
+
+    Подписывает всегда самый новый ключ. Ключ попадает в JWKS, пока с момента
+    его замены не прошло verify_grace_seconds (максимальный срок жизни токена).
+    """
+
+    RELOAD_MIN_INTERVAL_SECONDS = 30
+
+    def __init__(
+        self,
+        algorithm: str = "ES256",
+        keys_dir: Optional[str] = None,
+        rotation_days: int = 30,
+        verify_grace_seconds: int = 30 * 24 * 3600,
+        clock: Callable[[], float] = time.time
+    ):
+        if algorithm not in SUPPORTED_ALGORITHMS:
+            raise ValueError(f"Unsupported JWT algorithm: {algorithm}")
+        self.algorithm = algorithm
+        self.keys_dir = Path(keys_dir) if keys_dir else None
+        self.rotation_seconds = rotation_days * 24 * 3600
+        self.verify_grace_seconds = verify_grace_seconds
+        self._clock = clock
+        # kid -> ключ, по возрастанию created_at
+        self._keys: Dict[str, SigningKey] = {}
+        # kid -> JWK публичной части
+        self._jwk_cache: Dict[str, Dict[str, Any]] = {}
+        self._last_reload = 0.0
+
+    def load(self) -> "KeyRing":
+        """Прочитать ключи из keys_dir и создать ключ, если его нет или он устарел"""
+        self.reload()
+        if self._needs_rotation():
+            self.rotate()
+        return self
+
+    # ==================== STORAGE ====================
+
+    def reload(self) -> int:
+        """Перечитать ключи из keys_dir (ключи, созданные другими воркерами)"""
+        self._last_reload = self._clock()
+        if self.keys_dir is None or not self.keys_dir.is_dir():
+            return 0
+
+        loaded = 0
+        for path in self.keys_dir.glob("*.pem"):
+            if path.stem in self._keys:
+                continue
+            self._keys[path.stem] = SigningKey.from_pem(
+                path.stem, path.read_bytes(), path.stat().st_mtime
+            )
+            loaded += 1
+
+        if loaded:
+            self._keys = dict(sorted(self._keys.items(), key=lambda item: item[1].created_at))
+        return loaded
+
+    def _store(self, key: SigningKey):
+        if self.keys_dir is None:
+            print("⚠️ JWT_KEYS_DIR is not set, signing key lives in memory of this process only")
+            return
+
+        self.keys_dir.mkdir(parents=True, exist_ok=True)
+        path = self.keys_dir / f"{key.kid}.pem"
+        # 0600 и O_EXCL: закрытый ключ не читается посторонними и не перезаписывается
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            f.write(key.to_pem())
+        os.utime(path, (key.created_at, key.created_at))
+
+    # ==================== ROTATION ====================
+
+    def _needs_rotation(self) -> bool:
+        if not self._keys:
+            return True
+        active = self.active
+        return (
+            active.algorithm != self.algorithm
+            or self._clock() - active.created_at >= self.rotation_seconds
+        )
+
+    def rotate(self) -> SigningKey:
+        """Создать новый ключ подписи; предыдущие остаются для проверки"""
+        key = SigningKey.generate(self.algorithm, self._clock())
+        self._store(key)
+        self._keys[key.kid] = key
+        print(f"🔑 New JWT signing key {key.kid} ({key.algorithm})")
+        return key
+
+    def maybe_rotate(self) -> Optional[SigningKey]:
+        """Ротация по сроку: сначала подхватываем ключ, который мог создать другой воркер"""
+        if not self._keys or not self._needs_rotation():
+            return None
+        self.reload()
+        if self._needs_rotation():
+            return self.rotate()
+        return None
+
+    @property
+    def active(self) -> SigningKey:
+        if not self._keys:
+            raise RuntimeError("JWT signing keys are not loaded, call KeyRing.load() on startup")
+        return next(reversed(self._keys.values()))
+
+    def _verifiable_keys(self) -> List[SigningKey]:
+        """Активный ключ и замененные не раньше verify_grace_seconds назад"""
+        keys = list(self._keys.values())
+        if not keys:
+            return []
+        now = self._clock()
+        result = [keys[-1]]
+        for key, successor in zip(keys, keys[1:]):
+            if now - successor.created_at < self.verify_grace_seconds:
+                result.append(key)
+        return result
+
+    # ==================== VERIFICATION ====================
+
+    def get_key(self, kid: Optional[str]) -> Optional[SigningKey]:
+        """
+        Ключ для проверки подписи по kid
+
+        Неизвестный kid мог появиться у другого воркера - keys_dir перечитывается,
+        но не чаще раза в RELOAD_MIN_INTERVAL_SECONDS (токены с мусорным kid
+        не должны превращаться в чтение диска на каждый запрос).
+        """
+        if kid is None:
+            return None
+        key = self._keys.get(kid)
+        if key is None and self._clock() - self._last_reload >= self.RELOAD_MIN_INTERVAL_SECONDS:
+            self.reload()
+            key = self._keys.get(kid)
+        if key is None or key not in self._verifiable_keys():
+            return None
+        return key
+
+    def jwks(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Документ /.well-known/jwks.json"""
+        keys = []
+        for key in self._verifiable_keys():
+            jwk = self._jwk_cache.get(key.kid)
+            if jwk is None:
+                jwk = self._jwk_cache[key.kid] = key.to_jwk()
+            keys.append(jwk)
+        return {"keys": keys}
+
+
+key_ring = KeyRing(
+    algorithm=settings.JWT_ALGORITHM,
+    keys_dir=settings.JWT_KEYS_DIR,
+    rotation_days=settings.JWT_KEY_ROTATION_DAYS,
+    verify_grace_seconds=settings.REFRESH_TOKEN_EXPIRE_DAYS * 24 * 3600
+)
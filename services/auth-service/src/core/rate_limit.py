@@ -0,0 +1,332 @@
+"""
+Ограничение попыток входа для Auth Service
+
+Счетчики неудачных попыток хранятся в памяти процесса или в Redis, а не в
+таблице ip_restrictions: всплеск перебора паролей не превращается в
+SELECT + UPDATE на каждую попытку. Используется скользящее окно (взвешенная
+сумма текущего и предыдущего фиксированного окна) отдельно по IP и по username.
+
+Postgres нужен только для аудита: сработавшие блокировки копятся в памяти и
+раз в LOCKOUT_FLUSH_INTERVAL_SECONDS записываются в ip_restrictions одним
+upsert-запросом. При старте активные блокировки подгружаются из таблицы.
+"""
+
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional, Tuple
+
+import databases
+
+from .config import settings
+
+try:
+    from redis import asyncio as redis_asyncio
+except ImportError:  # Redis - необязательный бэкенд
+    redis_asyncio = None
+
+
+class MemoryRateLimitBackend:
+    """
+    Счетчики скользящего окна в памяти процесса
+
+    Все операции синхронны внутри event loop и не содержат await между чтением
+    и записью, поэтому блокировки не нужны. Количество ключей ограничено:
+    окна лежат в порядке последней попытки, и при переполнении за O(1)
+    удаляется ключ, по которому дольше всех не было попыток (устаревшие окна
+    всегда в начале очереди).
+    """
+
+    def __init__(self, max_keys: int = 100_000, clock: Callable[[], float] = time.time):
+        self.max_keys = max_keys
+        self._clock = clock
+        # key -> (индекс окна, попыток в текущем окне, попыток в предыдущем окне)
+        self._windows: "OrderedDict[str, Tuple[int, int, int]]" = OrderedDict()
+        self._locks: Dict[str, float] = {}
+
+    async def hit(self, key: str, window_seconds: int) -> float:
+        now = self._clock()
+        index = int(now // window_seconds)
+        window = self._windows.get(key)
+
+        if window is None:
+            if len(self._windows) >= self.max_keys:
+                self._windows.popitem(last=False)
+            current, previous = 1, 0
+        elif window[0] == index:
+            current, previous = window[1] + 1, window[2]
+        elif window[0] == index - 1:
+            current, previous = 1, window[1]
+        else:
+            current, previous = 1, 0
+
+        self._windows[key] = (index, current, previous)
+        self._windows.move_to_end(key)
+        elapsed = (now % window_seconds) / window_seconds
+        return current + previous * (1 - elapsed)
+
+    async def reset(self, key: str, window_seconds: int):
+        self._windows.pop(key, None)
+        self._locks.pop(key, None)
+
+    async def lock(self, key: str, until: float):
+        self._locks[key] = until
+
+    async def locked_until(self, key: str) -> Optional[float]:
+        until = self._locks.get(key)
+        if until is None:
+            return None
+        if until <= self._clock():
+            del self._locks[key]
+            return None
+        return until
+
+
+class RedisRateLimitBackend:
+    """
+    Счетчики скользящего окна в Redis (общие для всех воркеров)
+
+    Каждая попытка - один pipeline без транзакции: INCR текущего окна, EXPIRE
+    и GET предыдущего окна. INCR атомарен на стороне Redis.
+    """
+
+    def __init__(self, redis_url: str, prefix: str = "auth:", clock: Callable[[], float] = time.time):
+        if redis_asyncio is None:
+            raise RuntimeError("redis package is required for RATE_LIMIT_BACKEND=redis")
+        self.redis = redis_asyncio.from_url(redis_url)
+        self.prefix = f"{prefix}rl:"
+        self._clock = clock
+
+    async def hit(self, key: str, window_seconds: int) -> float:
+        now = self._clock()
+        index = int(now // window_seconds)
+        current_key = f"{self.prefix}{key}:{index}"
+
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.incr(current_key)
+        pipe.expire(current_key, window_seconds * 2)
+        pipe.get(f"{self.prefix}{key}:{index - 1}")
+        current, _, previous = await pipe.execute()
+
+        elapsed = (now % window_seconds) / window_seconds
+        return int(current) + int(previous or 0) * (1 - elapsed)
+
+    async def reset(self, key: str, window_seconds: int):
+        index = int(self._clock() // window_seconds)
+        await self.redis.delete(
+            f"{self.prefix}lock:{key}",
+            f"{self.prefix}{key}:{index}",
+            f"{self.prefix}{key}:{index - 1}"
+        )
+
+    async def lock(self, key: str, until: float):
+        ttl = max(int(until - self._clock()), 1)
+        await self.redis.set(f"{self.prefix}lock:{key}", until, ex=ttl)
+
+    async def locked_until(self, key: str) -> Optional[float]:
+        value = await self.redis.get(f"{self.prefix}lock:{key}")
+        return float(value) if value is not None else None
+
+    async def close(self):
+        await self.redis.aclose()
+
+
+# Аудит блокировок: одна строка на IP, последнее значение побеждает
+_FLUSH_LOCKOUTS_SQL = """
+INSERT INTO ip_restrictions (
+    id, ip_address, failed_attempts, blocked_until,
+    first_attempt_at, last_attempt_at, created_at, updated_at
+)
+SELECT gen_random_uuid(), CAST(s.ip_address AS inet), s.failed_attempts, s.blocked_until,
+       s.last_attempt_at, s.last_attempt_at, NOW(), NOW()
+FROM jsonb_to_recordset(CAST(:rows AS jsonb)) AS s(
+    ip_address text, failed_attempts integer,
+    blocked_until timestamptz, last_attempt_at timestamptz
+)
+ON CONFLICT (ip_address) DO UPDATE SET
+    failed_attempts = EXCLUDED.failed_attempts,
+    blocked_until = EXCLUDED.blocked_until,
+    last_attempt_at = EXCLUDED.last_attempt_at,
+    updated_at = NOW()
+"""
+
+_ACTIVE_LOCKOUTS_SQL = """
+SELECT host(ip_address) AS ip_address, blocked_until
+FROM ip_restrictions
+WHERE blocked_until > NOW()
+"""
+
+
+class LoginRateLimiter:
+    """
+    Лимитер неудачных попыток входа по IP и по username
+
+    Username блокируется после max_user_attempts неудач в окне, IP - после
+    max_ip_attempts (порог выше, так как за NAT бывает много пользователей).
+    """
+
+    def __init__(
+        self,
+        backend,
+        max_user_attempts: int = 5,
+        max_ip_attempts: int = 20,
+        window_seconds: int = 900,
+        lockout_seconds: int = 900,
+        clock: Callable[[], float] = time.time
+    ):
+        self.backend = backend
+        self.max_user_attempts = max_user_attempts
+        self.max_ip_attempts = max_ip_attempts
+        self.window_seconds = window_seconds
+        self.lockout_seconds = lockout_seconds
+        self._clock = clock
+        # ip -> (число попыток, blocked_until, время попытки) для записи в ip_restrictions
+        self._pending_lockouts: Dict[str, Tuple[int, float, float]] = {}
+        self._flush_task: Optional[asyncio.Task] = None
+        self.stats = {"checked": 0, "blocked": 0, "failures": 0, "lockouts": 0, "flushed": 0}
+
+    @staticmethod
+    def _user_key(username: str) -> str:
+        return f"user:{username.strip().lower()}"
+
+    @staticmethod
+    def _ip_key(ip_address: str) -> str:
+        return f"ip:{ip_address}"
+
+    async def is_allowed(self, ip_address: Optional[str], username: Optional[str] = None) -> bool:
+        """Проверка, не заблокированы ли IP и username"""
+        self.stats["checked"] += 1
+
+        if ip_address and await self.backend.locked_until(self._ip_key(ip_address)):
+            self.stats["blocked"] += 1
+            return False
+        if username and await self.backend.locked_until(self._user_key(username)):
+            self.stats["blocked"] += 1
+            return False
+        return True
+
+    async def register_failure(self, ip_address: Optional[str], username: Optional[str] = None) -> bool:
+        """
+        Учет неудачной попытки
+
+        Returns:
+            True если попытка привела к блокировке IP или username
+        """
+        self.stats["failures"] += 1
+        now = self._clock()
+        locked = False
+
+        if ip_address:
+            attempts = await self.backend.hit(self._ip_key(ip_address), self.window_seconds)
+            if attempts >= self.max_ip_attempts:
+                until = now + self.lockout_seconds
+                await self.backend.lock(self._ip_key(ip_address), until)
+                self._pending_lockouts[ip_address] = (int(attempts), until, now)
+                locked = True
+
+        if username:
+            attempts = await self.backend.hit(self._user_key(username), self.window_seconds)
+            if attempts >= self.max_user_attempts:
+                await self.backend.lock(self._user_key(username), now + self.lockout_seconds)
+                locked = True
+
+        if locked:
+            self.stats["lockouts"] += 1
+        return locked
+
+    async def register_success(self, ip_address: Optional[str], username: Optional[str] = None):
+        """
+        Сброс счетчика username после успешного входа
+
+        Счетчик IP не сбрасывается, а истекает вместе с окном: иначе владелец
+        одного рабочего аккаунта мог бы чередовать удачный вход с подбором
+        чужих паролей, и IP никогда не блокировался бы.
+        """
+        if username:
+            await self.backend.reset(self._user_key(username), self.window_seconds)
+
+    # ==================== AUDIT ====================
+
+    async def flush_lockouts(self, db: databases.Database) -> int:
+        """Запись накопленных блокировок IP в ip_restrictions одним запросом"""
+        if not self._pending_lockouts:
+            return 0
+
+        pending, self._pending_lockouts = self._pending_lockouts, {}
+        rows = [
+            {
+                "ip_address": ip_address,
+                "failed_attempts": attempts,
+                "blocked_until": datetime.fromtimestamp(until, timezone.utc).isoformat(),
+                "last_attempt_at": datetime.fromtimestamp(attempt_at, timezone.utc).isoformat(),
+            }
+            for ip_address, (attempts, until, attempt_at) in pending.items()
+        ]
+
+        try:
+            await db.execute(query=_FLUSH_LOCKOUTS_SQL, values={"rows": json.dumps(rows)})
+        except Exception:
+            # Не теряем аудит: вернем записи, не перетирая более свежие
+            for ip_address, value in pending.items():
+                self._pending_lockouts.setdefault(ip_address, value)
+            raise
+
+        self.stats["flushed"] += len(rows)
+        return len(rows)
+
+    async def load_lockouts(self, db: databases.Database) -> int:
+        """Подгрузка активных блокировок из ip_restrictions (после рестарта)"""
+        rows = await db.fetch_all(query=_ACTIVE_LOCKOUTS_SQL)
+        for row in rows:
+            await self.backend.lock(self._ip_key(row["ip_address"]), row["blocked_until"].timestamp())
+        return len(rows)
+
+    def start_flusher(self, db: databases.Database, interval_seconds: float):
+        """Запуск периодической записи блокировок"""
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.get_running_loop().create_task(
+                self._flush_loop(db, interval_seconds)
+            )
+
+    async def _flush_loop(self, db: databases.Database, interval_seconds: float):
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await self.flush_lockouts(db)
+            except Exception as e:
+                print(f"⚠️ Failed to flush login lockouts: {e}")
+
+    async def close(self, db: Optional[databases.Database] = None):
+        """Остановка фоновой записи с финальным сбросом блокировок"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        if db is not None:
+            await self.flush_lockouts(db)
+        if hasattr(self.backend, "close"):
+            await self.backend.close()
+
+
+def create_login_limiter() -> LoginRateLimiter:
+    """Лимитер с бэкендом из настроек"""
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        backend = RedisRateLimitBackend(settings.REDIS_URL, settings.REDIS_PREFIX)
+    else:
+        backend = MemoryRateLimitBackend(max_keys=settings.RATE_LIMIT_MAX_KEYS)
+
+    return LoginRateLimiter(
+        backend,
+        max_user_attempts=settings.MAX_LOGIN_ATTEMPTS,
+        max_ip_attempts=settings.MAX_LOGIN_ATTEMPTS_PER_IP,
+        window_seconds=settings.LOGIN_ATTEMPT_WINDOW_SECONDS,
+        lockout_seconds=settings.LOCKOUT_DURATION_MINUTES * 60
+    )
+
+
+login_limiter = create_login_limiter()
@@ -3,33 +3,76 @@ Security и JWT управление для Auth Service
 """
 
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
-from jose import jwt, JWTError
+from typing import Optional, Dict, Any, Callable, Tuple
+from collections import OrderedDict
+import jwt
+from jwt import InvalidTokenError
 from passlib.context import CryptContext
 import secrets
 import hashlib
 import hmac
 import urllib.parse
 import json
+import time
 
 from .config import settings
+from .keys import KeyRing, key_ring
 
 
 class JWTManager:
-    """Менеджер для работы с JWT токенами"""
+    """
+    Менеджер для работы с JWT токенами
+    
+    Токены подписываются активным ключом KeyRing (ES256/EdDSA), kid ключа
+    пишется в заголовок. Проверка выбирает открытый ключ по kid, поэтому
+    токены, подписанные до ротации, остаются действительными.
+    """
     
     def __init__(
         self,
-        secret_key: str,
-        algorithm: str = "HS256",
+        key_ring: KeyRing,
+        issuer: str = "artel-auth",
         access_token_expire_minutes: int = 30,
         refresh_token_expire_days: int = 30
     ):
-        self.secret_key = secret_key
-        self.algorithm = algorithm
+        self.key_ring = key_ring
+        self.issuer = issuer
         self.access_token_expire_minutes = access_token_expire_minutes
         self.refresh_token_expire_days = refresh_token_expire_days
     
+    def _encode(self, payload: Dict[str, Any]) -> str:
+        self.key_ring.maybe_rotate()
+        key = self.key_ring.active
+        return jwt.encode(
+            payload,
+            key.private_key,
+            algorithm=key.algorithm,
+            headers={"kid": key.kid}
+        )
+    
+    def _decode(self, token: str, token_type: str) -> Dict[str, Any]:
+        try:
+            kid = jwt.get_unverified_header(token).get("kid")
+            key = self.key_ring.get_key(kid)
+            if key is None:
+                raise InvalidTokenError(f"Unknown signing key: {kid}")
+            
+            payload = jwt.decode(
+                token,
+                key.public_key,
+                algorithms=[key.algorithm],
+                issuer=self.issuer,
+                options={"require": ["exp", "iat", "iss"]}
+            )
+            
+            # Проверяем тип токена
+            if payload.get("type") != token_type:
+                raise InvalidTokenError("Invalid token type")
+            
+            return payload
+        except InvalidTokenError as e:
+            raise InvalidTokenError(f"Invalid {token_type} token: {e}")
+    
     def create_access_token(
         self, 
         data: Dict[str, Any], 
@@ -46,11 +89,11 @@ class JWTManager:
         to_encode.update({
             "exp": expire,
             "iat": datetime.utcnow(),
+            "iss": self.issuer,
             "type": "access"
         })
         
-        encoded_jwt = jwt.encode(to_encode, self.secret_key, algorithm=self.algorithm)
-        return encoded_jwt
+        return self._encode(to_encode)
     
     def create_refresh_token(
         self, 
@@ -68,45 +111,36 @@ class JWTManager:
         to_encode.update({
             "exp": expire,
             "iat": datetime.utcnow(),
-            "type": "refresh"
+            "iss": self.issuer,
+            "type": "refresh",
+            # Уникальность токена: по его хешу ищется сессия
+            "jti": secrets.token_urlsafe(16)
         })
         
-        encoded_jwt = jwt.encode(to_encode, self.secret_key, algorithm=self.algorithm)
-        return encoded_jwt
+        return self._encode(to_encode)
     
     def decode_access_token(self, token: str) -> Dict[str, Any]:
         """Декодирование access токена"""
-        try:
-            payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
-            
-            # Проверяем тип токена
-            if payload.get("type") != "access":
-                raise JWTError("Invalid token type")
-            
-            return payload
-        except JWTError as e:
-            raise JWTError(f"Invalid access token: {e}")
+        return self._decode(token, "access")
     
     def decode_refresh_token(self, token: str) -> Dict[str, Any]:
         """Декодирование refresh токена"""
-        try:
-            payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
-            
-            # Проверяем тип токена
-            if payload.get("type") != "refresh":
-                raise JWTError("Invalid token type")
-            
-            return payload
-        except JWTError as e:
-            raise JWTError(f"Invalid refresh token: {e}")
+        return self._decode(token, "refresh")
     
     def verify_token(self, token: str) -> bool:
-        """Проверка валидности токена"""
-        try:
-            jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
-            return True
-        except JWTError:
-            return False
+        """Проверка валидности токена (access или refresh)"""
+        for token_type in ("access", "refresh"):
+            try:
+                self._decode(token, token_type)
+                return True
+            except InvalidTokenError:
+                continue
+        return False
+
+
+def hash_token(token: str) -> str:
+    """SHA-256 (hex) от токена - ключ сессии в user_sessions"""
+    return hashlib.sha256(token.encode()).hexdigest()
 
 
 class PasswordManager:
@@ -129,68 +163,157 @@ class PasswordManager:
 
 
 class TelegramDataValidator:
-    """Валидатор данных от Telegram Mini App"""
+    """
+    Валидатор init_data от Telegram Mini App
+    
+    Секретный ключ WebAppData вычисляется один раз при создании валидатора.
+    Уже проверенные payload'ы хранятся в ограниченном TTL-кэше по hash до конца
+    их срока жизни (auth_date + max_age_seconds): повтор того же init_data
+    принимается без пересчета HMAC, а при reject_replays=True - отклоняется.
+    https://core.telegram.org/bots/webapps#validating-data-received-via-the-mini-app
+    """
     
-    def __init__(self, bot_token: str):
+    # Допустимое расхождение часов, если auth_date немного в будущем
+    CLOCK_SKEW_SECONDS = 60
+    
+    def __init__(
+        self,
+        bot_token: str,
+        max_age_seconds: int = 3600,
+        replay_cache_size: int = 10000,
+        reject_replays: bool = False,
+        clock: Callable[[], float] = time.time
+    ):
         self.bot_token = bot_token
+        self.max_age_seconds = max_age_seconds
+        self.replay_cache_size = replay_cache_size
+        self.reject_replays = reject_replays
+        self._clock = clock
+        self._secret_key = hmac.new(
+            b"WebAppData",
+            bot_token.encode(),
+            hashlib.sha256
+        ).digest() if bot_token else None
+        # hash -> (expires_at, init_data, result)
+        self._seen: "OrderedDict[str, Tuple[float, str, Dict[str, Any]]]" = OrderedDict()
+        self.stats = {
+            "validated": 0,
+            "cache_hits": 0,
+            "replays_rejected": 0,
+            "rejected": 0
+        }
+    
+    @staticmethod
+    def _split_pairs(init_data: str) -> Dict[str, str]:
+        """Разбор query string за один проход (значения еще не декодированы)"""
+        pairs = {}
+        for chunk in init_data.split('&'):
+            key, sep, value = chunk.partition('=')
+            if sep and value and key not in pairs:
+                pairs[key] = value
+        return pairs
+    
+    def _reject(self, reason: str) -> None:
+        self.stats["rejected"] += 1
+        print(f"❌ Telegram validation failed: {reason}")
+        return None
+    
+    def _remember(self, received_hash: str, init_data: str, expires_at: float, result: Dict[str, Any]):
+        """Сохранение проверенного payload с вытеснением устаревших и лишних записей"""
+        now = self._clock()
+        while self._seen:
+            oldest_expires_at = next(iter(self._seen.values()))[0]
+            if oldest_expires_at > now and len(self._seen) < self.replay_cache_size:
+                break
+            self._seen.popitem(last=False)
+        self._seen[received_hash] = (expires_at, init_data, result)
     
     def validate_init_data(self, init_data: str) -> Optional[Dict[str, Any]]:
         """
         Валидация init_data от Telegram Mini App
-        https://core.telegram.org/bots/webapps#validating-data-received-via-the-mini-app
+        
+        Returns:
+            Проверенные данные (user, auth_date, start_param, ...) или None
         """
-        try:
-            # Парсим данные
-            parsed_data = urllib.parse.parse_qs(init_data)
-            
-            # Извлекаем hash
-            received_hash = parsed_data.get('hash', [None])[0]
-            if not received_hash:
-                return None
-            
-            # Создаем строку для проверки
-            check_string = '\n'.join([
-                f"{key}={value[0]}" 
-                for key, value in sorted(parsed_data.items()) 
-                if key != 'hash'
-            ])
-            
-            # Создаем секретный ключ
-            secret_key = hmac.new(
-                b"WebAppData", 
-                self.bot_token.encode(), 
-                hashlib.sha256
-            ).digest()
-            
-            # Вычисляем hash
-            calculated_hash = hmac.new(
-                secret_key,
-                check_string.encode(),
-                hashlib.sha256
-            ).hexdigest()
-            
-            # Проверяем hash
-            if not hmac.compare_digest(received_hash, calculated_hash):
-                return None
-            
-            # Парсим user данные
-            user_data = None
-            if 'user' in parsed_data:
-                try:
-                    user_data = json.loads(parsed_data['user'][0])
-                except json.JSONDecodeError:
+        if not self._secret_key:
+            return self._reject("bot token not configured")
+        
+        raw_pairs = self._split_pairs(init_data)
+        received_hash = raw_pairs.pop('hash', None)
+        if not received_hash:
+            return self._reject("no hash provided")
+        
+        # Быстрый путь: этот payload уже проверялся и еще не истек
+        cached = self._seen.get(received_hash)
+        if cached is not None:
+            expires_at, cached_init_data, result = cached
+            if expires_at > self._clock() and hmac.compare_digest(cached_init_data, init_data):
+                if self.reject_replays:
+                    self.stats["replays_rejected"] += 1
                     return None
-            
-            return {
-                'user': user_data,
-                'auth_date': parsed_data.get('auth_date', [None])[0],
-                'start_param': parsed_data.get('start_param', [None])[0],
-                'query_id': parsed_data.get('query_id', [None])[0]
-            }
-            
-        except Exception as e:
-            print(f"Error validating Telegram data: {e}")
-            return None
+                self.stats["cache_hits"] += 1
+                return dict(result)
+        
+        values = {key: urllib.parse.unquote_plus(value) for key, value in raw_pairs.items()}
+        check_string = '\n'.join(f"{key}={values[key]}" for key in sorted(values))
+        calculated_hash = hmac.new(
+            self._secret_key,
+            check_string.encode(),
+            hashlib.sha256
+        ).hexdigest()
+        
+        if not hmac.compare_digest(received_hash, calculated_hash):
+            return self._reject("hash mismatch")
+        
+        # Проверяем свежесть данных
+        try:
+            auth_timestamp = int(values['auth_date'])
+        except (KeyError, ValueError):
+            return self._reject("invalid auth_date")
+        
+        now = self._clock()
+        age = now - auth_timestamp
+        if age > self.max_age_seconds or age < -self.CLOCK_SKEW_SECONDS:
+            return self._reject("data too old")
+        
+        # Парсим данные пользователя
+        try:
+            user_data = json.loads(values.get('user') or 'null')
+        except json.JSONDecodeError:
+            return self._reject("invalid user data JSON")
+        
+        if not isinstance(user_data, dict) or not user_data.get('id'):
+            return self._reject("no user data")
+        
+        result = {
+            'user': user_data,
+            'auth_date': values['auth_date'],
+            'start_param': values.get('start_param'),
+            'query_id': values.get('query_id'),
+            'chat_type': values.get('chat_type'),
+            'chat_instance': values.get('chat_instance')
+        }
+        
+        self.stats["validated"] += 1
+        self._remember(received_hash, init_data, auth_timestamp + self.max_age_seconds, result)
+        return dict(result)
+
+
+_telegram_validators: Dict[str, TelegramDataValidator] = {}
+
+
+def get_telegram_validator(bot_token: str) -> TelegramDataValidator:
+    """Общий валидатор на bot token: секрет и кэш повторов живут весь процесс"""
+    validator = _telegram_validators.get(bot_token)
+    if validator is None:
+        validator = TelegramDataValidator(
+            bot_token,
+            max_age_seconds=settings.TELEGRAM_INIT_DATA_MAX_AGE_SECONDS,
+            replay_cache_size=settings.TELEGRAM_REPLAY_CACHE_SIZE,
+            reject_replays=settings.TELEGRAM_REJECT_REPLAYS
+        )
+        _telegram_validators[bot_token] = validator
+    return validator
 
 
 class SecurityHeaders:
@@ -211,12 +334,12 @@ class SecurityHeaders:
 
 # Глобальные экземпляры
 jwt_manager = JWTManager(
-    secret_key=settings.JWT_SECRET_KEY,
-    algorithm=settings.JWT_ALGORITHM,
+    key_ring,
+    issuer=settings.JWT_ISSUER,
     access_token_expire_minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES,
     refresh_token_expire_days=settings.REFRESH_TOKEN_EXPIRE_DAYS
 )
 
 password_manager = PasswordManager()
 
-telegram_validator = TelegramDataValidator(settings.TELEGRAM_BOT_TOKEN or "")
\ No newline at end of file
+telegram_validator = get_telegram_validator(settings.TELEGRAM_BOT_TOKEN or "")
\ No newline at end of file
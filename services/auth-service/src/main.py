@@ -2,7 +2,7 @@
 Простая версия Auth Service для тестирования с Python 3.13
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 import logging
@@ -21,9 +21,38 @@ async def lifespan(app: FastAPI):
     # Startup
     try:
         print("🚀 Starting Auth Service...")
-        from .core.database import connect_database, create_tables
+        # Ключи подписи JWT: чтение/создание в JWT_KEYS_DIR (при импорте ничего не делается)
+        from .core.keys import key_ring
+        key_ring.load()
+        print(f"✅ JWT signing key {key_ring.active.kid} ({key_ring.active.algorithm})")
+        
+        # Схема создается миграциями: alembic upgrade head (см. Dockerfile)
+        from .core.database import connect_database
         await connect_database()
-        await create_tables()
+        
+        from .core.database import database
+        from .core.config import settings
+        from .core.rate_limit import login_limiter
+        restored = await login_limiter.load_lockouts(database)
+        login_limiter.start_flusher(database, settings.LOCKOUT_FLUSH_INTERVAL_SECONDS)
+        print(f"✅ Login limiter started ({restored} active lockouts restored)")
+        
+        from .services.audit import audit_writer
+        from .services.sweeper import expiry_sweeper
+        audit_writer.start()
+        expiry_sweeper.start()
+        
+        # RabbitMQ: сброс кэша пользователей между воркерами и события user.updated
+        from .services.rabbitmq import RabbitMQManager
+        from .services.user_cache import user_cache
+        rabbitmq = RabbitMQManager(settings.RABBITMQ_URL)
+        try:
+            await rabbitmq.connect()
+            await user_cache.attach(rabbitmq)
+            app.state.rabbitmq = rabbitmq
+        except Exception as e:
+            print(f"⚠️ RabbitMQ unavailable, user cache invalidation is local only: {e}")
+        
         print("✅ Auth Service startup completed")
         yield
     except Exception as e:
@@ -32,7 +61,17 @@ async def lifespan(app: FastAPI):
     finally:
         # Shutdown
         try:
-            from .core.database import disconnect_database
+            from .core.database import database, disconnect_database
+            from .core.rate_limit import login_limiter
+            from .services.audit import audit_writer
+            from .services.google import google_jwks
+            from .services.sweeper import expiry_sweeper
+            await expiry_sweeper.close()
+            await audit_writer.close()
+            if getattr(app.state, "rabbitmq", None):
+                await app.state.rabbitmq.close()
+            await login_limiter.close(database)
+            await google_jwks.close()
             await disconnect_database()
             print("✅ Auth Service shutdown completed")
         except Exception as e:
@@ -101,6 +140,30 @@ async def readiness_check():
         }
     }
 
+@app.get("/metrics")
+async def metrics():
+    """Счетчики фоновых подсистем (аудит, лимитер входа)"""
+    from .core.rate_limit import login_limiter
+    from .services.audit import audit_writer
+    from .services.sweeper import expiry_sweeper
+    from .services.user_cache import user_cache
+    rabbitmq = getattr(app.state, "rabbitmq", None)
+    return {
+        "audit": {**audit_writer.stats, "pending": audit_writer.pending},
+        "login_limiter": login_limiter.stats,
+        "expiry_sweeper": expiry_sweeper.stats,
+        "user_cache": {**user_cache.stats, "size": len(user_cache)},
+        "consumers": rabbitmq.consumer_metrics() if rabbitmq else {}
+    }
+
+@app.get("/.well-known/jwks.json")
+async def jwks(response: Response):
+    """Открытые ключи подписи JWT для локальной проверки токенов другими сервисами"""
+    from .core.config import settings
+    from .core.keys import key_ring
+    response.headers["Cache-Control"] = f"public, max-age={settings.JWKS_MAX_AGE_SECONDS}"
+    return key_ring.jwks()
+
 @app.get("/health/live")
 async def liveness_check():
     """Liveness check endpoint"""
@@ -47,6 +47,8 @@ users_table = sa.Table(
     Column("role", String(20), nullable=False, default=UserRole.REGULAR_USER.value),
     Column("is_active", Boolean, default=True),
     Column("is_verified", Boolean, default=False),
+    # Увеличивается при отзыве всех сессий - токены со старой версией недействительны
+    Column("token_version", Integer, nullable=False, server_default="0"),
     Column("language_code", String(10), default="ru"),
     Column("timezone", String(50), default="UTC"),
     Column("created_at", DateTime(timezone=True), server_default=func.now()),
@@ -89,8 +91,9 @@ user_sessions_table = sa.Table(
     metadata,
     Column("id", UUID(as_uuid=True), primary_key=True, default=uuid.uuid4),
     Column("user_id", UUID(as_uuid=True), sa.ForeignKey("users.id", ondelete="CASCADE"), nullable=False),
-    Column("access_token_hash", String(255), nullable=False),
-    Column("refresh_token_hash", String(255), nullable=True),
+    # SHA-256 (hex) от токенов; сами токены в БД не хранятся
+    Column("access_token_hash", String(64), nullable=False),
+    Column("refresh_token_hash", String(64), nullable=False),
     Column("device_info", JSONB, nullable=True),  # Информация об устройстве
     Column("ip_address", INET, nullable=True),
     Column("user_agent", Text, nullable=True),
@@ -98,15 +101,18 @@ user_sessions_table = sa.Table(
     Column("expires_at", DateTime(timezone=True), nullable=False),
     Column("created_at", DateTime(timezone=True), server_default=func.now()),
     Column("last_activity", DateTime(timezone=True), server_default=func.now()),
-    Column("session_token", String(255), unique=True, nullable=True),
-    Column("refresh_token", String(255), nullable=True),
     Column("updated_at", DateTime(timezone=True), server_default=func.now()),
     Column("last_activity_at", DateTime(timezone=True), server_default=func.now()),
     
     # Индексы
     Index("idx_user_sessions_user_id", "user_id"),
-    Index("idx_user_sessions_token", "session_token"),
-    Index("idx_user_sessions_refresh_token", "refresh_token"),
+    Index("uq_user_sessions_refresh_token_hash", "refresh_token_hash", unique=True),
+    # Вытеснение самых старых активных сессий при превышении лимита
+    Index(
+        "idx_user_sessions_user_active_created",
+        "user_id", sa.text("created_at DESC"),
+        postgresql_where=sa.text("status = 'active'")
+    ),
     Index("idx_user_sessions_expires_at", "expires_at"),
     Index("idx_user_sessions_status", "status"),
 )
@@ -5,7 +5,7 @@ Pydantic модели для Auth Service
 from datetime import datetime
 from typing import Optional, Dict, Any, List
 from uuid import UUID
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from enum import Enum
 
 from .database import UserRole, AuthProvider, SessionStatus
@@ -104,6 +104,27 @@ class UserResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class UserPublicProfile(BaseModel):
+    """Публичный профиль пользователя (для других сервисов)"""
+    id: UUID
+    username: str
+    display_name: str
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    avatar_url: Optional[str] = None
+    is_active: bool
+
+
+class UserBatchRequest(BaseModel):
+    """Запрос профилей нескольких пользователей"""
+    user_ids: List[UUID] = Field(..., min_length=1, max_length=500)
+
+
+class UserBatchResponse(BaseModel):
+    """Профили пользователей; несуществующие id перечислены в missing"""
+    users: List[UserPublicProfile]
+    missing: List[UUID] = []
+
 class UserProfile(BaseModel):
     """Расширенный профиль пользователя"""
     providers: List["AuthProviderResponse"] = []
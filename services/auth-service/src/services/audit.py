@@ -0,0 +1,301 @@
+"""
+Пакетная запись аудита аутентификации
+
+События auth_logs и отметки last_login_at копятся в памяти и пишутся в БД
+пачками: один INSERT на все события и один UPDATE ... FROM на все отметки
+входа. Запись запускается по размеру буфера или по таймеру, так что запросы
+/login, /telegram, /google и т.д. не ждут двух одиночных записей в БД.
+
+Буфер ограничен: при переполнении новые события отбрасываются и учитываются
+в stats["dropped_events"]. При остановке сервиса буфер сбрасывается полностью.
+
+Ошибки записи делятся на два вида:
+- временные (соединение, таймаут, перегрузка БД) - пачка возвращается в
+  начало буфера и пишется при следующем сбросе;
+- ошибки данных (SQLSTATE 22xxx/23xxx: например, ip_address, который не
+  приводится к inet) - пачка пишется построчно, плохие строки уходят в
+  dead-letter (stats["dead_letter_*"] и последние строки в dead_letters),
+  чтобы одна строка не блокировала весь буфер.
+"""
+
+import asyncio
+import json
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from uuid import UUID, uuid4
+
+import databases
+
+from ..core.config import settings
+from ..core.database import database
+
+
+INSERT_AUTH_LOGS_SQL = """
+INSERT INTO auth_logs (
+    id, user_id, action, provider, ip_address, user_agent,
+    success, error_message, metadata, created_at
+)
+SELECT s.id, s.user_id, s.action, s.provider, CAST(s.ip_address AS inet), s.user_agent,
+       s.success, s.error_message, s.metadata, s.created_at
+FROM jsonb_to_recordset(CAST(:rows AS jsonb)) AS s(
+    id uuid, user_id uuid, action varchar, provider varchar, ip_address text,
+    user_agent text, success boolean, error_message text, metadata jsonb,
+    created_at timestamptz
+)
+"""
+
+# Последние строки, отброшенные из-за ошибок данных (для разбора по /metrics и логам)
+DEAD_LETTER_SIZE = 100
+
+# Пользователь мог быть удален, пока отметка лежала в буфере - UPDATE ее просто пропустит
+TOUCH_LAST_LOGIN_SQL = """
+UPDATE users u
+SET last_login_at = s.last_login_at,
+    updated_at = NOW()
+FROM jsonb_to_recordset(CAST(:rows AS jsonb)) AS s(user_id uuid, last_login_at timestamptz)
+WHERE u.id = s.user_id
+  AND (u.last_login_at IS NULL OR u.last_login_at < s.last_login_at)
+"""
+
+
+def is_data_error(error: Exception) -> bool:
+    """Ошибка в самих данных (классы SQLSTATE 22 и 23): повтор той же строки не поможет"""
+    sqlstate = getattr(error, "sqlstate", None)
+    return isinstance(sqlstate, str) and sqlstate[:2] in ("22", "23")
+
+
+class AuthAuditWriter:
+    """Буфер событий аутентификации с фоновой пакетной записью"""
+
+    def __init__(
+        self,
+        db: databases.Database,
+        batch_size: int = 500,
+        flush_interval_seconds: float = 1.0,
+        max_buffer_size: int = 10_000
+    ):
+        self.db = db
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_buffer_size = max_buffer_size
+        self._events: List[Dict[str, Any]] = []
+        # user_id -> время последнего входа; повторные входы схлопываются
+        self._last_logins: Dict[str, str] = {}
+        self._flush_requested = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        # (вид, строка, ошибка) последних отброшенных строк
+        self.dead_letters: Deque[Tuple[str, Dict[str, Any], str]] = deque(maxlen=DEAD_LETTER_SIZE)
+        self.stats = {
+            "enqueued_events": 0,
+            "written_events": 0,
+            "written_last_logins": 0,
+            "dropped_events": 0,
+            "dropped_last_logins": 0,
+            "dead_letter_events": 0,
+            "dead_letter_last_logins": 0,
+            "flushes": 0,
+            "failed_flushes": 0,
+        }
+
+    @property
+    def pending(self) -> int:
+        return len(self._events) + len(self._last_logins)
+
+    def log_event(
+        self,
+        action: str,
+        user_id: Optional[UUID] = None,
+        provider: Optional[str] = None,
+        ip_address: Optional[str] = None,
+        user_agent: Optional[str] = None,
+        success: bool = True,
+        error_message: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None
+    ):
+        """Поставить событие в очередь на запись (без обращения к БД)"""
+        if len(self._events) >= self.max_buffer_size:
+            self.stats["dropped_events"] += 1
+            return
+
+        self._events.append({
+            "id": str(uuid4()),
+            "user_id": str(user_id) if user_id else None,
+            "action": action,
+            "provider": provider,
+            "ip_address": ip_address,
+            "user_agent": user_agent,
+            "success": success,
+            "error_message": error_message,
+            "metadata": metadata,
+            "created_at": datetime.now(timezone.utc).isoformat(),
+        })
+        self.stats["enqueued_events"] += 1
+        self._maybe_request_flush()
+
+    def touch_last_login(self, user_id: UUID):
+        """Поставить в очередь обновление users.last_login_at"""
+        key = str(user_id)
+        if key not in self._last_logins and len(self._last_logins) >= self.max_buffer_size:
+            self.stats["dropped_last_logins"] += 1
+            return
+
+        self._last_logins[key] = datetime.now(timezone.utc).isoformat()
+        self._maybe_request_flush()
+
+    def _maybe_request_flush(self):
+        if len(self._events) >= self.batch_size or len(self._last_logins) >= self.batch_size:
+            self._flush_requested.set()
+
+    async def flush(self) -> int:
+        """
+        Записать накопленные события и отметки входа
+
+        Returns:
+            Количество записанных элементов
+        """
+        async with self._flush_lock:
+            written = 0
+            while self._events or self._last_logins:
+                events = self._events[:self.batch_size]
+                del self._events[:len(events)]
+                touched = list(self._last_logins.items())[:self.batch_size]
+                for user_id, _ in touched:
+                    del self._last_logins[user_id]
+
+                try:
+                    await self._write(events, touched)
+                except Exception as e:
+                    self.stats["failed_flushes"] += 1
+                    if not is_data_error(e):
+                        self._requeue(events, touched)
+                        raise
+                    events, touched = await self._write_row_by_row(events, touched)
+
+                self.stats["flushes"] += 1
+                self.stats["written_events"] += len(events)
+                self.stats["written_last_logins"] += len(touched)
+                written += len(events) + len(touched)
+
+            return written
+
+    async def _write(self, events: List[Dict[str, Any]], touched: List[tuple]):
+        """Пачка событий и отметок входа одной транзакцией"""
+        async with self.db.transaction():
+            if events:
+                await self.db.execute(
+                    query=INSERT_AUTH_LOGS_SQL,
+                    values={"rows": json.dumps(events)}
+                )
+            if touched:
+                await self.db.execute(
+                    query=TOUCH_LAST_LOGIN_SQL,
+                    values={"rows": json.dumps([
+                        {"user_id": user_id, "last_login_at": at}
+                        for user_id, at in touched
+                    ])}
+                )
+
+    async def _write_row_by_row(
+        self,
+        events: List[Dict[str, Any]],
+        touched: List[tuple]
+    ) -> Tuple[List[Dict[str, Any]], List[tuple]]:
+        """
+        Построчная запись пачки с ошибкой данных
+
+        Строки с ошибкой данных уходят в dead-letter; при временной ошибке
+        незаписанный остаток возвращается в буфер и ошибка пробрасывается.
+
+        Returns:
+            Записанные события и отметки входа
+        """
+        written_events = []
+        for number, event in enumerate(events):
+            try:
+                await self._write([event], [])
+            except Exception as e:
+                if not is_data_error(e):
+                    self._requeue(events[number:], touched)
+                    raise
+                self._dead_letter("event", event, e)
+                continue
+            written_events.append(event)
+
+        written_touched = []
+        for number, touch in enumerate(touched):
+            try:
+                await self._write([], [touch])
+            except Exception as e:
+                if not is_data_error(e):
+                    self._requeue([], touched[number:])
+                    raise
+                self._dead_letter("last_login", {"user_id": touch[0], "last_login_at": touch[1]}, e)
+                continue
+            written_touched.append(touch)
+
+        return written_events, written_touched
+
+    def _dead_letter(self, kind: str, row: Dict[str, Any], error: Exception):
+        self.stats["dead_letter_events" if kind == "event" else "dead_letter_last_logins"] += 1
+        self.dead_letters.append((kind, row, str(error)))
+        print(f"⚠️ Auth audit {kind} dropped to dead-letter: {error}")
+
+    def _requeue(self, events: List[Dict[str, Any]], touched: List[tuple]):
+        """Вернуть пачку в буфер после ошибки записи, не превышая лимит"""
+        room = max(self.max_buffer_size - len(self._events), 0)
+        self._events[:0] = events[:room]
+        self.stats["dropped_events"] += len(events) - min(len(events), room)
+
+        for user_id, at in touched:
+            if user_id in self._last_logins:
+                continue
+            if len(self._last_logins) >= self.max_buffer_size:
+                self.stats["dropped_last_logins"] += 1
+                continue
+            self._last_logins[user_id] = at
+
+    def start(self):
+        """Запуск фоновой записи"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._flush_requested.wait(), timeout=self.flush_interval_seconds
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"⚠️ Failed to flush auth audit log: {e}")
+
+    async def close(self):
+        """Остановка фоновой записи и сброс оставшегося буфера"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        try:
+            written = await self.flush()
+            print(f"✅ Auth audit log drained ({written} records)")
+        except Exception as e:
+            print(f"❌ Failed to drain auth audit log, {self.pending} records lost: {e}")
+
+
+audit_writer = AuthAuditWriter(
+    database,
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_interval_seconds=settings.AUDIT_FLUSH_INTERVAL_SECONDS,
+    max_buffer_size=settings.AUDIT_MAX_BUFFER_SIZE
+)
@@ -5,30 +5,239 @@
 from typing import Optional, Dict, Any, List
 from datetime import datetime, timedelta
 from uuid import UUID, uuid4
+import asyncpg
 import databases
 import json
 
 from ..models.database import (
     users_table, auth_providers_table, user_sessions_table,
-    auth_logs_table, ip_restrictions_table, UserRole, AuthProvider, SessionStatus
+    UserRole, AuthProvider, SessionStatus
 )
 from ..models.schemas import UserCreate, UserResponse, SessionResponse
-from ..core.security import password_manager
+from ..core.security import password_manager, hash_token
 from ..core.config import settings
+from ..core.database import CompiledQuery
+from ..core.rate_limit import LoginRateLimiter, login_limiter
+from .audit import AuthAuditWriter, audit_writer
+from .user_cache import UserCache, user_cache
+
+
+# ==================== PROVIDER UPSERT QUERIES ====================
+#
+# Вход через провайдера выполняется одним выражением: запись auth_providers
+# вставляется первой (уникальность uq_provider_user разрешает гонку), пользователь
+# создается только из RETURNING этой вставки. FK проверяется в конце выражения,
+# поэтому порядок вставок внутри CTE допустим. Если провайдер уже есть,
+# возвращается существующий пользователь.
+
+TELEGRAM_UPSERT_SQL = """
+WITH new_provider AS (
+    INSERT INTO auth_providers (
+        id, user_id, provider, provider_user_id, provider_username,
+        provider_data, is_primary, created_at, updated_at
+    )
+    VALUES (
+        CAST(:provider_row_id AS uuid), CAST(:new_user_id AS uuid), :provider,
+        :provider_user_id, :provider_username, CAST(:provider_data AS jsonb),
+        TRUE, NOW(), NOW()
+    )
+    ON CONFLICT (provider, provider_user_id) DO NOTHING
+    RETURNING user_id
+),
+new_user AS (
+    INSERT INTO users (
+        id, username, first_name, last_name, language_code, timezone,
+        role, is_active, is_verified, created_at, updated_at
+    )
+    SELECT
+        np.user_id,
+        CASE WHEN EXISTS (SELECT 1 FROM users WHERE username = :username)
+             THEN :fallback_username ELSE :username END,
+        :first_name, :last_name, :language_code, 'UTC',
+        :role, TRUE, FALSE, NOW(), NOW()
+    FROM new_provider np
+    RETURNING *
+)
+SELECT * FROM new_user
+UNION ALL
+SELECT u.* FROM auth_providers p
+JOIN users u ON u.id = p.user_id
+WHERE p.provider = :provider
+  AND p.provider_user_id = :provider_user_id
+  AND NOT EXISTS (SELECT 1 FROM new_provider)
+"""
+
+# Для Google дополнительно: если пользователь с таким email уже есть,
+# провайдер привязывается к нему, новый пользователь не создается.
+GOOGLE_UPSERT_SQL = """
+WITH email_user AS (
+    SELECT id FROM users WHERE email = :email
+),
+new_provider AS (
+    INSERT INTO auth_providers (
+        id, user_id, provider, provider_user_id, provider_data,
+        is_primary, created_at, updated_at
+    )
+    SELECT
+        CAST(:provider_row_id AS uuid),
+        COALESCE((SELECT id FROM email_user), CAST(:new_user_id AS uuid)),
+        :provider, :provider_user_id, CAST(:provider_data AS jsonb),
+        NOT EXISTS (SELECT 1 FROM email_user), NOW(), NOW()
+    ON CONFLICT (provider, provider_user_id) DO NOTHING
+    RETURNING user_id
+),
+new_user AS (
+    INSERT INTO users (
+        id, username, email, first_name, last_name, avatar_url, language_code,
+        timezone, role, is_active, is_verified, created_at, updated_at
+    )
+    SELECT
+        np.user_id,
+        CASE WHEN EXISTS (SELECT 1 FROM users WHERE username = :username)
+             THEN :fallback_username ELSE :username END,
+        :email, :first_name, :last_name, :avatar_url, 'en',
+        'UTC', :role, TRUE, FALSE, NOW(), NOW()
+    FROM new_provider np
+    WHERE np.user_id = CAST(:new_user_id AS uuid)
+    RETURNING *
+)
+SELECT * FROM new_user
+UNION ALL
+SELECT u.* FROM new_provider np
+JOIN users u ON u.id = np.user_id
+WHERE np.user_id <> CAST(:new_user_id AS uuid)
+UNION ALL
+SELECT u.* FROM auth_providers p
+JOIN users u ON u.id = p.user_id
+WHERE p.provider = :provider
+  AND p.provider_user_id = :provider_user_id
+  AND NOT EXISTS (SELECT 1 FROM new_provider)
+"""
+
+
+# ==================== SESSION QUERIES ====================
+#
+# Сессия ищется по SHA-256 хешу refresh токена (уникальный индекс). Создание
+# сессии вместе с вытеснением лишних и ротация токенов - по одному выражению.
+
+CREATE_SESSION_SQL = """
+WITH evicted AS (
+    UPDATE user_sessions
+    SET status = 'revoked', updated_at = NOW()
+    WHERE id IN (
+        SELECT id FROM user_sessions
+        WHERE user_id = CAST(:user_id AS uuid) AND status = 'active' AND expires_at > NOW()
+        ORDER BY created_at DESC
+        OFFSET :keep
+    )
+)
+INSERT INTO user_sessions (
+    id, user_id, access_token_hash, refresh_token_hash, device_info,
+    ip_address, user_agent, status, expires_at,
+    created_at, updated_at, last_activity, last_activity_at
+)
+VALUES (
+    CAST(:session_id AS uuid), CAST(:user_id AS uuid), :access_token_hash, :refresh_token_hash,
+    CAST(:device_info AS jsonb), CAST(:ip_address AS inet), :user_agent, 'active', :expires_at,
+    NOW(), NOW(), NOW(), NOW()
+)
+RETURNING *
+"""
+
+USER_PROFILES_SQL = """
+SELECT id, username, first_name, last_name, avatar_url, is_active,
+       COALESCE(NULLIF(TRIM(CONCAT_WS(' ', first_name, last_name)), ''), username) AS display_name
+FROM users
+WHERE id = ANY(CAST(:user_ids AS uuid[]))
+"""
+
+REVOKE_ALL_SESSIONS_SQL = """
+WITH revoked AS (
+    UPDATE user_sessions
+    SET status = 'revoked', updated_at = NOW()
+    WHERE user_id = CAST(:user_id AS uuid)
+)
+UPDATE users
+SET token_version = token_version + 1, updated_at = NOW()
+WHERE id = CAST(:user_id AS uuid)
+"""
+
+ROTATE_SESSION_SQL = """
+WITH rotated AS (
+    UPDATE user_sessions s
+    SET access_token_hash = :access_token_hash,
+        refresh_token_hash = :refresh_token_hash,
+        updated_at = NOW(),
+        last_activity_at = NOW()
+    WHERE s.refresh_token_hash = :old_refresh_token_hash
+      AND s.user_id = CAST(:user_id AS uuid)
+      AND s.status = 'active'
+      AND s.expires_at > NOW()
+      AND EXISTS (SELECT 1 FROM users WHERE id = s.user_id AND is_active)
+    RETURNING s.id AS session_id, s.user_id
+)
+SELECT u.*, r.session_id
+FROM rotated r
+JOIN users u ON u.id = r.user_id
+"""
+
+
+# ==================== HOT QUERIES ====================
+#
+# Запросы на каждый вход/проверку токена/refresh компилируются один раз.
+
+GET_USER_QUERY = CompiledQuery(
+    "SELECT * FROM users WHERE id = :user_id",
+    json_columns=("metadata",)
+)
+
+USER_BY_PROVIDER_QUERY = CompiledQuery("""
+SELECT u.*
+FROM auth_providers p
+JOIN users u ON u.id = p.user_id
+WHERE p.provider = :provider AND p.provider_user_id = :provider_user_id
+""", json_columns=("metadata",))
+
+ROTATE_SESSION_QUERY = CompiledQuery(ROTATE_SESSION_SQL, json_columns=("metadata",))
 
 
 class AuthService:
     """Основной сервис аутентификации и управления пользователями"""
     
-    def __init__(self, database: databases.Database):
+    def __init__(
+        self,
+        database: databases.Database,
+        limiter: Optional[LoginRateLimiter] = None,
+        audit: Optional[AuthAuditWriter] = None,
+        cache: Optional[UserCache] = None
+    ):
         self.db = database
+        self.limiter = limiter or login_limiter
+        self.audit = audit or audit_writer
+        self.user_cache = cache or user_cache
     
     # ==================== USER MANAGEMENT ====================
     
     async def get_user(self, user_id: UUID) -> Optional[Dict[str, Any]]:
         """Получение пользователя по ID"""
-        query = users_table.select().where(users_table.c.id == user_id)
-        return await self.db.fetch_one(query)
+        return await GET_USER_QUERY.fetch_one(self.db, {"user_id": user_id})
+    
+    async def get_user_cached(self, user_id: UUID) -> Optional[Dict[str, Any]]:
+        """Получение пользователя по ID через кэш (для проверки токена на каждом запросе)"""
+        user = self.user_cache.get(user_id)
+        if user is None:
+            user = await self.get_user(user_id)
+            if user is None:
+                return None
+            self.user_cache.put(user)
+        return user
+    
+    async def get_user_profiles(self, user_ids: List[UUID]) -> List[Dict[str, Any]]:
+        """Публичные профили нескольких пользователей одним запросом по PK"""
+        return await self.db.fetch_all(
+            query=USER_PROFILES_SQL,
+            values={"user_ids": list({str(user_id) for user_id in user_ids})}
+        )
     
     async def get_user_by_username(self, username: str) -> Optional[Dict[str, Any]]:
         """Получение пользователя по username"""
@@ -120,128 +329,100 @@ class AuthService:
         ).values(**update_data)
         
         await self.db.execute(query)
-        return await self.get_user(user_id)
+        user = await self.get_user(user_id)
+        if user is not None:
+            await self.user_cache.publish_updated(user)
+        return user
     
     async def update_last_login(self, user_id: UUID):
-        """Обновление времени последнего входа"""
-        query = users_table.update().where(
-            users_table.c.id == user_id
-        ).values(
-            last_login_at=datetime.utcnow(),
-            updated_at=datetime.utcnow()
-        )
-        
-        await self.db.execute(query)
+        """Обновление времени последнего входа (пишется пакетно через audit)"""
+        self.audit.touch_last_login(user_id)
     
     # ==================== AUTH PROVIDERS ====================
     
+    async def _upsert_provider_user(self, query: str, values: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Выполнение upsert-запроса провайдера за один round-trip
+        
+        Запрос сначала вставляет запись провайдера (ON CONFLICT DO NOTHING по
+        uq_provider_user), а пользователя создает только если вставка прошла.
+        Поэтому два параллельных первых входа не создадут дубликат аккаунта.
+        При гонке за username/email запрос повторяется один раз - к этому моменту
+        конфликтующая строка уже закоммичена и CASE выберет запасной username.
+        """
+        for attempt in range(2):
+            try:
+                return await self.db.fetch_one(query=query, values=values)
+            except asyncpg.exceptions.UniqueViolationError:
+                if attempt:
+                    raise
+        return None
+    
+    async def get_user_by_provider(self, provider: AuthProvider, provider_user_id: str) -> Optional[Dict[str, Any]]:
+        """Получение пользователя по идентификатору у провайдера"""
+        return await USER_BY_PROVIDER_QUERY.fetch_one(self.db, {
+            "provider": provider.value,
+            "provider_user_id": str(provider_user_id),
+        })
+    
     async def get_or_create_telegram_user(self, telegram_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Получение или создание пользователя через Telegram"""
+        """Получение или создание пользователя через Telegram (один запрос к БД)"""
         telegram_user = telegram_data.get('user', {})
-        telegram_id = str(telegram_user.get('id'))
+        telegram_id = telegram_user.get('id')
         
         if not telegram_id:
             raise ValueError("Invalid Telegram user data")
         
-        # Ищем существующего пользователя по Telegram ID
-        query = auth_providers_table.select().where(
-            (auth_providers_table.c.provider == AuthProvider.TELEGRAM.value) &
-            (auth_providers_table.c.provider_user_id == telegram_id)
-        )
-        provider_record = await self.db.fetch_one(query)
-        
-        if provider_record:
-            # Пользователь уже существует
-            return await self.get_user(provider_record['user_id'])
-        
-        # Создаем нового пользователя
-        username = (
-            telegram_user.get('username') or 
-            f"user_{telegram_id}" or
-            f"tg_{telegram_id}"
-        )
-        
-        # Проверяем уникальность username
-        existing_user = await self.get_user_by_username(username)
-        if existing_user:
-            username = f"tg_{telegram_id}_{uuid4().hex[:8]}"
-        
-        user_data = UserCreate(
-            username=username,
-            first_name=telegram_user.get('first_name'),
-            last_name=telegram_user.get('last_name'),
-            language_code=telegram_user.get('language_code', 'ru')
-        )
-        
-        user = await self.create_user(user_data)
-        
-        # Создаем запись провайдера
-        await self.create_auth_provider(
-            user_id=user['id'],
-            provider=AuthProvider.TELEGRAM,
-            provider_user_id=telegram_id,
-            provider_username=telegram_user.get('username'),
-            provider_data=telegram_data,
-            is_primary=True
-        )
+        telegram_id = str(telegram_id)
+        
+        user = await self._upsert_provider_user(TELEGRAM_UPSERT_SQL, {
+            "provider": AuthProvider.TELEGRAM.value,
+            "provider_user_id": telegram_id,
+            "provider_row_id": str(uuid4()),
+            "new_user_id": str(uuid4()),
+            "provider_username": telegram_user.get('username'),
+            "provider_data": json.dumps(telegram_data, default=str),
+            "username": telegram_user.get('username') or f"user_{telegram_id}",
+            "fallback_username": f"tg_{telegram_id}_{uuid4().hex[:8]}",
+            "first_name": telegram_user.get('first_name'),
+            "last_name": telegram_user.get('last_name'),
+            "language_code": telegram_user.get('language_code', 'ru'),
+            "role": UserRole.REGULAR_USER.value,
+        })
+        
+        if user is None:
+            # Параллельный первый вход закоммитил провайдера после снимка нашего запроса
+            user = await self.get_user_by_provider(AuthProvider.TELEGRAM, telegram_id)
         
         return user
     
     async def get_or_create_google_user(self, google_data: Dict[str, Any]) -> Dict[str, Any]:
-        """Получение или создание пользователя через Google"""
+        """Получение или создание пользователя через Google (один запрос к БД)"""
         google_id = google_data.get('sub')
         email = google_data.get('email')
         
         if not google_id or not email:
             raise ValueError("Invalid Google user data")
         
-        # Ищем существующего пользователя по Google ID
-        query = auth_providers_table.select().where(
-            (auth_providers_table.c.provider == AuthProvider.GOOGLE.value) &
-            (auth_providers_table.c.provider_user_id == google_id)
-        )
-        provider_record = await self.db.fetch_one(query)
-        
-        if provider_record:
-            return await self.get_user(provider_record['user_id'])
-        
-        # Ищем по email
-        existing_user = await self.get_user_by_email(email)
-        if existing_user:
-            # Добавляем Google провайдер к существующему пользователю
-            await self.create_auth_provider(
-                user_id=existing_user['id'],
-                provider=AuthProvider.GOOGLE,
-                provider_user_id=google_id,
-                provider_data=google_data
-            )
-            return existing_user
-        
-        # Создаем нового пользователя
         username = email.split('@')[0]
-        existing_username = await self.get_user_by_username(username)
-        if existing_username:
-            username = f"{username}_{uuid4().hex[:8]}"
         
-        user_data = UserCreate(
-            username=username,
-            email=email,
-            first_name=google_data.get('given_name'),
-            last_name=google_data.get('family_name'),
-            avatar_url=google_data.get('picture'),
-            language_code='en'
-        )
-        
-        user = await self.create_user(user_data)
-        
-        # Создаем запись провайдера
-        await self.create_auth_provider(
-            user_id=user['id'],
-            provider=AuthProvider.GOOGLE,
-            provider_user_id=google_id,
-            provider_data=google_data,
-            is_primary=True
-        )
+        user = await self._upsert_provider_user(GOOGLE_UPSERT_SQL, {
+            "provider": AuthProvider.GOOGLE.value,
+            "provider_user_id": google_id,
+            "provider_row_id": str(uuid4()),
+            "new_user_id": str(uuid4()),
+            "provider_data": json.dumps(google_data, default=str),
+            "email": email,
+            "username": username,
+            "fallback_username": f"{username}_{uuid4().hex[:8]}",
+            "first_name": google_data.get('given_name'),
+            "last_name": google_data.get('family_name'),
+            "avatar_url": google_data.get('picture'),
+            "role": UserRole.REGULAR_USER.value,
+        })
+        
+        if user is None:
+            user = await self.get_user_by_provider(AuthProvider.GOOGLE, google_id)
         
         return user
     
@@ -278,39 +459,27 @@ class AuthService:
         refresh_token: str,
         ip_address: Optional[str] = None,
         user_agent: Optional[str] = None,
-        device_info: Optional[Dict[str, Any]] = None
+        device_info: Optional[Dict[str, Any]] = None,
+        session_id: Optional[UUID] = None
     ) -> Dict[str, Any]:
-        """Создание новой сессии пользователя"""
-        
-        # Проверяем количество активных сессий
-        active_sessions = await self.get_user_active_sessions(user_id)
-        if len(active_sessions) >= settings.MAX_ACTIVE_SESSIONS:
-            # Удаляем самую старую сессию
-            oldest_session = min(active_sessions, key=lambda s: s['created_at'])
-            await self.revoke_session(oldest_session['id'])
-        
-        session_id = uuid4()
-        expires_at = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
-        
-        query = user_sessions_table.insert().values(
-            id=session_id,
-            user_id=user_id,
-            access_token_hash=access_token,
-            refresh_token_hash=refresh_token,
-            session_token=access_token,
-            refresh_token=refresh_token,
-            device_info=device_info,
-            ip_address=ip_address,
-            user_agent=user_agent,
-            status=SessionStatus.ACTIVE.value,
-            expires_at=expires_at,
-            created_at=datetime.utcnow(),
-            updated_at=datetime.utcnow(),
-            last_activity_at=datetime.utcnow()
-        )
+        """
+        Создание новой сессии пользователя
         
-        await self.db.execute(query)
-        return await self.get_session(session_id)
+        Лишние активные сессии (сверх MAX_ACTIVE_SESSIONS) отзываются в том же
+        запросе по индексу (user_id, created_at DESC).
+        """
+        values = {
+            "session_id": str(session_id or uuid4()),
+            "user_id": str(user_id),
+            "access_token_hash": hash_token(access_token),
+            "refresh_token_hash": hash_token(refresh_token),
+            "device_info": json.dumps(device_info) if device_info is not None else None,
+            "ip_address": ip_address,
+            "user_agent": user_agent,
+            "expires_at": datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+            "keep": max(settings.MAX_ACTIVE_SESSIONS - 1, 0),
+        }
+        return await self.db.fetch_one(query=CREATE_SESSION_SQL, values=values)
     
     async def get_session(self, session_id: UUID) -> Optional[Dict[str, Any]]:
         """Получение сессии по ID"""
@@ -326,6 +495,27 @@ class AuthService:
         )
         return await self.db.fetch_all(query)
     
+    async def rotate_session(
+        self,
+        user_id: UUID,
+        old_refresh_token: str,
+        access_token: str,
+        refresh_token: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Ротация токенов сессии за один round-trip
+        
+        Сессия ищется по хешу старого refresh токена; при успехе возвращается
+        пользователь (и session_id). Повторное использование старого refresh
+        токена вернет None - его хеш уже заменен.
+        """
+        return await ROTATE_SESSION_QUERY.fetch_one(self.db, {
+            "user_id": str(user_id),
+            "old_refresh_token_hash": hash_token(old_refresh_token),
+            "access_token_hash": hash_token(access_token),
+            "refresh_token_hash": hash_token(refresh_token),
+        })
+    
     async def update_session_tokens(
         self,
         session_id: UUID,
@@ -336,8 +526,8 @@ class AuthService:
         query = user_sessions_table.update().where(
             user_sessions_table.c.id == session_id
         ).values(
-            session_token=access_token,
-            refresh_token=refresh_token,
+            access_token_hash=hash_token(access_token),
+            refresh_token_hash=hash_token(refresh_token),
             updated_at=datetime.utcnow(),
             last_activity_at=datetime.utcnow()
         )
@@ -356,15 +546,14 @@ class AuthService:
         await self.db.execute(query)
     
     async def revoke_all_user_sessions(self, user_id: UUID):
-        """Отзыв всех сессий пользователя"""
-        query = user_sessions_table.update().where(
-            user_sessions_table.c.user_id == user_id
-        ).values(
-            status=SessionStatus.REVOKED.value,
-            updated_at=datetime.utcnow()
-        )
+        """
+        Отзыв всех сессий пользователя
         
-        await self.db.execute(query)
+        token_version увеличивается в том же запросе, поэтому уже выданные
+        access токены перестают приниматься get_current_user.
+        """
+        await self.db.execute(query=REVOKE_ALL_SESSIONS_SQL, values={"user_id": str(user_id)})
+        await self.user_cache.invalidate(user_id, "sessions_revoked")
     
     # ==================== LOGGING ====================
     
@@ -379,99 +568,33 @@ class AuthService:
         error_message: Optional[str] = None,
         metadata: Optional[Dict[str, Any]] = None
     ):
-        """Логирование событий аутентификации"""
-        query = auth_logs_table.insert().values(
-            id=uuid4(),
-            user_id=user_id,
+        """Логирование событий аутентификации (пишется пакетно через audit)"""
+        self.audit.log_event(
             action=action,
+            user_id=user_id,
             provider=provider,
             ip_address=ip_address,
             user_agent=user_agent,
             success=success,
             error_message=error_message,
-            metadata=metadata,
-            created_at=datetime.utcnow()
+            metadata=metadata
         )
-        
-        await self.db.execute(query)
     
     # ==================== SECURITY ====================
     
-    async def check_ip_restrictions(self, ip_address: str) -> bool:
-        """Проверка ограничений по IP"""
-        if not ip_address:
-            return True
-        
-        query = ip_restrictions_table.select().where(
-            ip_restrictions_table.c.ip_address == ip_address
-        )
-        restriction = await self.db.fetch_one(query)
-        
-        if not restriction:
-            return True
-        
-        # Проверяем блокировку
-        if restriction['blocked_until'] and restriction['blocked_until'] > datetime.utcnow():
-            return False
-        
-        return True
+    async def check_ip_restrictions(self, ip_address: str, username: Optional[str] = None) -> bool:
+        """Проверка блокировки IP и username (без обращения к БД)"""
+        return await self.limiter.is_allowed(ip_address, username)
     
-    async def record_failed_attempt(self, ip_address: str):
-        """Запись неудачной попытки входа"""
-        if not ip_address:
-            return
-        
-        query = ip_restrictions_table.select().where(
-            ip_restrictions_table.c.ip_address == ip_address
-        )
-        restriction = await self.db.fetch_one(query)
+    async def record_failed_attempt(self, ip_address: str, username: Optional[str] = None) -> bool:
+        """
+        Запись неудачной попытки входа
         
-        if restriction:
-            # Увеличиваем счетчик
-            failed_attempts = restriction['failed_attempts'] + 1
-            blocked_until = None
-            
-            # Блокируем при превышении лимита
-            if failed_attempts >= settings.MAX_LOGIN_ATTEMPTS:
-                blocked_until = datetime.utcnow() + timedelta(
-                    minutes=settings.LOCKOUT_DURATION_MINUTES
-                )
-            
-            update_query = ip_restrictions_table.update().where(
-                ip_restrictions_table.c.ip_address == ip_address
-            ).values(
-                failed_attempts=failed_attempts,
-                blocked_until=blocked_until,
-                last_attempt_at=datetime.utcnow(),
-                updated_at=datetime.utcnow()
-            )
-            
-            await self.db.execute(update_query)
-        else:
-            # Создаем новую запись
-            insert_query = ip_restrictions_table.insert().values(
-                id=uuid4(),
-                ip_address=ip_address,
-                failed_attempts=1,
-                first_attempt_at=datetime.utcnow(),
-                last_attempt_at=datetime.utcnow(),
-                created_at=datetime.utcnow(),
-                updated_at=datetime.utcnow()
-            )
-            
-            await self.db.execute(insert_query)
+        Счетчики живут в лимитере; в ip_restrictions блокировки попадают
+        пакетно через login_limiter.flush_lockouts.
+        """
+        return await self.limiter.register_failure(ip_address, username)
     
-    async def clear_failed_attempts(self, ip_address: str):
+    async def clear_failed_attempts(self, ip_address: str, username: Optional[str] = None):
         """Очистка неудачных попыток после успешного входа"""
-        if not ip_address:
-            return
-        
-        query = ip_restrictions_table.update().where(
-            ip_restrictions_table.c.ip_address == ip_address
-        ).values(
-            failed_attempts=0,
-            blocked_until=None,
-            updated_at=datetime.utcnow()
-        )
-        
-        await self.db.execute(query)
\ No newline at end of file
+        await self.limiter.register_success(ip_address, username)
@@ -3,20 +3,153 @@ Google OAuth аутентификация сервис
 """
 
 from typing import Optional, Dict, Any
-import json
-import base64
-from datetime import datetime
+import asyncio
+import re
+import time
 import httpx
+import jwt
+from jwt import PyJWK
 
 from ..core.config import settings
 
 
+GOOGLE_JWKS_URL = "https://www.googleapis.com/oauth2/v3/certs"
+GOOGLE_ISSUERS = ['https://accounts.google.com', 'accounts.google.com']
+
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+
+class JWKSCache:
+    """
+    Кэш JSON Web Key Set в памяти процесса
+    
+    Ключи загружаются один раз и живут столько, сколько разрешает Cache-Control
+    (max-age) ответа. Фоновая задача обновляет набор заранее, до истечения срока,
+    поэтому проверка подписи не ждет сети. Неизвестный kid (ротация ключей)
+    вызывает не больше одной внеочередной загрузки за min_refetch_interval.
+    """
+    
+    def __init__(
+        self,
+        jwks_url: str,
+        http_client: Optional[httpx.AsyncClient] = None,
+        default_max_age: int = 3600,
+        refresh_ahead_seconds: int = 300,
+        min_refetch_interval: float = 30.0,
+        clock=time.monotonic
+    ):
+        self.jwks_url = jwks_url
+        self.default_max_age = default_max_age
+        self.refresh_ahead_seconds = refresh_ahead_seconds
+        self.min_refetch_interval = min_refetch_interval
+        self._http_client = http_client
+        self._owns_client = http_client is None
+        self._clock = clock
+        self._keys: Dict[str, PyJWK] = {}
+        self._expires_at = 0.0
+        self._last_fetch_at: Optional[float] = None
+        self._fetch_lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.fetch_count = 0
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._http_client is None:
+            self._http_client = httpx.AsyncClient(timeout=5.0)
+        return self._http_client
+    
+    def _max_age(self, response: httpx.Response) -> int:
+        match = _MAX_AGE_RE.search(response.headers.get("cache-control", ""))
+        return int(match.group(1)) if match else self.default_max_age
+    
+    async def refresh(self):
+        """Загрузка набора ключей"""
+        async with self._fetch_lock:
+            await self._fetch()
+    
+    async def _fetch(self):
+        """Загрузка набора ключей; вызывается под _fetch_lock"""
+        response = await self.client.get(self.jwks_url)
+        response.raise_for_status()
+        
+        keys = {}
+        for key_data in response.json().get("keys", []):
+            if key_data.get("kid") and key_data.get("kty") == "RSA":
+                keys[key_data["kid"]] = PyJWK(key_data, algorithm="RS256")
+        
+        now = self._clock()
+        self._keys = keys
+        self._expires_at = now + self._max_age(response)
+        self._last_fetch_at = now
+        self.fetch_count += 1
+    
+    def _needs_fetch(self, kid: str) -> bool:
+        if self._clock() >= self._expires_at:
+            return True
+        # Google мог повернуть ключи раньше, чем истек max-age
+        return kid not in self._keys and self._can_refetch()
+    
+    async def get_signing_key(self, kid: str) -> Optional[PyJWK]:
+        """Ключ по kid; при необходимости набор загружается или обновляется"""
+        if self._needs_fetch(kid):
+            async with self._fetch_lock:
+                # Пока ждали блокировку, набор мог загрузить другой запрос
+                if self._needs_fetch(kid):
+                    await self._fetch()
+        
+        self._ensure_background_refresh()
+        return self._keys.get(kid)
+    
+    def _can_refetch(self) -> bool:
+        return (
+            self._last_fetch_at is None or
+            self._clock() - self._last_fetch_at >= self.min_refetch_interval
+        )
+    
+    def _ensure_background_refresh(self):
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.get_running_loop().create_task(self._refresh_loop())
+    
+    async def _refresh_loop(self):
+        """Обновление набора ключей до истечения срока кэша"""
+        while True:
+            delay = self._expires_at - self._clock() - self.refresh_ahead_seconds
+            await asyncio.sleep(max(delay, self.min_refetch_interval))
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"⚠️ JWKS background refresh failed: {e}")
+    
+    async def close(self):
+        """Остановка фонового обновления и закрытие HTTP клиента"""
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+        if self._owns_client and self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+
+
+# Общий кэш ключей Google на процесс
+google_jwks = JWKSCache(GOOGLE_JWKS_URL)
+
+
 class GoogleAuthService:
     """Сервис для аутентификации через Google OAuth"""
     
-    def __init__(self, client_id: Optional[str], client_secret: Optional[str]):
+    def __init__(
+        self,
+        client_id: Optional[str],
+        client_secret: Optional[str],
+        jwks: Optional[JWKSCache] = None
+    ):
         self.client_id = client_id
         self.client_secret = client_secret
+        self.jwks = jwks or google_jwks
         
         if not client_id or not client_secret:
             print("⚠️ Warning: Google OAuth credentials not configured")
@@ -25,6 +158,10 @@ class GoogleAuthService:
         """
         Валидация Google ID Token
         
+        Подпись RS256 проверяется локально по закэшированному JWKS Google,
+        затем проверяются aud, iss и exp. Сетевой запрос к Google нужен только
+        при первой загрузке ключей и при их ротации.
+        
         Args:
             id_token: JWT токен от Google
             
@@ -36,83 +173,44 @@ class GoogleAuthService:
             return None
         
         try:
-            # В продакшене следует использовать Google API для валидации
-            # Здесь упрощенная версия для демонстрации
-            
-            # Декодируем JWT токен (без проверки подписи!)
-            # ВНИМАНИЕ: Это небезопасно для продакшена!
-            payload = self._decode_jwt_payload(id_token)
-            
-            if not payload:
-                print("❌ Google token validation failed: invalid JWT format")
+            kid = jwt.get_unverified_header(id_token).get('kid')
+            if not kid:
+                print("❌ Google token validation failed: no kid in header")
                 return None
             
-            # Проверяем обязательные поля
-            if not payload.get('sub') or not payload.get('email'):
-                print("❌ Google token validation failed: missing required fields")
+            signing_key = await self.jwks.get_signing_key(kid)
+            if signing_key is None:
+                print("❌ Google token validation failed: unknown signing key")
                 return None
             
-            # Проверяем audience (должен совпадать с нашим client_id)
-            if payload.get('aud') != self.client_id:
-                print("❌ Google token validation failed: invalid audience")
-                return None
+            payload = jwt.decode(
+                id_token,
+                key=signing_key.key,
+                algorithms=["RS256"],
+                audience=self.client_id,
+                issuer=GOOGLE_ISSUERS,
+                options={"require": ["exp", "iat", "sub"]}
+            )
             
-            # Проверяем issuer
-            valid_issuers = ['https://accounts.google.com', 'accounts.google.com']
-            if payload.get('iss') not in valid_issuers:
-                print("❌ Google token validation failed: invalid issuer")
-                return None
-            
-            # Проверяем время истечения
-            exp = payload.get('exp')
-            if exp and datetime.utcnow().timestamp() > exp:
-                print("❌ Google token validation failed: token expired")
+            if not payload.get('email'):
+                print("❌ Google token validation failed: missing required fields")
                 return None
             
-            print(f"✅ Google token validation successful for user {payload.get('email')}")
             return payload
             
-        except Exception as e:
-            print(f"❌ Google token validation error: {e}")
+        except jwt.InvalidTokenError as e:
+            print(f"❌ Google token validation failed: {e}")
             return None
-    
-    def _decode_jwt_payload(self, jwt_token: str) -> Optional[Dict[str, Any]]:
-        """
-        Декодирование payload из JWT токена
-        
-        ВНИМАНИЕ: Это упрощенная версия без проверки подписи!
-        В продакшене используйте google-auth библиотеку для полной валидации.
-        """
-        try:
-            # JWT состоит из трех частей: header.payload.signature
-            parts = jwt_token.split('.')
-            if len(parts) != 3:
-                return None
-            
-            # Декодируем payload (вторая часть)
-            payload_encoded = parts[1]
-            
-            # Добавляем padding если нужно
-            payload_encoded += '=' * (4 - len(payload_encoded) % 4)
-            
-            # Декодируем base64
-            payload_bytes = base64.urlsafe_b64decode(payload_encoded)
-            payload_str = payload_bytes.decode('utf-8')
-            
-            # Парсим JSON
-            payload = json.loads(payload_str)
-            
-            return payload
-            
         except Exception as e:
-            print(f"❌ JWT decode error: {e}")
+            print(f"❌ Google token validation error: {e}")
             return None
     
     async def validate_id_token_with_google_api(self, id_token: str) -> Optional[Dict[str, Any]]:
         """
-        Валидация ID токена через Google API (рекомендуемый способ)
+        Валидация ID токена через Google tokeninfo API
         
-        Этот метод делает запрос к Google API для проверки токена
+        Делает сетевой запрос на каждый вызов; основной путь - validate_id_token
+        с локальной проверкой подписи. Оставлен для отладки.
         """
         if not self.client_id:
             return None
@@ -121,22 +219,21 @@ class GoogleAuthService:
             # URL для валидации токенов Google
             validation_url = f"https://oauth2.googleapis.com/tokeninfo?id_token={id_token}"
             
-            async with httpx.AsyncClient() as client:
-                response = await client.get(validation_url)
-                
-                if response.status_code != 200:
-                    print(f"❌ Google API validation failed: {response.status_code}")
-                    return None
-                
-                token_info = response.json()
-                
-                # Проверяем audience
-                if token_info.get('aud') != self.client_id:
-                    print("❌ Google API validation failed: invalid audience")
-                    return None
-                
-                print(f"✅ Google API validation successful for user {token_info.get('email')}")
-                return token_info
+            response = await self.jwks.client.get(validation_url)
+            
+            if response.status_code != 200:
+                print(f"❌ Google API validation failed: {response.status_code}")
+                return None
+            
+            token_info = response.json()
+            
+            # Проверяем audience
+            if token_info.get('aud') != self.client_id:
+                print("❌ Google API validation failed: invalid audience")
+                return None
+            
+            print(f"✅ Google API validation successful for user {token_info.get('email')}")
+            return token_info
                 
         except Exception as e:
             print(f"❌ Google API validation error: {e}")
@@ -9,7 +9,8 @@ from datetime import datetime
 from uuid import uuid4
 import aio_pika
 from aio_pika import Connection, Channel, Exchange, Queue, Message
-from aio_pika.patterns import MasterChannel
+
+from artel_events import QueueConsumer
 
 from ..core.config import settings
 
@@ -23,6 +24,7 @@ class RabbitMQManager:
         self.channel: Optional[Channel] = None
         self.exchanges: Dict[str, Exchange] = {}
         self.queues: Dict[str, Queue] = {}
+        self.consumers: Dict[str, QueueConsumer] = {}
         
     async def connect(self):
         """Подключение к RabbitMQ"""
@@ -47,6 +49,11 @@ class RabbitMQManager:
     async def close(self):
         """Закрытие соединения с RabbitMQ"""
         try:
+            # Дообрабатываем полученные сообщения до закрытия соединения
+            for consumer in self.consumers.values():
+                await consumer.stop()
+            self.consumers.clear()
+            
             if self.connection and not self.connection.is_closed:
                 await self.connection.close()
                 print("✅ Disconnected from RabbitMQ")
@@ -191,41 +198,54 @@ class RabbitMQManager:
         queue_name: str,
         exchange_name: str,
         routing_keys: list,
-        callback: Callable
-    ):
-        """Настройка consumer для обработки сообщений"""
+        handler: Callable,
+        prefetch_count: int = 100,
+        concurrency: int = 4,
+        batch_size: int = 50,
+        batch_timeout: float = 0.05,
+        retry_delays: tuple = (1, 10, 60)
+    ) -> QueueConsumer:
+        """
+        Настройка consumer для обработки сообщений
+
+        handler получает список событий (dict) пачкой; исключение в handler
+        отправляет пачку на повтор с задержкой, после исчерпания попыток - в DLQ.
+        Каждый consumer работает на своем канале со своим prefetch_count.
+        """
         try:
-            if not self.channel:
-                raise RuntimeError("Channel not initialized")
+            if not self.connection:
+                raise RuntimeError("Connection not initialized")
             
-            # Создаем очередь
-            queue = await self.channel.declare_queue(
-                queue_name,
-                durable=True,
-                arguments={
+            consumer = QueueConsumer(
+                queue_name=queue_name,
+                handler=handler,
+                exchange_name=exchange_name,
+                routing_keys=routing_keys,
+                prefetch_count=prefetch_count,
+                concurrency=concurrency,
+                batch_size=batch_size,
+                batch_timeout=batch_timeout,
+                retry_delays=retry_delays,
+                queue_arguments={
                     'x-message-ttl': 86400000,  # TTL 24 часа
                     'x-max-length': 10000  # Максимум сообщений в очереди
                 }
             )
+            await consumer.start(self.connection)
             
-            # Привязываем к exchange
-            if exchange_name in self.exchanges:
-                exchange = self.exchanges[exchange_name]
-                
-                for routing_key in routing_keys:
-                    await queue.bind(exchange, routing_key)
+            self.consumers[queue_name] = consumer
+            self.queues[queue_name] = consumer._queue
             
-            # Настраиваем consumer
-            await queue.consume(callback)
-            
-            self.queues[queue_name] = queue
-            
-            print(f"✅ Setup consumer for queue {queue_name}")
+            return consumer
             
         except Exception as e:
             print(f"❌ Failed to setup consumer: {e}")
             raise
     
+    def consumer_metrics(self) -> Dict[str, Any]:
+        """Счетчики, задержка и пропускная способность consumers"""
+        return {name: consumer.metrics() for name, consumer in self.consumers.items()}
+    
     async def health_check(self) -> bool:
         """Проверка здоровья RabbitMQ соединения"""
         try:
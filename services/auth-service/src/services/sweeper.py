@@ -0,0 +1,164 @@
+"""
+Фоновая очистка устаревших строк Auth Service
+
+Удаляет истекшие и отозванные сессии (user_sessions) и неактуальные записи
+блокировок (ip_restrictions). Строки удаляются пачками
+DELETE ... WHERE ctid IN (SELECT ctid ... LIMIT n) с паузой между пачками,
+чтобы не держать долгих блокировок и не создавать всплесков WAL.
+
+Одновременно чистит только один воркер: перед проходом берется
+pg_try_advisory_lock, остальные воркеры этот проход пропускают.
+"""
+
+import asyncio
+import time
+from datetime import datetime
+from typing import Dict, Optional
+
+import databases
+
+from ..core.config import settings
+from ..core.database import database
+
+
+SWEEPER_ADVISORY_LOCK_KEY = 730_035
+
+_TRY_LOCK_SQL = "SELECT pg_try_advisory_lock(:key)"
+_UNLOCK_SQL = "SELECT pg_advisory_unlock(:key)"
+
+# Истекшие давно, либо отозванные и не менявшиеся retention дней
+_DELETE_SESSIONS_SQL = """
+WITH deleted AS (
+    DELETE FROM user_sessions
+    WHERE ctid IN (
+        SELECT ctid FROM user_sessions
+        WHERE expires_at < NOW() - make_interval(days => :retention_days)
+           OR (status <> 'active' AND updated_at < NOW() - make_interval(days => :retention_days))
+        LIMIT :batch_size
+    )
+    RETURNING 1
+)
+SELECT COUNT(*) FROM deleted
+"""
+
+# Блокировка закончилась (или ее не было), и попыток не было retention дней
+_DELETE_IP_RESTRICTIONS_SQL = """
+WITH deleted AS (
+    DELETE FROM ip_restrictions
+    WHERE ctid IN (
+        SELECT ctid FROM ip_restrictions
+        WHERE (blocked_until IS NULL OR blocked_until < NOW())
+          AND last_attempt_at < NOW() - make_interval(days => :retention_days)
+        LIMIT :batch_size
+    )
+    RETURNING 1
+)
+SELECT COUNT(*) FROM deleted
+"""
+
+
+class ExpirySweeper:
+    """Периодическая пакетная очистка user_sessions и ip_restrictions"""
+
+    def __init__(
+        self,
+        db: databases.Database,
+        interval_seconds: float = 3600,
+        batch_size: int = 1000,
+        pause_seconds: float = 0.1,
+        retention_days: int = 7
+    ):
+        self.db = db
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self.pause_seconds = pause_seconds
+        self.retention_days = retention_days
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {
+            "runs": 0,
+            "skipped_locked": 0,
+            "errors": 0,
+            "sessions_deleted": 0,
+            "ip_restrictions_deleted": 0,
+            "last_run_at": None,
+            "last_duration_ms": None,
+        }
+
+    async def _delete_in_batches(self, query: str) -> int:
+        """Удаление пачками до тех пор, пока пачка не окажется неполной"""
+        total = 0
+        values = {"batch_size": self.batch_size, "retention_days": self.retention_days}
+
+        while True:
+            deleted = await self.db.fetch_val(query=query, values=values)
+            total += deleted
+            if deleted < self.batch_size:
+                return total
+            await asyncio.sleep(self.pause_seconds)
+
+    async def sweep_once(self) -> Optional[Dict[str, int]]:
+        """
+        Один проход очистки
+
+        Returns:
+            Количество удаленных строк по таблицам или None, если чистит другой воркер
+        """
+        started = time.perf_counter()
+
+        # Сессионная advisory-блокировка живет на соединении - все запросы прохода на нем же
+        async with self.db.connection():
+            locked = await self.db.fetch_val(
+                query=_TRY_LOCK_SQL, values={"key": SWEEPER_ADVISORY_LOCK_KEY}
+            )
+            if not locked:
+                self.stats["skipped_locked"] += 1
+                return None
+
+            try:
+                report = {
+                    "sessions_deleted": await self._delete_in_batches(_DELETE_SESSIONS_SQL),
+                    "ip_restrictions_deleted": await self._delete_in_batches(_DELETE_IP_RESTRICTIONS_SQL),
+                }
+            finally:
+                await self.db.fetch_val(query=_UNLOCK_SQL, values={"key": SWEEPER_ADVISORY_LOCK_KEY})
+
+        self.stats["runs"] += 1
+        for key, count in report.items():
+            self.stats[key] += count
+        self.stats["last_run_at"] = datetime.utcnow().isoformat()
+        self.stats["last_duration_ms"] = round((time.perf_counter() - started) * 1000, 1)
+        return report
+
+    def start(self):
+        """Запуск периодической очистки"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                report = await self.sweep_once()
+                if report and any(report.values()):
+                    print(f"🧹 Expiry sweep: {report}")
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"⚠️ Expiry sweep failed: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+expiry_sweeper = ExpirySweeper(
+    database,
+    interval_seconds=settings.SESSION_CLEANUP_INTERVAL_HOURS * 3600,
+    batch_size=settings.SWEEP_BATCH_SIZE,
+    pause_seconds=settings.SWEEP_PAUSE_SECONDS,
+    retention_days=settings.SESSION_RETENTION_DAYS
+)
@@ -3,13 +3,9 @@ Telegram аутентификация сервис
 """
 
 from typing import Optional, Dict, Any
-import urllib.parse
-import json
-import hashlib
-import hmac
-from datetime import datetime
 
 from ..core.config import settings
+from ..core.security import get_telegram_validator
 
 
 class TelegramAuthService:
@@ -17,6 +13,7 @@ class TelegramAuthService:
     
     def __init__(self, bot_token: Optional[str]):
         self.bot_token = bot_token
+        self.validator = get_telegram_validator(bot_token) if bot_token else None
         
         if not bot_token:
             print("⚠️ Warning: TELEGRAM_BOT_TOKEN not set")
@@ -25,6 +22,10 @@ class TelegramAuthService:
         """
         Валидация init_data от Telegram Mini App
         
+        Проверка выполняется общим TelegramDataValidator: секрет WebAppData
+        вычисляется один раз на процесс, повторы уже проверенного payload
+        обслуживаются из кэша.
+        
         Документация:
         https://core.telegram.org/bots/webapps#validating-data-received-via-the-mini-app
         """
@@ -33,86 +34,14 @@ class TelegramAuthService:
             return None
         
         try:
-            # Парсим query string
-            parsed_data = urllib.parse.parse_qs(init_data)
-            
-            # Извлекаем hash
-            received_hash = parsed_data.get('hash', [None])[0]
-            if not received_hash:
-                print("❌ Telegram validation failed: no hash provided")
-                return None
-            
-            # Создаем строку для проверки (все параметры кроме hash)
-            check_items = []
-            for key, values in sorted(parsed_data.items()):
-                if key != 'hash' and values:
-                    check_items.append(f"{key}={values[0]}")
-            
-            check_string = '\n'.join(check_items)
-            
-            # Создаем секретный ключ для проверки
-            secret_key = hmac.new(
-                b"WebAppData",
-                self.bot_token.encode(),
-                hashlib.sha256
-            ).digest()
-            
-            # Вычисляем ожидаемый hash
-            calculated_hash = hmac.new(
-                secret_key,
-                check_string.encode(),
-                hashlib.sha256
-            ).hexdigest()
-            
-            # Проверяем hash
-            if not hmac.compare_digest(received_hash, calculated_hash):
-                print("❌ Telegram validation failed: hash mismatch")
-                return None
-            
-            # Проверяем время (данные не должны быть старше 1 часа)
-            auth_date = parsed_data.get('auth_date', [None])[0]
-            if auth_date:
-                try:
-                    auth_timestamp = int(auth_date)
-                    current_timestamp = int(datetime.utcnow().timestamp())
-                    
-                    # Данные старше 1 часа считаем недействительными
-                    if current_timestamp - auth_timestamp > 3600:
-                        print("❌ Telegram validation failed: data too old")
-                        return None
-                except ValueError:
-                    print("❌ Telegram validation failed: invalid auth_date")
-                    return None
-            
-            # Парсим данные пользователя
-            user_data = None
-            if 'user' in parsed_data and parsed_data['user'][0]:
-                try:
-                    user_data = json.loads(parsed_data['user'][0])
-                except json.JSONDecodeError:
-                    print("❌ Telegram validation failed: invalid user data JSON")
-                    return None
-            
-            if not user_data or not user_data.get('id'):
-                print("❌ Telegram validation failed: no user data")
-                return None
-            
-            # Возвращаем валидированные данные
-            result = {
-                'user': user_data,
-                'auth_date': auth_date,
-                'start_param': parsed_data.get('start_param', [None])[0],
-                'query_id': parsed_data.get('query_id', [None])[0],
-                'chat_type': parsed_data.get('chat_type', [None])[0],
-                'chat_instance': parsed_data.get('chat_instance', [None])[0]
-            }
-            
-            print(f"✅ Telegram validation successful for user {user_data.get('id')}")
-            return result
-            
+            result = self.validator.validate_init_data(init_data)
         except Exception as e:
             print(f"❌ Telegram validation error: {e}")
             return None
+        
+        if result:
+            print(f"✅ Telegram validation successful for user {result['user'].get('id')}")
+        return result
     
     def extract_user_info(self, telegram_data: Dict[str, Any]) -> Dict[str, Any]:
         """Извлечение информации о пользователе из Telegram данных"""
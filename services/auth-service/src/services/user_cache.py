@@ -0,0 +1,152 @@
+"""
+Кэш пользователей для get_current_user
+
+Ограниченный TTL + LRU кэш строк users по id. Локально сбрасывается в
+AuthService.update_user и revoke_all_user_sessions; остальным воркерам
+сброс рассылается сообщением user.invalidated (или user.updated с новым
+профилем - его же слушает game-service) в exchange user_events.
+Каждый воркер слушает его через собственную временную очередь.
+"""
+
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import aio_pika
+
+from ..core.config import settings
+
+
+# Сообщения user_events, после которых запись кэша устарела
+INVALIDATION_ROUTING_KEYS = ["user.invalidated", "user.updated", "user.deactivated"]
+
+
+class UserCache:
+    """TTL + LRU кэш пользователей с рассылкой инвалидаций"""
+
+    def __init__(
+        self,
+        max_size: int = 10_000,
+        ttl_seconds: float = 60.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        # user_id -> (истекает, пользователь)
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._rabbitmq = None
+        self.stats = {"hits": 0, "misses": 0, "invalidations": 0, "evictions": 0}
+
+    def get(self, user_id) -> Optional[Dict[str, Any]]:
+        key = str(user_id)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+
+        expires_at, user = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            self.stats["misses"] += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.stats["hits"] += 1
+        return user
+
+    def put(self, user: Dict[str, Any]):
+        key = str(user["id"])
+        self._entries[key] = (self._clock() + self.ttl_seconds, user)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def discard(self, user_id):
+        """Локальный сброс записи"""
+        if self._entries.pop(str(user_id), None) is not None:
+            self.stats["invalidations"] += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def invalidate(self, user_id, reason: str):
+        """Сброс записи в этом воркере и рассылка сброса остальным"""
+        self.discard(user_id)
+
+        if self._rabbitmq is None:
+            return
+        try:
+            await self._rabbitmq.publish_user_event(
+                event_type="invalidated",
+                user_id=str(user_id),
+                data={"reason": reason}
+            )
+        except Exception as e:
+            # Остальные воркеры догонят по TTL
+            print(f"⚠️ Failed to broadcast user cache invalidation: {e}")
+
+    async def publish_updated(self, user: Dict[str, Any]):
+        """
+        Сброс записи и событие user.updated с публичными полями профиля
+
+        Одно сообщение сбрасывает кэш остальных воркеров и доставляет новое
+        имя сервисам, которые хранят его копию (участники сессий game-service).
+        """
+        self.discard(user["id"])
+
+        if self._rabbitmq is None:
+            return
+        first_name = (user.get("first_name") or "").strip()
+        try:
+            await self._rabbitmq.publish_user_event(
+                event_type="updated",
+                user_id=str(user["id"]),
+                data={
+                    "username": user.get("username"),
+                    "first_name": user.get("first_name"),
+                    "last_name": user.get("last_name"),
+                    "avatar_url": user.get("avatar_url"),
+                    # Так же имя участника выбирает фронтенд при создании сессии
+                    "display_name": first_name or user.get("username"),
+                    "is_active": user.get("is_active")
+                }
+            )
+        except Exception as e:
+            print(f"⚠️ Failed to publish user.updated: {e}")
+
+    async def attach(self, rabbitmq):
+        """
+        Подписка на user_events через RabbitMQManager
+
+        Очередь exclusive/auto_delete: у каждого воркера своя, удаляется при отключении.
+        """
+        queue = await rabbitmq.channel.declare_queue(exclusive=True, auto_delete=True)
+        exchange = rabbitmq.exchanges["user_events"]
+        for routing_key in INVALIDATION_ROUTING_KEYS:
+            await queue.bind(exchange, routing_key)
+
+        await queue.consume(self._on_message)
+        self._rabbitmq = rabbitmq
+        print(f"✅ User cache subscribed to user_events ({', '.join(INVALIDATION_ROUTING_KEYS)})")
+
+    async def _on_message(self, message: aio_pika.IncomingMessage):
+        async with message.process():
+            try:
+                user_id = json.loads(message.body).get("user_id")
+            except (ValueError, AttributeError):
+                return
+            if user_id:
+                self.discard(user_id)
+
+
+user_cache = UserCache(
+    max_size=settings.USER_CACHE_MAX_SIZE,
+    ttl_seconds=settings.USER_CACHE_TTL_SECONDS
+)
@@ -0,0 +1,37 @@
+"""
+Общие фикстуры тестов Auth Service
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+# Тесты импортируют код сервиса как пакет src (как и uvicorn src.main:app)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+# Общие библиотеки (в контейнерах - PYTHONPATH=/app/shared-libs/python)
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "shared-libs" / "python"))
+
+
+@pytest.fixture
+def database_url() -> str:
+    """URL тестовой PostgreSQL; интеграционные тесты пропускаются, если он не задан"""
+    url = os.getenv("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    return url
+
+
+@pytest.fixture
+def redis_url() -> str:
+    """URL тестового Redis; тесты Redis-бэкенда пропускаются, если он не задан"""
+    url = os.getenv("TEST_REDIS_URL")
+    if not url:
+        pytest.skip("TEST_REDIS_URL is not set")
+    return url
+
+
+def pytest_configure(config):
+    config.addinivalue_line("markers", "integration: Integration tests")
+    config.addinivalue_line("markers", "performance: Performance tests")
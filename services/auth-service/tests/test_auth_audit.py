@@ -0,0 +1,158 @@
+"""
+Tests for the batched auth audit writer
+"""
+
+import asyncio
+from uuid import uuid4
+
+import databases
+import pytest
+import pytest_asyncio
+import sqlalchemy as sa
+
+from src.models.database import metadata, users_table, auth_logs_table
+from src.services.audit import AuthAuditWriter
+from src.services.auth import AuthService
+
+
+@pytest_asyncio.fixture
+async def database(database_url):
+    engine = sa.create_engine(database_url)
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+    engine.dispose()
+
+    db = databases.Database(database_url)
+    await db.connect()
+    try:
+        yield db
+    finally:
+        await db.disconnect()
+
+
+async def create_user(db):
+    service = AuthService(db, audit=AuthAuditWriter(db))
+    user = await service.get_or_create_telegram_user({"user": {"id": 42, "username": "audited"}})
+    return user["id"]
+
+
+async def count_logs(db) -> int:
+    return await db.fetch_val(sa.select(sa.func.count()).select_from(auth_logs_table))
+
+
+@pytest.mark.asyncio
+async def test_events_written_in_batches(database):
+    writer = AuthAuditWriter(database, batch_size=100)
+    user_id = await create_user(database)
+
+    for i in range(250):
+        writer.log_event(
+            action="login",
+            user_id=user_id if i % 2 else None,
+            provider="email",
+            ip_address="10.0.0.1" if i % 3 else None,
+            success=bool(i % 2),
+            metadata={"attempt": i} if i % 5 == 0 else None,
+        )
+    assert await count_logs(database) == 0
+
+    assert await writer.flush() == 250
+    assert await count_logs(database) == 250
+    assert writer.stats["flushes"] == 3
+    assert writer.pending == 0
+
+    row = await database.fetch_one(
+        auth_logs_table.select().where(auth_logs_table.c.metadata.isnot(None)).limit(1)
+    )
+    assert "attempt" in row["metadata"]
+
+
+@pytest.mark.asyncio
+async def test_last_login_touches_coalesced(database):
+    writer = AuthAuditWriter(database)
+    user_id = await create_user(database)
+
+    for _ in range(10):
+        writer.touch_last_login(user_id)
+    writer.touch_last_login(uuid4())  # пользователь удален - строка пропускается
+
+    assert writer.pending == 2
+    await writer.flush()
+
+    last_login = await database.fetch_val(
+        sa.select(users_table.c.last_login_at).where(users_table.c.id == user_id)
+    )
+    assert last_login is not None
+
+
+@pytest.mark.asyncio
+async def test_bounded_buffer_counts_dropped_events(database):
+    writer = AuthAuditWriter(database, max_buffer_size=10)
+
+    for _ in range(15):
+        writer.log_event(action="login", success=False)
+
+    assert writer.pending == 10
+    assert writer.stats["dropped_events"] == 5
+
+
+@pytest.mark.asyncio
+async def test_size_trigger_and_drain_on_close(database):
+    writer = AuthAuditWriter(database, batch_size=20, flush_interval_seconds=60)
+    writer.start()
+
+    for _ in range(20):
+        writer.log_event(action="login")
+    for _ in range(50):
+        await asyncio.sleep(0.01)
+        if await count_logs(database) == 20:
+            break
+    assert await count_logs(database) == 20
+
+    # Меньше batch_size и до таймера - остаток пишется при остановке
+    for _ in range(5):
+        writer.log_event(action="logout")
+    await writer.close()
+    assert await count_logs(database) == 25
+
+
+@pytest.mark.asyncio
+async def test_bad_rows_go_to_dead_letter_instead_of_blocking(database):
+    writer = AuthAuditWriter(database, batch_size=10)
+    user_id = await create_user(database)
+
+    for i in range(10):
+        writer.log_event(action="login", user_id=user_id, ip_address=f"10.0.0.{i}")
+    writer.log_event(action="login", ip_address="not-an-ip")  # CAST AS inet
+    writer.log_event(action="login", user_id=uuid4())  # FK на users
+    for _ in range(8):
+        writer.log_event(action="logout")
+    writer.touch_last_login(user_id)
+
+    assert await writer.flush() == 19
+    assert await count_logs(database) == 18
+    assert writer.pending == 0
+    assert writer.stats["dead_letter_events"] == 2
+    assert [row["ip_address"] for kind, row, _ in writer.dead_letters] == ["not-an-ip", None]
+
+    # Следующие сбросы не застревают на плохой строке
+    writer.log_event(action="login")
+    assert await writer.flush() == 1
+
+
+class FailingDatabase:
+    def transaction(self):
+        raise ConnectionError("database is down")
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_requeues_batch():
+    writer = AuthAuditWriter(FailingDatabase(), max_buffer_size=100)
+    for _ in range(3):
+        writer.log_event(action="login")
+
+    with pytest.raises(ConnectionError):
+        await writer.flush()
+
+    assert writer.pending == 3
+    assert writer.stats["failed_flushes"] == 1
@@ -0,0 +1,70 @@
+"""
+Tests for precompiled hot queries executed on the raw asyncpg connection
+"""
+
+import databases
+import pytest
+import pytest_asyncio
+import sqlalchemy as sa
+
+from src.core.database import CompiledQuery
+from src.models.database import AuthProvider, metadata
+from src.services.audit import AuthAuditWriter
+from src.services.auth import AuthService
+
+
+@pytest_asyncio.fixture
+async def database(database_url):
+    engine = sa.create_engine(database_url)
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+    engine.dispose()
+
+    db = databases.Database(database_url)
+    await db.connect()
+    try:
+        yield db
+    finally:
+        await db.disconnect()
+
+
+def test_named_params_compiled_to_positional():
+    query = CompiledQuery(
+        "SELECT :a::text, CAST(:b AS int), :a || 'x:y' FROM t WHERE id = :id"
+    )
+    assert query.sql == "SELECT $1::text, CAST($2 AS int), $1 || 'x:y' FROM t WHERE id = $3"
+    assert query.params == ("a", "b", "id")
+    assert query._args({"a": 1, "b": 2, "id": 3}) == [1, 2, 3]
+
+
+@pytest.mark.asyncio
+async def test_hot_queries_return_plain_rows(database):
+    service = AuthService(database, audit=AuthAuditWriter(database))
+    created = await service.get_or_create_telegram_user({"user": {"id": 42, "username": "hot"}})
+    await database.execute(
+        query="UPDATE users SET metadata = CAST(:m AS jsonb) WHERE id = :id",
+        values={"m": '{"theme": "dark"}', "id": created["id"]}
+    )
+
+    user = await service.get_user(str(created["id"]))
+    assert user["username"] == "hot"
+    assert user["metadata"] == {"theme": "dark"}
+
+    by_provider = await service.get_user_by_provider(AuthProvider.TELEGRAM, "42")
+    assert by_provider["id"] == created["id"]
+    assert await service.get_user_by_provider(AuthProvider.GOOGLE, "42") is None
+
+
+@pytest.mark.asyncio
+async def test_compiled_query_joins_current_transaction(database):
+    service = AuthService(database, audit=AuthAuditWriter(database))
+    user = await service.get_or_create_telegram_user({"user": {"id": 7, "username": "tx"}})
+
+    transaction = await database.transaction()
+    await database.execute(
+        query="UPDATE users SET username = 'renamed' WHERE id = :id", values={"id": user["id"]}
+    )
+    assert (await service.get_user(user["id"]))["username"] == "renamed"
+    await transaction.rollback()
+
+    assert (await service.get_user(user["id"]))["username"] == "tx"
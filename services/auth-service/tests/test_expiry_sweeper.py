@@ -0,0 +1,98 @@
+"""
+Tests for the batched expiry sweeper
+"""
+
+from datetime import datetime, timedelta
+from uuid import uuid4
+
+import databases
+import pytest
+import pytest_asyncio
+import sqlalchemy as sa
+
+from src.models.database import metadata, user_sessions_table, ip_restrictions_table
+from src.services.audit import AuthAuditWriter
+from src.services.auth import AuthService
+from src.services.sweeper import SWEEPER_ADVISORY_LOCK_KEY, ExpirySweeper
+
+
+@pytest_asyncio.fixture
+async def database(database_url):
+    engine = sa.create_engine(database_url)
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+    engine.dispose()
+
+    db = databases.Database(database_url, min_size=1, max_size=5)
+    await db.connect()
+    try:
+        yield db
+    finally:
+        await db.disconnect()
+
+
+async def seed(db):
+    service = AuthService(db, audit=AuthAuditWriter(db))
+    user = await service.get_or_create_telegram_user({"user": {"id": 1, "username": "sweep"}})
+    now = datetime.utcnow()
+    old = now - timedelta(days=30)
+
+    sessions = []
+    for i in range(25):
+        kind = ("expired", "revoked", "active")[i % 3]
+        sessions.append({
+            "id": uuid4(),
+            "user_id": user["id"],
+            "access_token_hash": f"a{i}",
+            "refresh_token_hash": f"r{i}",
+            "status": "revoked" if kind == "revoked" else "active",
+            "expires_at": old if kind == "expired" else now + timedelta(days=1),
+            "updated_at": old if kind == "revoked" else now,
+        })
+    await db.execute_many(user_sessions_table.insert(), sessions)
+
+    await db.execute_many(ip_restrictions_table.insert(), [
+        {"id": uuid4(), "ip_address": "10.0.0.1", "failed_attempts": 9, "blocked_until": None, "last_attempt_at": old},
+        {"id": uuid4(), "ip_address": "10.0.0.2", "failed_attempts": 9, "blocked_until": now + timedelta(hours=1),
+         "last_attempt_at": old},
+        {"id": uuid4(), "ip_address": "10.0.0.3", "failed_attempts": 1, "blocked_until": None, "last_attempt_at": now},
+    ])
+
+
+async def count(db, table) -> int:
+    return await db.fetch_val(sa.select(sa.func.count()).select_from(table))
+
+
+@pytest.mark.asyncio
+async def test_sweep_deletes_stale_rows_in_batches(database):
+    await seed(database)
+    sweeper = ExpirySweeper(database, batch_size=4, pause_seconds=0)
+
+    report = await sweeper.sweep_once()
+
+    # 9 истекших (i % 3 == 0) и 8 отозванных из 25
+    assert report == {"sessions_deleted": 17, "ip_restrictions_deleted": 1}
+    assert await count(database, user_sessions_table) == 8
+    assert await count(database, ip_restrictions_table) == 2
+    assert sweeper.stats["runs"] == 1
+
+    assert await sweeper.sweep_once() == {"sessions_deleted": 0, "ip_restrictions_deleted": 0}
+
+
+@pytest.mark.asyncio
+async def test_sweep_skipped_while_another_worker_holds_lock(database):
+    await seed(database)
+    sweeper = ExpirySweeper(database)
+
+    other = databases.Database(str(database.url))
+    await other.connect()
+    try:
+        # asyncpg снимает advisory-блокировки при возврате соединения в пул - держим его
+        async with other.connection():
+            await other.fetch_val(query="SELECT pg_advisory_lock(:key)", values={"key": SWEEPER_ADVISORY_LOCK_KEY})
+            assert await sweeper.sweep_once() is None
+            assert sweeper.stats["skipped_locked"] == 1
+    finally:
+        await other.disconnect()
+
+    assert (await sweeper.sweep_once())["sessions_deleted"] == 17
@@ -0,0 +1,203 @@
+"""
+Tests for local Google ID token verification against a cached JWKS
+"""
+
+import asyncio
+import json
+import time
+
+import httpx
+import jwt
+import pytest
+import pytest_asyncio
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt.algorithms import RSAAlgorithm
+
+from src.services.google import GOOGLE_JWKS_URL, GoogleAuthService, JWKSCache
+
+CLIENT_ID = "test-client.apps.googleusercontent.com"
+
+
+def make_key(kid: str):
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    jwk = json.loads(RSAAlgorithm.to_jwk(private_key.public_key()))
+    jwk.update({"kid": kid, "alg": "RS256", "use": "sig"})
+    return private_key, jwk
+
+
+class FakeGoogleCerts:
+    """Локальная подмена https://www.googleapis.com/oauth2/v3/certs"""
+
+    def __init__(self, max_age: int = 3600):
+        self.keys = {}
+        self.max_age = max_age
+        self.requests = 0
+
+    def add_key(self, kid: str):
+        private_key, jwk = make_key(kid)
+        self.keys[kid] = jwk
+        return private_key
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        return httpx.Response(
+            200,
+            json={"keys": list(self.keys.values())},
+            headers={"Cache-Control": f"public, max-age={self.max_age}, must-revalidate"},
+        )
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def sign_id_token(private_key, kid: str, **overrides) -> str:
+    now = int(time.time())
+    claims = {
+        "iss": "https://accounts.google.com",
+        "aud": CLIENT_ID,
+        "sub": "1234567890",
+        "email": "player@example.com",
+        "email_verified": True,
+        "iat": now,
+        "exp": now + 3600,
+    }
+    claims.update(overrides)
+    return jwt.encode(claims, private_key, algorithm="RS256", headers={"kid": kid})
+
+
+@pytest.fixture
+def certs():
+    return FakeGoogleCerts()
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest_asyncio.fixture
+async def jwks(certs, clock):
+    client = httpx.AsyncClient(transport=httpx.MockTransport(certs.handler))
+    cache = JWKSCache(GOOGLE_JWKS_URL, http_client=client, clock=clock)
+    try:
+        yield cache
+    finally:
+        await cache.close()
+        await client.aclose()
+
+
+@pytest.fixture
+def google(jwks):
+    return GoogleAuthService(CLIENT_ID, "secret", jwks=jwks)
+
+
+@pytest.mark.asyncio
+async def test_valid_token_verified_locally(google, certs):
+    key = certs.add_key("k1")
+
+    payload = await google.validate_id_token(sign_id_token(key, "k1"))
+
+    assert payload["sub"] == "1234567890"
+    assert payload["email"] == "player@example.com"
+    assert certs.requests == 1
+
+
+@pytest.mark.asyncio
+async def test_keys_cached_for_max_age(google, certs, clock):
+    key = certs.add_key("k1")
+    token = sign_id_token(key, "k1")
+
+    for _ in range(50):
+        assert await google.validate_id_token(token) is not None
+    assert certs.requests == 1
+
+    clock.now += certs.max_age + 1
+    assert await google.validate_id_token(token) is not None
+    assert certs.requests == 2
+
+
+@pytest.mark.asyncio
+async def test_cache_control_max_age_is_honored(jwks, certs):
+    certs.max_age = 120
+    certs.add_key("k1")
+
+    await jwks.refresh()
+
+    assert jwks._expires_at == pytest.approx(jwks._clock() + 120)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("claims", [
+    {"aud": "someone-else"},
+    {"iss": "https://evil.example.com"},
+    {"exp": int(time.time()) - 10},
+    {"email": None},
+])
+async def test_invalid_claims_rejected(google, certs, claims):
+    key = certs.add_key("k1")
+
+    assert await google.validate_id_token(sign_id_token(key, "k1", **claims)) is None
+
+
+@pytest.mark.asyncio
+async def test_forged_signature_rejected(google, certs):
+    certs.add_key("k1")
+    attacker_key, _ = make_key("k1")
+
+    assert await google.validate_id_token(sign_id_token(attacker_key, "k1")) is None
+
+
+@pytest.mark.asyncio
+async def test_unsigned_token_rejected(google, certs):
+    certs.add_key("k1")
+    token = jwt.encode({"sub": "1", "aud": CLIENT_ID}, None, algorithm="none", headers={"kid": "k1"})
+
+    assert await google.validate_id_token(token) is None
+
+
+@pytest.mark.asyncio
+async def test_unknown_kid_refetches_once(google, certs, clock):
+    old_key = certs.add_key("k1")
+    assert await google.validate_id_token(sign_id_token(old_key, "k1")) is not None
+
+    # Google повернул ключи раньше истечения max-age
+    clock.now += 60
+    new_key = certs.add_key("k2")
+    assert await google.validate_id_token(sign_id_token(new_key, "k2")) is not None
+    assert certs.requests == 2
+
+    # Неизвестный kid не приводит к шторму запросов к Google
+    stranger, _ = make_key("k3")
+    for _ in range(10):
+        assert await google.validate_id_token(sign_id_token(stranger, "k3")) is None
+    assert certs.requests == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrent_lookups_share_one_fetch(certs, clock):
+    async def slow_handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(0.01)
+        return certs.handler(request)
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(slow_handler))
+    jwks = JWKSCache(GOOGLE_JWKS_URL, http_client=client, clock=clock)
+    certs.add_key("k1")
+    try:
+        # Холодный кэш: 20 одновременных запросов - одна загрузка
+        keys = await asyncio.gather(*[jwks.get_signing_key("k1") for _ in range(20)])
+        assert all(key is not None for key in keys)
+        assert certs.requests == 1
+
+        # Неизвестный kid после min_refetch_interval - тоже одна загрузка на всех
+        clock.now += jwks.min_refetch_interval
+        keys = await asyncio.gather(*[jwks.get_signing_key("k2") for _ in range(20)])
+        assert keys == [None] * 20
+        assert certs.requests == 2
+    finally:
+        await jwks.close()
+        await client.aclose()
@@ -0,0 +1,129 @@
+"""
+Tests for asymmetric JWT signing, key rotation and the JWKS document
+"""
+
+import time
+
+import jwt
+import pytest
+
+from src.core.keys import KeyRing
+from src.core.security import JWTManager
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = time.time()
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def verify_with_jwks(token: str, jwks: dict) -> dict:
+    """Проверка так, как это делает сторонний сервис: только по JWKS"""
+    kid = jwt.get_unverified_header(token)["kid"]
+    jwk = next(key for key in jwks["keys"] if key["kid"] == kid)
+    return jwt.decode(token, jwt.PyJWK(jwk).key, algorithms=[jwk["alg"]], issuer="artel-auth")
+
+
+@pytest.mark.parametrize("algorithm", ["ES256", "EdDSA"])
+def test_token_verifiable_by_jwks(algorithm):
+    manager = JWTManager(KeyRing(algorithm=algorithm).load())
+    token = manager.create_access_token({"user_id": "u1"})
+
+    assert jwt.get_unverified_header(token)["alg"] == algorithm
+    assert manager.decode_access_token(token)["user_id"] == "u1"
+    assert verify_with_jwks(token, manager.key_ring.jwks())["user_id"] == "u1"
+
+    with pytest.raises(jwt.InvalidTokenError):
+        manager.decode_refresh_token(token)
+
+
+def test_rotation_keeps_old_tokens_valid_until_grace_ends():
+    clock = FakeClock()
+    ring = KeyRing(rotation_days=1, verify_grace_seconds=3 * 24 * 3600, clock=clock).load()
+    manager = JWTManager(ring)
+    old_kid = ring.active.kid
+    old_token = manager.create_refresh_token({"user_id": "u1"}, expires_delta=None)
+
+    clock.now += 25 * 3600
+    new_token = manager.create_access_token({"user_id": "u1"})
+    assert ring.active.kid != old_kid
+    assert jwt.get_unverified_header(new_token)["kid"] == ring.active.kid
+    assert [key["kid"] for key in ring.jwks()["keys"]] == [ring.active.kid, old_kid]
+    assert manager.decode_refresh_token(old_token)["user_id"] == "u1"
+
+    # Старый ключ заменен больше grace назад - из JWKS он пропадает
+    clock.now += 3 * 24 * 3600
+    assert old_kid not in [key["kid"] for key in ring.jwks()["keys"]]
+    assert ring.get_key(old_kid) is None
+
+
+def test_keys_shared_between_workers_through_keys_dir(tmp_path):
+    first = KeyRing(keys_dir=str(tmp_path)).load()
+    token = JWTManager(first).create_access_token({"user_id": "u1"})
+
+    # Второй воркер подхватывает тот же ключ, а не генерирует свой
+    second = KeyRing(keys_dir=str(tmp_path)).load()
+    assert second.active.kid == first.active.kid
+    assert JWTManager(second).decode_access_token(token)["user_id"] == "u1"
+    assert (tmp_path / f"{first.active.kid}.pem").stat().st_mode & 0o777 == 0o600
+
+    # Ключ, созданный первым воркером после старта второго, находится по kid
+    rotated = first.rotate()
+    second._last_reload = 0
+    assert second.get_key(rotated.kid).kid == rotated.kid
+
+
+def test_keys_are_loaded_on_startup_not_on_construction(tmp_path):
+    keys_dir = tmp_path / "jwt-keys"
+    ring = KeyRing(keys_dir=str(keys_dir))
+
+    # Конструктор (импорт модуля) не трогает диск
+    assert not keys_dir.exists()
+    with pytest.raises(RuntimeError):
+        ring.active
+    assert ring.jwks() == {"keys": []}
+
+    ring.load()
+    assert [path.stem for path in keys_dir.glob("*.pem")] == [ring.active.kid]
+
+
+def test_foreign_and_unsigned_tokens_rejected():
+    manager = JWTManager(KeyRing().load())
+    other = JWTManager(KeyRing().load())
+
+    with pytest.raises(jwt.InvalidTokenError):
+        manager.decode_access_token(other.create_access_token({"user_id": "u1"}))
+
+    unsigned = jwt.encode({"user_id": "u1", "type": "access"}, None, algorithm="none")
+    with pytest.raises(jwt.InvalidTokenError):
+        manager.decode_access_token(unsigned)
+
+
+@pytest.mark.performance
+def test_verify_cost_per_algorithm():
+    """Бенчмарк: стоимость локальной проверки подписи по алгоритмам"""
+    payload = {"user_id": "u1", "session_id": "s1", "exp": int(time.time()) + 600}
+    secret = "x" * 32
+    results = {}
+
+    for algorithm in ("HS256", "ES256", "EdDSA"):
+        if algorithm == "HS256":
+            token = jwt.encode(payload, secret, algorithm=algorithm)
+            key = secret
+        else:
+            signing = KeyRing(algorithm=algorithm).load().active
+            token = jwt.encode(payload, signing.private_key, algorithm=algorithm)
+            key = signing.public_key
+
+        rounds = 2000
+        started = time.perf_counter()
+        for _ in range(rounds):
+            jwt.decode(token, key, algorithms=[algorithm])
+        results[algorithm] = (time.perf_counter() - started) / rounds * 1_000_000
+
+    print("\n📊 JWT verify: " + ", ".join(f"{alg} {us:.0f} µs" for alg, us in results.items()))
+    # Проверка на месте должна укладываться в доли миллисекунды
+    assert results["ES256"] < 1000
+    assert results["EdDSA"] < 1000
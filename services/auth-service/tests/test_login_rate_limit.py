@@ -0,0 +1,215 @@
+"""
+Tests for the in-memory login rate limiter and lockout audit flush
+"""
+
+import time
+from uuid import uuid4
+
+import databases
+import pytest
+import pytest_asyncio
+import sqlalchemy as sa
+
+from src.core import rate_limit
+from src.core.rate_limit import LoginRateLimiter, MemoryRateLimitBackend, RedisRateLimitBackend
+from src.models.database import metadata, ip_restrictions_table
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1_700_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def limiter(clock):
+    return LoginRateLimiter(
+        MemoryRateLimitBackend(clock=clock),
+        max_user_attempts=5,
+        max_ip_attempts=20,
+        window_seconds=900,
+        lockout_seconds=900,
+        clock=clock,
+    )
+
+
+@pytest.mark.asyncio
+async def test_username_locked_after_max_attempts(limiter):
+    for _ in range(4):
+        assert await limiter.register_failure("10.0.0.1", "alice") is False
+    assert await limiter.is_allowed("10.0.0.1", "alice")
+
+    assert await limiter.register_failure("10.0.0.1", "alice") is True
+    assert not await limiter.is_allowed("10.0.0.1", "alice")
+    # Тот же username с другого IP тоже заблокирован, другой username - нет
+    assert not await limiter.is_allowed("10.0.0.2", "ALICE ")
+    assert await limiter.is_allowed("10.0.0.1", "bob")
+
+
+@pytest.mark.asyncio
+async def test_ip_locked_across_usernames(limiter):
+    for i in range(20):
+        await limiter.register_failure("10.0.0.9", f"user{i}")
+
+    assert not await limiter.is_allowed("10.0.0.9", "someone-new")
+    assert await limiter.is_allowed("10.0.0.10", "someone-new")
+
+
+@pytest.mark.asyncio
+async def test_lockout_expires(limiter, clock):
+    for _ in range(5):
+        await limiter.register_failure("10.0.0.1", "alice")
+    assert not await limiter.is_allowed(None, "alice")
+
+    clock.now += 901
+    assert await limiter.is_allowed(None, "alice")
+
+
+@pytest.mark.asyncio
+async def test_sliding_window_forgets_old_failures(limiter, clock):
+    for _ in range(4):
+        await limiter.register_failure(None, "alice")
+
+    # Через два окна старые попытки не учитываются
+    clock.now += 1800
+    for _ in range(4):
+        assert await limiter.register_failure(None, "alice") is False
+
+
+@pytest.mark.asyncio
+async def test_success_resets_counters(limiter):
+    for _ in range(4):
+        await limiter.register_failure("10.0.0.1", "alice")
+    await limiter.register_success("10.0.0.1", "alice")
+
+    for _ in range(4):
+        assert await limiter.register_failure("10.0.0.1", "alice") is False
+
+
+@pytest.mark.asyncio
+async def test_success_does_not_reset_ip_counter(limiter):
+    """Удачный вход в свой аккаунт не обнуляет подбор паролей с того же IP"""
+    for i in range(19):
+        await limiter.register_failure("10.0.0.1", f"victim{i}")
+        await limiter.register_success("10.0.0.1", "attacker")
+        assert await limiter.is_allowed("10.0.0.1", "attacker")
+
+    assert await limiter.register_failure("10.0.0.1", "victim19") is True
+    assert not await limiter.is_allowed("10.0.0.1", "attacker")
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_bounded(clock):
+    backend = MemoryRateLimitBackend(max_keys=100, clock=clock)
+    for i in range(1000):
+        await backend.hit(f"ip:{i}", 900)
+
+    assert len(backend._windows) <= 100
+
+    # Вытесняется ключ, по которому дольше всех не было попыток
+    await backend.hit("ip:hot", 900)
+    for i in range(99):
+        await backend.hit(f"ip:new{i}", 900)
+        await backend.hit("ip:hot", 900)
+    assert backend._windows["ip:hot"][1] == 100
+
+
+@pytest_asyncio.fixture
+async def database(database_url):
+    engine = sa.create_engine(database_url)
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+    engine.dispose()
+
+    db = databases.Database(database_url)
+    await db.connect()
+    try:
+        yield db
+    finally:
+        await db.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_lockouts_flushed_in_one_batch_and_restored(database):
+    limiter = LoginRateLimiter(MemoryRateLimitBackend(), max_ip_attempts=3)
+    for ip in ("10.0.0.1", "10.0.0.2"):
+        for _ in range(5):
+            await limiter.register_failure(ip)
+
+    assert await limiter.flush_lockouts(database) == 2
+    assert await limiter.flush_lockouts(database) == 0
+
+    rows = await database.fetch_all(ip_restrictions_table.select())
+    assert {str(row["ip_address"]) for row in rows} == {"10.0.0.1", "10.0.0.2"}
+    assert all(row["failed_attempts"] == 5 for row in rows)
+
+    # Новый процесс (пустая память) подхватывает активные блокировки из таблицы
+    restarted = LoginRateLimiter(MemoryRateLimitBackend(), max_ip_attempts=3)
+    assert await restarted.load_lockouts(database) == 2
+    assert not await restarted.is_allowed("10.0.0.1")
+
+
+@pytest.mark.performance
+@pytest.mark.asyncio
+async def test_limiter_throughput():
+    """Бенчмарк: лимитер должен держать не меньше 10k попыток/с без обращения к БД"""
+    # ~67k разных ключей при max_keys=10k: большая часть попыток идет через вытеснение
+    backend = MemoryRateLimitBackend(max_keys=10_000)
+    limiter = LoginRateLimiter(backend)
+    attempts = 100_000
+
+    started = time.perf_counter()
+    for i in range(attempts):
+        ip = f"10.{i % 250}.{(i // 250) % 250}.1"
+        username = f"user{i % 5000}"
+        if await limiter.is_allowed(ip, username):
+            await limiter.register_failure(ip, username)
+    elapsed = time.perf_counter() - started
+
+    rate = attempts / elapsed
+    print(f"\n📊 Login limiter: {rate:,.0f} attempts/s")
+    assert len(backend._windows) <= backend.max_keys
+    assert rate >= 10_000
+
+
+@pytest.mark.asyncio
+async def test_redis_backend_selected_from_settings(monkeypatch):
+    """Без пакета redis RATE_LIMIT_BACKEND=redis падает здесь, а не при старте сервиса"""
+    monkeypatch.setattr(rate_limit.settings, "RATE_LIMIT_BACKEND", "redis")
+
+    limiter = rate_limit.create_login_limiter()
+
+    assert isinstance(limiter.backend, RedisRateLimitBackend)
+    await limiter.backend.close()
+
+
+@pytest.mark.integration
+@pytest.mark.asyncio
+async def test_redis_backend_locks_and_resets(redis_url, clock):
+    backend = RedisRateLimitBackend(redis_url, prefix=f"test:{uuid4()}:", clock=clock)
+    limiter = LoginRateLimiter(
+        backend, max_user_attempts=3, max_ip_attempts=20,
+        window_seconds=900, lockout_seconds=900, clock=clock,
+    )
+    try:
+        for _ in range(3):
+            assert await limiter.is_allowed("10.0.0.1", "alice")
+            await limiter.register_failure("10.0.0.1", "alice")
+        assert not await limiter.is_allowed("10.0.0.1", "alice")
+        assert await limiter.is_allowed("10.0.0.1", "bob")
+        assert await backend.hit("ip:10.0.0.1", 900) == 4
+
+        # Успешный вход снимает блокировку и счетчик username, но не IP
+        await limiter.register_success("10.0.0.1", "alice")
+        assert await limiter.is_allowed("10.0.0.1", "alice")
+        assert await backend.hit("user:alice", 900) == 1
+        assert await backend.hit("ip:10.0.0.1", 900) == 5
+    finally:
+        await backend.close()
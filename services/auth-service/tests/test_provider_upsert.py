@@ -0,0 +1,102 @@
+"""
+Tests for single round-trip provider sign-in (AuthService.get_or_create_*_user)
+"""
+
+import asyncio
+
+import databases
+import pytest
+import pytest_asyncio
+import sqlalchemy as sa
+
+from src.models.database import metadata, users_table, auth_providers_table
+from src.services.auth import AuthService
+
+
+@pytest_asyncio.fixture
+async def auth_service(database_url):
+    """AuthService поверх чистой схемы тестовой БД"""
+    engine = sa.create_engine(database_url)
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+    engine.dispose()
+
+    database = databases.Database(database_url, min_size=1, max_size=20)
+    await database.connect()
+    try:
+        yield AuthService(database)
+    finally:
+        await database.disconnect()
+
+
+def telegram_payload(telegram_id: int, username: str = "racer") -> dict:
+    return {
+        "user": {"id": telegram_id, "username": username, "first_name": "Race"},
+        "auth_date": "1700000000",
+    }
+
+
+async def count_rows(service: AuthService, table) -> int:
+    return await service.db.fetch_val(sa.select(sa.func.count()).select_from(table))
+
+
+@pytest.mark.asyncio
+async def test_telegram_first_login_creates_user_and_provider(auth_service):
+    user = await auth_service.get_or_create_telegram_user(telegram_payload(101))
+
+    assert user["username"] == "racer"
+    assert await count_rows(auth_service, users_table) == 1
+    assert await count_rows(auth_service, auth_providers_table) == 1
+
+    again = await auth_service.get_or_create_telegram_user(telegram_payload(101))
+    assert again["id"] == user["id"]
+    assert await count_rows(auth_service, users_table) == 1
+
+
+@pytest.mark.asyncio
+async def test_telegram_username_collision_uses_fallback(auth_service):
+    first = await auth_service.get_or_create_telegram_user(telegram_payload(1, "same"))
+    second = await auth_service.get_or_create_telegram_user(telegram_payload(2, "same"))
+
+    assert first["id"] != second["id"]
+    assert second["username"].startswith("tg_2_")
+
+
+@pytest.mark.asyncio
+async def test_parallel_first_logins_create_single_account(auth_service):
+    results = await asyncio.gather(*[
+        auth_service.get_or_create_telegram_user(telegram_payload(777))
+        for _ in range(16)
+    ])
+
+    assert {row["id"] for row in results} == {results[0]["id"]}
+    assert await count_rows(auth_service, users_table) == 1
+    assert await count_rows(auth_service, auth_providers_table) == 1
+
+
+@pytest.mark.asyncio
+async def test_google_links_provider_to_existing_email(auth_service):
+    telegram_user = await auth_service.get_or_create_telegram_user(telegram_payload(5, "player"))
+    await auth_service.update_user(telegram_user["id"], {"email": "player@example.com"})
+
+    google_user = await auth_service.get_or_create_google_user({
+        "sub": "google-5",
+        "email": "player@example.com",
+        "given_name": "Player",
+    })
+
+    assert google_user["id"] == telegram_user["id"]
+    assert await count_rows(auth_service, users_table) == 1
+    assert await count_rows(auth_service, auth_providers_table) == 2
+
+
+@pytest.mark.asyncio
+async def test_parallel_google_first_logins_create_single_account(auth_service):
+    payload = {"sub": "google-9", "email": "new@example.com", "given_name": "New"}
+    results = await asyncio.gather(*[
+        auth_service.get_or_create_google_user(payload) for _ in range(8)
+    ])
+
+    assert {row["id"] for row in results} == {results[0]["id"]}
+    assert results[0]["username"] == "new"
+    assert await count_rows(auth_service, users_table) == 1
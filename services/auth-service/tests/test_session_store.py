@@ -0,0 +1,121 @@
+"""
+Tests for the token-hash keyed session store
+"""
+
+import asyncio
+
+import databases
+import pytest
+import pytest_asyncio
+import sqlalchemy as sa
+
+from src.core.config import settings
+from src.core.keys import KeyRing
+from src.core.security import JWTManager, hash_token
+from src.models.database import metadata, user_sessions_table
+from src.services.audit import AuthAuditWriter
+from src.services.auth import AuthService
+
+
+@pytest_asyncio.fixture
+async def auth_service(database_url):
+    engine = sa.create_engine(database_url)
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+    engine.dispose()
+
+    database = databases.Database(database_url, min_size=1, max_size=10)
+    await database.connect()
+    try:
+        yield AuthService(database, audit=AuthAuditWriter(database))
+    finally:
+        await database.disconnect()
+
+
+@pytest.fixture
+def jwt_manager():
+    return JWTManager(KeyRing().load())
+
+
+async def login(service: AuthService, jwt_manager: JWTManager, user_id):
+    data = {"user_id": str(user_id)}
+    access_token = jwt_manager.create_access_token(data=data)
+    refresh_token = jwt_manager.create_refresh_token(data=data)
+    session = await service.create_session(user_id, access_token, refresh_token)
+    return session, refresh_token
+
+
+@pytest_asyncio.fixture
+async def user(auth_service):
+    return await auth_service.get_or_create_telegram_user({"user": {"id": 1, "username": "mobile"}})
+
+
+@pytest.mark.asyncio
+async def test_tokens_stored_as_hashes(auth_service, jwt_manager, user):
+    session, refresh_token = await login(auth_service, jwt_manager, user["id"])
+
+    assert session["refresh_token_hash"] == hash_token(refresh_token)
+    assert refresh_token not in dict(session).values()
+
+
+@pytest.mark.asyncio
+async def test_rotation_returns_user_and_invalidates_old_token(auth_service, jwt_manager, user):
+    session, refresh_token = await login(auth_service, jwt_manager, user["id"])
+    data = {"user_id": str(user["id"])}
+    new_access = jwt_manager.create_access_token(data=data)
+    new_refresh = jwt_manager.create_refresh_token(data=data)
+
+    rotated = await auth_service.rotate_session(user["id"], refresh_token, new_access, new_refresh)
+
+    assert rotated["id"] == user["id"]
+    assert rotated["session_id"] == session["id"]
+    # Старый refresh токен больше не подходит, новый - подходит
+    assert await auth_service.rotate_session(user["id"], refresh_token, new_access, new_refresh) is None
+    stored = await auth_service.get_session(session["id"])
+    assert stored["refresh_token_hash"] == hash_token(new_refresh)
+
+
+@pytest.mark.asyncio
+async def test_concurrent_rotation_wins_once(auth_service, jwt_manager, user):
+    _, refresh_token = await login(auth_service, jwt_manager, user["id"])
+    data = {"user_id": str(user["id"])}
+
+    results = await asyncio.gather(*[
+        auth_service.rotate_session(
+            user["id"], refresh_token,
+            jwt_manager.create_access_token(data=data),
+            jwt_manager.create_refresh_token(data=data),
+        )
+        for _ in range(5)
+    ])
+
+    assert sum(1 for row in results if row) == 1
+
+
+@pytest.mark.asyncio
+async def test_rotation_rejected_for_revoked_session_or_other_user(auth_service, jwt_manager, user):
+    session, refresh_token = await login(auth_service, jwt_manager, user["id"])
+    other = await auth_service.get_or_create_telegram_user({"user": {"id": 2, "username": "other"}})
+
+    assert await auth_service.rotate_session(other["id"], refresh_token, "a", "b") is None
+
+    await auth_service.revoke_session(session["id"])
+    assert await auth_service.rotate_session(user["id"], refresh_token, "a", "b") is None
+
+
+@pytest.mark.asyncio
+async def test_oldest_sessions_evicted_over_limit(auth_service, jwt_manager, user):
+    created = []
+    for _ in range(settings.MAX_ACTIVE_SESSIONS + 2):
+        session, _ = await login(auth_service, jwt_manager, user["id"])
+        created.append(session["id"])
+
+    active = await auth_service.get_user_active_sessions(user["id"])
+    assert len(active) == settings.MAX_ACTIVE_SESSIONS
+    assert {row["id"] for row in active} == set(created[-settings.MAX_ACTIVE_SESSIONS:])
+
+    revoked = await auth_service.db.fetch_val(
+        sa.select(sa.func.count()).select_from(user_sessions_table)
+        .where(user_sessions_table.c.status == "revoked")
+    )
+    assert revoked == 2
@@ -0,0 +1,147 @@
+"""
+Tests for TelegramDataValidator (cached secret, freshness, replay cache)
+"""
+
+import hashlib
+import hmac
+import json
+import time
+import urllib.parse
+
+import pytest
+
+from src.core.security import TelegramDataValidator
+
+BOT_TOKEN = "123456:TEST-token"
+
+
+def sign_init_data(fields: dict, bot_token: str = BOT_TOKEN) -> str:
+    """Сборка init_data так же, как это делает Telegram"""
+    check_string = "\n".join(f"{key}={fields[key]}" for key in sorted(fields))
+    secret_key = hmac.new(b"WebAppData", bot_token.encode(), hashlib.sha256).digest()
+    signature = hmac.new(secret_key, check_string.encode(), hashlib.sha256).hexdigest()
+    return urllib.parse.urlencode({**fields, "hash": signature})
+
+
+def make_init_data(user_id: int = 42, auth_date: int = None, **extra) -> str:
+    fields = {
+        "auth_date": str(auth_date if auth_date is not None else int(time.time())),
+        "query_id": "AAH-test",
+        "user": json.dumps({"id": user_id, "first_name": "Иван", "username": "ivan"}),
+        **extra,
+    }
+    return sign_init_data(fields)
+
+
+def test_valid_init_data_is_accepted():
+    validator = TelegramDataValidator(BOT_TOKEN)
+
+    result = validator.validate_init_data(make_init_data(start_param="room7"))
+
+    assert result["user"]["id"] == 42
+    assert result["user"]["first_name"] == "Иван"
+    assert result["start_param"] == "room7"
+    assert validator.stats["validated"] == 1
+
+
+def test_tampered_init_data_is_rejected():
+    validator = TelegramDataValidator(BOT_TOKEN)
+    tampered = make_init_data().replace("ivan", "admin")
+
+    assert validator.validate_init_data(tampered) is None
+
+
+def test_wrong_bot_token_is_rejected():
+    validator = TelegramDataValidator("999:other")
+
+    assert validator.validate_init_data(make_init_data()) is None
+
+
+def test_stale_and_future_auth_date_are_rejected():
+    validator = TelegramDataValidator(BOT_TOKEN, max_age_seconds=60)
+    now = int(time.time())
+
+    assert validator.validate_init_data(make_init_data(auth_date=now - 61)) is None
+    assert validator.validate_init_data(make_init_data(auth_date=now + 3600)) is None
+
+
+def test_missing_auth_date_is_rejected():
+    validator = TelegramDataValidator(BOT_TOKEN)
+    init_data = sign_init_data({"user": json.dumps({"id": 1})})
+
+    assert validator.validate_init_data(init_data) is None
+
+
+def test_repeat_is_served_from_cache():
+    validator = TelegramDataValidator(BOT_TOKEN)
+    init_data = make_init_data()
+
+    first = validator.validate_init_data(init_data)
+    second = validator.validate_init_data(init_data)
+
+    assert first == second
+    assert validator.stats == {"validated": 1, "cache_hits": 1, "replays_rejected": 0, "rejected": 0}
+
+
+def test_repeat_is_rejected_when_replays_forbidden():
+    validator = TelegramDataValidator(BOT_TOKEN, reject_replays=True)
+    init_data = make_init_data()
+
+    assert validator.validate_init_data(init_data) is not None
+    assert validator.validate_init_data(init_data) is None
+    assert validator.stats["replays_rejected"] == 1
+
+
+def test_cached_hash_with_different_payload_is_fully_checked():
+    validator = TelegramDataValidator(BOT_TOKEN)
+    init_data = make_init_data()
+    validator.validate_init_data(init_data)
+
+    forged = init_data.replace("ivan", "admin")
+
+    assert validator.validate_init_data(forged) is None
+
+
+def test_cache_entry_expires_with_payload():
+    now = [time.time()]
+    validator = TelegramDataValidator(BOT_TOKEN, max_age_seconds=60, clock=lambda: now[0])
+    init_data = make_init_data(auth_date=int(now[0]))
+
+    assert validator.validate_init_data(init_data) is not None
+    now[0] += 120
+
+    assert validator.validate_init_data(init_data) is None
+    assert validator.stats["cache_hits"] == 0
+
+
+def test_replay_cache_is_bounded():
+    validator = TelegramDataValidator(BOT_TOKEN, replay_cache_size=10)
+
+    for user_id in range(1, 51):
+        assert validator.validate_init_data(make_init_data(user_id=user_id)) is not None
+
+    assert len(validator._seen) == 10
+
+
+@pytest.mark.performance
+def test_validation_throughput():
+    """Бенчмарк: полная проверка против повторов из кэша"""
+    validator = TelegramDataValidator(BOT_TOKEN, replay_cache_size=5000)
+    payloads = [make_init_data(user_id=user_id) for user_id in range(1, 2001)]
+
+    started = time.perf_counter()
+    for init_data in payloads:
+        assert validator.validate_init_data(init_data) is not None
+    cold_elapsed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    for init_data in payloads:
+        assert validator.validate_init_data(init_data) is not None
+    cached_elapsed = time.perf_counter() - started
+
+    cold_rate = len(payloads) / cold_elapsed
+    cached_rate = len(payloads) / cached_elapsed
+    print(f"\nTelegram init_data: {cold_rate:,.0f} validations/s, {cached_rate:,.0f} cached repeats/s")
+
+    assert validator.stats["cache_hits"] == len(payloads)
+    assert cached_rate > cold_rate
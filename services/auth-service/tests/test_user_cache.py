@@ -0,0 +1,174 @@
+"""
+Tests for the get_current_user cache and token-version revocation
+"""
+
+import json
+
+import databases
+import pytest
+import pytest_asyncio
+import sqlalchemy as sa
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+
+from src.api.auth import build_token_data
+from src.api.users import get_current_user
+from src.core.keys import KeyRing
+from src.core.security import JWTManager
+from src.models.database import metadata
+from src.services.audit import AuthAuditWriter
+from src.services.auth import AuthService
+from src.services.user_cache import UserCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeMessage:
+    def __init__(self, payload: dict):
+        self.body = json.dumps(payload).encode()
+
+    def process(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+def test_ttl_expiry():
+    clock = FakeClock()
+    cache = UserCache(ttl_seconds=10, clock=clock)
+    cache.put({"id": "u1", "is_active": True})
+
+    assert cache.get("u1")["is_active"] is True
+    clock.now += 11
+    assert cache.get("u1") is None
+
+
+def test_lru_eviction():
+    cache = UserCache(max_size=2)
+    cache.put({"id": "u1"})
+    cache.put({"id": "u2"})
+    cache.get("u1")
+    cache.put({"id": "u3"})
+
+    assert cache.get("u2") is None
+    assert cache.get("u1") is not None
+    assert cache.stats["evictions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_user_events_message_invalidates():
+    cache = UserCache()
+    cache.put({"id": "u1"})
+
+    await cache._on_message(FakeMessage({"event_type": "invalidated", "user_id": "u1"}))
+
+    assert cache.get("u1") is None
+
+
+@pytest_asyncio.fixture
+async def auth_service(database_url):
+    engine = sa.create_engine(database_url)
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+    engine.dispose()
+
+    database = databases.Database(database_url)
+    await database.connect()
+    try:
+        yield AuthService(database, audit=AuthAuditWriter(database), cache=UserCache())
+    finally:
+        await database.disconnect()
+
+
+@pytest_asyncio.fixture
+async def user(auth_service):
+    return await auth_service.get_or_create_telegram_user({"user": {"id": 7, "username": "cached"}})
+
+
+async def current_user(service: AuthService, jwt_manager: JWTManager, token: str):
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    return await get_current_user(credentials, service, jwt_manager)
+
+
+@pytest.mark.asyncio
+async def test_repeated_lookups_served_from_cache(auth_service, user):
+    await auth_service.get_user_cached(user["id"])
+    await auth_service.get_user_cached(user["id"])
+
+    assert auth_service.user_cache.stats == {
+        "hits": 1, "misses": 1, "invalidations": 0, "evictions": 0
+    }
+
+
+@pytest.mark.asyncio
+async def test_update_user_invalidates(auth_service, user):
+    await auth_service.get_user_cached(user["id"])
+    await auth_service.update_user(user["id"], {"first_name": "Renamed"})
+
+    refreshed = await auth_service.get_user_cached(user["id"])
+    assert refreshed["first_name"] == "Renamed"
+
+
+@pytest.mark.asyncio
+async def test_revoke_all_sessions_rejects_issued_tokens(auth_service, user):
+    jwt_manager = JWTManager(KeyRing().load())
+    token = jwt_manager.create_access_token(data=build_token_data(user, "s1"))
+
+    assert (await current_user(auth_service, jwt_manager, token))["id"] == user["id"]
+
+    await auth_service.revoke_all_user_sessions(user["id"])
+    with pytest.raises(HTTPException) as exc:
+        await current_user(auth_service, jwt_manager, token)
+    assert exc.value.status_code == 401
+
+    refreshed = await auth_service.get_user(user["id"])
+    new_token = jwt_manager.create_access_token(data=build_token_data(refreshed, "s2"))
+    assert (await current_user(auth_service, jwt_manager, new_token))["token_version"] == 1
+
+
+@pytest.mark.asyncio
+async def test_disabled_user_rejected_with_issued_token(auth_service, user):
+    jwt_manager = JWTManager(KeyRing().load())
+    token_data = build_token_data(user, "s1")
+    token = jwt_manager.create_access_token(data=token_data)
+    assert set(token_data) == {"user_id", "session_id", "tv"}
+
+    assert (await current_user(auth_service, jwt_manager, token))["id"] == user["id"]
+
+    # is_active берется из закэшированного пользователя; update_user сбрасывает кэш
+    await auth_service.update_user(user["id"], {"is_active": False})
+    with pytest.raises(HTTPException):
+        await current_user(auth_service, jwt_manager, token)
+
+
+class FakeRabbitMQ:
+    def __init__(self):
+        self.events = []
+
+    async def publish_user_event(self, event_type, user_id, data):
+        self.events.append((event_type, user_id, data))
+
+
+@pytest.mark.asyncio
+async def test_update_user_publishes_user_updated(auth_service, user):
+    rabbitmq = FakeRabbitMQ()
+    auth_service.user_cache._rabbitmq = rabbitmq
+
+    await auth_service.update_user(user["id"], {"first_name": "  Вася "})
+    await auth_service.update_user(user["id"], {"first_name": None})
+
+    assert [(event_type, data["display_name"]) for event_type, _, data in rabbitmq.events] == [
+        ("updated", "Вася"),
+        ("updated", "cached"),
+    ]
+    assert rabbitmq.events[0][1] == str(user["id"])
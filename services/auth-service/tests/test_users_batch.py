@@ -0,0 +1,58 @@
+"""
+Tests for bulk public profile resolution (POST /users/batch)
+"""
+
+from uuid import uuid4
+
+import databases
+import pytest
+import pytest_asyncio
+import sqlalchemy as sa
+
+from src.api.users import get_users_batch
+from src.models.database import metadata
+from src.models.schemas import UserBatchRequest
+from src.services.audit import AuthAuditWriter
+from src.services.auth import AuthService
+
+
+@pytest_asyncio.fixture
+async def auth_service(database_url):
+    engine = sa.create_engine(database_url)
+    metadata.drop_all(engine)
+    metadata.create_all(engine)
+    engine.dispose()
+
+    database = databases.Database(database_url)
+    await database.connect()
+    try:
+        yield AuthService(database, audit=AuthAuditWriter(database))
+    finally:
+        await database.disconnect()
+
+
+@pytest.mark.asyncio
+async def test_batch_returns_profiles_and_missing_ids(auth_service):
+    users = [
+        await auth_service.get_or_create_telegram_user(
+            {"user": {"id": i, "username": f"player{i}", "first_name": "Name" if i % 2 else None}}
+        )
+        for i in range(1, 6)
+    ]
+    unknown = uuid4()
+    requested = [user["id"] for user in users] + [unknown, users[0]["id"]]
+
+    response = await get_users_batch(
+        UserBatchRequest(user_ids=requested), current_user=dict(users[0]), auth_service=auth_service
+    )
+
+    assert {profile.id for profile in response.users} == {user["id"] for user in users}
+    assert response.missing == [unknown]
+    names = {profile.username: profile.display_name for profile in response.users}
+    assert names["player1"] == "Name"
+    assert names["player2"] == "player2"
+
+
+def test_batch_size_is_bounded():
+    with pytest.raises(ValueError):
+        UserBatchRequest(user_ids=[uuid4() for _ in range(501)])
@@ -0,0 +1,92 @@
+"""Typed columns for hot event_data fields
+
+Revision ID: 4b7e1d9a0c26
+Revises: cdff118edbab
+Create Date: 2026-10-19 12:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b7e1d9a0c26'
+down_revision: Union[str, Sequence[str], None] = 'cdff118edbab'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+BACKFILL_BATCH_SIZE = 5000
+
+# Число из event_data->>'name' или 0, если поля нет или оно не число
+NUMERIC_FIELD = r"""
+    CASE WHEN e.event_data->>'{name}' ~ '^\s*-?[0-9]+(\.[0-9]+)?\s*$'
+         THEN (e.event_data->>'{name}')::numeric ELSE 0 END
+"""
+
+# Заполнение колонок по id > :last_id пачками (keyset по первичному ключу)
+BACKFILL_BATCH = f"""
+    WITH batch AS (
+        SELECT id FROM game_events
+        WHERE id > CAST(:last_id AS uuid)
+        ORDER BY id
+        LIMIT :batch_size
+    ), updated AS (
+        UPDATE game_events AS e
+        SET points = round({NUMERIC_FIELD.format(name='points')})::integer,
+            money = {NUMERIC_FIELD.format(name='money')},
+            penalty = {NUMERIC_FIELD.format(name='penalty')}
+        FROM batch
+        WHERE e.id = batch.id
+          AND e.event_data ?| array['points', 'money', 'penalty']
+    )
+    SELECT id FROM batch ORDER BY id DESC LIMIT 1
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # JSON -> JSONB (таблица может быть уже создана из моделей с JSONB)
+    op.execute("""
+        DO $$ BEGIN
+            IF (SELECT data_type FROM information_schema.columns
+                WHERE table_name = 'game_events' AND column_name = 'event_data') = 'json' THEN
+                ALTER TABLE game_events ALTER COLUMN event_data TYPE JSONB USING event_data::jsonb;
+            END IF;
+        END $$;
+    """)
+
+    # NOT NULL DEFAULT 0 добавляется без перезаписи таблицы (PostgreSQL 11+)
+    op.execute("ALTER TABLE game_events ADD COLUMN IF NOT EXISTS points INTEGER NOT NULL DEFAULT 0")
+    op.execute("ALTER TABLE game_events ADD COLUMN IF NOT EXISTS money NUMERIC(10, 2) NOT NULL DEFAULT 0")
+    op.execute("ALTER TABLE game_events ADD COLUMN IF NOT EXISTS penalty NUMERIC(10, 2) NOT NULL DEFAULT 0")
+
+    # Заполнение истории пачками, чтобы не держать блокировку всей таблицы одним UPDATE
+    connection = op.get_bind()
+    last_id = '00000000-0000-0000-0000-000000000000'
+    while True:
+        batch_last_id = connection.execute(
+            sa.text(BACKFILL_BATCH),
+            {"last_id": last_id, "batch_size": BACKFILL_BATCH_SIZE}
+        ).scalar()
+        if batch_last_id is None:
+            break
+        last_id = str(batch_last_id)
+
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_game_events_game_totals
+        ON game_events (game_id, participant_id)
+        INCLUDE (event_type, sequence_number, points, money, penalty)
+        WHERE is_deleted = false
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_game_events_game_totals', table_name='game_events')
+    op.drop_column('game_events', 'penalty')
+    op.drop_column('game_events', 'money')
+    op.drop_column('game_events', 'points')
+    op.execute("ALTER TABLE game_events ALTER COLUMN event_data TYPE JSON USING event_data::json")
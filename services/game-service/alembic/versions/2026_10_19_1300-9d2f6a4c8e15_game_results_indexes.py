@@ -0,0 +1,31 @@
+"""Indexes for game_results lookups
+
+Revision ID: 9d2f6a4c8e15
+Revises: 4b7e1d9a0c26
+Create Date: 2026-10-19 13:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9d2f6a4c8e15'
+down_revision: Union[str, Sequence[str], None] = '4b7e1d9a0c26'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Те же имена, что у индексов моделей: базы из create_all и из миграций совпадают
+    op.execute("CREATE INDEX IF NOT EXISTS idx_results_game ON game_results (game_id)")
+    # Сводка сессии (GROUP BY participant_id)
+    op.execute("CREATE INDEX IF NOT EXISTS idx_results_participant ON game_results (participant_id)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Индексы объявлены в моделях и раньше этой ревизии (create_all) - не удаляем
+    pass
@@ -0,0 +1,63 @@
+"""Store money as integer kopecks
+
+Revision ID: a3c5e7f9b1d2
+Revises: 9d2f6a4c8e15
+Create Date: 2026-10-19 14:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c5e7f9b1d2'
+down_revision: Union[str, Sequence[str], None] = '9d2f6a4c8e15'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (таблица, старая колонка в рублях, новая колонка в копейках, тип)
+MONEY_COLUMNS = [
+    ("session_participants", "session_balance_rubles", "session_balance_kopecks", "BIGINT"),
+    ("game_events", "money", "money_kopecks", "BIGINT"),
+    ("game_events", "penalty", "penalty_kopecks", "BIGINT"),
+    ("game_results", "rubles_earned", "earned_kopecks", "BIGINT"),
+    ("game_results", "rubles_paid", "paid_kopecks", "BIGINT"),
+    ("game_results", "net_result_rubles", "net_result_kopecks", "BIGINT"),
+    ("game_results", "point_value_rubles", "point_value_kopecks", "INTEGER"),
+]
+
+# Старые типы и nullable-колонки для downgrade
+RUBLE_TYPES = {
+    "point_value_rubles": "NUMERIC(5, 2)",
+}
+NULLABLE_RUBLES = {"session_balance_rubles", "rubles_earned", "rubles_paid", "net_result_rubles"}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Переименование сохраняет ix_game_events_game_totals (INCLUDE money, penalty)
+    for table, rubles, kopecks, column_type in MONEY_COLUMNS:
+        op.execute(f"ALTER TABLE {table} RENAME COLUMN {rubles} TO {kopecks}")
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN {kopecks} DROP DEFAULT")
+        op.execute(
+            f"ALTER TABLE {table} ALTER COLUMN {kopecks} TYPE {column_type} "
+            f"USING round(COALESCE({kopecks}, 0) * 100)::{column_type}"
+        )
+        if kopecks != "point_value_kopecks":
+            op.execute(f"ALTER TABLE {table} ALTER COLUMN {kopecks} SET DEFAULT 0")
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN {kopecks} SET NOT NULL")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, rubles, kopecks, column_type in reversed(MONEY_COLUMNS):
+        ruble_type = RUBLE_TYPES.get(rubles, "NUMERIC(10, 2)")
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN {kopecks} DROP DEFAULT")
+        op.execute(f"ALTER TABLE {table} ALTER COLUMN {kopecks} TYPE {ruble_type} USING {kopecks} / 100.0")
+        if rubles != "point_value_rubles":
+            op.execute(f"ALTER TABLE {table} ALTER COLUMN {kopecks} SET DEFAULT 0")
+        if rubles in NULLABLE_RUBLES:
+            op.execute(f"ALTER TABLE {table} ALTER COLUMN {kopecks} DROP NOT NULL")
+        op.execute(f"ALTER TABLE {table} RENAME COLUMN {kopecks} TO {rubles}")
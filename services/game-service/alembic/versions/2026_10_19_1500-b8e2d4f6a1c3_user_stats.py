@@ -0,0 +1,84 @@
+"""user_stats projection
+
+Revision ID: b8e2d4f6a1c3
+Revises: a3c5e7f9b1d2
+Create Date: 2026-10-19 15:00:00.000000+00:00
+
+После upgrade проекция заполняется из истории:
+    python -m src.services.user_stats
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8e2d4f6a1c3'
+down_revision: Union[str, Sequence[str], None] = 'a3c5e7f9b1d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("ALTER TABLE game_results ADD COLUMN IF NOT EXISTS fouls INTEGER NOT NULL DEFAULT 0")
+    op.execute("ALTER TABLE game_results ADD COLUMN IF NOT EXISTS is_winner BOOLEAN NOT NULL DEFAULT false")
+
+    # Фолы сохраненных результатов - из неудаленных событий foul
+    op.execute("""
+        UPDATE game_results AS gr
+        SET fouls = f.fouls
+        FROM (
+            SELECT game_id, participant_id, COUNT(*) AS fouls
+            FROM game_events
+            WHERE event_type = 'foul' AND is_deleted = false
+            GROUP BY game_id, participant_id
+        ) AS f
+        WHERE f.game_id = gr.game_id AND f.participant_id = gr.participant_id
+    """)
+    # Победитель - больше всего очков (при равенстве - раньше в очереди), только при очках > 0
+    op.execute("""
+        UPDATE game_results AS gr
+        SET is_winner = true
+        FROM (
+            SELECT DISTINCT ON (game_id) id
+            FROM game_results
+            WHERE points_scored > 0
+            ORDER BY game_id, points_scored DESC, queue_position_in_game
+        ) AS winners
+        WHERE gr.id = winners.id
+    """)
+
+    op.create_table(
+        'user_stats',
+        sa.Column('user_id', sa.UUID(), nullable=False),
+        sa.Column('sessions_played', sa.Integer(), server_default=sa.text('0'), nullable=False),
+        sa.Column('games_played', sa.Integer(), server_default=sa.text('0'), nullable=False),
+        sa.Column('games_won', sa.Integer(), server_default=sa.text('0'), nullable=False),
+        sa.Column('balls_potted', sa.Integer(), server_default=sa.text('0'), nullable=False),
+        sa.Column('fouls', sa.Integer(), server_default=sa.text('0'), nullable=False),
+        sa.Column('points_scored', sa.Integer(), server_default=sa.text('0'), nullable=False),
+        sa.Column('net_result_kopecks', sa.BigInteger(), server_default=sa.text('0'), nullable=False),
+        sa.Column('favourite_game_type_id', sa.Integer(), nullable=True),
+        sa.Column('updated_at', postgresql.TIMESTAMP(timezone=True), server_default=sa.text('NOW()'), nullable=False),
+        sa.ForeignKeyConstraint(['favourite_game_type_id'], ['game_types.id']),
+        sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_table(
+        'user_game_type_stats',
+        sa.Column('user_id', sa.UUID(), nullable=False),
+        sa.Column('game_type_id', sa.Integer(), nullable=False),
+        sa.Column('games_played', sa.Integer(), server_default=sa.text('0'), nullable=False),
+        sa.ForeignKeyConstraint(['game_type_id'], ['game_types.id']),
+        sa.PrimaryKeyConstraint('user_id', 'game_type_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_game_type_stats')
+    op.drop_table('user_stats')
+    op.drop_column('game_results', 'is_winner')
+    op.drop_column('game_results', 'fouls')
@@ -0,0 +1,44 @@
+"""Player ratings
+
+Revision ID: c4f1a9e3d7b5
+Revises: b8e2d4f6a1c3
+Create Date: 2026-10-19 16:00:00.000000+00:00
+
+После upgrade рейтинги считаются по истории:
+    python -m src.services.ratings
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4f1a9e3d7b5'
+down_revision: Union[str, Sequence[str], None] = 'b8e2d4f6a1c3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('game_results', sa.Column('rating_delta', sa.Float(), nullable=True))
+    op.create_table(
+        'player_ratings',
+        sa.Column('user_id', sa.UUID(), nullable=False),
+        sa.Column('game_type_id', sa.Integer(), nullable=False),
+        sa.Column('rating', sa.Float(), nullable=False),
+        sa.Column('games_played', sa.Integer(), server_default=sa.text('0'), nullable=False),
+        sa.Column('updated_at', postgresql.TIMESTAMP(timezone=True), server_default=sa.text('NOW()'), nullable=False),
+        sa.ForeignKeyConstraint(['game_type_id'], ['game_types.id']),
+        sa.PrimaryKeyConstraint('user_id', 'game_type_id')
+    )
+    op.execute("CREATE INDEX ix_player_ratings_leaderboard ON player_ratings (game_type_id, rating DESC)")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_player_ratings_leaderboard', table_name='player_ratings')
+    op.drop_table('player_ratings')
+    op.drop_column('game_results', 'rating_delta')
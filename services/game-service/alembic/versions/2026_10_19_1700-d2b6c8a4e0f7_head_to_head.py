@@ -0,0 +1,81 @@
+"""Head-to-head table
+
+Revision ID: d2b6c8a4e0f7
+Revises: c4f1a9e3d7b5
+Create Date: 2026-10-19 17:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd2b6c8a4e0f7'
+down_revision: Union[str, Sequence[str], None] = 'c4f1a9e3d7b5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Те же правила, что в services/head_to_head.py, сразу по всем сохраненным результатам
+BACKFILL = """
+    WITH seats AS (
+        SELECT gr.game_id,
+               sp.user_id,
+               gr.queue_position_in_game AS position,
+               COALESCE(gr.points_scored, 0) AS points_scored,
+               gr.earned_kopecks,
+               COUNT(*) OVER (PARTITION BY gr.game_id) AS seat_count
+        FROM game_results AS gr
+        JOIN session_participants AS sp ON sp.id = gr.participant_id
+    ), payments AS (
+        SELECT payer.game_id, payer.user_id AS payer_id, payee.user_id AS payee_id, payee.earned_kopecks AS amount
+        FROM seats AS payer
+        JOIN seats AS payee
+          ON payee.game_id = payer.game_id
+         AND payee.position = payer.position % payer.seat_count + 1
+        WHERE payer.user_id IS NOT NULL AND payee.user_id IS NOT NULL AND payer.user_id <> payee.user_id
+    ), flows AS (
+        SELECT payee_id AS user_id, payer_id AS opponent_id, SUM(amount) AS amount
+        FROM payments
+        GROUP BY payee_id, payer_id
+    ), pairs AS (
+        SELECT me.user_id,
+               opponent.user_id AS opponent_id,
+               COUNT(DISTINCT me.game_id) AS games_together,
+               SUM((me.points_scored > opponent.points_scored)::int) AS wins,
+               SUM((me.points_scored < opponent.points_scored)::int) AS losses
+        FROM seats AS me
+        JOIN seats AS opponent ON opponent.game_id = me.game_id AND opponent.user_id <> me.user_id
+        GROUP BY me.user_id, opponent.user_id
+    )
+    INSERT INTO head_to_head (user_id, opponent_id, games_together, wins, losses, net_kopecks)
+    SELECT pairs.user_id, pairs.opponent_id, pairs.games_together, pairs.wins, pairs.losses,
+           COALESCE(incoming.amount, 0) - COALESCE(outgoing.amount, 0)
+    FROM pairs
+    LEFT JOIN flows AS incoming ON incoming.user_id = pairs.user_id AND incoming.opponent_id = pairs.opponent_id
+    LEFT JOIN flows AS outgoing ON outgoing.user_id = pairs.opponent_id AND outgoing.opponent_id = pairs.user_id
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'head_to_head',
+        sa.Column('user_id', sa.UUID(), nullable=False),
+        sa.Column('opponent_id', sa.UUID(), nullable=False),
+        sa.Column('games_together', sa.Integer(), server_default=sa.text('0'), nullable=False),
+        sa.Column('wins', sa.Integer(), server_default=sa.text('0'), nullable=False),
+        sa.Column('losses', sa.Integer(), server_default=sa.text('0'), nullable=False),
+        sa.Column('net_kopecks', sa.BigInteger(), server_default=sa.text('0'), nullable=False),
+        sa.PrimaryKeyConstraint('user_id', 'opponent_id')
+    )
+    op.execute("CREATE INDEX ix_head_to_head_rivals ON head_to_head (user_id, games_together DESC)")
+    op.execute(BACKFILL)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_head_to_head_rivals', table_name='head_to_head')
+    op.drop_table('head_to_head')
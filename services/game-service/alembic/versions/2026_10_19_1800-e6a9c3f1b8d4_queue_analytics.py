@@ -0,0 +1,73 @@
+"""Queue analytics counters
+
+Revision ID: e6a9c3f1b8d4
+Revises: d2b6c8a4e0f7
+Create Date: 2026-10-19 18:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e6a9c3f1b8d4'
+down_revision: Union[str, Sequence[str], None] = 'd2b6c8a4e0f7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Раньше game_queues писалась только для random_no_repeat - дописываем историю
+# остальных игр из games.current_queue
+BACKFILL_QUEUES = """
+    INSERT INTO game_queues (id, session_id, game_id, queue_order, algorithm_used, created_at)
+    SELECT gen_random_uuid(), g.session_id, g.id, g.current_queue, g.queue_algorithm, g.created_at
+    FROM games AS g
+    WHERE jsonb_typeof(g.current_queue) = 'array'
+      AND NOT EXISTS (SELECT 1 FROM game_queues AS q WHERE q.game_id = g.id)
+"""
+
+# Те же счетчики, что в services/queue_analytics.py, сразу по всей game_queues
+BACKFILL = """
+    INSERT INTO queue_position_counts (session_id, participant_id, position, games)
+    SELECT q.session_id, CAST(seat.participant_id AS uuid), seat.position, COUNT(*)
+    FROM game_queues AS q
+    CROSS JOIN LATERAL jsonb_array_elements_text(q.queue_order) WITH ORDINALITY AS seat(participant_id, position)
+    GROUP BY q.session_id, seat.participant_id, seat.position;
+
+    INSERT INTO queue_algorithm_counts (session_id, algorithm, games)
+    SELECT session_id, algorithm_used, COUNT(*)
+    FROM game_queues
+    GROUP BY session_id, algorithm_used;
+"""
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'queue_position_counts',
+        sa.Column('session_id', sa.UUID(), nullable=False),
+        sa.Column('participant_id', sa.UUID(), nullable=False),
+        sa.Column('position', sa.Integer(), nullable=False),
+        sa.Column('games', sa.Integer(), server_default=sa.text('0'), nullable=False),
+        sa.ForeignKeyConstraint(['session_id'], ['game_sessions.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('session_id', 'participant_id', 'position')
+    )
+    op.create_table(
+        'queue_algorithm_counts',
+        sa.Column('session_id', sa.UUID(), nullable=False),
+        sa.Column('algorithm', sa.String(length=50), nullable=False),
+        sa.Column('games', sa.Integer(), server_default=sa.text('0'), nullable=False),
+        sa.ForeignKeyConstraint(['session_id'], ['game_sessions.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('session_id', 'algorithm')
+    )
+    op.execute(BACKFILL_QUEUES)
+    op.execute(BACKFILL)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Дописанные строки game_queues остаются: это обычная история очередей
+    op.drop_table('queue_algorithm_counts')
+    op.drop_table('queue_position_counts')
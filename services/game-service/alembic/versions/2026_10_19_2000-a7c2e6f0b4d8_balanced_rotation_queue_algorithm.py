@@ -0,0 +1,40 @@
+"""balanced_rotation queue algorithm
+
+Revision ID: a7c2e6f0b4d8
+Revises: f3b7d1e5a9c2
+Create Date: 2026-10-19 20:00:00.000000+00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c2e6f0b4d8'
+down_revision: Union[str, Sequence[str], None] = 'f3b7d1e5a9c2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("ALTER TYPE queue_algorithm_enum ADD VALUE IF NOT EXISTS 'balanced_rotation'")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Значение из enum не удалить - пересоздаем тип; сохраненные очереди balanced_rotation остаются как manual
+    op.execute("UPDATE games SET queue_algorithm = 'manual' WHERE queue_algorithm = 'balanced_rotation'")
+    op.execute("UPDATE game_queues SET algorithm_used = 'manual' WHERE algorithm_used = 'balanced_rotation'")
+    op.execute("ALTER TYPE queue_algorithm_enum RENAME TO queue_algorithm_enum_old")
+    op.execute("CREATE TYPE queue_algorithm_enum AS ENUM ('always_random', 'random_no_repeat', 'manual', 'cycle')")
+    op.execute(
+        "ALTER TABLE games ALTER COLUMN queue_algorithm TYPE queue_algorithm_enum "
+        "USING queue_algorithm::text::queue_algorithm_enum"
+    )
+    op.execute(
+        "ALTER TABLE game_queues ALTER COLUMN algorithm_used TYPE queue_algorithm_enum "
+        "USING algorithm_used::text::queue_algorithm_enum"
+    )
+    op.execute("DROP TYPE queue_algorithm_enum_old")
@@ -12,9 +12,12 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from ..models.schemas import (
     CreateGameRequest, GameResponse, GameListResponse,
     GameEventRequest, GameEventResponse, GameEventsResponse,
-    GameScoresResponse, BaseResponse
+    GameScoresResponse, SessionLedgerEntry, SessionLedgerResponse, SessionSettlementResponse,
+    QueueAnalyticsResponse, BaseResponse
 )
+from ..core.money import to_rubles
 from ..services.game_service import GameService
+from ..services import queue_analytics
 from ..core.database import get_db
 
 router = APIRouter(tags=["games"])
@@ -155,6 +158,21 @@ async def end_game(
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
+@router.post("/{game_id}/cancel", response_model=GameResponse)
+async def cancel_game(
+    game_id: UUID,
+    current_user: UUID = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Отмена игры (результаты завершенной игры откатываются из итогов сессии)"""
+    try:
+        return await GameService.cancel_game(db, game_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
 @router.post("/{game_id}/events", response_model=GameEventResponse)
 async def add_game_event(
     game_id: UUID,
@@ -208,6 +226,47 @@ async def get_game_scores(
     """Получение текущих счетов игры"""
     try:
         return await GameService.get_game_scores(db, game_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+@router.get("/sessions/{session_id}/ledger", response_model=SessionLedgerResponse)
+async def get_session_ledger(
+    session_id: UUID,
+    db: AsyncSession = Depends(get_db)
+):
+    """Сводка расчетов сессии по завершенным играм"""
+    try:
+        entries = await GameService.get_session_ledger(db, session_id)
+        return SessionLedgerResponse(session_id=session_id, entries=[
+            SessionLedgerEntry(
+                participant_id=entry["participant_id"],
+                display_name=entry["display_name"],
+                games_played=entry["games_played"],
+                balls_potted=entry["balls_potted"],
+                points_scored=entry["points_scored"],
+                rubles_earned=to_rubles(entry["earned_kopecks"]),
+                rubles_paid=to_rubles(entry["paid_kopecks"]),
+                net_result_rubles=to_rubles(entry["net_result_kopecks"])
+            )
+            for entry in entries
+        ])
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+@router.get("/sessions/{session_id}/settlement", response_model=SessionSettlementResponse)
+async def get_session_settlement(
+    session_id: UUID,
+    db: AsyncSession = Depends(get_db)
+):
+    """Кто кому переводит в конце вечера (минимум переводов)"""
+    try:
+        return await GameService.get_session_settlement(db, session_id)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
@@ -282,20 +341,13 @@ async def set_manual_queue(
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
-@router.get("/sessions/{session_id}/queue/analytics")
-async def get_queue_analytics(session_id: UUID):
+@router.get("/sessions/{session_id}/queue/analytics", response_model=QueueAnalyticsResponse)
+async def get_queue_analytics(
+    session_id: UUID,
+    db: AsyncSession = Depends(get_db)
+):
     """Получение аналитики справедливости очередей"""
     try:
-        # TODO: Реализовать аналитику очередей
-        return {
-            "total_games": 0,
-            "algorithm_distribution": {
-                "always_random": 0,
-                "random_no_repeat": 0,
-                "manual": 0
-            },
-            "fairness_score": 100.0,
-            "player_statistics": {}
-        }
+        return QueueAnalyticsResponse(**await queue_analytics.get_session_analytics(db, session_id))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
\ No newline at end of file
@@ -0,0 +1,29 @@
+"""
+Rating API Endpoints
+"""
+
+from fastapi import APIRouter, HTTPException, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.schemas import LeaderboardEntry, LeaderboardResponse
+from ..services import ratings
+from ..core.database import get_db
+
+router = APIRouter(prefix="/ratings", tags=["ratings"])
+
+
+@router.get("/{game_type}/leaderboard", response_model=LeaderboardResponse)
+async def get_leaderboard(
+    game_type: str,
+    limit: int = Query(20, ge=1, le=100),
+    min_games: int = Query(1, ge=1),
+    db: AsyncSession = Depends(get_db)
+):
+    """Таблица лидеров по рейтингу в типе игры"""
+    try:
+        rows = await ratings.get_leaderboard(db, game_type, limit, min_games)
+        return LeaderboardResponse(game_type=game_type, entries=[
+            LeaderboardEntry(rank=rank, **row) for rank, row in enumerate(rows, start=1)
+        ])
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
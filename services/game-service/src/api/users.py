@@ -0,0 +1,68 @@
+"""
+User Statistics API Endpoints
+"""
+
+from uuid import UUID
+
+from fastapi import APIRouter, HTTPException, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.schemas import UserStatsResponse, RivalEntry, RivalsResponse
+from ..services import head_to_head, user_stats
+from ..core.database import get_db
+from ..core.money import to_rubles
+
+router = APIRouter(prefix="/users", tags=["users"])
+
+
+@router.get("/{user_id}/stats", response_model=UserStatsResponse)
+async def get_user_stats(
+    user_id: UUID,
+    db: AsyncSession = Depends(get_db)
+):
+    """Статистика игрока за все время (одна строка user_stats)"""
+    try:
+        stats = await user_stats.get_user_stats(db, user_id) or {}
+        sessions_played = stats.get("sessions_played", 0)
+        games_played = stats.get("games_played", 0)
+        net_result_kopecks = stats.get("net_result_kopecks", 0)
+        return UserStatsResponse(
+            user_id=user_id,
+            sessions_played=sessions_played,
+            games_played=games_played,
+            games_won=stats.get("games_won", 0),
+            win_rate=round(stats.get("games_won", 0) / games_played, 4) if games_played else 0.0,
+            balls_potted=stats.get("balls_potted", 0),
+            fouls=stats.get("fouls", 0),
+            points_scored=stats.get("points_scored", 0),
+            net_result_rubles=to_rubles(net_result_kopecks),
+            average_per_session_rubles=to_rubles(round(net_result_kopecks / sessions_played) if sessions_played else 0),
+            favourite_game_type=stats.get("favourite_game_type"),
+            favourite_game_type_display_name=stats.get("favourite_game_type_display_name"),
+            updated_at=stats.get("updated_at")
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+
+
+@router.get("/{user_id}/rivals", response_model=RivalsResponse)
+async def get_top_rivals(
+    user_id: UUID,
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_db)
+):
+    """Самые частые соперники игрока и итог личных встреч"""
+    try:
+        rivals = await head_to_head.get_top_rivals(db, user_id, limit)
+        return RivalsResponse(user_id=user_id, rivals=[
+            RivalEntry(
+                opponent_id=rival["opponent_id"],
+                games_together=rival["games_together"],
+                wins=rival["wins"],
+                losses=rival["losses"],
+                net_result_rubles=to_rubles(rival["net_kopecks"])
+            )
+            for rival in rivals
+        ])
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
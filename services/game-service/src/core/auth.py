@@ -2,12 +2,10 @@
 JWT Authentication Middleware for Game Service
 """
 
-import jwt
 from fastapi import HTTPException, Depends, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from typing import Optional
-import httpx
-from ..core.config import settings
+from jwt import InvalidTokenError
+from .jwt_verifier import jwt_verifier
 
 # Схема безопасности для JWT токенов
 security = HTTPBearer()
@@ -15,19 +13,12 @@ security = HTTPBearer()
 async def verify_jwt_token(credentials: HTTPAuthorizationCredentials = Depends(security)) -> dict:
     """
     Проверяет JWT токен и возвращает payload
-    ВРЕМЕННО: Упрощенная проверка без валидации подписи
+    Подпись проверяется локально по JWKS auth-service (без запроса на каждый токен)
     """
     try:
-        token = credentials.credentials
-        # ВРЕМЕННО: Декодируем JWT без проверки подписи для тестирования
-        payload = jwt.decode(
-            token,
-            options={"verify_signature": False}
-        )
-        print(f"🔓 DEBUG: JWT payload decoded successfully: {payload}")
-        return payload
-    except Exception as e:
-        print(f"❌ DEBUG: JWT decode error: {e}")
+        return await jwt_verifier.verify(credentials.credentials)
+    except InvalidTokenError as e:
+        print(f"❌ JWT verification failed: {e}")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=f"Invalid JWT token: {str(e)}"
@@ -50,7 +41,7 @@ async def get_current_user_id(payload: dict = Depends(verify_jwt_token)) -> str:
 async def get_current_user(payload: dict = Depends(verify_jwt_token)) -> str: # Changed return type to str
     """
     Возвращает ID пользователя как строку (для совместимости с UUID)
-    ВРЕМЕННО: Не делаем запросы к auth-service
+    Не делаем запросы к auth-service: достаточно проверенного токена
     """
     user_id = payload.get("user_id") or payload.get("sub")
     if not user_id:
@@ -0,0 +1,135 @@
+"""
+Локальная проверка JWT, выданных auth-service
+
+Открытые ключи берутся из /.well-known/jwks.json auth-service и кэшируются
+по kid, поэтому проверка токена - только проверка подписи (ES256/EdDSA) и
+срока, без HTTP запросов. JWKS перечитывается по истечении Cache-Control
+max-age и при встрече неизвестного kid (после ротации ключа), но не чаще
+раза в min_refetch_interval секунд.
+"""
+
+import asyncio
+import re
+import time
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+import httpx
+import jwt
+from jwt import InvalidTokenError
+
+from .config import settings
+
+
+_MAX_AGE_RE = re.compile(r"max-age=(\d+)")
+
+
+class JWKSVerifier:
+    """Проверка access токенов auth-service по закэшированному JWKS"""
+
+    def __init__(
+        self,
+        jwks_url: str,
+        issuer: str,
+        algorithms: Sequence[str] = ("ES256", "EdDSA"),
+        http_client: Optional[httpx.AsyncClient] = None,
+        default_max_age: int = 300,
+        min_refetch_interval: float = 30.0,
+        clock: Callable[[], float] = time.monotonic
+    ):
+        self.jwks_url = jwks_url
+        self.issuer = issuer
+        self.algorithms = tuple(algorithms)
+        self.default_max_age = default_max_age
+        self.min_refetch_interval = min_refetch_interval
+        self._clock = clock
+        self._http_client = http_client
+        self._owns_client = http_client is None
+        # kid -> (алгоритм, открытый ключ)
+        self._keys: Dict[str, Tuple[str, Any]] = {}
+        self._expires_at = 0.0
+        self._last_fetch = float("-inf")
+        self._lock = asyncio.Lock()
+        self.stats = {"verified": 0, "rejected": 0, "jwks_fetches": 0}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._http_client is None:
+            self._http_client = httpx.AsyncClient(timeout=5.0)
+        return self._http_client
+
+    async def refresh(self) -> int:
+        """Загрузка JWKS; возвращает количество ключей"""
+        self._last_fetch = self._clock()
+        response = await self.client.get(self.jwks_url)
+        response.raise_for_status()
+
+        keys = {}
+        for jwk in response.json().get("keys", []):
+            algorithm = jwk.get("alg")
+            if algorithm not in self.algorithms or not jwk.get("kid"):
+                continue
+            keys[jwk["kid"]] = (algorithm, jwt.PyJWK(jwk, algorithm=algorithm).key)
+
+        match = _MAX_AGE_RE.search(response.headers.get("cache-control", ""))
+        max_age = int(match.group(1)) if match else self.default_max_age
+
+        self._keys = keys
+        self._expires_at = self._last_fetch + max_age
+        self.stats["jwks_fetches"] += 1
+        return len(keys)
+
+    async def _get_key(self, kid: str) -> Optional[Tuple[str, Any]]:
+        key = self._keys.get(kid)
+        if key is not None and self._clock() < self._expires_at:
+            return key
+
+        async with self._lock:
+            key = self._keys.get(kid)
+            if key is not None and self._clock() < self._expires_at:
+                return key
+            # Неизвестный kid или устаревший JWKS - перечитываем, но не чаще min_refetch_interval
+            if self._clock() - self._last_fetch >= self.min_refetch_interval:
+                try:
+                    await self.refresh()
+                except Exception as e:
+                    # Auth-service недоступен - работаем на уже известных ключах
+                    print(f"⚠️ Failed to refresh JWKS from {self.jwks_url}: {e}")
+            return self._keys.get(kid)
+
+    async def verify(self, token: str, token_type: str = "access") -> Dict[str, Any]:
+        """
+        Проверка подписи, срока, издателя и типа токена
+
+        Raises:
+            InvalidTokenError: токен недействителен
+        """
+        try:
+            kid = jwt.get_unverified_header(token).get("kid")
+            key = await self._get_key(kid) if kid else None
+            if key is None:
+                raise InvalidTokenError(f"Unknown signing key: {kid}")
+
+            algorithm, public_key = key
+            payload = jwt.decode(
+                token,
+                public_key,
+                algorithms=[algorithm],
+                issuer=self.issuer,
+                options={"require": ["exp", "iss"]}
+            )
+            if payload.get("type") != token_type:
+                raise InvalidTokenError("Invalid token type")
+        except InvalidTokenError:
+            self.stats["rejected"] += 1
+            raise
+
+        self.stats["verified"] += 1
+        return payload
+
+    async def close(self):
+        if self._owns_client and self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+
+
+jwt_verifier = JWKSVerifier(settings.jwks_url, settings.jwt_issuer)
@@ -0,0 +1,30 @@
+"""
+Деньги в копейках
+
+Внутри сервиса все суммы - целые копейки (int в Python, BIGINT в БД):
+суммы и агрегаты точные и не требуют Decimal на каждую строку. Рубли из
+правил сессии и event_data переводятся в копейки при чтении, обратно в
+рубли - только при сборке ответа API.
+"""
+
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+KOPECKS_PER_RUBLE = 100
+
+
+def to_kopecks(rubles) -> int:
+    """Рубли (число или строка) в копейки; нечисловое значение -> 0"""
+    if rubles is None:
+        return 0
+    try:
+        value = Decimal(str(rubles))
+    except InvalidOperation:
+        return 0
+    if not value.is_finite():
+        return 0
+    return int((value * KOPECKS_PER_RUBLE).to_integral_value(rounding=ROUND_HALF_UP))
+
+
+def to_rubles(kopecks: int) -> Decimal:
+    """Копейки в рубли для ответа API"""
+    return Decimal(int(kopecks or 0)).scaleb(-2)
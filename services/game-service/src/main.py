@@ -10,7 +10,10 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from .core.database import connect_to_db, disconnect_from_db, create_tables, init_sqlalchemy
 from .core.config import settings
-from .api import health, sessions, games
+from .api import health, sessions, games, users, ratings
+from .core.jwt_verifier import jwt_verifier
+from .services.user_profiles import user_profiles
+from .services.participant_names import participant_name_sync
 
 # Настройка логирования
 logging.basicConfig(level=logging.DEBUG)
@@ -34,8 +37,23 @@ async def lifespan(app: FastAPI):
         # Инициализация SQLAlchemy
         await init_sqlalchemy()
         
-        # TODO: Подключение к RabbitMQ
-        print("🐰 RabbitMQ connection: placeholder")
+        # RabbitMQ: сброс кэша профилей пользователей по событиям user_events
+        try:
+            await user_profiles.start_invalidation_listener(settings.rabbitmq_url)
+        except Exception as e:
+            print(f"⚠️ RabbitMQ unavailable, user profile cache relies on TTL only: {e}")
+        
+        # Имена участников сессий обновляются по событиям user.updated от auth-service
+        try:
+            await participant_name_sync.start(settings.rabbitmq_url)
+        except Exception as e:
+            print(f"⚠️ RabbitMQ unavailable, participant names are not synced: {e}")
+        
+        # Ключи подписи JWT: если auth-service еще не поднялся, загрузятся при первом токене
+        try:
+            await jwt_verifier.refresh()
+        except Exception as e:
+            print(f"⚠️ JWKS is not loaded yet: {e}")
         
         # TODO: Подключение к Redis
         print("🟥 Redis connection: placeholder")
@@ -49,6 +67,10 @@ async def lifespan(app: FastAPI):
     finally:
         print("🛑 Shutting down Game Service...")
         
+        await participant_name_sync.close()
+        await user_profiles.close()
+        await jwt_verifier.close()
+        
         # Отключение от базы данных
         await disconnect_from_db()
         
@@ -96,6 +118,8 @@ app.add_middleware(
 app.include_router(health.router)
 app.include_router(sessions.router, prefix="/api/v1")
 app.include_router(games.router, prefix="/api/v1")
+app.include_router(users.router, prefix="/api/v1")
+app.include_router(ratings.router, prefix="/api/v1")
 
 
 @app.get("/")
@@ -110,11 +134,22 @@ async def root():
         "endpoints": {
             "health": "/health",
             "sessions": "/api/v1/sessions",
-            "games": "/api/v1/games"
+            "games": "/api/v1/games",
+            "users": "/api/v1/users",
+            "ratings": "/api/v1/ratings"
         }
     }
 
 
+@app.get("/metrics")
+async def metrics():
+    """Счетчики фоновых подсистем (кэш профилей, потребители событий)"""
+    return {
+        "user_profiles": user_profiles.stats,
+        "participant_names": await participant_name_sync.metrics()
+    }
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=settings.service_port)
\ No newline at end of file
@@ -3,13 +3,12 @@ Game Service Database Models
 """
 
 from datetime import datetime
-from decimal import Decimal
 from uuid import uuid4
 from typing import Optional
 
 from sqlalchemy import (
-    Column, String, Integer, Boolean, DateTime, Text, 
-    ForeignKey, Numeric, Index, JSON, Enum, text, TIMESTAMP
+    Column, String, Integer, BigInteger, Float, Boolean, DateTime, Text, 
+    ForeignKey, Index, JSON, Enum, text, TIMESTAMP
 )
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
@@ -41,7 +40,7 @@ class Game(Base):
     session_id = Column(UUID(as_uuid=True), ForeignKey("game_sessions.id", ondelete="CASCADE"), nullable=False)
     game_number = Column(Integer, nullable=False)
     status = Column(Enum("active", "completed", "cancelled", name="game_status_enum"), nullable=False, default="active")
-    queue_algorithm = Column(Enum("always_random", "random_no_repeat", "manual", name="queue_algorithm_enum"), nullable=False)
+    queue_algorithm = Column(Enum("always_random", "random_no_repeat", "manual", "cycle", "balanced_rotation", name="queue_algorithm_enum"), nullable=False)
     current_queue = Column(JSONB, nullable=True)
     started_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text("NOW()"))
     completed_at = Column(TIMESTAMP(timezone=True), nullable=True)
@@ -58,14 +57,14 @@ class Game(Base):
 
 
 class GameQueue(Base):
-    """Модель для истории очередностей (только для random_no_repeat)"""
+    """Модель для истории очередностей (по каждой игре, любого алгоритма)"""
     __tablename__ = "game_queues"
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid4)
     session_id = Column(UUID(as_uuid=True), ForeignKey("game_sessions.id", ondelete="CASCADE"), nullable=False)
     game_id = Column(UUID(as_uuid=True), ForeignKey("games.id", ondelete="CASCADE"), nullable=False)
     queue_order = Column(JSONB, nullable=False)
-    algorithm_used = Column(Enum("always_random", "random_no_repeat", "manual", name="queue_algorithm_enum"), nullable=False)
+    algorithm_used = Column(Enum("always_random", "random_no_repeat", "manual", "cycle", "balanced_rotation", name="queue_algorithm_enum"), nullable=False)
     created_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text("NOW()"))
     
     # Relationships
@@ -131,8 +130,8 @@ class SessionParticipant(Base):
     can_change_rules = Column(Boolean, default=False)
     invited_by_user_id = Column(UUID(as_uuid=True))
     
-    # Накопительный баланс для игры "Колхоз"
-    session_balance_rubles = Column(Numeric(10, 2), default=0.00)
+    # Накопительный баланс для игры "Колхоз" (в копейках)
+    session_balance_kopecks = Column(BigInteger, nullable=False, default=0, server_default=text("0"))
     total_games_played = Column(Integer, default=0)
     total_balls_potted = Column(Integer, default=0)
     
@@ -150,14 +149,29 @@ class GameEvent(Base):
     game_id = Column(UUID(as_uuid=True), ForeignKey("games.id", ondelete="CASCADE"), nullable=False)
     participant_id = Column(UUID(as_uuid=True), ForeignKey("session_participants.id"), nullable=False)
     event_type = Column(String(100), nullable=False)  # 'shot', 'foul', 'combo', 'break', etc.
-    event_data = Column(JSON)  # Детали события
+    event_data = Column(JSONB)  # Детали события
     sequence_number = Column(Integer, nullable=False)  # Порядок событий
     is_deleted = Column(Boolean, default=False)  # 🔄 НОВОЕ ПОЛЕ: Мягкое удаление
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
+    # Числовые поля event_data, по которым считаются итоги игры (заполняются при вставке)
+    points = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    money_kopecks = Column(BigInteger, nullable=False, default=0, server_default=text("0"))
+    penalty_kopecks = Column(BigInteger, nullable=False, default=0, server_default=text("0"))
+    
     # Relationships
     game = relationship("Game", back_populates="events", foreign_keys=[game_id])
     participant = relationship("SessionParticipant", back_populates="game_events", foreign_keys=[participant_id])
+    
+    __table_args__ = (
+        # Итоги игры (GROUP BY participant_id) читаются только из индекса
+        Index(
+            "ix_game_events_game_totals",
+            "game_id", "participant_id",
+            postgresql_include=["event_type", "sequence_number", "points", "money_kopecks", "penalty_kopecks"],
+            postgresql_where=text("is_deleted = false")
+        ),
+    )
 
 
 class GameResult(Base):
@@ -170,10 +184,13 @@ class GameResult(Base):
     queue_position_in_game = Column(Integer, nullable=False)  # Позиция в очереди в этой игре
     balls_potted = Column(Integer, default=0)  # Количество забитых шаров в игре
     points_scored = Column(Integer, default=0)  # Очки в игре (сумма стоимости шаров)
-    rubles_earned = Column(Numeric(10, 2), default=0.00)  # Заработано рублей (от предыдущего игрока)
-    rubles_paid = Column(Numeric(10, 2), default=0.00)  # Заплачено рублей (следующему игроку)
-    net_result_rubles = Column(Numeric(10, 2), default=0.00)  # Чистый результат (earned - paid)
-    point_value_rubles = Column(Numeric(5, 2), nullable=False)  # Стоимость одного очка в рублях
+    fouls = Column(Integer, nullable=False, default=0, server_default=text("0"))  # Фолы в игре
+    is_winner = Column(Boolean, nullable=False, default=False, server_default=text("false"))  # Победитель игры
+    rating_delta = Column(Float, nullable=True)  # Изменение рейтинга за игру (NULL - игра без рейтинга)
+    earned_kopecks = Column(BigInteger, nullable=False, default=0, server_default=text("0"))  # Заработано (от предыдущего игрока)
+    paid_kopecks = Column(BigInteger, nullable=False, default=0, server_default=text("0"))  # Заплачено (следующему игроку)
+    net_result_kopecks = Column(BigInteger, nullable=False, default=0, server_default=text("0"))  # Чистый результат (earned - paid)
+    point_value_kopecks = Column(Integer, nullable=False)  # Стоимость одного очка в копейках
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
@@ -181,6 +198,83 @@ class GameResult(Base):
     participant = relationship("SessionParticipant", back_populates="game_results", foreign_keys=[participant_id])
 
 
+class UserStats(Base):
+    """Итоги пользователя за все время (проекция game_results, см. services/user_stats.py)"""
+    __tablename__ = "user_stats"
+    
+    user_id = Column(UUID(as_uuid=True), primary_key=True)
+    sessions_played = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    games_played = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    games_won = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    balls_potted = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    fouls = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    points_scored = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    net_result_kopecks = Column(BigInteger, nullable=False, default=0, server_default=text("0"))
+    favourite_game_type_id = Column(Integer, ForeignKey("game_types.id"), nullable=True)
+    updated_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text("NOW()"))
+
+
+class PlayerRating(Base):
+    """Рейтинг Elo пользователя в типе игры (см. services/ratings.py)"""
+    __tablename__ = "player_ratings"
+    
+    user_id = Column(UUID(as_uuid=True), primary_key=True)
+    game_type_id = Column(Integer, ForeignKey("game_types.id"), primary_key=True)
+    rating = Column(Float, nullable=False)
+    games_played = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    updated_at = Column(TIMESTAMP(timezone=True), nullable=False, server_default=text("NOW()"))
+    
+    __table_args__ = (
+        # Таблица лидеров: топ-K по типу игры
+        Index("ix_player_ratings_leaderboard", "game_type_id", text("rating DESC")),
+    )
+
+
+class HeadToHead(Base):
+    """Личные встречи пары пользователей (в обе стороны, см. services/head_to_head.py)"""
+    __tablename__ = "head_to_head"
+    
+    user_id = Column(UUID(as_uuid=True), primary_key=True)
+    opponent_id = Column(UUID(as_uuid=True), primary_key=True)
+    games_together = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    wins = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    losses = Column(Integer, nullable=False, default=0, server_default=text("0"))
+    net_kopecks = Column(BigInteger, nullable=False, default=0, server_default=text("0"))  # От opponent к user
+    
+    __table_args__ = (
+        # Топ соперников пользователя
+        Index("ix_head_to_head_rivals", "user_id", text("games_together DESC")),
+    )
+
+
+class QueuePositionCount(Base):
+    """Сколько раз участник стоял на месте очереди в сессии (см. services/queue_analytics.py)"""
+    __tablename__ = "queue_position_counts"
+    
+    session_id = Column(UUID(as_uuid=True), ForeignKey("game_sessions.id", ondelete="CASCADE"), primary_key=True)
+    participant_id = Column(UUID(as_uuid=True), primary_key=True)
+    position = Column(Integer, primary_key=True)  # 1 - разбивает
+    games = Column(Integer, nullable=False, default=0, server_default=text("0"))
+
+
+class QueueAlgorithmCount(Base):
+    """Сколько очередей сессии построил каждый алгоритм"""
+    __tablename__ = "queue_algorithm_counts"
+    
+    session_id = Column(UUID(as_uuid=True), ForeignKey("game_sessions.id", ondelete="CASCADE"), primary_key=True)
+    algorithm = Column(String(50), primary_key=True)
+    games = Column(Integer, nullable=False, default=0, server_default=text("0"))
+
+
+class UserGameTypeStats(Base):
+    """Число игр пользователя по типам игр (для любимого типа в user_stats)"""
+    __tablename__ = "user_game_type_stats"
+    
+    user_id = Column(UUID(as_uuid=True), primary_key=True)
+    game_type_id = Column(Integer, ForeignKey("game_types.id"), primary_key=True)
+    games_played = Column(Integer, nullable=False, default=0, server_default=text("0"))
+
+
 # Индексы
 Index("idx_sessions_creator", GameSession.creator_user_id)
 Index("idx_sessions_status", GameSession.status)
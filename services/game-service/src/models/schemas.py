@@ -138,7 +138,7 @@ class InvitePlayerRequest(BaseModel):
 
 # Game Models
 class CreateGameRequest(BaseModel):
-    queue_algorithm: Optional[str] = "manual"  # "always_random", "random_no_repeat", "manual"
+    queue_algorithm: Optional[str] = "manual"  # "always_random", "random_no_repeat", "manual", "cycle", "balanced_rotation"
     custom_queue: Optional[List[UUID]] = None
 
 
@@ -209,9 +209,81 @@ class GameScoresResponse(BaseModel):
     winner_participant_id: Optional[UUID]
 
 
+class SessionLedgerEntry(BaseModel):
+    participant_id: UUID
+    display_name: str
+    games_played: int
+    balls_potted: int
+    points_scored: int
+    rubles_earned: Decimal
+    rubles_paid: Decimal
+    net_result_rubles: Decimal
+
+
+class SessionLedgerResponse(BaseModel):
+    session_id: UUID
+    entries: List[SessionLedgerEntry]
+
+
+class UserStatsResponse(BaseModel):
+    user_id: UUID
+    sessions_played: int
+    games_played: int
+    games_won: int
+    win_rate: float
+    balls_potted: int
+    fouls: int
+    points_scored: int
+    net_result_rubles: Decimal
+    average_per_session_rubles: Decimal
+    favourite_game_type: Optional[str]
+    favourite_game_type_display_name: Optional[str]
+    updated_at: Optional[datetime]
+
+
+class RivalEntry(BaseModel):
+    opponent_id: UUID
+    games_together: int
+    wins: int
+    losses: int
+    net_result_rubles: Decimal  # Плюс - соперник в сумме заплатил пользователю
+
+
+class RivalsResponse(BaseModel):
+    user_id: UUID
+    rivals: List[RivalEntry]
+
+
+class LeaderboardEntry(BaseModel):
+    rank: int
+    user_id: UUID
+    rating: float
+    games_played: int
+
+
+class LeaderboardResponse(BaseModel):
+    game_type: str
+    entries: List[LeaderboardEntry]
+
+
+class SettlementTransfer(BaseModel):
+    from_participant_id: UUID
+    from_display_name: str
+    to_participant_id: UUID
+    to_display_name: str
+    amount_kopecks: int
+
+
+class SessionSettlementResponse(BaseModel):
+    session_id: UUID
+    transfers: List[SettlementTransfer]
+    total_transfers: int
+    is_minimal: bool  # False - жадный расчет для большого числа участников
+
+
 # Queue Management Models
 class QueueGenerationRequest(BaseModel):
-    algorithm: str = Field(pattern="^(always_random|random_no_repeat|manual)$")
+    algorithm: str = Field(pattern="^(always_random|random_no_repeat|manual|cycle|balanced_rotation)$")
     custom_queue: Optional[List[UUID]] = None
 
 
@@ -226,6 +298,11 @@ class QueueAnalyticsResponse(BaseModel):
     algorithm_distribution: Dict[str, int]
     fairness_score: float  # 0-100, где 100 = идеальная справедливость
     player_statistics: Dict[UUID, Dict[str, Any]]
+    positions: int = 0  # Длина самой длинной очереди сессии
+    position_matrix: Dict[UUID, List[int]] = {}  # Участник -> игр на местах 1..positions
+    break_frequency: Dict[UUID, float] = {}  # Доля игр участника, где он разбивал
+    chi_square: float = 0.0
+    degrees_of_freedom: int = 0
 
 
 # Error Models
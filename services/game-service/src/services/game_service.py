@@ -5,19 +5,23 @@ Game Service - Управление играми и игровой логико
 import random
 import math
 from datetime import datetime
-from decimal import Decimal
+from decimal import Decimal, ROUND_HALF_UP
 from typing import List, Optional, Dict, Any
-from uuid import UUID
+from uuid import UUID, uuid5
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, func, insert, delete
 
 from ..models.schemas import (
     CreateGameRequest, GameResponse, GameEventRequest, KolkhozBallPottedEvent,
     GameEventResponse, GameResultResponse, GameScoresResponse,
     QueueGenerationRequest, QueueResponse, GameStatus, GameEventType
 )
-from ..models.database import Game, GameQueue, GameSession, SessionParticipant, GameEvent
-from .queue_algorithms import get_queue_algorithm
+from ..models.database import Game, GameQueue, GameSession, SessionParticipant, GameEvent, GameResult
+from .queue_algorithms import QUEUE_ALGORITHMS, get_queue_algorithm
+from .settlement import point_value_from_rules, settle_kolkhoz, settlement_order
+from . import head_to_head, queue_analytics, ratings, session_ledger, user_stats
+from .transfers import minimal_transfers
+from ..core.money import KOPECKS_PER_RUBLE, to_kopecks, to_rubles
 
 
 class GameService:
@@ -33,6 +37,96 @@ class GameService:
         }
         return status_mapping.get(db_status, db_status)
     
+    @staticmethod
+    def _typed_event_fields(event_data: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Числовые поля event_data для колонок points/money_kopecks/penalty_kopecks (нечисловое -> 0)"""
+        event_data = event_data or {}
+        try:
+            points = Decimal(str(event_data.get("points", 0)))
+        except ArithmeticError:
+            points = Decimal(0)
+        return {
+            "points": int(points.to_integral_value(rounding=ROUND_HALF_UP)) if points.is_finite() else 0,
+            "money_kopecks": to_kopecks(event_data.get("money")),
+            "penalty_kopecks": to_kopecks(event_data.get("penalty"))
+        }
+    
+    @staticmethod
+    async def get_participant_totals(db: AsyncSession, game_id: UUID) -> List[Dict[str, Any]]:
+        """
+        Итоги участников игры одним GROUP BY в PostgreSQL
+        
+        Учитываются неудаленные события: ball_potted дает шар, очки и деньги,
+        foul - фол и штраф (вычитается из денег, все в копейках). Участники отсортированы по
+        первому событию в игре.
+        """
+        is_ball = GameEvent.event_type == 'ball_potted'
+        is_foul = GameEvent.event_type == 'foul'
+        totals_query = select(
+            GameEvent.participant_id,
+            func.count().filter(is_ball).label('balls'),
+            func.count().filter(is_foul).label('fouls'),
+            func.coalesce(func.sum(GameEvent.points).filter(is_ball), 0).label('points'),
+            (
+                func.coalesce(func.sum(GameEvent.money_kopecks).filter(is_ball), 0)
+                - func.coalesce(func.sum(GameEvent.penalty_kopecks).filter(is_foul), 0)
+            ).label('money_kopecks')
+        ).where(
+            GameEvent.game_id == game_id,
+            GameEvent.is_deleted == False
+        ).group_by(
+            GameEvent.participant_id
+        ).order_by(
+            func.min(GameEvent.sequence_number)
+        )
+        
+        result = await db.execute(totals_query)
+        return [dict(row._mapping) for row in result]
+    
+    @staticmethod
+    async def settle_game(
+        db: AsyncSession,
+        game: Game,
+        rules: Optional[Dict[str, Any]],
+        totals: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """
+        Расчеты "Колхоза" по итогам участников (см. settlement.py)
+        
+        Круг - очередь игры; участники, удаленные из сессии, в расчет не входят.
+        """
+        participants_query = select(SessionParticipant.id).where(
+            SessionParticipant.session_id == game.session_id
+        )
+        session_participant_ids = set((await db.execute(participants_query)).scalars())
+        
+        order = [
+            participant_id
+            for participant_id in settlement_order(game.current_queue, [row['participant_id'] for row in totals])
+            if participant_id in session_participant_ids
+        ]
+        return settle_kolkhoz(
+            order,
+            points={row['participant_id']: int(row['points']) for row in totals},
+            balls={row['participant_id']: row['balls'] for row in totals},
+            point_value=point_value_from_rules(rules)
+        )
+    
+    @staticmethod
+    def _score_response(row: Dict[str, Any], **fields) -> GameResultResponse:
+        """Строка результата в копейках -> ответ API в рублях"""
+        return GameResultResponse(
+            participant_id=row["participant_id"],
+            queue_position_in_game=row["queue_position_in_game"],
+            balls_potted=row["balls_potted"],
+            points_scored=row["points_scored"],
+            rubles_earned=to_rubles(row["earned_kopecks"]),
+            rubles_paid=to_rubles(row["paid_kopecks"]),
+            net_result_rubles=to_rubles(row["net_result_kopecks"]),
+            point_value_rubles=to_rubles(row["point_value_kopecks"]),
+            **fields
+        )
+    
     @staticmethod
     async def create_game(
         db: AsyncSession, 
@@ -107,6 +201,12 @@ class GameService:
                 print(f"🎮 GameService.create_game: Сессия не имеет шаблона, используем дефолтный алгоритм")
                 queue_algorithm = "random_no_repeat"  # дефолтный алгоритм
             
+            # Алгоритм из правил сессии (туда копируются правила шаблона), если он зарегистрирован
+            rules_algorithm = (session.rules or {}).get("queue_algorithm")
+            if rules_algorithm in QUEUE_ALGORITHMS:
+                queue_algorithm = rules_algorithm
+                print(f"🎮 GameService.create_game: Алгоритм из правил сессии: {queue_algorithm}")
+            
             # 🔄 УБИРАЕМ: Не полагаемся на frontend для queue_algorithm
             # queue_algorithm = request.queue_algorithm or "manual"
             
@@ -141,6 +241,11 @@ class GameService:
                 
                 print(f"🎮 GameService.create_game: АЛГОРИТМ ВЫПОЛНЕН")
                 print(f"🎮 GameService.create_game: Результат алгоритма: {[f'{p.id}:{p.display_name}' for p in current_queue]}")
+            elif queue_algorithm in ("cycle", "balanced_rotation"):
+                # Очередь выводится из session_id и номера игры - история не читается
+                print(f"🎮 GameService.create_game: ВЫЗЫВАЕМ АЛГОРИТМ {queue_algorithm} для игры {next_game_number}")
+                current_queue = algorithm_func(participants, session_id, next_game_number)
+                print(f"🎮 GameService.create_game: Результат алгоритма: {[f'{p.id}:{p.display_name}' for p in current_queue]}")
             else:
                 # Для always_random и manual не нужна история
                 print(f"🎮 GameService.create_game: ВЫЗЫВАЕМ АЛГОРИТМ {queue_algorithm}")
@@ -194,27 +299,28 @@ class GameService:
             await db.flush()  # Получаем ID игры
             print(f"🎮 GameService.create_game: ID игры получен: {game.id}")
             
-            # 6. Сохраняем очередность в историю (только для random_no_repeat)
-            if queue_algorithm == "random_no_repeat":
-                print(f"🎮 GameService.create_game: Шаг 6 - Сохраняем историю очереди")
-                print(f"🎮 GameService.create_game: ДЕТАЛЬНОЕ ЛОГИРОВАНИЕ СОХРАНЕНИЯ В GAME_QUEUES")
-                print(f"🎮 GameService.create_game: session_id: {session_id}")
-                print(f"🎮 GameService.create_game: game.id: {game.id}")
-                print(f"🎮 GameService.create_game: current_queue_ids: {current_queue_ids}")
-                print(f"🎮 GameService.create_game: queue_algorithm: {queue_algorithm}")
-                
-                queue_record = GameQueue(
-                    session_id=session_id,
-                    game_id=game.id,
-                    queue_order=current_queue_ids,
-                    algorithm_used=queue_algorithm
-                )
-                print(f"🎮 GameService.create_game: Объект GameQueue создан: {queue_record}")
-                print(f"🎮 GameService.create_game: queue_record.queue_order: {queue_record.queue_order}")
-                print(f"🎮 GameService.create_game: Тип queue_record.queue_order: {type(queue_record.queue_order)}")
-                
-                db.add(queue_record)
-                print(f"🎮 GameService.create_game: Запись истории очереди добавлена")
+            # 6. Сохраняем очередность в историю (для любого алгоритма - на ней строится аналитика;
+            #    random_no_repeat читает только свои записи)
+            print(f"🎮 GameService.create_game: Шаг 6 - Сохраняем историю очереди")
+            print(f"🎮 GameService.create_game: ДЕТАЛЬНОЕ ЛОГИРОВАНИЕ СОХРАНЕНИЯ В GAME_QUEUES")
+            print(f"🎮 GameService.create_game: session_id: {session_id}")
+            print(f"🎮 GameService.create_game: game.id: {game.id}")
+            print(f"🎮 GameService.create_game: current_queue_ids: {current_queue_ids}")
+            print(f"🎮 GameService.create_game: queue_algorithm: {queue_algorithm}")
+            
+            queue_record = GameQueue(
+                session_id=session_id,
+                game_id=game.id,
+                queue_order=current_queue_ids,
+                algorithm_used=queue_algorithm
+            )
+            print(f"🎮 GameService.create_game: Объект GameQueue создан: {queue_record}")
+            print(f"🎮 GameService.create_game: queue_record.queue_order: {queue_record.queue_order}")
+            print(f"🎮 GameService.create_game: Тип queue_record.queue_order: {type(queue_record.queue_order)}")
+            
+            db.add(queue_record)
+            await queue_analytics.apply_queue(db, session_id, current_queue_ids, queue_algorithm)
+            print(f"🎮 GameService.create_game: Запись истории очереди и аналитика добавлены")
             
             # 6.5. 🔄 НОВЫЙ ШАГ: Обновляем queue_position в session_participants
             print(f"🎮 GameService.create_game: Шаг 6.5 - Обновляем queue_position в session_participants")
@@ -368,7 +474,8 @@ class GameService:
     async def complete_game(db: AsyncSession, game_id: UUID) -> GameResponse:
         """Завершение игры"""
         
-        game_query = select(Game).where(Game.id == game_id)
+        # Блокируем строку игры: повторное завершение не применит итоги дважды
+        game_query = select(Game).where(Game.id == game_id).with_for_update()
         game_result = await db.execute(game_query)
         game = game_result.scalar_one_or_none()
         
@@ -378,55 +485,24 @@ class GameService:
         if game.status != "active":
             raise ValueError(f"Game {game_id} is not active")
         
+        # Итоги по участникам считаются в PostgreSQL, события в воркер не загружаются
+        totals = await GameService.get_participant_totals(db, game_id)
+        
         # 🔄 ДОБАВЛЯЕМ: Определяем победителя на основе событий игры
         winner_participant_id = None
         game_statistics = {}
         
         try:
-            # Получаем все события игры для расчета статистики
-            events_query = select(GameEvent).where(
-                GameEvent.game_id == game_id,
-                GameEvent.is_deleted == False
-            ).order_by(GameEvent.sequence_number)
-            
-            events_result = await db.execute(events_query)
-            game_events = events_result.scalars().all()
-            
-            # Собираем статистику по участникам
-            participant_stats = {}
-            
-            for event in game_events:
-                participant_id = event.participant_id
-                
-                if participant_id not in participant_stats:
-                    participant_stats[participant_id] = {
-                        'points': 0,
-                        'money': 0,
-                        'balls': 0,
-                        'fouls': 0
-                    }
-                
-                # Обрабатываем события забитых шаров
-                if event.event_type == 'ball_potted':
-                    participant_stats[participant_id]['balls'] += 1
-                    
-                    # Получаем очки и деньги из event_data
-                    event_data = event.event_data or {}
-                    points = event_data.get('points', 0)
-                    money = event_data.get('money', 0)
-                    
-                    participant_stats[participant_id]['points'] += points
-                    participant_stats[participant_id]['money'] += money
-                
-                # Обрабатываем штрафы
-                elif event.event_type == 'foul':
-                    participant_stats[participant_id]['fouls'] += 1
-                    
-                    # Получаем штраф из event_data
-                    event_data = event.event_data or {}
-                    penalty = event_data.get('penalty', 0)
-                    
-                    participant_stats[participant_id]['money'] -= penalty
+            participant_stats = {
+                row['participant_id']: {
+                    'points': int(row['points']),
+                    'money': int(row['money_kopecks']) / KOPECKS_PER_RUBLE,
+                    'money_kopecks': int(row['money_kopecks']),
+                    'balls': row['balls'],
+                    'fouls': row['fouls']
+                }
+                for row in totals
+            }
             
             # Определяем победителя по очкам
             if participant_stats:
@@ -466,6 +542,24 @@ class GameService:
             # 🔄 НЕ меняем статус сессии на "completed"!
             # session.status остается как есть (обычно "active")
         
+        # Результаты всех участников - одной вставкой в той же транзакции, что и смена статуса
+        results = await GameService.settle_game(db, game, session.rules if session else None, totals)
+        if results:
+            fouls = {row['participant_id']: row['fouls'] for row in totals}
+            await db.execute(insert(GameResult), [
+                {
+                    "game_id": game.id,
+                    **row,
+                    "fouls": fouls.get(row["participant_id"], 0),
+                    "is_winner": row["participant_id"] == winner_participant_id and row["points_scored"] > 0
+                }
+                for row in results
+            ])
+            await session_ledger.apply_game(db, game.id, 1)
+            await user_stats.apply_game(db, game.id, 1)
+            await ratings.apply_game(db, game.id)
+            await head_to_head.apply_game(db, game.id, 1)
+        
         await db.commit()
         
         return GameResponse(
@@ -484,6 +578,59 @@ class GameService:
             }
         )
     
+    @staticmethod
+    async def cancel_game(db: AsyncSession, game_id: UUID) -> GameResponse:
+        """
+        Отмена игры
+        
+        Для завершенной игры ее результаты вычитаются из итогов участников
+        и удаляются - в одной транзакции со сменой статуса.
+        """
+        
+        game_query = select(Game).where(Game.id == game_id).with_for_update()
+        game_result = await db.execute(game_query)
+        game = game_result.scalar_one_or_none()
+        
+        if not game:
+            raise ValueError(f"Game {game_id} not found")
+        
+        if game.status == "cancelled":
+            raise ValueError(f"Game {game_id} is already cancelled")
+        
+        if game.status == "completed":
+            reverted = await session_ledger.apply_game(db, game.id, -1)
+            await user_stats.apply_game(db, game.id, -1)
+            await ratings.revert_game(db, game.id)
+            await head_to_head.apply_game(db, game.id, -1)
+            await db.execute(delete(GameResult).where(GameResult.game_id == game.id))
+            print(f"🔄 GameService.cancel_game: Итоги {reverted} участников откатены для игры {game_id}")
+        
+        game.status = "cancelled"
+        
+        session_query = select(GameSession).where(GameSession.id == game.session_id)
+        session_result = await db.execute(session_query)
+        session = session_result.scalar_one_or_none()
+        
+        if session and session.current_game_id == game_id:
+            session.current_game_id = None
+        
+        await db.commit()
+        
+        return GameResponse(
+            id=game.id,
+            session_id=game.session_id,
+            game_number=game.game_number,
+            status=GameStatus.CANCELLED,
+            winner_participant_id=None,
+            started_at=game.started_at,
+            completed_at=game.completed_at,
+            duration_seconds=None,
+            game_data={
+                "queue_algorithm": game.queue_algorithm,
+                "current_queue": game.current_queue
+            }
+        )
+    
     @staticmethod
     async def add_game_event(
         db: AsyncSession, 
@@ -533,7 +680,8 @@ class GameService:
                 participant_id=request.participant_id,
                 event_type=request.event_type.value if hasattr(request.event_type, 'value') else str(request.event_type),
                 event_data=request.event_data,
-                sequence_number=next_sequence
+                sequence_number=next_sequence,
+                **GameService._typed_event_fields(request.event_data)
             )
             
             db.add(new_event)
@@ -635,30 +783,111 @@ class GameService:
     
     @staticmethod
     async def get_game_scores(db: AsyncSession, game_id: UUID) -> GameScoresResponse:
-        """Получение текущих счетов игры"""
+        """
+        Текущие счета игры
+        
+        Для завершенной игры - сохраненные строки game_results, для активной -
+        расчет на лету по текущим итогам (в БД не пишется).
+        """
+        game = (await db.execute(select(Game).where(Game.id == game_id))).scalar_one_or_none()
+        if not game:
+            raise ValueError(f"Game {game_id} not found")
         
-        # TODO: Реализовать подсчет очков из событий игры
-        # Пока возвращаем заглушку
+        if game.status == "completed":
+            results_query = select(GameResult.__table__).where(
+                GameResult.game_id == game_id
+            ).order_by(GameResult.queue_position_in_game)
+            scores = [
+                GameService._score_response(row, id=row["id"], game_id=row["game_id"], created_at=row["created_at"])
+                for row in (await db.execute(results_query)).mappings()
+            ]
+        else:
+            rules_query = select(GameSession.rules).where(GameSession.id == game.session_id)
+            rules = (await db.execute(rules_query)).scalar_one_or_none()
+            totals = await GameService.get_participant_totals(db, game_id)
+            now = datetime.now()
+            scores = [
+                # Стабильный id строки, пока результат не сохранен
+                GameService._score_response(row, id=uuid5(game_id, str(row["participant_id"])), game_id=game_id, created_at=now)
+                for row in await GameService.settle_game(db, game, rules, totals)
+            ]
+        
+        winner = max(scores, key=lambda score: score.points_scored, default=None)
         return GameScoresResponse(
-            current_scores=[
-                GameResultResponse(
-                    id=UUID("score123-4567-8901-2345-678901234567"),
-                    game_id=game_id,
-                    participant_id=UUID("87654321-4321-8765-cba9-987654321abc"),
-                    queue_position_in_game=1,
-                    balls_potted=5,
-                    points_scored=250,
-                    rubles_earned=Decimal("125.00"),
-                    rubles_paid=Decimal("75.00"),
-                    net_result_rubles=Decimal("50.00"),
-                    point_value_rubles=Decimal("50.00"),
-                    created_at=datetime.now()
-                )
-            ],
-            game_status=GameStatus.IN_PROGRESS,
-            winner_participant_id=None
+            current_scores=scores,
+            game_status=GameService._map_db_status_to_frontend(game.status),
+            winner_participant_id=winner.participant_id if winner and winner.points_scored > 0 else None
         )
-
+    
+    @staticmethod
+    async def get_session_ledger(db: AsyncSession, session_id: UUID) -> List[Dict[str, Any]]:
+        """
+        Сводка сессии по сохраненным результатам завершенных игр
+        
+        Один GROUP BY по game_results вместо пересчета событий всех игр;
+        суммы - в копейках.
+        """
+        ledger_query = select(
+            SessionParticipant.id.label('participant_id'),
+            SessionParticipant.display_name,
+            func.count(GameResult.id).label('games_played'),
+            func.coalesce(func.sum(GameResult.balls_potted), 0).label('balls_potted'),
+            func.coalesce(func.sum(GameResult.points_scored), 0).label('points_scored'),
+            func.coalesce(func.sum(GameResult.earned_kopecks), 0).label('earned_kopecks'),
+            func.coalesce(func.sum(GameResult.paid_kopecks), 0).label('paid_kopecks'),
+            func.coalesce(func.sum(GameResult.net_result_kopecks), 0).label('net_result_kopecks')
+        ).select_from(
+            SessionParticipant
+        ).outerjoin(
+            GameResult, GameResult.participant_id == SessionParticipant.id
+        ).where(
+            SessionParticipant.session_id == session_id
+        ).group_by(
+            SessionParticipant.id, SessionParticipant.display_name
+        ).order_by(
+            func.coalesce(func.sum(GameResult.net_result_kopecks), 0).desc(),
+            SessionParticipant.display_name
+        )
+        
+        result = await db.execute(ledger_query)
+        return [dict(row._mapping) for row in result]
+    
+    @staticmethod
+    async def get_session_settlement(db: AsyncSession, session_id: UUID) -> Dict[str, Any]:
+        """
+        Переводы для закрытия вечера по итоговым балансам участников
+        
+        Балансы берутся из session_participants (поддерживаются инкрементально),
+        расчет переводов кэшируется по самим балансам.
+        """
+        participants_query = select(
+            SessionParticipant.id,
+            SessionParticipant.display_name,
+            SessionParticipant.session_balance_kopecks
+        ).where(SessionParticipant.session_id == session_id)
+        rows = (await db.execute(participants_query)).all()
+        
+        names = {row.id: row.display_name for row in rows}
+        transfers, is_minimal = minimal_transfers({
+            row.id: row.session_balance_kopecks for row in rows
+        })
+        
+        return {
+            "session_id": session_id,
+            "transfers": [
+                {
+                    "from_participant_id": debtor,
+                    "from_display_name": names[debtor],
+                    "to_participant_id": creditor,
+                    "to_display_name": names[creditor],
+                    "amount_kopecks": amount
+                }
+                for debtor, creditor, amount in transfers
+            ],
+            "total_transfers": len(transfers),
+            "is_minimal": is_minimal
+        }
+    
     @staticmethod
     async def delete_game_event(
         db: AsyncSession, 
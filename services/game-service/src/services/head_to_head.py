@@ -0,0 +1,85 @@
+"""
+Личные встречи пользователей (head_to_head)
+
+Разреженная таблица смежности: строка на каждую пару пользователей, которые
+играли вместе, в обе стороны (user_id -> opponent_id и обратно), чтобы
+соперники пользователя читались одним индексным запросом.
+
+- games_together - общие игры;
+- wins / losses - игры, где user_id набрал больше / меньше очков, чем opponent_id;
+- net_kopecks - деньги от opponent_id к user_id минус обратно. В "Колхозе"
+  каждый платит следующему по кругу очереди его заработок, поэтому потоки
+  считаются по соседним местам queue_position_in_game.
+
+Обновляется в транзакции complete_game / cancel_game по строкам game_results.
+"""
+
+from typing import Any, Dict, List
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+APPLY_GAME = text("""
+    WITH seats AS (
+        SELECT sp.user_id,
+               gr.queue_position_in_game AS position,
+               COALESCE(gr.points_scored, 0) AS points_scored,
+               gr.earned_kopecks,
+               COUNT(*) OVER () AS seat_count
+        FROM game_results AS gr
+        JOIN session_participants AS sp ON sp.id = gr.participant_id
+        WHERE gr.game_id = :game_id
+    ), payments AS (
+        -- Место платит следующему по кругу его заработок
+        SELECT payer.user_id AS payer_id, payee.user_id AS payee_id, payee.earned_kopecks AS amount
+        FROM seats AS payer
+        JOIN seats AS payee ON payee.position = payer.position % payer.seat_count + 1
+    ), pairs AS (
+        SELECT me.user_id,
+               opponent.user_id AS opponent_id,
+               SUM((me.points_scored > opponent.points_scored)::int) AS wins,
+               SUM((me.points_scored < opponent.points_scored)::int) AS losses,
+               COALESCE((
+                   SELECT SUM(CASE WHEN p.payee_id = me.user_id THEN p.amount ELSE -p.amount END)
+                   FROM payments AS p
+                   WHERE (p.payer_id, p.payee_id) IN ((opponent.user_id, me.user_id), (me.user_id, opponent.user_id))
+               ), 0) AS net_kopecks
+        FROM seats AS me
+        JOIN seats AS opponent ON opponent.user_id <> me.user_id
+        GROUP BY me.user_id, opponent.user_id
+    )
+    INSERT INTO head_to_head AS h (user_id, opponent_id, games_together, wins, losses, net_kopecks)
+    SELECT user_id, opponent_id, :sign, :sign * wins, :sign * losses, :sign * net_kopecks
+    FROM pairs
+    ON CONFLICT (user_id, opponent_id) DO UPDATE SET
+        games_together = h.games_together + EXCLUDED.games_together,
+        wins = h.wins + EXCLUDED.wins,
+        losses = h.losses + EXCLUDED.losses,
+        net_kopecks = h.net_kopecks + EXCLUDED.net_kopecks
+""")
+
+TOP_RIVALS = text("""
+    SELECT opponent_id, games_together, wins, losses, net_kopecks
+    FROM head_to_head
+    WHERE user_id = :user_id
+      AND games_together > 0
+    ORDER BY games_together DESC, opponent_id
+    LIMIT :limit
+""")
+
+
+async def apply_game(db: AsyncSession, game_id: UUID, sign: int = 1) -> None:
+    """
+    Прибавить (sign=1) или вычесть (sign=-1) игру из личных встреч ее участников
+
+    Боты (user_id IS NULL) в пары не входят; коммит - на вызывающем коде.
+    """
+    await db.execute(APPLY_GAME, {"game_id": game_id, "sign": sign})
+
+
+async def get_top_rivals(db: AsyncSession, user_id: UUID, limit: int = 10) -> List[Dict[str, Any]]:
+    """Самые частые соперники по индексу (user_id, games_together DESC)"""
+    result = await db.execute(TOP_RIVALS, {"user_id": user_id, "limit": limit})
+    return [dict(row) for row in result.mappings()]
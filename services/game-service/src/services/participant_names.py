@@ -0,0 +1,129 @@
+"""
+Синхронизация имен участников сессий с auth-service
+
+display_name участника копируется в session_participants при добавлении в
+сессию, чтобы чтение сессии оставалось локальным запросом. Когда
+пользователь меняет имя, auth-service публикует user.updated в exchange
+user_events; здесь эти события читаются пачками из постоянной очереди
+game-service.user_updates и применяются одним UPDATE ... FROM (VALUES ...)
+на пачку.
+"""
+
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import text
+
+from artel_events import ConsumerGroup, QueueConsumer
+
+from ..core import database as core_database
+
+
+USER_UPDATES_QUEUE = "game-service.user_updates"
+DISPLAY_NAME_MAX_LENGTH = 255
+
+
+@lru_cache(maxsize=64)
+def build_rename_statement(count: int):
+    """UPDATE на count переименований; строки без изменений не трогаются"""
+    rows = ", ".join(
+        f"(CAST(:user_id_{i} AS uuid), CAST(:display_name_{i} AS varchar))"
+        for i in range(count)
+    )
+    return text(f"""
+        UPDATE session_participants AS sp
+        SET display_name = v.display_name
+        FROM (VALUES {rows}) AS v(user_id, display_name)
+        WHERE sp.user_id = v.user_id
+          AND sp.display_name IS DISTINCT FROM v.display_name
+    """)
+
+
+def latest_display_names(events: List[Dict[str, Any]]) -> Dict[str, str]:
+    """user_id -> имя из самого позднего события пачки"""
+    latest: Dict[str, Dict[str, Any]] = {}
+    for event in events:
+        user_id = event.get("user_id")
+        display_name = (event.get("data") or {}).get("display_name")
+        if not user_id or not display_name:
+            continue
+        current = latest.get(user_id)
+        if current is None or str(event.get("timestamp", "")) >= str(current.get("timestamp", "")):
+            latest[user_id] = event
+    return {
+        user_id: event["data"]["display_name"][:DISPLAY_NAME_MAX_LENGTH]
+        for user_id, event in latest.items()
+    }
+
+
+async def apply_renames(session, renames: Dict[str, str]) -> int:
+    """Переименование участников одним запросом; возвращает число измененных строк"""
+    if not renames:
+        return 0
+    params = {}
+    for i, (user_id, display_name) in enumerate(renames.items()):
+        params[f"user_id_{i}"] = user_id
+        params[f"display_name_{i}"] = display_name
+    result = await session.execute(build_rename_statement(len(renames)), params)
+    return result.rowcount
+
+
+class ParticipantNameSync:
+    """Потребитель user.updated, обновляющий session_participants.display_name"""
+
+    def __init__(
+        self,
+        session_factory: Optional[Callable] = None,
+        batch_size: int = 200,
+        chunk_size: int = 500,
+        prefetch_count: int = 500
+    ):
+        self._session_factory = session_factory
+        self.chunk_size = chunk_size
+        # Один воркер: переименования одного пользователя применяются по порядку
+        self.consumer = QueueConsumer(
+            queue_name=USER_UPDATES_QUEUE,
+            handler=self.handle,
+            exchange_name="user_events",
+            routing_keys=["user.updated"],
+            prefetch_count=prefetch_count,
+            concurrency=1,
+            batch_size=batch_size,
+            batch_timeout=0.2
+        )
+        self._group = ConsumerGroup()
+        self._group.add(self.consumer)
+        self.stats = {"events": 0, "users": 0, "rows_updated": 0}
+
+    def _new_session(self):
+        if self._session_factory is not None:
+            return self._session_factory()
+        if core_database.async_session_maker is None:
+            raise RuntimeError("Database not initialized")
+        return core_database.async_session_maker()
+
+    async def handle(self, events: List[Dict[str, Any]]):
+        renames = latest_display_names(events)
+        items = list(renames.items())
+
+        updated = 0
+        async with self._new_session() as session:
+            for start in range(0, len(items), self.chunk_size):
+                updated += await apply_renames(session, dict(items[start:start + self.chunk_size]))
+            await session.commit()
+
+        self.stats["events"] += len(events)
+        self.stats["users"] += len(renames)
+        self.stats["rows_updated"] += updated
+
+    async def start(self, rabbitmq_url: str):
+        await self._group.start(rabbitmq_url)
+
+    async def close(self):
+        await self._group.stop()
+
+    async def metrics(self) -> Dict[str, Any]:
+        return {**self.stats, "consumers": await self._group.metrics()}
+
+
+participant_name_sync = ParticipantNameSync()
@@ -2,12 +2,78 @@
 Queue Algorithms - Алгоритмы генерации очередности игроков
 """
 
+import hashlib
 import random
 import math
-from typing import List, Dict, Any
+from functools import lru_cache
+from typing import List, Dict, Any, Tuple
 from uuid import UUID
 
 
+# Раунды сети Фейстеля для перестановки номеров очередей (cycle)
+FEISTEL_ROUNDS = 4
+
+
+def _cycle_key(session_id: UUID, cycle: int) -> bytes:
+    """Ключ перестановки: от сессии и номера цикла, без хранения в БД"""
+    return hashlib.sha256(f"{session_id}:{cycle}".encode()).digest()
+
+
+def _permute_rank(rank: int, domain: int, key: bytes) -> int:
+    """
+    Format-preserving перестановка [0, domain): сбалансированная сеть Фейстеля
+    на ближайшем четном числе бит плюс cycle walking до попадания в domain
+    """
+    bits = max(2, (domain - 1).bit_length())
+    bits += bits % 2
+    half = bits // 2
+    mask = (1 << half) - 1
+    width = (half + 7) // 8
+
+    value = rank
+    while True:
+        left, right = value >> half, value & mask
+        for round_number in range(FEISTEL_ROUNDS):
+            digest = hashlib.blake2b(
+                bytes([round_number]) + right.to_bytes(width, "big"), key=key
+            ).digest()
+            left, right = right, left ^ (int.from_bytes(digest, "big") & mask)
+        value = (left << half) | right
+        if value < domain:
+            return value
+
+
+@lru_cache(maxsize=1024)
+def _latin_square(session_id: UUID, size: int) -> Tuple[Tuple[int, ...], Tuple[int, ...], Tuple[int, ...]]:
+    """
+    Случайный латинский квадрат сессии: циклический квадрат (i + j) mod n
+    с перемешанными по ключу сессии строками, столбцами и символами
+
+    Клетка (игра r, место j) = symbols[(rows[r] + columns[j]) % n].
+    Квадрат выводится из session_id, поэтому не хранится и одинаков на любом инстансе.
+    """
+    rng = random.Random(hashlib.sha256(f"{session_id}:latin".encode()).digest())
+    rows, columns, symbols = list(range(size)), list(range(size)), list(range(size))
+    rng.shuffle(rows)
+    rng.shuffle(columns)
+    rng.shuffle(symbols)
+    return tuple(rows), tuple(columns), tuple(symbols)
+
+
+def _unrank(rank: int, items: List[Any]) -> List[Any]:
+    """Перестановка items с номером rank в лексикографическом порядке (код Лемера)"""
+    factorials = [1]
+    for size in range(1, len(items)):
+        factorials.append(factorials[-1] * size)
+
+    pool = list(items)
+    ordered = []
+    for size in range(len(items) - 1, -1, -1):
+        index, rank = divmod(rank, factorials[size])
+        ordered.append(pool.pop(index))
+    return ordered
+
+
 class QueueAlgorithms:
     """Класс для генерации очередности игроков"""
     
@@ -96,6 +162,72 @@ class QueueAlgorithms:
         
         return selected_queue
     
+    @staticmethod
+    def generate_cycle_queue(
+        participants: List[Dict[str, Any]],
+        session_id: UUID,
+        game_number: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Cycle - Псевдослучайный обход всех n! очередностей без чтения истории
+        
+        Игры 1..n! сессии - это номера 0..n!-1, переставленные ключом сессии,
+        поэтому внутри цикла очереди не повторяются; следующий цикл
+        переставляется новым ключом. Очередь любой игры можно пересчитать
+        где угодно по session_id и номеру игры.
+        
+        Args:
+            participants: Список участников сессии
+            session_id: ID сессии (из него выводится ключ)
+            game_number: Номер игры в сессии, начиная с 1
+            
+        Returns:
+            Список участников в порядке очереди этой игры
+        """
+        # Канонический порядок, чтобы результат не зависел от порядка выборки из БД
+        canonical = sorted(participants, key=lambda p: str(p.id))
+        total_permutations = math.factorial(len(canonical))
+        
+        cycle, index = divmod(game_number - 1, total_permutations)
+        rank = _permute_rank(index, total_permutations, _cycle_key(session_id, cycle)) if total_permutations > 1 else 0
+        
+        print(f"🔄 generate_cycle_queue: Сессия {session_id}, игра {game_number}: цикл {cycle}, перестановка {rank} из {total_permutations}")
+        
+        return _unrank(rank, canonical)
+    
+    @staticmethod
+    def generate_balanced_rotation_queue(
+        participants: List[Dict[str, Any]],
+        session_id: UUID,
+        game_number: int
+    ) -> List[Dict[str, Any]]:
+        """
+        Balanced Rotation - Очереди по строкам латинского квадрата сессии
+        
+        В каждом блоке из n игр (1..n, n+1..2n, ...) каждый участник ровно
+        один раз стоит на каждом месте, в том числе ровно раз разбивает.
+        Игра берет строку квадрата по номеру - без истории и перебора перестановок.
+        
+        Args:
+            participants: Список участников сессии
+            session_id: ID сессии (из него выводится квадрат)
+            game_number: Номер игры в сессии, начиная с 1
+            
+        Returns:
+            Список участников в порядке очереди этой игры
+        """
+        canonical = sorted(participants, key=lambda p: str(p.id))
+        size = len(canonical)
+        if size < 2:
+            return canonical
+        
+        rows, columns, symbols = _latin_square(session_id, size)
+        row = rows[(game_number - 1) % size]
+        
+        print(f"🔄 generate_balanced_rotation_queue: Сессия {session_id}, игра {game_number}: строка {row} квадрата {size}x{size}")
+        
+        return [canonical[symbols[(row + columns[place]) % size]] for place in range(size)]
+    
     @staticmethod
     def generate_manual_queue(
         participants: List[Dict[str, Any]], 
@@ -131,6 +263,16 @@ class QueueAlgorithms:
         return ordered_queue
 
 
+# Зарегистрированные алгоритмы по имени (имена совпадают с queue_algorithm_enum)
+QUEUE_ALGORITHMS = {
+    "always_random": QueueAlgorithms.generate_always_random_queue,
+    "random_no_repeat": QueueAlgorithms.generate_random_no_repeat_queue,
+    "manual": QueueAlgorithms.generate_manual_queue,
+    "cycle": QueueAlgorithms.generate_cycle_queue,
+    "balanced_rotation": QueueAlgorithms.generate_balanced_rotation_queue
+}
+
+
 def get_queue_algorithm(algorithm_name: str):
     """
     Фабричная функция для получения алгоритма по имени
@@ -141,10 +283,4 @@ def get_queue_algorithm(algorithm_name: str):
     Returns:
         Функция генерации очередности
     """
-    algorithms = {
-        "always_random": QueueAlgorithms.generate_always_random_queue,
-        "random_no_repeat": QueueAlgorithms.generate_random_no_repeat_queue,
-        "manual": QueueAlgorithms.generate_manual_queue
-    }
-    
-    return algorithms.get(algorithm_name, QueueAlgorithms.generate_random_no_repeat_queue)
+    return QUEUE_ALGORITHMS.get(algorithm_name, QueueAlgorithms.generate_random_no_repeat_queue)
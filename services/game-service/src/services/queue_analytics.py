@@ -0,0 +1,136 @@
+"""
+Аналитика справедливости очередей сессии
+
+Две счетные таблицы, которые пополняются в транзакции create_game вместе с
+записью GameQueue, поэтому чтение аналитики не зависит от числа сыгранных игр:
+
+- queue_position_counts - матрица "участник x место в очереди" (разреженная);
+  место 1 - разбой, из него считается частота разбоя;
+- queue_algorithm_counts - сколько очередей сессии построил каждый алгоритм.
+
+Справедливость - критерий хи-квадрат против равномерного распределения мест:
+для участника с g играми на k местах ожидается g/k игр на каждом месте.
+Статистика нормируется между лучшей достижимой раскладкой (места различаются
+не больше чем на одну игру) и худшей (все игры на одном месте):
+100 - идеальная ротация, 0 - участник всегда на одном и том же месте.
+"""
+
+import json
+from typing import Any, Dict, List, Sequence
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+APPLY_POSITIONS = text("""
+    INSERT INTO queue_position_counts AS q (session_id, participant_id, position, games)
+    SELECT :session_id, CAST(seat.participant_id AS uuid), seat.position, 1
+    FROM jsonb_array_elements_text(CAST(:queue_order AS jsonb)) WITH ORDINALITY AS seat(participant_id, position)
+    ON CONFLICT (session_id, participant_id, position) DO UPDATE SET
+        games = q.games + 1
+""")
+
+APPLY_ALGORITHM = text("""
+    INSERT INTO queue_algorithm_counts AS a (session_id, algorithm, games)
+    VALUES (:session_id, :algorithm, 1)
+    ON CONFLICT (session_id, algorithm) DO UPDATE SET
+        games = a.games + 1
+""")
+
+SESSION_POSITIONS = text("""
+    SELECT participant_id, position, games
+    FROM queue_position_counts
+    WHERE session_id = :session_id
+""")
+
+SESSION_ALGORITHMS = text("""
+    SELECT algorithm, games
+    FROM queue_algorithm_counts
+    WHERE session_id = :session_id
+""")
+
+# Базовые алгоритмы показываются всегда, даже с нулем
+ALGORITHMS = ("always_random", "random_no_repeat", "manual", "cycle", "balanced_rotation")
+
+
+async def apply_queue(db: AsyncSession, session_id: UUID, queue_order: Sequence[str], algorithm: str) -> None:
+    """
+    Учесть новую очередь сессии (вызывается там же, где пишется GameQueue)
+
+    Коммит - на вызывающем коде.
+    """
+    params = {"session_id": session_id, "queue_order": json.dumps([str(item) for item in queue_order])}
+    await db.execute(APPLY_POSITIONS, params)
+    await db.execute(APPLY_ALGORITHM, {"session_id": session_id, "algorithm": algorithm})
+
+
+def fairness(matrix: Dict[Any, List[int]]) -> Dict[str, float]:
+    """
+    Хи-квадрат по матрице мест и нормированная оценка справедливости 0-100
+
+    matrix: участник -> число игр на местах 1..k (все строки одной длины k).
+    """
+    chi_square = 0.0
+    excess = 0.0
+    worst = 0.0
+    positions = max((len(counts) for counts in matrix.values()), default=0)
+    players = 0
+
+    for counts in matrix.values():
+        games = sum(counts)
+        if not games or positions < 2:
+            continue
+        players += 1
+        expected = games / positions
+        # sum((c - E)^2 / E) = sum(c^2) / E - g
+        squares = sum(count * count for count in counts)
+        quotient, remainder = divmod(games, positions)
+        best_squares = remainder * (quotient + 1) ** 2 + (positions - remainder) * quotient ** 2
+
+        chi_square += squares / expected - games
+        excess += (squares - best_squares) / expected
+        worst += (games * games - best_squares) / expected
+
+    return {
+        "chi_square": round(chi_square, 4),
+        "degrees_of_freedom": players * (positions - 1),
+        "fairness_score": round(100.0 * (1 - excess / worst), 2) if worst else 100.0,
+    }
+
+
+async def get_session_analytics(db: AsyncSession, session_id: UUID) -> Dict[str, Any]:
+    """Аналитика очередей сессии: O(участники x места) строк, без обхода истории"""
+    algorithm_distribution = {algorithm: 0 for algorithm in ALGORITHMS}
+    for row in (await db.execute(SESSION_ALGORITHMS, {"session_id": session_id})).mappings():
+        algorithm_distribution[row["algorithm"]] = row["games"]
+    total_games = sum(algorithm_distribution.values())
+
+    cells = (await db.execute(SESSION_POSITIONS, {"session_id": session_id})).mappings().all()
+    positions = max((row["position"] for row in cells), default=0)
+    matrix: Dict[UUID, List[int]] = {}
+    for row in cells:
+        matrix.setdefault(row["participant_id"], [0] * positions)[row["position"] - 1] = row["games"]
+
+    player_statistics = {}
+    for participant_id, counts in matrix.items():
+        games = sum(counts)
+        player_statistics[participant_id] = {
+            "games": games,
+            "positions": counts,
+            "breaks": counts[0],
+            "break_frequency": round(counts[0] / games, 4),
+            "average_position": round(sum(place * count for place, count in enumerate(counts, 1)) / games, 4),
+        }
+
+    return {
+        "total_games": total_games,
+        "algorithm_distribution": algorithm_distribution,
+        "positions": positions,
+        "position_matrix": matrix,
+        "break_frequency": {
+            participant_id: stats["break_frequency"] for participant_id, stats in player_statistics.items()
+        },
+        "player_statistics": player_statistics,
+        **fairness(matrix),
+    }
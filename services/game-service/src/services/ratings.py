@@ -0,0 +1,401 @@
+"""
+Рейтинги игроков (Elo) по типам игр
+
+Игра с N участниками раскладывается на пары: каждый "играет" с каждым,
+выше по очкам - победа (1), поровну - ничья (0.5). Изменение рейтинга:
+
+    delta[i] = K / (N - 1) * sum_j (S[i, j] - E[i, j])
+    E[i, j]  = 1 / (1 + 10 ** ((R[j] - R[i]) / scale))
+
+Это матрица N x N на маленьких массивах NumPy (O(N^2) на игру). Одна и та
+же функция считает и одну игру в complete_game, и пачку игр при полном
+пересчете.
+
+- complete_game: рейтинги участников-пользователей (боты не учитываются)
+  увеличиваются на delta одним upsert, delta сохраняется в game_results,
+  чтобы отмена игры вычла именно ее.
+- Полный пересчет (например, после смены параметров) читает историю
+  потоком в хронологическом порядке; игры пачки раскладываются по уровням,
+  внутри которых у игр нет общих игроков, и каждый уровень считается одной
+  векторной операцией:
+      python -m src.services.ratings [--k-factor 32] [--initial 1500] [--chunk-size 5000]
+  Пересчет переписывает и player_ratings, и game_results.rating_delta, чтобы
+  отмена игры после пересчета вычитала дельту с новыми параметрами.
+
+Блокировки: пересчет держит LOCK player_ratings IN EXCLUSIVE MODE от чтения
+истории до коммита, а apply_game / revert_game сначала берут ROW EXCLUSIVE на
+ту же таблицу. Игры ждут окончания пересчета и применяются поверх новых
+рейтингов, между собой игры не блокируются, чтение лидерборда не ждет.
+"""
+
+import argparse
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+REPLAY_CHUNK_SIZE = 5000
+WRITE_BATCH_SIZE = 10000
+
+
+@dataclass(frozen=True)
+class RatingParams:
+    """Параметры Elo"""
+    initial: float = 1500.0
+    k_factor: float = 32.0
+    scale: float = 400.0
+
+
+DEFAULT_PARAMS = RatingParams()
+
+
+def batch_deltas(ratings: np.ndarray, points: np.ndarray, mask: np.ndarray, params: RatingParams) -> np.ndarray:
+    """
+    Изменения рейтингов для W игр, дополненных до P мест
+
+    Args:
+        ratings, points: массивы W x P
+        mask: W x P, True - место занято игроком
+
+    Returns:
+        W x P изменений (0 на пустых местах)
+    """
+    pairs = mask[:, :, None] & mask[:, None, :]
+    expected = 1.0 / (1.0 + 10.0 ** ((ratings[:, None, :] - ratings[:, :, None]) / params.scale))
+    actual = (np.sign(points[:, :, None] - points[:, None, :]) + 1.0) / 2.0
+    totals = np.where(pairs, actual - expected, 0.0).sum(axis=2)
+    players = mask.sum(axis=1)
+    k = params.k_factor / np.maximum(players - 1, 1)
+    return np.where(mask & (players[:, None] > 1), totals * k[:, None], 0.0)
+
+
+def game_deltas(ratings: Sequence[float], points: Sequence[int], params: RatingParams = DEFAULT_PARAMS) -> np.ndarray:
+    """Изменения рейтингов участников одной игры"""
+    ratings = np.asarray(ratings, dtype=float)[None, :]
+    points = np.asarray(points, dtype=float)[None, :]
+    return batch_deltas(ratings, points, np.ones_like(ratings, dtype=bool), params)[0]
+
+
+class RatingReplay:
+    """Рейтинги в массивах NumPy при последовательном проигрывании истории"""
+
+    def __init__(self, params: RatingParams = DEFAULT_PARAMS):
+        self.params = params
+        self.keys: List[Hashable] = []
+        self.index: Dict[Hashable, int] = {}
+        self.ratings = np.empty(1024)
+        self.games = np.zeros(1024, dtype=np.int64)
+
+    def _slot(self, key: Hashable) -> int:
+        slot = self.index.get(key)
+        if slot is None:
+            slot = len(self.keys)
+            if slot == len(self.ratings):
+                self.ratings = np.concatenate([self.ratings, np.empty(slot)])
+                self.games = np.concatenate([self.games, np.zeros(slot, dtype=np.int64)])
+            self.ratings[slot] = self.params.initial
+            self.games[slot] = 0
+            self.index[key] = slot
+            self.keys.append(key)
+        return slot
+
+    def play(self, games: List[List[Tuple[Hashable, int]]]) -> List[List[float]]:
+        """
+        Проиграть пачку игр в хронологическом порядке
+
+        Args:
+            games: для каждой игры - [(ключ игрока, очки)]
+
+        Returns:
+            Для каждой игры - изменения рейтингов по ее местам
+            (пустой список для игр, где меньше двух игроков)
+        """
+        result: List[List[float]] = [[] for _ in games]
+        numbers = [number for number, game in enumerate(games) if len(game) > 1]
+        games = [games[number] for number in numbers]
+        if not games:
+            return result
+
+        # Уровень игры - на единицу больше последнего уровня любого ее игрока:
+        # у игр одного уровня нет общих игроков, порядок игр каждого игрока сохраняется
+        slots = [[self._slot(key) for key, _ in game] for game in games]
+        last_level: Dict[int, int] = {}
+        levels = np.empty(len(games), dtype=np.int64)
+        for number, game_slots in enumerate(slots):
+            level = 1 + max(last_level.get(slot, -1) for slot in game_slots)
+            levels[number] = level
+            for slot in game_slots:
+                last_level[slot] = level
+
+        width = max(len(game) for game in games)
+        seats = np.full((len(games), width), -1, dtype=np.int64)
+        points = np.zeros((len(games), width))
+        for number, (game, game_slots) in enumerate(zip(games, slots)):
+            seats[number, :len(game)] = game_slots
+            points[number, :len(game)] = [value for _, value in game]
+
+        for level in range(int(levels.max()) + 1):
+            rows = np.flatnonzero(levels == level)
+            level_seats = seats[rows]
+            mask = level_seats >= 0
+            ratings = np.where(mask, self.ratings[np.where(mask, level_seats, 0)], 0.0)
+            deltas = batch_deltas(ratings, points[rows], mask, self.params)
+            self.ratings[level_seats[mask]] += deltas[mask]
+            self.games[level_seats[mask]] += 1
+            for row, row_deltas in zip(rows.tolist(), deltas.tolist()):
+                result[numbers[row]] = row_deltas[:len(games[row])]
+        return result
+
+    def rows(self) -> List[Tuple[Hashable, float, int]]:
+        """(ключ, рейтинг, игр) всех игроков"""
+        count = len(self.keys)
+        return list(zip(self.keys, self.ratings[:count].tolist(), self.games[:count].tolist()))
+
+
+# Пересчет исключает запись рейтингов, игры между собой совместимы
+LOCK_FOR_RECOMPUTE = text("LOCK TABLE player_ratings IN EXCLUSIVE MODE")
+LOCK_FOR_GAME = text("LOCK TABLE player_ratings IN ROW EXCLUSIVE MODE")
+
+GAME_PLAYERS = text("""
+    SELECT gr.id AS result_id, sp.user_id, gs.game_type_id, COALESCE(gr.points_scored, 0) AS points_scored,
+           pr.rating
+    FROM game_results AS gr
+    JOIN session_participants AS sp ON sp.id = gr.participant_id
+    JOIN games AS g ON g.id = gr.game_id
+    JOIN game_sessions AS gs ON gs.id = g.session_id
+    LEFT JOIN player_ratings AS pr ON pr.user_id = sp.user_id AND pr.game_type_id = gs.game_type_id
+    WHERE gr.game_id = :game_id
+      AND sp.user_id IS NOT NULL
+    ORDER BY gr.queue_position_in_game
+""")
+
+# Изменения прибавляются к текущему значению: параллельная игра того же игрока не теряется
+APPLY_DELTAS = text("""
+    INSERT INTO player_ratings AS pr (user_id, game_type_id, rating, games_played)
+    SELECT user_id, :game_type_id, :initial + delta, 1
+    FROM unnest(CAST(:user_ids AS uuid[]), CAST(:deltas AS float8[])) AS d(user_id, delta)
+    ON CONFLICT (user_id, game_type_id) DO UPDATE SET
+        rating = pr.rating + EXCLUDED.rating - :initial,
+        games_played = pr.games_played + 1,
+        updated_at = NOW()
+""")
+
+STORE_DELTAS = text("""
+    UPDATE game_results AS gr
+    SET rating_delta = d.delta
+    FROM unnest(CAST(:result_ids AS uuid[]), CAST(:deltas AS float8[])) AS d(result_id, delta)
+    WHERE gr.id = d.result_id
+""")
+
+REVERT_GAME = text("""
+    UPDATE player_ratings AS pr
+    SET rating = pr.rating - gr.rating_delta,
+        games_played = pr.games_played - 1,
+        updated_at = NOW()
+    FROM game_results AS gr
+    JOIN session_participants AS sp ON sp.id = gr.participant_id
+    JOIN games AS g ON g.id = gr.game_id
+    JOIN game_sessions AS gs ON gs.id = g.session_id
+    WHERE gr.game_id = :game_id
+      AND gr.rating_delta IS NOT NULL
+      AND pr.user_id = sp.user_id
+      AND pr.game_type_id = gs.game_type_id
+""")
+
+# Вся история по порядку: строки одной игры идут подряд
+HISTORY = text("""
+    SELECT g.id AS game_id, gs.game_type_id, sp.user_id, COALESCE(gr.points_scored, 0) AS points_scored,
+           gr.id AS result_id
+    FROM games AS g
+    JOIN game_sessions AS gs ON gs.id = g.session_id
+    JOIN game_results AS gr ON gr.game_id = g.id
+    JOIN session_participants AS sp ON sp.id = gr.participant_id
+    WHERE g.status = 'completed'
+      AND sp.user_id IS NOT NULL
+    ORDER BY COALESCE(g.completed_at, g.created_at), g.id, gr.queue_position_in_game
+""")
+
+CLEAR_DELTAS = text("""
+    UPDATE game_results
+    SET rating_delta = NULL
+    WHERE rating_delta IS NOT NULL
+""")
+
+REPLACE_RATINGS = text("""
+    INSERT INTO player_ratings (user_id, game_type_id, rating, games_played)
+    SELECT * FROM unnest(
+        CAST(:user_ids AS uuid[]), CAST(:game_type_ids AS integer[]),
+        CAST(:ratings AS float8[]), CAST(:games AS integer[])
+    )
+""")
+
+LEADERBOARD = text("""
+    SELECT pr.user_id, pr.rating, pr.games_played
+    FROM player_ratings AS pr
+    WHERE pr.game_type_id = (SELECT id FROM game_types WHERE name = :game_type)
+      AND pr.games_played >= :min_games
+    ORDER BY pr.rating DESC
+    LIMIT :limit
+""")
+
+
+async def apply_game(db: AsyncSession, game_id: UUID, params: RatingParams = DEFAULT_PARAMS) -> Dict[UUID, float]:
+    """
+    Обновить рейтинги по сохраненным результатам завершенной игры
+
+    Вызывается после вставки game_results; коммит - на вызывающем коде.
+
+    Returns:
+        user_id -> изменение рейтинга
+    """
+    # Ждем, пока идет полный пересчет, и только потом читаем текущие рейтинги
+    await db.execute(LOCK_FOR_GAME)
+    players = {}
+    for row in (await db.execute(GAME_PLAYERS, {"game_id": game_id})).mappings():
+        # Один пользователь за двумя местами считается по первому
+        players.setdefault(row["user_id"], row)
+    if len(players) < 2:
+        return {}
+
+    rows = list(players.values())
+    deltas = game_deltas(
+        [params.initial if row["rating"] is None else row["rating"] for row in rows],
+        [row["points_scored"] for row in rows],
+        params
+    ).tolist()
+
+    await db.execute(APPLY_DELTAS, {
+        "game_type_id": rows[0]["game_type_id"],
+        "initial": params.initial,
+        "user_ids": [row["user_id"] for row in rows],
+        "deltas": deltas
+    })
+    await db.execute(STORE_DELTAS, {"result_ids": [row["result_id"] for row in rows], "deltas": deltas})
+    return {row["user_id"]: delta for row, delta in zip(rows, deltas)}
+
+
+async def revert_game(db: AsyncSession, game_id: UUID) -> None:
+    """Вычесть изменения рейтингов отменяемой игры (до удаления game_results)"""
+    await db.execute(LOCK_FOR_GAME)
+    await db.execute(REVERT_GAME, {"game_id": game_id})
+
+
+async def get_leaderboard(db: AsyncSession, game_type: str, limit: int = 20, min_games: int = 1) -> List[Dict[str, Any]]:
+    """Топ-K по индексу (game_type_id, rating DESC)"""
+    result = await db.execute(LEADERBOARD, {"game_type": game_type, "limit": limit, "min_games": min_games})
+    return [dict(row) for row in result.mappings()]
+
+
+async def recompute(
+    session_factory,
+    params: RatingParams = DEFAULT_PARAMS,
+    chunk_size: int = REPLAY_CHUNK_SIZE
+) -> int:
+    """
+    Пересчитать все рейтинги заново по истории игр
+
+    История читается потоком пачками строк, незаконченная игра в конце
+    пачки переносится в следующую. Чтение истории, замена player_ratings и
+    перезапись game_results.rating_delta идут в одной транзакции под
+    LOCK_FOR_RECOMPUTE: игры, завершенные или отмененные в это время, ждут
+    коммита и применяются к уже пересчитанным рейтингам.
+
+    Returns:
+        Число проигранных игр
+    """
+    replay = RatingReplay(params)
+    played = 0
+    result_ids: List[Any] = []
+    deltas: List[float] = []
+
+    async with session_factory() as db:
+        await db.execute(LOCK_FOR_RECOMPUTE)
+
+        stream = await db.stream(HISTORY.execution_options(yield_per=chunk_size))
+        pending: List[Tuple[Any, Any, Any, int, Any]] = []
+        async for partition in stream.partitions(chunk_size):
+            pending.extend(partition)
+            last_game_id = pending[-1][0]
+            complete = [row for row in pending if row[0] != last_game_id]
+            pending = [row for row in pending if row[0] == last_game_id]
+            played += _play_rows(replay, complete, result_ids, deltas)
+        played += _play_rows(replay, pending, result_ids, deltas)
+        await stream.close()
+
+        rows = replay.rows()
+        await db.execute(text("DELETE FROM player_ratings"))
+        for start in range(0, len(rows), WRITE_BATCH_SIZE):
+            batch = rows[start:start + WRITE_BATCH_SIZE]
+            await db.execute(REPLACE_RATINGS, {
+                "user_ids": [key[0] for key, _, _ in batch],
+                "game_type_ids": [key[1] for key, _, _ in batch],
+                "ratings": [rating for _, rating, _ in batch],
+                "games": [games for _, _, games in batch]
+            })
+
+        await db.execute(CLEAR_DELTAS)
+        for start in range(0, len(result_ids), WRITE_BATCH_SIZE):
+            await db.execute(STORE_DELTAS, {
+                "result_ids": result_ids[start:start + WRITE_BATCH_SIZE],
+                "deltas": deltas[start:start + WRITE_BATCH_SIZE]
+            })
+        await db.commit()
+    return played
+
+
+def _play_rows(
+    replay: RatingReplay,
+    rows: List[Tuple[Any, Any, Any, int, Any]],
+    result_ids: List[Any],
+    deltas: List[float]
+) -> int:
+    """
+    Строки истории (game_id, game_type_id, user_id, очки, result_id) -> игры пачки
+
+    Изменения рейтингов дописываются в result_ids / deltas. Как и в apply_game,
+    пользователь за двумя местами считается по первому, дельта - только у него.
+    """
+    games: Dict[Any, Dict[Tuple[Any, Any], Tuple[int, Any]]] = {}
+    for game_id, game_type_id, user_id, points, result_id in rows:
+        games.setdefault(game_id, {}).setdefault((user_id, game_type_id), (points, result_id))
+
+    seats = [list(players.items()) for players in games.values()]
+    played = replay.play([[(key, points) for key, (points, _) in game] for game in seats])
+    for game, seat_deltas in zip(seats, played):
+        for (_, (_, result_id)), delta in zip(game, seat_deltas):
+            result_ids.append(result_id)
+            deltas.append(delta)
+    return len(games)
+
+
+async def _main():
+    """Ручной запуск полного пересчета"""
+    parser = argparse.ArgumentParser(description="Recompute player ratings from the whole game history")
+    parser.add_argument("--initial", type=float, default=DEFAULT_PARAMS.initial)
+    parser.add_argument("--k-factor", type=float, default=DEFAULT_PARAMS.k_factor)
+    parser.add_argument("--scale", type=float, default=DEFAULT_PARAMS.scale)
+    parser.add_argument("--chunk-size", type=int, default=REPLAY_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    from ..core import database as core_database
+
+    await core_database.init_sqlalchemy()
+    try:
+        started = time.perf_counter()
+        played = await recompute(
+            core_database.async_session_maker,
+            RatingParams(initial=args.initial, k_factor=args.k_factor, scale=args.scale),
+            args.chunk_size
+        )
+        print(f"✅ Ratings recomputed from {played} games in {time.perf_counter() - started:.1f}s")
+    finally:
+        await core_database.engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
@@ -0,0 +1,132 @@
+"""
+Накопительные итоги участников сессии
+
+session_participants.session_balance_kopecks, total_games_played и
+total_balls_potted обновляются инкрементально: при завершении игры к ним
+прибавляются строки game_results этой игры, при отмене завершенной игры -
+вычитаются. Оба случая - один UPDATE ... FROM в транзакции вызывающего кода,
+поэтому экран сессии читает итоги за O(участников), без пересчета игр.
+
+Пересчет из истории и проверка расхождений:
+    python -m src.services.session_ledger verify [--session-id UUID]
+    python -m src.services.session_ledger rebuild [--session-id UUID]
+"""
+
+import argparse
+import asyncio
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+APPLY_GAME_DELTAS = text("""
+    UPDATE session_participants AS sp
+    SET session_balance_kopecks = sp.session_balance_kopecks + :sign * gr.net_result_kopecks,
+        total_games_played = COALESCE(sp.total_games_played, 0) + :sign,
+        total_balls_potted = COALESCE(sp.total_balls_potted, 0) + :sign * COALESCE(gr.balls_potted, 0)
+    FROM game_results AS gr
+    WHERE gr.game_id = :game_id
+      AND gr.participant_id = sp.id
+""")
+
+# Итоги участников, пересчитанные из game_results (сохраняются только для завершенных игр)
+EXPECTED_TOTALS = """
+    SELECT p.id AS participant_id,
+           p.session_id,
+           p.session_balance_kopecks AS stored_balance,
+           COALESCE(p.total_games_played, 0) AS stored_games,
+           COALESCE(p.total_balls_potted, 0) AS stored_balls,
+           COALESCE(t.balance, 0) AS expected_balance,
+           COALESCE(t.games, 0) AS expected_games,
+           COALESCE(t.balls, 0) AS expected_balls
+    FROM session_participants AS p
+    LEFT JOIN (
+        SELECT participant_id,
+               SUM(net_result_kopecks) AS balance,
+               COUNT(*) AS games,
+               SUM(COALESCE(balls_potted, 0)) AS balls
+        FROM game_results
+        GROUP BY participant_id
+    ) AS t ON t.participant_id = p.id
+    WHERE (CAST(:session_id AS uuid) IS NULL OR p.session_id = CAST(:session_id AS uuid))
+"""
+
+DRIFT_CONDITION = """
+    (stored_balance, stored_games, stored_balls)
+        IS DISTINCT FROM (expected_balance, expected_games, expected_balls)
+"""
+
+FIND_DRIFT = text(f"""
+    SELECT * FROM ({EXPECTED_TOTALS}) AS totals
+    WHERE {DRIFT_CONDITION}
+    ORDER BY session_id, participant_id
+""")
+
+REBUILD = text(f"""
+    UPDATE session_participants AS sp
+    SET session_balance_kopecks = totals.expected_balance,
+        total_games_played = totals.expected_games,
+        total_balls_potted = totals.expected_balls
+    FROM ({EXPECTED_TOTALS}) AS totals
+    WHERE sp.id = totals.participant_id
+      AND {DRIFT_CONDITION}
+""")
+
+
+async def apply_game(db: AsyncSession, game_id: UUID, sign: int = 1) -> int:
+    """
+    Прибавить (sign=1) или вычесть (sign=-1) результаты игры из итогов участников
+
+    Коммит - на вызывающем коде, вместе с изменением статуса игры.
+    """
+    result = await db.execute(APPLY_GAME_DELTAS, {"game_id": game_id, "sign": sign})
+    return result.rowcount
+
+
+async def find_drift(db: AsyncSession, session_id: Optional[UUID] = None) -> List[Dict[str, Any]]:
+    """Участники, у которых сохраненные итоги не совпадают с game_results"""
+    result = await db.execute(FIND_DRIFT, {"session_id": session_id})
+    return [dict(row._mapping) for row in result]
+
+
+async def rebuild(db: AsyncSession, session_id: Optional[UUID] = None) -> int:
+    """Пересчитать итоги из game_results; возвращает число исправленных участников"""
+    result = await db.execute(REBUILD, {"session_id": session_id})
+    return result.rowcount
+
+
+async def _main():
+    """Ручной запуск проверки или пересчета"""
+    parser = argparse.ArgumentParser(description="Session participant totals: verify or rebuild from game_results")
+    parser.add_argument("command", choices=["verify", "rebuild"])
+    parser.add_argument("--session-id", type=UUID, default=None)
+    args = parser.parse_args()
+
+    from ..core import database as core_database
+
+    await core_database.init_sqlalchemy()
+    try:
+        async with core_database.async_session_maker() as db:
+            if args.command == "verify":
+                drift = await find_drift(db, args.session_id)
+                for row in drift:
+                    print(
+                        f"⚠️ Participant {row['participant_id']} (session {row['session_id']}): "
+                        f"balance {row['stored_balance']} != {row['expected_balance']}, "
+                        f"games {row['stored_games']} != {row['expected_games']}, "
+                        f"balls {row['stored_balls']} != {row['expected_balls']}"
+                    )
+                print(f"{'❌' if drift else '✅'} Drift found for {len(drift)} participants")
+                raise SystemExit(1 if drift else 0)
+
+            fixed = await rebuild(db, args.session_id)
+            await db.commit()
+            print(f"✅ Session totals rebuilt ({fixed} participants fixed)")
+    finally:
+        await core_database.engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
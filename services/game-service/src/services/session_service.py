@@ -14,6 +14,7 @@ from ..models.schemas import (
     GameTypeResponse
 )
 from ..models.database import GameSession, SessionParticipant, GameType
+from ..core.money import to_rubles
 
 
 class SessionService:
@@ -155,7 +156,7 @@ class SessionService:
                     can_modify_settings=True,
                     can_kick_players=True,
                     can_change_rules=True,
-                    session_balance_rubles=0.0,
+                    session_balance_rubles=to_rubles(0),
                     total_games_played=0,
                     total_balls_potted=0
                 )
@@ -214,7 +215,7 @@ class SessionService:
                 can_modify_settings=db_participant.can_modify_settings,
                 can_kick_players=db_participant.can_kick_players,
                 can_change_rules=db_participant.can_change_rules,
-                session_balance_rubles=float(db_participant.session_balance_rubles) if db_participant.session_balance_rubles else 0.0,
+                session_balance_rubles=to_rubles(db_participant.session_balance_kopecks),
                 total_games_played=db_participant.total_games_played,
                 total_balls_potted=db_participant.total_balls_potted
             )
@@ -383,7 +384,7 @@ class SessionService:
                             can_modify_settings=db_participant.can_modify_settings,
                             can_kick_players=db_participant.can_kick_players,
                             can_change_rules=db_participant.can_change_rules,
-                            session_balance_rubles=float(db_participant.session_balance_rubles) if db_participant.session_balance_rubles else 0.0,
+                            session_balance_rubles=to_rubles(db_participant.session_balance_kopecks),
                             total_games_played=db_participant.total_games_played,
                             total_balls_potted=db_participant.total_balls_potted
                         )
@@ -460,7 +461,7 @@ class SessionService:
                 can_modify_settings=db_participant.can_modify_settings,
                 can_kick_players=db_participant.can_kick_players,
                 can_change_rules=db_participant.can_change_rules,
-                session_balance_rubles=float(db_participant.session_balance_rubles) if db_participant.session_balance_rubles else 0.0,
+                session_balance_rubles=to_rubles(db_participant.session_balance_kopecks),
                 total_games_played=db_participant.total_games_played,
                 total_balls_potted=db_participant.total_balls_potted
             )
@@ -498,7 +499,7 @@ class SessionService:
                     can_modify_settings=db_participant.can_modify_settings,
                     can_kick_players=db_participant.can_kick_players,
                     can_change_rules=db_participant.can_change_rules,
-                    session_balance_rubles=float(db_participant.session_balance_rubles) if db_participant.session_balance_rubles else 0.0,
+                    session_balance_rubles=to_rubles(db_participant.session_balance_kopecks),
                     total_games_played=db_participant.total_games_played,
                     total_balls_potted=db_participant.total_balls_potted
                 )
@@ -602,7 +603,7 @@ class SessionService:
                 can_modify_settings=new_bot.can_modify_settings,
                 can_kick_players=new_bot.can_kick_players,
                 can_change_rules=new_bot.can_change_rules,
-                session_balance_rubles=float(new_bot.session_balance_rubles) if new_bot.session_balance_rubles else 0.0,
+                session_balance_rubles=to_rubles(new_bot.session_balance_kopecks),
                 total_games_played=new_bot.total_games_played,
                 total_balls_potted=new_bot.total_balls_potted
             )
@@ -0,0 +1,80 @@
+"""
+Расчеты игры "Колхоз"
+
+Правило: участники сидят по кругу в порядке очереди игры. Каждый получает
+от предыдущего игрока за свои очки и платит следующему за его очки:
+
+    earned[i] = points[i] * стоимость очка
+    paid[i]   = points[i + 1] * стоимость очка   (за последним - первый)
+    net[i]    = earned[i] - paid[i]
+
+Сумма net по игре всегда равна нулю. Расчет - один проход по очереди и
+по ее сдвигу на одну позицию, без попарного перебора участников. Все суммы -
+целые копейки.
+"""
+
+from typing import Any, Dict, Iterable, List, Mapping, Optional
+from uuid import UUID
+
+from ..core.money import to_kopecks
+
+DEFAULT_POINT_VALUE_KOPECKS = 5000
+
+
+def point_value_from_rules(rules: Optional[Mapping[str, Any]]) -> int:
+    """Стоимость очка в копейках из правил сессии (point_value_kopecks или point_value_rubles)"""
+    rules = rules or {}
+    if rules.get("point_value_kopecks") is not None:
+        return int(rules["point_value_kopecks"])
+    if rules.get("point_value_rubles") is not None:
+        return to_kopecks(rules["point_value_rubles"])
+    return DEFAULT_POINT_VALUE_KOPECKS
+
+
+def settlement_order(queue: Optional[Iterable], participant_ids: Iterable[UUID]) -> List[UUID]:
+    """
+    Порядок круга: очередь игры, затем участники с событиями, которых в ней нет
+
+    Участник из очереди без забитых шаров остается в круге с нулем очков.
+    """
+    order = [UUID(str(participant_id)) for participant_id in (queue or [])]
+    seen = set(order)
+    for participant_id in participant_ids:
+        if participant_id not in seen:
+            order.append(participant_id)
+            seen.add(participant_id)
+    return order
+
+
+def settle_kolkhoz(
+    order: List[UUID],
+    points: Mapping[UUID, int],
+    balls: Mapping[UUID, int],
+    point_value: int
+) -> List[Dict[str, Any]]:
+    """
+    Результаты всех участников игры
+
+    Returns:
+        Строки для game_results (без game_id) в порядке очереди
+    """
+    if not order:
+        return []
+
+    earned = [points.get(participant_id, 0) * point_value for participant_id in order]
+    # Следующему игроку платится ровно то, что он получил
+    paid = earned[1:] + earned[:1]
+
+    return [
+        {
+            "participant_id": participant_id,
+            "queue_position_in_game": position,
+            "balls_potted": balls.get(participant_id, 0),
+            "points_scored": points.get(participant_id, 0),
+            "earned_kopecks": earned_kopecks,
+            "paid_kopecks": paid_kopecks,
+            "net_result_kopecks": earned_kopecks - paid_kopecks,
+            "point_value_kopecks": point_value
+        }
+        for position, (participant_id, earned_kopecks, paid_kopecks) in enumerate(zip(order, earned, paid), start=1)
+    ]
@@ -0,0 +1,153 @@
+"""
+Взаиморасчет в конце вечера: кто кому сколько переводит
+
+На входе - итоговые балансы участников в копейках (сумма равна нулю), на
+выходе - список переводов должник -> кредитор. Минимальное число переводов
+равно N - k, где k - наибольшее число непересекающихся групп с нулевой
+суммой, на которые делятся ненулевые балансы.
+
+- До EXACT_LIMIT ненулевых балансов k ищется точно, динамикой по подмножествам
+  (O(2^n * n)).
+- Больше - жадно: крупнейший должник платит крупнейшему кредитору (две кучи),
+  предварительно сводятся пары с равными суммами. Не больше N - 1 переводов.
+
+Результат кэшируется по самим балансам: любая завершенная или отмененная игра
+меняет балансы, и следующий запрос считается заново.
+
+Замер на 5..50 участниках:
+    python -m src.services.transfers
+"""
+
+import heapq
+import random
+import time
+from collections import defaultdict
+from functools import lru_cache
+from typing import Dict, Hashable, List, Mapping, Tuple
+
+EXACT_LIMIT = 12
+
+Transfer = Tuple[Hashable, Hashable, int]
+
+
+def _greedy(balances: List[Tuple[Hashable, int]]) -> List[Transfer]:
+    """Крупнейший должник -> крупнейший кредитор, после сведения равных пар"""
+    transfers: List[Transfer] = []
+
+    # Равные суммы закрываются одним переводом и не дробятся в кучах
+    creditors_by_amount: Dict[int, List[Hashable]] = defaultdict(list)
+    for participant_id, amount in balances:
+        if amount > 0:
+            creditors_by_amount[amount].append(participant_id)
+    debtors = []
+    for participant_id, amount in balances:
+        if amount < 0 and creditors_by_amount.get(-amount):
+            transfers.append((participant_id, creditors_by_amount[-amount].pop(0), -amount))
+        elif amount < 0:
+            debtors.append((amount, str(participant_id), participant_id))
+    creditors = [
+        (-amount, str(participant_id), participant_id)
+        for amount, participant_ids in creditors_by_amount.items()
+        for participant_id in participant_ids
+    ]
+
+    heapq.heapify(debtors)
+    heapq.heapify(creditors)
+    while debtors and creditors:
+        debt, debtor_key, debtor = heapq.heappop(debtors)
+        credit, creditor_key, creditor = heapq.heappop(creditors)
+        amount = min(-debt, -credit)
+        transfers.append((debtor, creditor, amount))
+        if -debt > amount:
+            heapq.heappush(debtors, (debt + amount, debtor_key, debtor))
+        if -credit > amount:
+            heapq.heappush(creditors, (credit + amount, creditor_key, creditor))
+    return transfers
+
+
+def _zero_sum_groups(balances: List[Tuple[Hashable, int]]) -> List[List[Tuple[Hashable, int]]]:
+    """Наибольшее разбиение балансов на группы с нулевой суммой"""
+    n = len(balances)
+    full = (1 << n) - 1
+    totals = [0] * (full + 1)
+    groups = [0] * (full + 1)
+    removed = [0] * (full + 1)
+
+    for mask in range(1, full + 1):
+        lowest = (mask & -mask).bit_length() - 1
+        totals[mask] = totals[mask & (mask - 1)] + balances[lowest][1]
+        best, best_index = -1, 0
+        rest = mask
+        while rest:
+            bit = rest & -rest
+            index = bit.bit_length() - 1
+            if groups[mask ^ bit] > best:
+                best, best_index = groups[mask ^ bit], index
+            rest ^= bit
+        groups[mask] = best + (totals[mask] == 0)
+        removed[mask] = best_index
+
+    # Обратный проход: каждая маска с нулевой суммой закрывает очередную группу
+    result, current, mask = [], [], full
+    while mask:
+        index = removed[mask]
+        current.append(balances[index])
+        mask ^= 1 << index
+        if totals[mask] == 0:
+            result.append(current)
+            current = []
+    return result
+
+
+@lru_cache(maxsize=256)
+def _settle(balances: Tuple[Tuple[Hashable, int], ...]) -> Tuple[Tuple[Transfer, ...], bool]:
+    nonzero = [(participant_id, amount) for participant_id, amount in balances if amount]
+    if sum(amount for _, amount in nonzero) != 0:
+        raise ValueError("Balances do not sum to zero")
+
+    if len(nonzero) > EXACT_LIMIT:
+        return tuple(_greedy(nonzero)), False
+
+    transfers = []
+    for group in _zero_sum_groups(nonzero):
+        transfers.extend(_greedy(group))
+    return tuple(transfers), True
+
+
+def minimal_transfers(balances: Mapping[Hashable, int]) -> Tuple[List[Transfer], bool]:
+    """
+    Переводы, закрывающие все балансы
+
+    Args:
+        balances: participant_id -> баланс в копейках (плюс - получает)
+
+    Returns:
+        ([(должник, кредитор, копейки)], точный ли минимум)
+    """
+    key = tuple(sorted(balances.items(), key=lambda item: str(item[0])))
+    transfers, exact = _settle(key)
+    return list(transfers), exact
+
+
+def _random_balances(count: int, rng: random.Random) -> Dict[int, int]:
+    """Случайные балансы с нулевой суммой, кратные стоимости очка"""
+    balances = {index: rng.randint(-40, 40) * 5000 for index in range(count - 1)}
+    balances[count - 1] = -sum(balances.values())
+    return balances
+
+
+def _main():
+    """Замер времени и числа переводов для 5..50 участников"""
+    rng = random.Random(42)
+    for count in (5, 8, 10, 12, 20, 30, 40, 50):
+        samples = [_random_balances(count, rng) for _ in range(20)]
+        _settle.cache_clear()
+        started = time.perf_counter()
+        results = [minimal_transfers(balances) for balances in samples]
+        elapsed_ms = (time.perf_counter() - started) * 1000 / len(samples)
+        worst = max(len(transfers) for transfers, _ in results)
+        print(f"📊 {count} participants: {elapsed_ms:.2f} ms, up to {worst} transfers, exact={results[0][1]}")
+
+
+if __name__ == "__main__":
+    _main()
@@ -0,0 +1,219 @@
+"""
+Клиент профилей пользователей auth-service
+
+Имена и аватары запрашиваются пачкой через POST /auth/users/batch:
+- одновременные запросы за короткое окно объединяются в один HTTP запрос,
+  одинаковые id внутри окна запрашиваются один раз; объединяются только
+  запросы с одним и тем же токеном - чужой (истекший или отозванный) JWT
+  не должен ронять или авторизовывать пачку другого пользователя;
+- полученные профили хранятся в LRU с TTL;
+- события user.updated / user.invalidated из exchange user_events
+  сбрасывают профиль из кэша.
+"""
+
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import httpx
+
+from ..core.config import settings
+
+try:
+    import aio_pika
+except ImportError:  # без RabbitMQ кэш живет только по TTL
+    aio_pika = None
+
+
+INVALIDATION_ROUTING_KEYS = ["user.updated", "user.invalidated"]
+
+
+class UserProfilesClient:
+    """Асинхронный клиент POST /auth/users/batch с объединением запросов и LRU"""
+
+    def __init__(
+        self,
+        base_url: str,
+        http_client: Optional[httpx.AsyncClient] = None,
+        max_size: int = 5000,
+        ttl_seconds: float = 300.0,
+        batch_window_seconds: float = 0.005,
+        max_batch_size: int = 500
+    ):
+        self.base_url = base_url.rstrip("/")
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.batch_window_seconds = batch_window_seconds
+        self.max_batch_size = max_batch_size
+        self._http_client = http_client
+        self._owns_client = http_client is None
+        # user_id -> (истекает, профиль)
+        self._cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        # (токен, user_id) -> future, который ждут все запросившие этот id
+        self._inflight: Dict[Tuple[str, str], asyncio.Future] = {}
+        # токен -> накопленная пачка id и таймер ее отправки
+        self._queues: Dict[str, List[str]] = {}
+        self._flush_handles: Dict[str, asyncio.TimerHandle] = {}
+        self._connection = None
+        self.stats = {"hits": 0, "misses": 0, "requests": 0, "coalesced": 0, "invalidations": 0}
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self._http_client is None:
+            self._http_client = httpx.AsyncClient(timeout=5.0)
+        return self._http_client
+
+    # ==================== CACHE ====================
+
+    def _get_cached(self, user_id: str) -> Optional[Dict[str, Any]]:
+        entry = self._cache.get(user_id)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del self._cache[user_id]
+            return None
+        self._cache.move_to_end(user_id)
+        return entry[1]
+
+    def _put(self, profile: Dict[str, Any]):
+        user_id = str(profile["id"])
+        self._cache[user_id] = (time.monotonic() + self.ttl_seconds, profile)
+        self._cache.move_to_end(user_id)
+        while len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+
+    def invalidate(self, user_id):
+        if self._cache.pop(str(user_id), None) is not None:
+            self.stats["invalidations"] += 1
+
+    # ==================== LOOKUP ====================
+
+    async def get_profiles(self, user_ids: Iterable, token: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Профили пользователей по id
+
+        Args:
+            user_ids: ID пользователей
+            token: JWT вызывающего пользователя (пробрасывается в auth-service)
+
+        Returns:
+            user_id -> профиль; неизвестные id в ответ не попадают
+        """
+        result: Dict[str, Dict[str, Any]] = {}
+        waiting: Dict[str, asyncio.Future] = {}
+
+        for user_id in dict.fromkeys(str(user_id) for user_id in user_ids):
+            profile = self._get_cached(user_id)
+            if profile is not None:
+                self.stats["hits"] += 1
+                result[user_id] = profile
+                continue
+
+            self.stats["misses"] += 1
+            future = self._inflight.get((token, user_id))
+            if future is None:
+                future = asyncio.get_running_loop().create_future()
+                self._inflight[(token, user_id)] = future
+                self._enqueue(user_id, token)
+            else:
+                self.stats["coalesced"] += 1
+            waiting[user_id] = future
+
+        for user_id, future in waiting.items():
+            # future общий для всех ждущих: отмена одного вызова не должна отменять остальных
+            profile = await asyncio.shield(future)
+            if profile is not None:
+                result[user_id] = profile
+        return result
+
+    async def get_profile(self, user_id, token: str) -> Optional[Dict[str, Any]]:
+        profiles = await self.get_profiles([user_id], token)
+        return profiles.get(str(user_id))
+
+    def _enqueue(self, user_id: str, token: str):
+        queue = self._queues.setdefault(token, [])
+        queue.append(user_id)
+
+        if len(queue) >= self.max_batch_size:
+            self._flush_now(token)
+        elif token not in self._flush_handles:
+            self._flush_handles[token] = asyncio.get_running_loop().call_later(
+                self.batch_window_seconds, self._flush_now, token
+            )
+
+    def _flush_now(self, token: str):
+        handle = self._flush_handles.pop(token, None)
+        if handle is not None:
+            handle.cancel()
+
+        batch = self._queues.pop(token, None)
+        if batch:
+            asyncio.get_running_loop().create_task(self._fetch(batch, token))
+
+    async def _fetch(self, user_ids: List[str], token: str):
+        """Один запрос в auth-service на всю пачку"""
+        self.stats["requests"] += 1
+        try:
+            response = await self.client.post(
+                f"{self.base_url}/auth/users/batch",
+                json={"user_ids": user_ids},
+                headers={"Authorization": f"Bearer {token}"}
+            )
+            response.raise_for_status()
+            profiles = {str(user["id"]): user for user in response.json()["users"]}
+        except Exception as e:
+            print(f"❌ Failed to fetch user profiles from auth-service: {e}")
+            for user_id in user_ids:
+                future = self._inflight.pop((token, user_id), None)
+                if future is not None and not future.done():
+                    future.set_exception(e)
+            return
+
+        for user_id in user_ids:
+            profile = profiles.get(user_id)
+            if profile is not None:
+                self._put(profile)
+            future = self._inflight.pop((token, user_id), None)
+            if future is not None and not future.done():
+                future.set_result(profile)
+
+    # ==================== EVENTS ====================
+
+    async def start_invalidation_listener(self, rabbitmq_url: str):
+        """Подписка на user_events: своя временная очередь на каждый воркер"""
+        if aio_pika is None:
+            print("⚠️ aio-pika is not installed, user profile cache relies on TTL only")
+            return
+
+        self._connection = await aio_pika.connect_robust(rabbitmq_url)
+        channel = await self._connection.channel()
+        exchange = await channel.declare_exchange(
+            "user_events", aio_pika.ExchangeType.TOPIC, durable=True
+        )
+        queue = await channel.declare_queue(exclusive=True, auto_delete=True)
+        for routing_key in INVALIDATION_ROUTING_KEYS:
+            await queue.bind(exchange, routing_key)
+        await queue.consume(self._on_message)
+        print("✅ User profile cache subscribed to user_events")
+
+    async def _on_message(self, message):
+        async with message.process():
+            try:
+                user_id = json.loads(message.body).get("user_id")
+            except (ValueError, AttributeError):
+                return
+            if user_id:
+                self.invalidate(user_id)
+
+    async def close(self):
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
+        if self._owns_client and self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+
+
+user_profiles = UserProfilesClient(settings.AUTH_SERVICE_URL)
@@ -0,0 +1,231 @@
+"""
+Статистика пользователя за все время (user_stats)
+
+Проекция game_results по user_id участников: сессии, игры, победы, шары,
+фолы, очки, итог в копейках и любимый тип игры. Обновляется инкрементально
+в транзакции complete_game / cancel_game (после session_ledger.apply_game),
+поэтому страница статистики читает одну строку по первичному ключу.
+
+Полный пересчет истории пачками пользователей:
+    python -m src.services.user_stats [--chunk-size N]
+"""
+
+import argparse
+import asyncio
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+REBUILD_CHUNK_SIZE = 500
+
+# Строки результатов игры с пользователем и типом игры.
+# new_session = 1, если это первая (или, при отмене, последняя) игра участника в сессии:
+# session_ledger.apply_game уже изменил total_games_played в этой транзакции.
+GAME_ROWS = """
+    SELECT sp.user_id,
+           gs.game_type_id,
+           COALESCE(gr.balls_potted, 0) AS balls_potted,
+           gr.fouls,
+           COALESCE(gr.points_scored, 0) AS points_scored,
+           gr.net_result_kopecks,
+           gr.is_winner::int AS won,
+           (sp.total_games_played = :first_game_total)::int AS new_session
+    FROM game_results AS gr
+    JOIN session_participants AS sp ON sp.id = gr.participant_id
+    JOIN games AS g ON g.id = gr.game_id
+    JOIN game_sessions AS gs ON gs.id = g.session_id
+    WHERE gr.game_id = :game_id
+      AND sp.user_id IS NOT NULL
+"""
+
+APPLY_USER_STATS = text(f"""
+    INSERT INTO user_stats AS us (
+        user_id, sessions_played, games_played, games_won,
+        balls_potted, fouls, points_scored, net_result_kopecks
+    )
+    SELECT user_id, :sign * SUM(new_session), :sign * COUNT(*), :sign * SUM(won),
+           :sign * SUM(balls_potted), :sign * SUM(fouls), :sign * SUM(points_scored), :sign * SUM(net_result_kopecks)
+    FROM ({GAME_ROWS}) AS game_rows
+    GROUP BY user_id
+    ON CONFLICT (user_id) DO UPDATE SET
+        sessions_played = us.sessions_played + EXCLUDED.sessions_played,
+        games_played = us.games_played + EXCLUDED.games_played,
+        games_won = us.games_won + EXCLUDED.games_won,
+        balls_potted = us.balls_potted + EXCLUDED.balls_potted,
+        fouls = us.fouls + EXCLUDED.fouls,
+        points_scored = us.points_scored + EXCLUDED.points_scored,
+        net_result_kopecks = us.net_result_kopecks + EXCLUDED.net_result_kopecks,
+        updated_at = NOW()
+""")
+
+APPLY_GAME_TYPE_STATS = text(f"""
+    INSERT INTO user_game_type_stats AS t (user_id, game_type_id, games_played)
+    SELECT user_id, game_type_id, :sign * COUNT(*)
+    FROM ({GAME_ROWS}) AS game_rows
+    GROUP BY user_id, game_type_id
+    ON CONFLICT (user_id, game_type_id) DO UPDATE SET
+        games_played = t.games_played + EXCLUDED.games_played
+""")
+
+# Любимый тип - больше всего игр, при равенстве - меньший id
+FAVOURITE_GAME_TYPE = """
+    SELECT t.game_type_id
+    FROM user_game_type_stats AS t
+    WHERE t.user_id = us.user_id AND t.games_played > 0
+    ORDER BY t.games_played DESC, t.game_type_id
+    LIMIT 1
+"""
+
+REFRESH_FAVOURITE = text(f"""
+    UPDATE user_stats AS us
+    SET favourite_game_type_id = ({FAVOURITE_GAME_TYPE})
+    WHERE us.user_id IN (
+        SELECT sp.user_id
+        FROM game_results AS gr
+        JOIN session_participants AS sp ON sp.id = gr.participant_id
+        WHERE gr.game_id = :game_id
+    )
+""")
+
+REBUILD_NEXT_USERS = text("""
+    SELECT DISTINCT user_id
+    FROM session_participants
+    WHERE user_id IS NOT NULL
+      AND user_id > CAST(:last_user_id AS uuid)
+    ORDER BY user_id
+    LIMIT :chunk_size
+""")
+
+# История пачки пользователей (user_id = ANY(:user_ids))
+USER_HISTORY = """
+    SELECT sp.user_id, sp.session_id, gs.game_type_id, gr.*
+    FROM session_participants AS sp
+    JOIN game_results AS gr ON gr.participant_id = sp.id
+    JOIN games AS g ON g.id = gr.game_id
+    JOIN game_sessions AS gs ON gs.id = g.session_id
+    WHERE sp.user_id = ANY(CAST(:user_ids AS uuid[]))
+"""
+
+REBUILD_DELETE_GAME_TYPES = text("""
+    DELETE FROM user_game_type_stats WHERE user_id = ANY(CAST(:user_ids AS uuid[]))
+""")
+
+REBUILD_GAME_TYPES = text(f"""
+    INSERT INTO user_game_type_stats (user_id, game_type_id, games_played)
+    SELECT user_id, game_type_id, COUNT(*)
+    FROM ({USER_HISTORY}) AS history
+    GROUP BY user_id, game_type_id
+""")
+
+REBUILD_USER_STATS = text(f"""
+    INSERT INTO user_stats AS us (
+        user_id, sessions_played, games_played, games_won,
+        balls_potted, fouls, points_scored, net_result_kopecks
+    )
+    SELECT users.user_id,
+           COUNT(DISTINCT history.session_id),
+           COUNT(history.id),
+           COUNT(history.id) FILTER (WHERE history.is_winner),
+           COALESCE(SUM(history.balls_potted), 0),
+           COALESCE(SUM(history.fouls), 0),
+           COALESCE(SUM(history.points_scored), 0),
+           COALESCE(SUM(history.net_result_kopecks), 0)
+    FROM unnest(CAST(:user_ids AS uuid[])) AS users(user_id)
+    LEFT JOIN ({USER_HISTORY}) AS history ON history.user_id = users.user_id
+    GROUP BY users.user_id
+    ON CONFLICT (user_id) DO UPDATE SET
+        sessions_played = EXCLUDED.sessions_played,
+        games_played = EXCLUDED.games_played,
+        games_won = EXCLUDED.games_won,
+        balls_potted = EXCLUDED.balls_potted,
+        fouls = EXCLUDED.fouls,
+        points_scored = EXCLUDED.points_scored,
+        net_result_kopecks = EXCLUDED.net_result_kopecks,
+        updated_at = NOW()
+""")
+
+REBUILD_FAVOURITE = text(f"""
+    UPDATE user_stats AS us
+    SET favourite_game_type_id = ({FAVOURITE_GAME_TYPE})
+    WHERE us.user_id = ANY(CAST(:user_ids AS uuid[]))
+""")
+
+GET_USER_STATS = text("""
+    SELECT us.*, gt.name AS favourite_game_type, gt.display_name AS favourite_game_type_display_name
+    FROM user_stats AS us
+    LEFT JOIN game_types AS gt ON gt.id = us.favourite_game_type_id
+    WHERE us.user_id = :user_id
+""")
+
+
+async def apply_game(db: AsyncSession, game_id: UUID, sign: int = 1) -> None:
+    """
+    Прибавить (sign=1) или вычесть (sign=-1) результаты игры из статистики пользователей
+
+    Вызывается после session_ledger.apply_game и до удаления game_results при отмене;
+    коммит - на вызывающем коде.
+    """
+    params = {"game_id": game_id, "sign": sign, "first_game_total": 1 if sign > 0 else 0}
+    await db.execute(APPLY_USER_STATS, params)
+    await db.execute(APPLY_GAME_TYPE_STATS, params)
+    await db.execute(REFRESH_FAVOURITE, {"game_id": game_id})
+
+
+async def get_user_stats(db: AsyncSession, user_id: UUID) -> Optional[Dict[str, Any]]:
+    """Строка проекции пользователя (None - пользователь еще не играл)"""
+    row = (await db.execute(GET_USER_STATS, {"user_id": user_id})).mappings().first()
+    return dict(row) if row else None
+
+
+async def rebuild(session_factory, chunk_size: int = REBUILD_CHUNK_SIZE) -> int:
+    """
+    Пересчитать user_stats из game_results
+
+    Пользователи обрабатываются пачками по user_id (keyset), каждая пачка -
+    своя транзакция, так что история не загружается целиком.
+
+    Returns:
+        Число пересчитанных пользователей
+    """
+    last_user_id = "00000000-0000-0000-0000-000000000000"
+    total = 0
+    while True:
+        async with session_factory() as db:
+            user_ids: List[UUID] = list((await db.execute(
+                REBUILD_NEXT_USERS, {"last_user_id": last_user_id, "chunk_size": chunk_size}
+            )).scalars())
+            if not user_ids:
+                return total
+
+            params = {"user_ids": user_ids}
+            await db.execute(REBUILD_DELETE_GAME_TYPES, params)
+            await db.execute(REBUILD_GAME_TYPES, params)
+            await db.execute(REBUILD_USER_STATS, params)
+            await db.execute(REBUILD_FAVOURITE, params)
+            await db.commit()
+
+        total += len(user_ids)
+        last_user_id = str(user_ids[-1])
+        print(f"📊 user_stats: {total} users rebuilt")
+
+
+async def _main():
+    """Ручной запуск полного пересчета"""
+    parser = argparse.ArgumentParser(description="Rebuild user_stats from game_results")
+    parser.add_argument("--chunk-size", type=int, default=REBUILD_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    from ..core import database as core_database
+
+    await core_database.init_sqlalchemy()
+    try:
+        total = await rebuild(core_database.async_session_maker, args.chunk_size)
+        print(f"✅ user_stats rebuilt for {total} users")
+    finally:
+        await core_database.engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
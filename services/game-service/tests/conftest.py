@@ -0,0 +1,118 @@
+"""
+Общие настройки тестов Game Service
+"""
+
+import os
+import sys
+from pathlib import Path
+from uuid import uuid4
+
+import pytest
+import pytest_asyncio
+
+# Тесты импортируют код сервиса как пакет src (как и uvicorn src.main:app)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+# Общие библиотеки (в контейнерах - PYTHONPATH=/app/shared-libs/python)
+sys.path.insert(0, str(Path(__file__).resolve().parents[3] / "shared-libs" / "python"))
+
+# Типы игр, которые seed_session создает по game_type_id
+GAME_TYPES = {1: ("kolkhoz", "Колхоз"), 2: ("americana", "Американка")}
+
+
+@pytest.fixture
+def database_url() -> str:
+    """URL тестовой PostgreSQL; интеграционные тесты пропускаются, если он не задан"""
+    url = os.getenv("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL is not set")
+    return url
+
+
+@pytest_asyncio.fixture
+async def session_factory(database_url):
+    """Пустая схема game-service из моделей и фабрика асинхронных сессий"""
+    from sqlalchemy import text
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+    from src.models.database import Base
+
+    engine = create_async_engine(database_url.replace("postgresql://", "postgresql+psycopg://"))
+    async with engine.begin() as conn:
+        # drop_all не справляется с циклом внешних ключей game_sessions <-> games
+        await conn.execute(text("DROP SCHEMA public CASCADE"))
+        await conn.execute(text("CREATE SCHEMA public"))
+        await conn.run_sync(Base.metadata.create_all)
+    try:
+        yield async_sessionmaker(engine, expire_on_commit=False)
+    finally:
+        await engine.dispose()
+
+
+@pytest.fixture
+def seed_session(session_factory):
+    """
+    Сессия с участниками: await seed_session(users, names=None, bot=False, game_type_id=1, rules=None)
+
+    users - user_id участников (без него - случайные по числу names), bot - пустой игрок
+    в конце списка. Возвращает (session_id, [participant_id в порядке участников]).
+    """
+    from src.models.database import GameSession, GameType, SessionParticipant
+
+    async def seed(users=None, names=None, bot=False, game_type_id=1, rules=None):
+        users = list(users) if users is not None else [uuid4() for _ in names]
+        names = names or [f"Игрок {n}" for n in range(len(users))]
+        async with session_factory() as db:
+            if await db.get(GameType, game_type_id) is None:
+                name, display_name = GAME_TYPES[game_type_id]
+                db.add(GameType(id=game_type_id, name=name, display_name=display_name))
+            game_session = GameSession(creator_user_id=users[0], game_type_id=game_type_id, name="Вечер", rules=rules)
+            db.add(game_session)
+            await db.flush()
+            participants = [
+                SessionParticipant(session_id=game_session.id, user_id=user_id, display_name=name)
+                for user_id, name in zip(users, names)
+            ]
+            if bot:
+                participants.append(SessionParticipant(session_id=game_session.id, display_name="Бот", is_empty_user=True))
+            db.add_all(participants)
+            await db.commit()
+            return game_session.id, [participant.id for participant in participants]
+
+    return seed
+
+
+@pytest.fixture
+def play_game(session_factory):
+    """
+    Игра с ручной очередью: await play_game(session_id, queue, points=None, events=(), complete=True)
+
+    points - участник -> очки забитого шара (или список очков по шарам), events - прочие
+    события (participant_id, event_type, event_data). Возвращает game_id.
+    """
+    from src.models.database import Game
+    from src.models.schemas import GameEventRequest, GameEventType
+    from src.services.game_service import GameService
+
+    async def play(session_id, queue, points=None, events=(), complete=True):
+        async with session_factory() as db:
+            game = Game(session_id=session_id, game_number=1, queue_algorithm="manual",
+                        current_queue=[str(participant_id) for participant_id in queue])
+            db.add(game)
+            await db.commit()
+            game_id = game.id
+
+        balls = [
+            (participant_id, GameEventType.BALL_POTTED, {"points": value})
+            for participant_id, values in (points or {}).items()
+            for value in (values if isinstance(values, list) else [values])
+        ]
+        for participant_id, event_type, event_data in [*balls, *events]:
+            async with session_factory() as db:
+                await GameService.add_game_event(db, game_id, GameEventRequest(
+                    event_type=event_type, participant_id=participant_id, event_data=event_data
+                ))
+        if complete:
+            async with session_factory() as db:
+                await GameService.complete_game(db, game_id)
+        return game_id
+
+    return play
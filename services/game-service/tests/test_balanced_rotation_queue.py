@@ -0,0 +1,70 @@
+"""
+Tests for the balanced-rotation (Latin square) queue algorithm
+"""
+
+from collections import Counter
+from uuid import uuid4
+
+import pytest
+
+from src.models.database import SessionParticipant
+from src.services.queue_algorithms import QueueAlgorithms, get_queue_algorithm
+from src.services.queue_analytics import fairness
+
+
+def make_participants(count):
+    return [SessionParticipant(id=uuid4(), display_name=f"Игрок {n}") for n in range(count)]
+
+
+def schedule(participants, session_id, games):
+    return [
+        [str(participant.id) for participant in
+         QueueAlgorithms.generate_balanced_rotation_queue(participants, session_id, game_number)]
+        for game_number in range(1, games + 1)
+    ]
+
+
+class TestBalancedRotationQueue:
+    """Тесты для алгоритма balanced_rotation"""
+
+    def setup_method(self):
+        self.session_id = uuid4()
+
+    def test_registered(self):
+        assert get_queue_algorithm("balanced_rotation") is QueueAlgorithms.generate_balanced_rotation_queue
+
+    @pytest.mark.parametrize("players", [2, 3, 4, 5, 6, 7])
+    def test_every_block_is_latin(self, players):
+        """За каждые n игр каждый участник ровно раз стоит на каждом месте"""
+        participants = make_participants(players)
+        queues = schedule(participants, self.session_id, 3 * players)
+        ids = {str(participant.id) for participant in participants}
+
+        for queue in queues:
+            assert set(queue) == ids
+        for start in range(0, len(queues), players):
+            block = queues[start:start + players]
+            seats = Counter((participant_id, place) for queue in block for place, participant_id in enumerate(queue))
+            assert len(seats) == players * players
+            assert set(seats.values()) == {1}
+
+    def test_fairness_score_is_perfect_after_full_blocks(self):
+        participants = make_participants(5)
+        queues = schedule(participants, self.session_id, 10)
+        matrix = {
+            str(participant.id): [sum(queue[place] == str(participant.id) for queue in queues) for place in range(5)]
+            for participant in participants
+        }
+        assert fairness(matrix)["fairness_score"] == 100.0
+        assert fairness(matrix)["chi_square"] == 0.0
+
+    def test_reproducible_and_randomized_per_session(self):
+        participants = make_participants(4)
+        assert schedule(participants, self.session_id, 4) == schedule(list(reversed(participants)), self.session_id, 4)
+
+        squares = {tuple(map(tuple, schedule(participants, uuid4(), 4))) for _ in range(10)}
+        assert len(squares) > 1
+
+    def test_single_participant(self):
+        alone = make_participants(1)
+        assert QueueAlgorithms.generate_balanced_rotation_queue(alone, self.session_id, 5) == alone
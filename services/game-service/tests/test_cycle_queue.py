@@ -0,0 +1,83 @@
+"""
+Tests for the stateless seeded cycle queue algorithm
+"""
+
+import math
+from itertools import permutations
+from uuid import uuid4
+
+import pytest
+
+from src.models.database import SessionParticipant
+from src.models.schemas import CreateGameRequest
+from src.services.game_service import GameService
+from src.services.queue_algorithms import QueueAlgorithms, _permute_rank, _unrank, get_queue_algorithm
+
+
+def make_participants(count):
+    return [SessionParticipant(id=uuid4(), display_name=f"Игрок {n}") for n in range(count)]
+
+
+def order(queue):
+    return tuple(str(participant.id) for participant in queue)
+
+
+class TestCycleQueue:
+    """Тесты для алгоритма cycle"""
+
+    def setup_method(self):
+        self.participants = make_participants(4)
+        self.session_id = uuid4()
+
+    def test_registered(self):
+        assert get_queue_algorithm("cycle") is QueueAlgorithms.generate_cycle_queue
+
+    def test_unrank_is_lexicographic(self):
+        items = ["a", "b", "c"]
+        assert [tuple(_unrank(rank, items)) for rank in range(6)] == list(permutations(items))
+
+    def test_permute_rank_is_bijection(self):
+        for domain in (2, 6, 24, 120, 5040):
+            ranks = {_permute_rank(rank, domain, b"key") for rank in range(domain)}
+            assert ranks == set(range(domain))
+
+    def test_each_cycle_visits_every_order_once(self):
+        total = math.factorial(len(self.participants))
+        queues = [
+            order(QueueAlgorithms.generate_cycle_queue(self.participants, self.session_id, game_number))
+            for game_number in range(1, 2 * total + 1)
+        ]
+        assert len(set(queues[:total])) == total
+        assert len(set(queues[total:])) == total
+        # Следующий цикл перемешан другим ключом
+        assert queues[:total] != queues[total:]
+
+    def test_reproducible_and_independent_of_input_order(self):
+        first = QueueAlgorithms.generate_cycle_queue(self.participants, self.session_id, 7)
+        again = QueueAlgorithms.generate_cycle_queue(list(reversed(self.participants)), self.session_id, 7)
+        assert order(first) == order(again)
+
+        other_sessions = {
+            order(QueueAlgorithms.generate_cycle_queue(self.participants, uuid4(), 7)) for _ in range(10)
+        }
+        assert len(other_sessions) > 1
+
+    def test_single_participant(self):
+        alone = make_participants(1)
+        assert QueueAlgorithms.generate_cycle_queue(alone, self.session_id, 3) == alone
+
+
+@pytest.mark.asyncio
+async def test_create_game_uses_cycle_from_session_rules(session_factory, seed_session):
+    session_id, participant_ids = await seed_session([uuid4() for _ in range(3)], rules={"queue_algorithm": "cycle"})
+    participants = [SessionParticipant(id=participant_id) for participant_id in participant_ids]
+
+    queues = []
+    for _ in range(6):
+        async with session_factory() as db:
+            game = await GameService.create_game(db, session_id, CreateGameRequest())
+        assert game.game_data["queue_algorithm"] == "cycle"
+        expected = QueueAlgorithms.generate_cycle_queue(participants, session_id, game.game_number)
+        assert game.game_data["current_queue"] == list(order(expected))
+        queues.append(tuple(game.game_data["current_queue"]))
+    assert len(set(queues)) == 6
@@ -0,0 +1,183 @@
+"""
+Tests for the shared RabbitMQ consumer runtime (artel_events.QueueConsumer)
+"""
+
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from artel_events import QueueConsumer
+from artel_events.consumer import RETRY_COUNT_HEADER
+
+
+class FakeMessage:
+    def __init__(self, event, headers=None, raw: bytes = None):
+        self.body = raw if raw is not None else json.dumps(event).encode()
+        self.headers = headers or {}
+        self.message_id = event.get("event_id") if event else None
+        self.content_type = "application/json"
+        self.timestamp = None
+        self.acked = False
+
+    async def ack(self):
+        self.acked = True
+
+
+class FakeExchange:
+    def __init__(self):
+        self.published = []
+
+    async def publish(self, message, routing_key):
+        self.published.append((routing_key, message))
+
+
+class FakeChannel:
+    def __init__(self):
+        self.default_exchange = FakeExchange()
+        self.is_closed = False
+
+    async def close(self):
+        self.is_closed = True
+
+
+def event(n: int, **extra) -> dict:
+    return {"event_id": f"e{n}", "event_type": "updated", "data": {"n": n}, **extra}
+
+
+def make_consumer(handler, **kwargs) -> QueueConsumer:
+    consumer = QueueConsumer("game.user_events", handler, **kwargs)
+    consumer._channel = FakeChannel()
+    consumer._start_workers()
+    return consumer
+
+
+async def deliver(consumer: QueueConsumer, messages):
+    for message in messages:
+        await consumer._on_message(message)
+    await consumer._drained()
+
+
+@pytest.mark.asyncio
+async def test_events_delivered_in_batches_and_acked():
+    batches = []
+
+    async def handler(events):
+        batches.append([e["event_id"] for e in events])
+
+    consumer = make_consumer(handler, concurrency=1, batch_size=10, batch_timeout=0.05)
+    messages = [FakeMessage(event(n)) for n in range(25)]
+    await deliver(consumer, messages)
+    await consumer.stop()
+
+    assert [len(batch) for batch in batches] == [10, 10, 5]
+    assert all(message.acked for message in messages)
+    assert consumer.stats["processed"] == 25
+    assert consumer.stats["batches"] == 3
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded():
+    running = peak = 0
+
+    async def handler(events):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    consumer = make_consumer(handler, concurrency=3, batch_size=1)
+    await deliver(consumer, [FakeMessage(event(n)) for n in range(20)])
+    await consumer.stop()
+
+    assert peak == 3
+    assert consumer.stats["processed"] == 20
+
+
+@pytest.mark.asyncio
+async def test_duplicate_event_ids_skipped():
+    seen = []
+
+    async def handler(events):
+        seen.extend(e["event_id"] for e in events)
+
+    consumer = make_consumer(handler, concurrency=1)
+    await deliver(consumer, [FakeMessage(event(1)), FakeMessage(event(2))])
+    # Повторная доставка того же события (например, после переподключения)
+    duplicate = FakeMessage(event(1))
+    await deliver(consumer, [duplicate, FakeMessage(event(3))])
+    await consumer.stop()
+
+    assert seen == ["e1", "e2", "e3"]
+    assert duplicate.acked
+    assert consumer.stats["duplicates"] == 1
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_retried_with_delay_then_dead_lettered():
+    async def handler(events):
+        raise RuntimeError("database is down")
+
+    consumer = make_consumer(handler, concurrency=1, retry_delays=(1, 10))
+    exchange = consumer._channel.default_exchange
+
+    first = FakeMessage(event(1))
+    await deliver(consumer, [first])
+    routing_key, retried = exchange.published[-1]
+    assert routing_key == "game.user_events.retry.1"
+    assert retried.headers[RETRY_COUNT_HEADER] == 1
+    assert first.acked
+
+    # Сообщение вернулось из очереди задержки - вторая попытка, задержка больше
+    await deliver(consumer, [FakeMessage(event(1), headers=dict(retried.headers))])
+    routing_key, retried = exchange.published[-1]
+    assert routing_key == "game.user_events.retry.10"
+
+    await deliver(consumer, [FakeMessage(event(1), headers=dict(retried.headers))])
+    routing_key, dead = exchange.published[-1]
+    assert routing_key == "game.user_events.dlq"
+    assert "database is down" in dead.headers["x-last-error"]
+    await consumer.stop()
+
+    assert consumer.stats["retried"] == 2
+    assert consumer.stats["dead_lettered"] == 1
+    assert consumer.stats["processed"] == 0
+
+
+@pytest.mark.asyncio
+async def test_invalid_payload_goes_straight_to_dlq():
+    handled = []
+
+    async def handler(events):
+        handled.extend(events)
+
+    consumer = make_consumer(handler, concurrency=1)
+    exchange = consumer._channel.default_exchange
+    broken = FakeMessage(None, raw=b"{not json")
+    await deliver(consumer, [broken, FakeMessage(event(1))])
+    await consumer.stop()
+
+    assert [routing_key for routing_key, _ in exchange.published] == [
+        "game.user_events.dlq"
+    ]
+    assert broken.acked
+    assert [e["event_id"] for e in handled] == ["e1"]
+
+
+@pytest.mark.asyncio
+async def test_lag_and_throughput_metrics():
+    async def handler(events):
+        pass
+
+    consumer = make_consumer(handler, concurrency=2)
+    published = (datetime.utcnow() - timedelta(seconds=5)).isoformat()
+    await deliver(consumer, [FakeMessage(event(n, timestamp=published)) for n in range(30)])
+    await consumer.stop()
+
+    metrics = consumer.metrics()
+    assert 4 < metrics["last_lag_seconds"] < 60
+    assert metrics["throughput_per_second"] == pytest.approx(30 / 60, abs=0.01)
+    assert metrics["in_flight"] == 0
+    assert consumer._channel is None
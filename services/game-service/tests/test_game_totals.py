@@ -0,0 +1,56 @@
+"""
+Tests for typed event columns and SQL-side game totals in complete_game
+"""
+
+from uuid import uuid4
+
+import pytest
+
+from src.models.schemas import GameEventRequest, GameEventType
+from src.services.game_service import GameService
+
+
+def test_typed_fields_extracted_from_event_data():
+    assert GameService._typed_event_fields({"points": "5", "money": 12.5}) == {
+        "points": 5, "money_kopecks": 1250, "penalty_kopecks": 0
+    }
+    assert GameService._typed_event_fields({"points": "abc", "penalty": None}) == {
+        "points": 0, "money_kopecks": 0, "penalty_kopecks": 0
+    }
+    assert GameService._typed_event_fields(None)["points"] == 0
+
+
+async def add_event(session_factory, game_id, participant_id, event_type, event_data):
+    async with session_factory() as db:
+        return await GameService.add_game_event(
+            db, game_id, GameEventRequest(event_type=event_type, participant_id=participant_id, event_data=event_data)
+        )
+
+
+@pytest.mark.asyncio
+async def test_complete_game_totals_from_group_by(session_factory, seed_session, play_game):
+    session_id, (anna, boris, vera) = await seed_session(names=["Анна", "Борис", "Вера"])
+    game_id = await play_game(session_id, [], complete=False)
+
+    await add_event(session_factory, game_id, boris, GameEventType.BALL_POTTED, {"points": 3, "money": 30})
+    await add_event(session_factory, game_id, anna, GameEventType.BALL_POTTED, {"points": 7, "money": 70})
+    await add_event(session_factory, game_id, anna, GameEventType.FOUL, {"penalty": 50})
+    await add_event(session_factory, game_id, vera, GameEventType.SHOT, {"points": 100})
+    deleted = await add_event(session_factory, game_id, boris, GameEventType.BALL_POTTED, {"points": 10, "money": 100})
+    async with session_factory() as db:
+        await GameService.delete_game_event(db, game_id, deleted.id, uuid4())
+
+    async with session_factory() as db:
+        totals = await GameService.get_participant_totals(db, game_id)
+        response = await GameService.complete_game(db, game_id)
+
+    assert [row["participant_id"] for row in totals] == [boris, anna, vera]
+    statistics = response.game_data["statistics"]
+    assert statistics["participant_stats"] == {
+        boris: {"points": 3, "money": 30.0, "money_kopecks": 3000, "balls": 1, "fouls": 0},
+        anna: {"points": 7, "money": 20.0, "money_kopecks": 2000, "balls": 1, "fouls": 1},
+        vera: {"points": 0, "money": 0.0, "money_kopecks": 0, "balls": 0, "fouls": 0},
+    }
+    assert response.winner_participant_id == anna
+    assert statistics["total_balls"] == 2
+    assert statistics["total_fouls"] == 1
@@ -0,0 +1,67 @@
+"""
+Tests for the incremental head-to-head table
+"""
+
+import importlib.util
+from decimal import Decimal
+from pathlib import Path
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import delete, select, text
+
+from src.api.users import get_top_rivals
+from src.models.database import HeadToHead
+from src.services.game_service import GameService
+
+
+async def pairs(session_factory):
+    async with session_factory() as db:
+        rows = (await db.execute(select(HeadToHead))).scalars().all()
+        return {
+            (row.user_id, row.opponent_id): (row.games_together, row.wins, row.losses, row.net_kopecks)
+            for row in rows if row.games_together
+        }
+
+
+def load_backfill():
+    path = next(Path(__file__).parents[1].glob("alembic/versions/*_head_to_head.py"))
+    spec = importlib.util.spec_from_file_location("head_to_head_migration", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.BACKFILL
+
+
+@pytest.mark.asyncio
+async def test_pairs_follow_queue_payments(session_factory, seed_session, play_game):
+    anna, boris, vera = users = [uuid4() for _ in range(3)]
+    session_id, (a, b, v, bot) = await seed_session(users, bot=True, rules={"point_value_rubles": 50})
+
+    # Анна платит Борису 50, Борис Вере 0, Вера боту 0, бот Анне 150
+    await play_game(session_id, [a, b, v, bot], {a: 3, b: 1, bot: 2})
+    second = await play_game(session_id, [b, a], {b: 2})
+
+    table = await pairs(session_factory)
+    assert table[(anna, boris)] == (2, 1, 1, -15000)
+    assert table[(boris, anna)] == (2, 1, 1, 15000)
+    assert table[(anna, vera)] == (1, 1, 0, 0)
+    assert table[(vera, boris)] == (1, 0, 1, 0)
+    assert len(table) == 6
+
+    async with session_factory() as db:
+        rivals = await get_top_rivals(anna, limit=10, db=db)
+    assert [rival.opponent_id for rival in rivals.rivals] == [boris, vera]
+    assert rivals.rivals[0].net_result_rubles == Decimal("-150.00")
+
+    # Миграционный backfill по всей истории дает ту же таблицу
+    async with session_factory() as db:
+        await db.execute(delete(HeadToHead))
+        await db.execute(text(load_backfill()))
+        await db.commit()
+    assert await pairs(session_factory) == table
+
+    async with session_factory() as db:
+        await GameService.cancel_game(db, second)
+    table = await pairs(session_factory)
+    assert table[(anna, boris)] == (1, 1, 0, -5000)
+    assert table[(boris, anna)] == (1, 0, 1, 5000)
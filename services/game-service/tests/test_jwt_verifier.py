@@ -0,0 +1,111 @@
+"""
+Tests for local verification of auth-service tokens against its JWKS
+"""
+
+import time
+
+import httpx
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import ec
+from jwt.algorithms import ECAlgorithm
+
+from src.core.jwt_verifier import JWKSVerifier
+
+JWKS_URL = "http://auth-service:8001/.well-known/jwks.json"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeAuthService:
+    """Локальная подмена /.well-known/jwks.json с ротацией ключей"""
+
+    def __init__(self):
+        self.keys = []
+        self.fetches = 0
+        self.rotate()
+
+    def rotate(self) -> str:
+        kid = f"key-{len(self.keys)}"
+        self.keys.append((kid, ec.generate_private_key(ec.SECP256R1())))
+        return kid
+
+    def token(self, **claims) -> str:
+        kid, private_key = self.keys[-1]
+        payload = {"user_id": "u1", "type": "access", "iss": "artel-auth",
+                   "exp": int(time.time()) + 600, **claims}
+        return jwt.encode(payload, private_key, algorithm="ES256", headers={"kid": kid})
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.fetches += 1
+        keys = []
+        for kid, private_key in self.keys:
+            jwk = ECAlgorithm.to_jwk(private_key.public_key(), as_dict=True)
+            keys.append({**jwk, "kid": kid, "alg": "ES256", "use": "sig"})
+        return httpx.Response(200, json={"keys": keys}, headers={"Cache-Control": "public, max-age=300"})
+
+
+def make_verifier(auth: FakeAuthService, clock: FakeClock) -> JWKSVerifier:
+    client = httpx.AsyncClient(transport=httpx.MockTransport(auth.handler))
+    return JWKSVerifier(JWKS_URL, "artel-auth", http_client=client, clock=clock)
+
+
+@pytest.mark.asyncio
+async def test_tokens_verified_locally_after_first_fetch():
+    auth, clock = FakeAuthService(), FakeClock()
+    verifier = make_verifier(auth, clock)
+
+    for _ in range(100):
+        assert (await verifier.verify(auth.token()))["user_id"] == "u1"
+    assert auth.fetches == 1
+
+    # По истечении max-age JWKS перечитывается
+    clock.now += 301
+    await verifier.verify(auth.token())
+    assert auth.fetches == 2
+
+
+@pytest.mark.asyncio
+async def test_rotated_key_picked_up_and_unknown_kids_throttled():
+    auth, clock = FakeAuthService(), FakeClock()
+    verifier = make_verifier(auth, clock)
+    await verifier.verify(auth.token())
+
+    auth.rotate()
+    clock.now += 31
+    assert (await verifier.verify(auth.token()))["user_id"] == "u1"
+    assert auth.fetches == 2
+
+    # Мусорные kid не превращаются в запрос к auth-service на каждый токен
+    forged = jwt.encode(
+        {"user_id": "u1", "type": "access", "iss": "artel-auth", "exp": int(time.time()) + 600},
+        ec.generate_private_key(ec.SECP256R1()), algorithm="ES256", headers={"kid": "unknown"}
+    )
+    for _ in range(10):
+        with pytest.raises(jwt.InvalidTokenError):
+            await verifier.verify(forged)
+    assert auth.fetches == 2
+
+
+@pytest.mark.asyncio
+async def test_invalid_tokens_rejected():
+    auth, clock = FakeAuthService(), FakeClock()
+    verifier = make_verifier(auth, clock)
+
+    bad_tokens = [
+        auth.token(type="refresh"),
+        auth.token(iss="someone-else"),
+        auth.token(exp=int(time.time()) - 10),
+        jwt.encode({"user_id": "u1", "type": "access"}, "secret", algorithm="HS256",
+                   headers={"kid": auth.keys[-1][0]}),
+    ]
+    for token in bad_tokens:
+        with pytest.raises(jwt.InvalidTokenError):
+            await verifier.verify(token)
+    assert verifier.stats["rejected"] == len(bad_tokens)
@@ -0,0 +1,64 @@
+"""
+Tests for applying user.updated renames to session participants
+"""
+
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import select
+
+from src.models.database import SessionParticipant
+from src.services.participant_names import ParticipantNameSync, latest_display_names
+
+
+def user_updated(user_id, display_name, timestamp="2026-01-01T10:00:00"):
+    return {
+        "event_id": str(uuid4()),
+        "event_type": "updated",
+        "user_id": str(user_id),
+        "timestamp": timestamp,
+        "data": {"display_name": display_name},
+    }
+
+
+def test_latest_event_per_user_wins():
+    events = [
+        user_updated("u1", "Первое", "2026-01-01T10:00:01"),
+        user_updated("u1", "Последнее", "2026-01-01T10:00:03"),
+        user_updated("u1", "Второе", "2026-01-01T10:00:02"),
+        user_updated("u2", None),
+    ]
+    assert latest_display_names(events) == {"u1": "Последнее"}
+
+
+async def seed_participants(seed_session, names):
+    """Две сессии, в каждой все пользователи из names и один пустой игрок"""
+    users = {name: uuid4() for name in names}
+    for _ in range(2):
+        await seed_session(list(users.values()), names, bot=True)
+    return users
+
+
+async def participant_names(session_factory):
+    async with session_factory() as session:
+        rows = await session.execute(select(SessionParticipant.user_id, SessionParticipant.display_name))
+        return sorted((str(user_id), name) for user_id, name in rows)
+
+
+@pytest.mark.asyncio
+async def test_renames_applied_in_one_batch(session_factory, seed_session):
+    users = await seed_participants(seed_session, ["alice", "bob", "carol"])
+    sync = ParticipantNameSync(session_factory=session_factory, chunk_size=2)
+
+    await sync.handle([
+        user_updated(users["alice"], "Алиса"),
+        user_updated(users["bob"], "bob"),  # имя не изменилось - строка не трогается
+        user_updated(users["carol"], "Карина"),
+        user_updated(uuid4(), "Неизвестный"),
+    ])
+
+    names = await participant_names(session_factory)
+    assert [name for user_id, name in names if user_id == str(users["alice"])] == ["Алиса", "Алиса"]
+    assert [name for user_id, name in names if user_id == str(users["bob"])] == ["bob", "bob"]
+    assert [name for user_id, name in names if user_id == "None"] == ["Бот", "Бот"]
+    assert sync.stats == {"events": 4, "users": 4, "rows_updated": 4}
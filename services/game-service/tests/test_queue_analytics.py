@@ -0,0 +1,84 @@
+"""
+Tests for the incremental queue-fairness analytics
+"""
+
+import importlib.util
+from pathlib import Path
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import delete, text
+
+from src.api.games import get_queue_analytics
+from src.models.database import QueueAlgorithmCount, QueuePositionCount
+from src.models.schemas import CreateGameRequest
+from src.services.game_service import GameService
+from src.services.queue_analytics import fairness
+
+
+def test_fairness_bounds():
+    # Идеальная ротация трех игроков и "всегда одно место"
+    rotation = {"a": [2, 2, 2], "b": [2, 2, 2], "c": [2, 2, 2]}
+    stuck = {"a": [6, 0, 0], "b": [0, 6, 0], "c": [0, 0, 6]}
+    assert fairness(rotation) == {"chi_square": 0.0, "degrees_of_freedom": 6, "fairness_score": 100.0}
+    assert fairness(stuck)["fairness_score"] == 0.0
+    assert fairness(stuck)["chi_square"] == 36.0
+
+    # Неделимое число игр не штрафуется: 4 игры на 3 местах лучше 2/1/1 не разложить
+    assert fairness({"a": [2, 1, 1], "b": [1, 2, 1]})["fairness_score"] == 100.0
+    assert 0 < fairness({"a": [3, 1, 0], "b": [1, 3, 0]})["fairness_score"] < 100
+    assert fairness({})["fairness_score"] == 100.0
+
+
+def load_backfill():
+    path = next(Path(__file__).parents[1].glob("alembic/versions/*_queue_analytics.py"))
+    spec = importlib.util.spec_from_file_location("queue_analytics_migration", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.BACKFILL
+
+
+async def analytics(session_factory, session_id):
+    async with session_factory() as db:
+        return (await get_queue_analytics(session_id, db)).model_dump()
+
+
+@pytest.mark.asyncio
+async def test_analytics_follow_created_games_and_backfill(session_factory, seed_session):
+    session_id, participants = await seed_session([uuid4() for _ in range(3)])
+    queues = []
+    for _ in range(7):
+        async with session_factory() as db:
+            game = await GameService.create_game(db, session_id, CreateGameRequest())
+        queues.append(game.game_data["current_queue"])
+
+    response = await analytics(session_factory, session_id)
+    assert response["total_games"] == 7
+    assert response["algorithm_distribution"] == {
+        "always_random": 0, "random_no_repeat": 7, "manual": 0, "cycle": 0, "balanced_rotation": 0
+    }
+    assert response["positions"] == 3
+    for participant_id in participants:
+        counts = [sum(queue[place] == str(participant_id) for queue in queues) for place in range(3)]
+        assert response["position_matrix"][participant_id] == counts
+        assert response["break_frequency"][participant_id] == round(counts[0] / 7, 4)
+        assert response["player_statistics"][participant_id]["games"] == 7
+    assert response["degrees_of_freedom"] == 6
+    assert 0 <= response["fairness_score"] <= 100
+
+    # Миграционный backfill по game_queues дает те же счетчики
+    async with session_factory() as db:
+        await db.execute(delete(QueuePositionCount))
+        await db.execute(delete(QueueAlgorithmCount))
+        await db.execute(text(load_backfill()))
+        await db.commit()
+    assert await analytics(session_factory, session_id) == response
+
+
+@pytest.mark.asyncio
+async def test_empty_session_analytics(session_factory, seed_session):
+    session_id, _ = await seed_session([uuid4() for _ in range(2)])
+    response = await analytics(session_factory, session_id)
+    assert response["total_games"] == 0
+    assert response["fairness_score"] == 100.0
+    assert response["player_statistics"] == {}
@@ -0,0 +1,130 @@
+"""
+Tests for Elo ratings: per-game deltas, batched replay and the incremental path
+"""
+
+import asyncio
+import random
+from uuid import uuid4
+
+import numpy as np
+import pytest
+from sqlalchemy import select
+
+from src.api.ratings import get_leaderboard
+from src.models.database import GameResult
+from src.services import ratings
+from src.services.game_service import GameService
+from src.services.ratings import RatingParams, RatingReplay, game_deltas
+
+
+def test_two_player_game_is_zero_sum():
+    deltas = game_deltas([1500, 1500], [5, 2])
+    assert deltas.tolist() == [16.0, -16.0]
+    assert game_deltas([1600, 1400], [3, 3]).tolist() == pytest.approx([-8.312, 8.312], abs=1e-3)
+
+
+def test_multiplayer_standings():
+    deltas = game_deltas([1500, 1500, 1500, 1500], [9, 4, 4, 0])
+    assert deltas.sum() == pytest.approx(0)
+    assert deltas[0] > deltas[1] == deltas[2] > deltas[3]
+
+
+def test_replay_levels_match_sequential_games():
+    rng = random.Random(3)
+    params = RatingParams(k_factor=24)
+    players = [f"p{n}" for n in range(12)]
+    history = []
+    for _ in range(300):
+        seats = rng.sample(players, rng.randint(2, 5))
+        history.append([(player, rng.randint(0, 10)) for player in seats])
+
+    replay = RatingReplay(params)
+    for start in range(0, len(history), 64):
+        replay.play(history[start:start + 64])
+
+    expected = {player: params.initial for player in players}
+    for game in history:
+        deltas = game_deltas([expected[player] for player, _ in game], [points for _, points in game], params)
+        for (player, _), delta in zip(game, deltas):
+            expected[player] += delta
+
+    actual = {key: rating for key, rating, _ in replay.rows()}
+    assert actual == pytest.approx(expected)
+    assert sum(games for _, _, games in replay.rows()) == sum(len(game) for game in history)
+
+
+async def leaderboard(session_factory):
+    async with session_factory() as db:
+        response = await get_leaderboard("kolkhoz", limit=10, min_games=1, db=db)
+    return [(entry.user_id, round(entry.rating, 6), entry.games_played) for entry in response.entries]
+
+
+@pytest.mark.asyncio
+async def test_ratings_follow_games_and_recompute(session_factory, seed_session, play_game):
+    users = [uuid4() for _ in range(3)]
+    session_id, (first, second, third, bot) = await seed_session(users, bot=True)
+
+    await play_game(session_id, [first, second, third, bot], {first: 5, second: 2, bot: 9})
+    cancelled = await play_game(session_id, [third, first], {third: 4})
+    async with session_factory() as db:
+        await GameService.cancel_game(db, cancelled)
+    await play_game(session_id, [second, third], {third: 1})
+
+    board = await leaderboard(session_factory)
+    assert [user_id for user_id, _, _ in board] == [users[0], users[2], users[1]]
+    assert [games for _, _, games in board] == [1, 2, 2]
+
+    # Отмена вычла ровно свою дельту, поэтому полный пересчет дает те же рейтинги
+    assert await ratings.recompute(session_factory, chunk_size=2) == 2
+    assert await leaderboard(session_factory) == board
+    assert np.isclose(sum(rating for _, rating, _ in board), 3 * ratings.DEFAULT_PARAMS.initial)
+
+
+async def stored_deltas(session_factory):
+    async with session_factory() as db:
+        rows = (await db.execute(select(GameResult.id, GameResult.rating_delta))).all()
+    return {result_id: delta for result_id, delta in rows}
+
+
+@pytest.mark.asyncio
+async def test_recompute_rewrites_deltas_for_later_cancel(session_factory, seed_session, play_game):
+    users = [uuid4() for _ in range(3)]
+    session_id, (first, second, third, bot) = await seed_session(users, bot=True)
+    await play_game(session_id, [first, second, third, bot], {first: 5, second: 2, bot: 9})
+    await play_game(session_id, [second, third], {third: 1})
+    cancelled = await play_game(session_id, [third, first], {third: 4})
+    before = await stored_deltas(session_factory)
+
+    # Пересчет с новыми параметрами переписывает и дельты в game_results
+    params = ratings.RatingParams(initial=1200, k_factor=16)
+    assert await ratings.recompute(session_factory, params, chunk_size=3) == 3
+    after = await stored_deltas(session_factory)
+    assert after.keys() == before.keys()
+    assert [result_id for result_id, delta in after.items() if delta is None] == \
+        [result_id for result_id, delta in before.items() if delta is None]  # бот
+    assert after != before
+
+    # Отмена последней игры вычитает дельту с новыми параметрами - как пересчет без нее
+    async with session_factory() as db:
+        await GameService.cancel_game(db, cancelled)
+    board = await leaderboard(session_factory)
+    await ratings.recompute(session_factory, params)
+    assert await leaderboard(session_factory) == board
+
+
+@pytest.mark.asyncio
+async def test_games_wait_for_running_recompute(session_factory, seed_session, play_game):
+    users = [uuid4() for _ in range(2)]
+    session_id, (first, second, _) = await seed_session(users, bot=True)
+    await play_game(session_id, [first, second], {first: 3})
+
+    async with session_factory() as recompute_db:
+        # Так пересчет держит таблицу от чтения истории до коммита
+        await recompute_db.execute(ratings.LOCK_FOR_RECOMPUTE)
+        game = asyncio.create_task(play_game(session_id, [first, second], {second: 2}))
+        await asyncio.sleep(0.5)
+        assert not game.done()
+        await recompute_db.commit()
+    await asyncio.wait_for(game, timeout=10)
+
+    assert [games for _, _, games in await leaderboard(session_factory)] == [2, 2]
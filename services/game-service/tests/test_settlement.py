@@ -0,0 +1,143 @@
+"""
+Tests for the Kolkhoz settlement engine and the session ledger
+"""
+
+from decimal import Decimal
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import select
+
+from src.models.database import GameResult, SessionParticipant
+from src.services import session_ledger
+from src.services.game_service import GameService
+from src.services.settlement import point_value_from_rules, settle_kolkhoz, settlement_order
+
+
+def test_two_players_example():
+    first, second = uuid4(), uuid4()
+    rows = settle_kolkhoz([first, second], {first: 6, second: 3}, {first: 2, second: 2}, 5000)
+
+    assert [(row["earned_kopecks"], row["paid_kopecks"], row["net_result_kopecks"]) for row in rows] == [
+        (30000, 15000, 15000),
+        (15000, 30000, -15000),
+    ]
+
+
+def test_each_player_pays_the_next_in_queue():
+    players = [uuid4() for _ in range(3)]
+    points = dict(zip(players, [5, 8, 2]))
+    rows = settle_kolkhoz(players, points, {}, 5000)
+
+    assert [row["net_result_kopecks"] for row in rows] == [-15000, 30000, -15000]
+    assert [row["queue_position_in_game"] for row in rows] == [1, 2, 3]
+    assert sum(row["net_result_kopecks"] for row in rows) == 0
+
+
+def test_settlement_order_and_point_value():
+    queued, late = uuid4(), uuid4()
+    assert settlement_order([str(queued)], [late, queued]) == [queued, late]
+    assert settle_kolkhoz([queued], {queued: 4}, {}, 1000)[0]["net_result_kopecks"] == 0
+    assert point_value_from_rules({"point_value_rubles": 30.5}) == 3050
+    assert point_value_from_rules({"point_value_kopecks": 2000, "point_value_rubles": 30}) == 2000
+    assert point_value_from_rules(None) == 5000
+
+
+@pytest.mark.asyncio
+async def test_complete_game_writes_results_and_ledger(session_factory, seed_session, play_game):
+    session_id, (anna, boris, vera) = await seed_session(names=["Анна", "Борис", "Вера"], rules={"point_value_rubles": 50})
+
+    first = await play_game(session_id, [anna, boris, vera], {anna: [4, 1], boris: [2]}, complete=False)
+    async with session_factory() as db:
+        live = await GameService.get_game_scores(db, first)
+    assert [score.net_result_rubles for score in live.current_scores] == [Decimal("150"), Decimal("100"), Decimal("-250")]
+
+    async with session_factory() as db:
+        await GameService.complete_game(db, first)
+    await play_game(session_id, [vera, boris, anna], {vera: [7]})
+
+    async with session_factory() as db:
+        stored = (await db.execute(select(GameResult).where(GameResult.game_id == first))).scalars().all()
+        scores = await GameService.get_game_scores(db, first)
+        ledger = await GameService.get_session_ledger(db, session_id)
+
+    assert len(stored) == 3
+    assert [score.net_result_rubles for score in scores.current_scores] == [
+        score.net_result_rubles for score in live.current_scores
+    ]
+    assert scores.winner_participant_id == anna
+
+    # Игра 2: Вера получает 350 от Анны (перед ней по кругу), Анна платит Вере
+    by_name = {entry["display_name"]: entry for entry in ledger}
+    assert by_name["Анна"]["net_result_kopecks"] == -20000
+    assert by_name["Борис"]["net_result_kopecks"] == 10000
+    assert by_name["Вера"]["net_result_kopecks"] == 10000
+    assert by_name["Анна"]["games_played"] == 2
+    assert sum(entry["net_result_kopecks"] for entry in ledger) == 0
+
+
+async def participant_totals(session_factory, session_id):
+    async with session_factory() as db:
+        rows = await db.execute(
+            select(SessionParticipant.display_name, SessionParticipant.session_balance_kopecks,
+                   SessionParticipant.total_games_played, SessionParticipant.total_balls_potted)
+            .where(SessionParticipant.session_id == session_id)
+        )
+        return {name: (balance, games, balls) for name, balance, games, balls in rows}
+
+
+@pytest.mark.asyncio
+async def test_participant_totals_follow_complete_and_cancel(session_factory, seed_session, play_game):
+    session_id, (anna, boris) = await seed_session(names=["Анна", "Борис"], rules={"point_value_rubles": 50})
+
+    await play_game(session_id, [anna, boris], {anna: [6], boris: [1, 2]})
+    second = await play_game(session_id, [boris, anna], {boris: [4]})
+
+    assert await participant_totals(session_factory, session_id) == {
+        "Анна": (-5000, 2, 1), "Борис": (5000, 2, 3)
+    }
+
+    async with session_factory() as db:
+        await GameService.cancel_game(db, second)
+        with pytest.raises(ValueError):
+            await GameService.complete_game(db, second)
+
+    assert await participant_totals(session_factory, session_id) == {
+        "Анна": (15000, 1, 1), "Борис": (-15000, 1, 2)
+    }
+    async with session_factory() as db:
+        assert await session_ledger.find_drift(db) == []
+
+
+@pytest.mark.asyncio
+async def test_drift_detected_and_rebuilt(session_factory, seed_session, play_game):
+    session_id, (anna, boris) = await seed_session(names=["Анна", "Борис"], rules={"point_value_rubles": 10})
+    await play_game(session_id, [anna, boris], {anna: [3]})
+    async with session_factory() as db:
+        participant = await db.get(SessionParticipant, boris)
+        participant.session_balance_kopecks = 99900
+        await db.commit()
+
+    async with session_factory() as db:
+        drift = await session_ledger.find_drift(db, session_id)
+        assert [row["participant_id"] for row in drift] == [boris]
+        assert drift[0]["expected_balance"] == -3000
+        assert await session_ledger.rebuild(db, session_id) == 1
+        await db.commit()
+        assert await session_ledger.find_drift(db) == []
+
+    assert (await participant_totals(session_factory, session_id))["Борис"] == (-3000, 1, 0)
+
+
+@pytest.mark.asyncio
+async def test_session_settlement_transfers(session_factory, seed_session, play_game):
+    session_id, (anna, boris, vera) = await seed_session(names=["Анна", "Борис", "Вера"], rules={"point_value_rubles": 50})
+    await play_game(session_id, [anna, boris, vera], {anna: [4, 1], boris: [2]})
+    async with session_factory() as db:
+        settlement = await GameService.get_session_settlement(db, session_id)
+
+    assert settlement["is_minimal"]
+    assert sorted(
+        (transfer["from_display_name"], transfer["to_display_name"], transfer["amount_kopecks"])
+        for transfer in settlement["transfers"]
+    ) == [("Вера", "Анна", 15000), ("Вера", "Борис", 10000)]
@@ -0,0 +1,83 @@
+"""
+Tests for the minimal-transfer settle-up calculator
+"""
+
+import random
+from itertools import combinations
+
+import pytest
+
+from src.core.money import to_kopecks, to_rubles
+from src.services.transfers import EXACT_LIMIT, _random_balances, minimal_transfers
+
+
+def apply(balances, transfers):
+    remaining = dict(balances)
+    for debtor, creditor, amount in transfers:
+        assert amount > 0
+        remaining[debtor] += amount
+        remaining[creditor] -= amount
+    return remaining
+
+
+def brute_force_minimum(balances):
+    """N - наибольшее число групп с нулевой суммой, перебором"""
+    values = [amount for amount in balances.values() if amount]
+
+    def best(items):
+        if not items:
+            return 0
+        first, rest = items[0], items[1:]
+        result = 0
+        for size in range(0, len(rest) + 1):
+            for chosen in combinations(range(len(rest)), size):
+                if first + sum(rest[i] for i in chosen) == 0:
+                    left = [rest[i] for i in range(len(rest)) if i not in chosen]
+                    result = max(result, 1 + best(left))
+        return result
+
+    return len(values) - best(values)
+
+
+def test_kopeck_conversions():
+    assert to_kopecks("-150.50") == -15050
+    assert to_kopecks(None) == to_kopecks("abc") == 0
+    assert to_kopecks(12.3) == 1230
+    assert to_kopecks("0.005") == 1
+    assert str(to_rubles(-15050)) == "-150.50"
+
+
+def test_exact_search_finds_zero_sum_groups():
+    # Жадный алгоритм дал бы 4 перевода, а пары (a, d) и (b, c, e) закрываются тремя
+    balances = {"a": 500, "b": 400, "c": -300, "d": -500, "e": -100}
+    transfers, exact = minimal_transfers(balances)
+
+    assert exact
+    assert len(transfers) == 3
+    assert set(apply(balances, transfers).values()) == {0}
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_exact_matches_brute_force(seed):
+    rng = random.Random(seed)
+    balances = _random_balances(rng.randint(2, 8), rng)
+    transfers, exact = minimal_transfers(balances)
+
+    assert exact
+    assert set(apply(balances, transfers).values()) <= {0}
+    assert len(transfers) == brute_force_minimum(balances)
+
+
+def test_fifty_participants_use_greedy():
+    balances = _random_balances(50, random.Random(7))
+    transfers, exact = minimal_transfers(balances)
+
+    assert not exact
+    assert set(apply(balances, transfers).values()) == {0}
+    assert len(transfers) <= sum(1 for amount in balances.values() if amount) - 1
+    assert len(balances) > EXACT_LIMIT
+
+
+def test_unbalanced_input_rejected():
+    with pytest.raises(ValueError):
+        minimal_transfers({"a": 100, "b": -50})
@@ -0,0 +1,143 @@
+"""
+Tests for the auth-service user profiles client
+"""
+
+import asyncio
+import json
+from uuid import uuid4
+
+import httpx
+import pytest
+import pytest_asyncio
+
+from src.services.user_profiles import UserProfilesClient
+
+
+class FakeAuthService:
+    """Локальная подмена POST /auth/users/batch"""
+
+    def __init__(self, known_ids):
+        self.known_ids = set(known_ids)
+        self.requests = []
+        self.tokens = []
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        assert request.url.path == "/auth/users/batch"
+        user_ids = json.loads(request.content)["user_ids"]
+        self.requests.append(user_ids)
+        self.tokens.append(request.headers["Authorization"])
+        users = [
+            {"id": user_id, "username": f"user_{user_id[:4]}", "display_name": f"User {user_id[:4]}",
+             "avatar_url": None, "is_active": True}
+            for user_id in user_ids if user_id in self.known_ids
+        ]
+        return httpx.Response(200, json={"users": users, "missing": []})
+
+
+class FakeMessage:
+    def __init__(self, payload: dict):
+        self.body = json.dumps(payload).encode()
+
+    def process(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+USER_IDS = [str(uuid4()) for _ in range(20)]
+
+
+@pytest.fixture
+def auth():
+    return FakeAuthService(USER_IDS)
+
+
+@pytest_asyncio.fixture
+async def client(auth):
+    http_client = httpx.AsyncClient(
+        transport=httpx.MockTransport(auth.handler), base_url="http://auth"
+    )
+    profiles = UserProfilesClient("http://auth", http_client=http_client)
+    yield profiles
+    await http_client.aclose()
+
+
+@pytest.mark.asyncio
+async def test_concurrent_lookups_coalesced_into_one_request(client, auth):
+    chunks = [USER_IDS[i:i + 5] for i in range(0, 20, 2)]
+    results = await asyncio.gather(*[client.get_profiles(chunk, "token") for chunk in chunks])
+
+    assert len(auth.requests) == 1
+    assert auth.tokens == ["Bearer token"]
+    assert sorted(auth.requests[0]) == sorted(USER_IDS)
+    assert [set(result) for result in results] == [set(chunk) for chunk in chunks]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_coalesced_callers(client, auth):
+    first = asyncio.create_task(client.get_profile(USER_IDS[0], "token"))
+    second = asyncio.create_task(client.get_profile(USER_IDS[0], "token"))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert (await second)["id"] == USER_IDS[0]
+    assert first.cancelled()
+    assert len(auth.requests) == 1
+
+
+@pytest.mark.asyncio
+async def test_batches_are_coalesced_per_token(client, auth):
+    await asyncio.gather(
+        client.get_profiles(USER_IDS[:3], "alice"),
+        client.get_profiles(USER_IDS[2:5], "bob"),
+        client.get_profiles(USER_IDS[3:6], "alice"),
+    )
+
+    batches = dict(zip(auth.tokens, auth.requests))
+    assert len(auth.requests) == 2
+    assert sorted(batches["Bearer alice"]) == sorted(USER_IDS[:6])
+    assert sorted(batches["Bearer bob"]) == sorted(USER_IDS[2:5])
+
+
+@pytest.mark.asyncio
+async def test_cached_profiles_skip_auth_service(client, auth):
+    await client.get_profiles(USER_IDS[:3], "token")
+    profiles = await client.get_profiles(USER_IDS[:3], "token")
+
+    assert len(auth.requests) == 1
+    assert set(profiles) == set(USER_IDS[:3])
+
+
+@pytest.mark.asyncio
+async def test_unknown_users_are_omitted(client, auth):
+    unknown = str(uuid4())
+
+    profiles = await client.get_profiles([USER_IDS[0], unknown], "token")
+
+    assert set(profiles) == {USER_IDS[0]}
+    assert await client.get_profile(unknown, "token") is None
+
+
+@pytest.mark.asyncio
+async def test_user_updated_event_invalidates_profile(client, auth):
+    await client.get_profile(USER_IDS[0], "token")
+    await client._on_message(FakeMessage({"event_type": "updated", "user_id": USER_IDS[0]}))
+    await client.get_profile(USER_IDS[0], "token")
+
+    assert len(auth.requests) == 2
+
+
+@pytest.mark.asyncio
+async def test_batch_size_limit_splits_requests(auth):
+    http_client = httpx.AsyncClient(transport=httpx.MockTransport(auth.handler))
+    client = UserProfilesClient("http://auth", http_client=http_client, max_batch_size=8)
+
+    profiles = await client.get_profiles(USER_IDS, "token")
+
+    assert len(profiles) == 20
+    assert [len(batch) for batch in auth.requests] == [8, 8, 4]
+    await http_client.aclose()
@@ -0,0 +1,82 @@
+"""
+Tests for the incremental user_stats projection and its rebuild
+"""
+
+from decimal import Decimal
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import delete
+
+from src.api.users import get_user_stats
+from src.models.database import UserGameTypeStats, UserStats
+from src.models.schemas import GameEventType
+from src.services import user_stats
+from src.services.game_service import GameService
+
+
+async def seed_sessions(seed_session, anna, boris):
+    """Колхоз: Анна и Борис; Американка: Анна и бот"""
+    rules = {"point_value_rubles": 50}
+    kolkhoz, (anna_k, boris_k) = await seed_session([anna, boris], ["Анна", "Борис"], rules=rules)
+    americana, (anna_a, bot) = await seed_session([anna], ["Анна"], bot=True, game_type_id=2, rules=rules)
+    return kolkhoz, americana, [anna_k, boris_k, anna_a, bot]
+
+
+async def stats_of(session_factory, user_id):
+    async with session_factory() as db:
+        stats = await user_stats.get_user_stats(db, user_id)
+    stats.pop("updated_at")
+    return stats
+
+
+@pytest.mark.asyncio
+async def test_user_stats_follow_games_and_rebuild(session_factory, seed_session, play_game):
+    anna, boris = uuid4(), uuid4()
+    kolkhoz, americana, (anna_k, boris_k, anna_a, bot) = await seed_sessions(seed_session, anna, boris)
+
+    await play_game(kolkhoz, [anna_k, boris_k], {anna_k: 3, boris_k: 1},
+                    events=[(anna_k, GameEventType.FOUL, {"penalty": 10})])
+    second = await play_game(kolkhoz, [anna_k, boris_k], {boris_k: 2})
+    await play_game(americana, [anna_a, bot], {anna_a: 1})
+
+    stats = await stats_of(session_factory, anna)
+    assert {key: stats[key] for key in (
+        "sessions_played", "games_played", "games_won", "balls_potted", "fouls", "points_scored", "net_result_kopecks"
+    )} == {
+        "sessions_played": 2, "games_played": 3, "games_won": 2, "balls_potted": 2,
+        "fouls": 1, "points_scored": 4, "net_result_kopecks": 5000
+    }
+    assert stats["favourite_game_type"] == "kolkhoz"
+
+    async with session_factory() as db:
+        await GameService.cancel_game(db, second)
+    assert (await stats_of(session_factory, anna))["net_result_kopecks"] == 15000
+    boris_stats = await stats_of(session_factory, boris)
+    assert (boris_stats["sessions_played"], boris_stats["games_played"], boris_stats["games_won"]) == (1, 1, 0)
+
+    incremental = {user_id: await stats_of(session_factory, user_id) for user_id in (anna, boris)}
+    async with session_factory() as db:
+        await db.execute(delete(UserGameTypeStats))
+        await db.execute(delete(UserStats))
+        await db.commit()
+
+    assert await user_stats.rebuild(session_factory, chunk_size=1) == 2
+    assert {user_id: await stats_of(session_factory, user_id) for user_id in (anna, boris)} == incremental
+
+
+@pytest.mark.asyncio
+async def test_stats_endpoint_converts_at_the_edge(session_factory, seed_session, play_game):
+    anna, boris = uuid4(), uuid4()
+    kolkhoz, _, (anna_k, boris_k, _, _) = await seed_sessions(seed_session, anna, boris)
+    await play_game(kolkhoz, [anna_k, boris_k], {anna_k: 3})
+
+    async with session_factory() as db:
+        response = await get_user_stats(boris, db)
+        newcomer = await get_user_stats(uuid4(), db)
+
+    assert response.net_result_rubles == Decimal("-150.00")
+    assert response.average_per_session_rubles == Decimal("-150.00")
+    assert response.win_rate == 0.0
+    assert response.favourite_game_type_display_name == "Колхоз"
+    assert newcomer.games_played == 0 and newcomer.favourite_game_type is None
@@ -20,6 +20,9 @@ class Settings:
     DB_PASSWORD: str = os.getenv("DB_PASSWORD", "password")
     DB_ECHO: bool = os.getenv("DB_ECHO", "false").lower() == "true"
     
+    # Применять манифест системных категорий/шаблонов при старте
+    SEED_ON_STARTUP: bool = os.getenv("SEED_ON_STARTUP", "true").lower() == "true"
+    
     # Legacy database_url for compatibility
     database_url: str = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
     
@@ -0,0 +1,245 @@
+"""
+Idempotent seeding of system categories and templates for Template Service
+
+Заменяет набор разовых скриптов (add_kolkhoz_template.py, update_templates.py,
+remove_duplicates.py, cleanup_templates.py, fix_*.py). Манифест лежит в
+src/models/database.py (SYSTEM_CATEGORIES / SYSTEM_TEMPLATES), а здесь он
+применяется set-based запросами в одной транзакции:
+
+1. upsert категорий по id (INSERT ... ON CONFLICT DO UPDATE);
+2. удаление дубликатов системных шаблонов по name (остается самый старый,
+   избранное переносится на него);
+3. удаление системных шаблонов, которых больше нет в манифесте;
+4. upsert системных шаблонов по name (частичный уникальный индекс);
+5. заполнение пустых created_at/updated_at.
+
+Каждый UPDATE содержит условие IS DISTINCT FROM, поэтому при неизменном
+манифесте ни одна строка не перезаписывается и старт контейнера остается быстрым.
+
+Запуск вручную: python -m src.core.seeding
+"""
+
+import asyncio
+import json
+from typing import Dict, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from .database import engine
+from ..models.database import SYSTEM_CATEGORIES, SYSTEM_TEMPLATES, SYSTEM_CREATOR_USER_ID
+
+# Ключ advisory lock: несколько воркеров, стартующих одновременно, сидят по очереди
+SEED_ADVISORY_LOCK_KEY = 730_026
+
+SYSTEM_TEMPLATE_NAME_INDEX = "uq_game_templates_system_name"
+
+
+_LOCK_SQL = text("SELECT pg_advisory_xact_lock(:key)")
+
+# Освобождаем имена манифеста, занятые категориями с другими id
+_FREE_CATEGORY_NAMES_SQL = text("""
+    UPDATE template_categories c
+    SET name = c.name || ' (#' || c.id || ')', updated_at = NOW()
+    FROM jsonb_to_recordset(CAST(:rows AS jsonb)) AS s(id integer, name varchar)
+    WHERE c.name = s.name AND c.id <> s.id
+""")
+
+_UPSERT_CATEGORIES_SQL = text("""
+    INSERT INTO template_categories (id, name, description, sort_order, created_at, updated_at)
+    SELECT s.id, s.name, s.description, s.sort_order, NOW(), NOW()
+    FROM jsonb_to_recordset(CAST(:rows AS jsonb))
+        AS s(id integer, name varchar, description text, sort_order integer)
+    ON CONFLICT (id) DO UPDATE SET
+        name = EXCLUDED.name,
+        description = EXCLUDED.description,
+        sort_order = EXCLUDED.sort_order,
+        updated_at = NOW()
+    WHERE (template_categories.name, template_categories.description, template_categories.sort_order)
+        IS DISTINCT FROM (EXCLUDED.name, EXCLUDED.description, EXCLUDED.sort_order)
+    RETURNING (xmax = 0) AS inserted
+""")
+
+# Категории вставляются с явными id - подтягиваем sequence, чтобы не было конфликтов PK
+_SYNC_CATEGORY_SEQUENCE_SQL = text("""
+    SELECT setval(pg_get_serial_sequence('template_categories', 'id'), MAX(id))
+    FROM template_categories
+    HAVING MAX(id) IS NOT NULL
+""")
+
+_DEDUP_SYSTEM_TEMPLATES_SQL = text("""
+    WITH ranked AS (
+        SELECT id,
+               first_value(id) OVER (
+                   PARTITION BY name ORDER BY created_at NULLS LAST, id
+               ) AS keep_id
+        FROM game_templates
+        WHERE is_system
+    ),
+    dups AS (
+        SELECT id, keep_id FROM ranked WHERE id <> keep_id
+    ),
+    movable AS (
+        SELECT DISTINCT ON (d.keep_id, f.user_id) f.id, d.keep_id
+        FROM template_favorites f
+        JOIN dups d ON f.template_id = d.id
+        WHERE NOT EXISTS (
+            SELECT 1 FROM template_favorites k
+            WHERE k.template_id = d.keep_id AND k.user_id = f.user_id
+        )
+        ORDER BY d.keep_id, f.user_id, f.created_at
+    ),
+    moved AS (
+        UPDATE template_favorites f
+        SET template_id = m.keep_id
+        FROM movable m
+        WHERE f.id = m.id
+        RETURNING f.id
+    ),
+    dropped_favorites AS (
+        DELETE FROM template_favorites f
+        USING dups d
+        WHERE f.template_id = d.id AND f.id NOT IN (SELECT id FROM movable)
+    )
+    DELETE FROM game_templates t
+    USING dups d
+    WHERE t.id = d.id
+    RETURNING t.id
+""")
+
+_CREATE_SYSTEM_NAME_INDEX_SQL = text(f"""
+    CREATE UNIQUE INDEX IF NOT EXISTS {SYSTEM_TEMPLATE_NAME_INDEX}
+    ON game_templates (name) WHERE is_system
+""")
+
+_PRUNE_SYSTEM_TEMPLATES_SQL = text("""
+    WITH stale AS (
+        SELECT id FROM game_templates
+        WHERE is_system
+          AND name NOT IN (
+              SELECT s.name FROM jsonb_to_recordset(CAST(:rows AS jsonb)) AS s(name varchar)
+          )
+    ),
+    dropped_favorites AS (
+        DELETE FROM template_favorites f USING stale s WHERE f.template_id = s.id
+    )
+    DELETE FROM game_templates t
+    USING stale s
+    WHERE t.id = s.id
+    RETURNING t.id
+""")
+
+_UPSERT_TEMPLATES_SQL = text(f"""
+    INSERT INTO game_templates (
+        id, creator_user_id, name, description, game_type, rules, settings,
+        category_id, is_public, is_system, tags, created_at, updated_at
+    )
+    SELECT gen_random_uuid(), CAST(:creator_user_id AS uuid), s.name, s.description,
+           s.game_type, s.rules, s.settings, s.category_id, s.is_public, TRUE, s.tags,
+           NOW(), NOW()
+    FROM jsonb_to_recordset(CAST(:rows AS jsonb)) AS s(
+        name varchar, description text, game_type varchar, rules jsonb, settings jsonb,
+        category_id integer, is_public boolean, tags jsonb
+    )
+    ON CONFLICT (name) WHERE is_system DO UPDATE SET
+        description = EXCLUDED.description,
+        game_type = EXCLUDED.game_type,
+        rules = EXCLUDED.rules,
+        settings = EXCLUDED.settings,
+        category_id = EXCLUDED.category_id,
+        is_public = EXCLUDED.is_public,
+        tags = EXCLUDED.tags,
+        updated_at = NOW()
+    WHERE (game_templates.description, game_templates.game_type, game_templates.rules,
+           game_templates.settings, game_templates.category_id, game_templates.is_public,
+           game_templates.tags)
+        IS DISTINCT FROM (EXCLUDED.description, EXCLUDED.game_type, EXCLUDED.rules,
+                          EXCLUDED.settings, EXCLUDED.category_id, EXCLUDED.is_public,
+                          EXCLUDED.tags)
+    RETURNING (xmax = 0) AS inserted
+""")
+
+_FIX_TIMESTAMPS_SQL = text("""
+    UPDATE game_templates
+    SET created_at = COALESCE(created_at, NOW()),
+        updated_at = COALESCE(updated_at, NOW())
+    WHERE created_at IS NULL OR updated_at IS NULL
+""")
+
+
+def _count_upserts(rows) -> Dict[str, int]:
+    """Разделить результат RETURNING (xmax = 0) на вставленные и обновленные строки"""
+    inserted = sum(1 for row in rows if row.inserted)
+    return {"inserted": inserted, "updated": len(rows) - inserted}
+
+
+async def apply_seed_with_connection(conn: AsyncConnection) -> Dict[str, int]:
+    """
+    Применить манифест на открытом соединении (внутри транзакции вызывающего)
+
+    Returns:
+        Количество затронутых строк по каждому шагу
+    """
+    category_rows = json.dumps(SYSTEM_CATEGORIES, ensure_ascii=False)
+    template_rows = json.dumps(SYSTEM_TEMPLATES, ensure_ascii=False)
+
+    await conn.execute(_LOCK_SQL, {"key": SEED_ADVISORY_LOCK_KEY})
+
+    renamed = await conn.execute(_FREE_CATEGORY_NAMES_SQL, {"rows": category_rows})
+    categories = _count_upserts(
+        (await conn.execute(_UPSERT_CATEGORIES_SQL, {"rows": category_rows})).fetchall()
+    )
+    await conn.execute(_SYNC_CATEGORY_SEQUENCE_SQL)
+
+    duplicates = (await conn.execute(_DEDUP_SYSTEM_TEMPLATES_SQL)).fetchall()
+    await conn.execute(_CREATE_SYSTEM_NAME_INDEX_SQL)
+    pruned = (await conn.execute(_PRUNE_SYSTEM_TEMPLATES_SQL, {"rows": template_rows})).fetchall()
+    templates = _count_upserts(
+        (await conn.execute(
+            _UPSERT_TEMPLATES_SQL,
+            {"rows": template_rows, "creator_user_id": SYSTEM_CREATOR_USER_ID}
+        )).fetchall()
+    )
+    timestamps = await conn.execute(_FIX_TIMESTAMPS_SQL)
+
+    return {
+        "categories_renamed": renamed.rowcount,
+        "categories_inserted": categories["inserted"],
+        "categories_updated": categories["updated"],
+        "templates_deduplicated": len(duplicates),
+        "templates_pruned": len(pruned),
+        "templates_inserted": templates["inserted"],
+        "templates_updated": templates["updated"],
+        "timestamps_fixed": timestamps.rowcount,
+    }
+
+
+async def apply_seed(conn: Optional[AsyncConnection] = None) -> Dict[str, int]:
+    """
+    Применить манифест системных категорий и шаблонов в одной транзакции
+
+    Args:
+        conn: Открытое соединение; если не передано, открывается новая транзакция
+
+    Returns:
+        Количество затронутых строк по каждому шагу
+    """
+    if conn is not None:
+        return await apply_seed_with_connection(conn)
+
+    async with engine.begin() as new_conn:
+        return await apply_seed_with_connection(new_conn)
+
+
+async def _main():
+    """Ручной запуск сидинга"""
+    try:
+        report = await apply_seed()
+        touched = sum(report.values())
+        print(f"✅ Seed applied ({touched} rows changed): {report}")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main())
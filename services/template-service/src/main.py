@@ -7,13 +7,18 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
 from .api import templates, health
+from .core.config import settings
 from .core.database import init_db, close_db
+from .core.seeding import apply_seed
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Управление жизненным циклом приложения"""
     # Startup
     await init_db()
+    if settings.SEED_ON_STARTUP:
+        report = await apply_seed()
+        print(f"🌱 System templates seeded: {report}")
     yield
     # Shutdown
     await close_db()
@@ -5,7 +5,7 @@ Template Service Database Models - SQLAlchemy
 from datetime import datetime
 from typing import Optional
 from uuid import uuid4
-from sqlalchemy import Column, String, Integer, Boolean, Float, Text, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, String, Integer, Boolean, Float, Text, DateTime, ForeignKey, JSON, Index, text
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
@@ -48,6 +48,11 @@ class GameTemplate(Base):
     category = relationship("TemplateCategory", back_populates="templates")
     favorites = relationship("TemplateFavorite", back_populates="template")
 
+    __table_args__ = (
+        # Естественный ключ системных шаблонов для upsert в src/core/seeding.py
+        Index("uq_game_templates_system_name", "name", unique=True, postgresql_where=text("is_system")),
+    )
+
 class TemplateFavorite(Base):
     """Избранные шаблоны пользователей"""
     __tablename__ = "template_favorites"
@@ -60,122 +65,183 @@ class TemplateFavorite(Base):
     # Связи
     template = relationship("GameTemplate", back_populates="favorites")
 
-# Initial data for system categories
+# Seed manifest: system categories and templates.
+# Применяется идемпотентно движком src/core/seeding.py (при старте или вручную).
+# Категории идентифицируются по id (на них ссылается фронтенд), шаблоны - по name.
+SYSTEM_CREATOR_USER_ID = "00000000-0000-0000-0000-000000000000"
+
 SYSTEM_CATEGORIES = [
-    {"name": "Колхоз", "description": "Шаблоны для игры Колхоз", "sort_order": 1},
-    {"name": "Американка", "description": "Шаблоны для Американки", "sort_order": 2},
-    {"name": "Московская пирамида", "description": "Шаблоны для Московской пирамиды", "sort_order": 3},
-    {"name": "Турниры", "description": "Шаблоны для турнирных игр", "sort_order": 4},
-    {"name": "Обучение", "description": "Упрощенные шаблоны для новичков", "sort_order": 5},
-    {"name": "Пользовательские", "description": "Созданные пользователями", "sort_order": 6}
+    {"id": 1, "name": "Колхоз", "description": "Шаблоны для игры Колхоз", "sort_order": 1},
+    {"id": 2, "name": "Американка", "description": "Шаблоны для игры Американка", "sort_order": 2},
+    {"id": 3, "name": "Московская пирамида", "description": "Шаблоны для Московской пирамиды", "sort_order": 3}
 ]
 
-# Initial data for system templates (will be inserted via migrations)
 SYSTEM_TEMPLATES = [
     {
         "name": "Колхоз стандартный (50₽ за очко)",
-        "description": "Стандартные правила игры Колхоз с оплатой 50 рублей за очко",
+        "description": "Классическая русская игра Колхоз. Игра до последнего шара. 50₽ за очко",
         "game_type": "kolkhoz",
         "rules": {
             "game_type": "kolkhoz",
             "max_players": 6,
             "min_players": 2,
-            "point_value_rubles": 50.00,
-            "balls": [
-                {"color": "white", "points": 1, "order_priority": 1, "is_required": True},
-                {"color": "yellow", "points": 2, "order_priority": 2, "is_required": True},
-                {"color": "green", "points": 3, "order_priority": 3, "is_required": True},
-                {"color": "brown", "points": 4, "order_priority": 4, "is_required": True},
-                {"color": "blue", "points": 5, "order_priority": 5, "is_required": True},
-                {"color": "pink", "points": 6, "order_priority": 6, "is_required": True},
-                {"color": "black", "points": 7, "order_priority": 7, "is_required": True}
-            ],
-            "payment_direction": "clockwise",
-            "allow_queue_change": True,
+            "balls_total": 15,
+            "point_value_rubles": 50,
             "queue_algorithm": "random_no_repeat",
-            "calculate_net_result": True
+            "winning_condition": "last_ball_remaining",
+            "game_rules": {
+                "description": "Классическая русская игра Колхоз. Игра до последнего шара",
+                "ball_counting": "point_based",
+                "foul_penalty_points": -1,
+                "foul_penalty_description": "Штраф за фол: -1 очко (50₽ при стоимости очка 50₽)",
+                "payment_direction": "clockwise",
+                "calculate_net_result": True
+            }
         },
         "settings": {
             "ui_theme": "classic",
+            "show_points_counter": True,
             "show_running_total": True,
-            "enable_sound_effects": True,
-            "auto_calculate_results": True
+            "enable_point_calculation": True,
+            "show_foul_warnings": True,
+            "show_payment_direction": True
         },
         "category_id": 1,
         "is_public": True,
-        "is_system": True,
-        "tags": ["стандарт", "колхоз", "средний"],
-        "usage_count": 1250,
-        "rating": 4.8
+        "tags": ["колхоз", "русский бильярд", "классика"]
     },
     {
         "name": "Колхоз бюджетный (25₽ за очко)",
-        "description": "Бюджетный вариант игры Колхоз для начинающих",
+        "description": "Бюджетная версия игры Колхоз для начинающих. 25₽ за очко",
         "game_type": "kolkhoz",
         "rules": {
             "game_type": "kolkhoz",
             "max_players": 4,
             "min_players": 2,
-            "point_value_rubles": 25.00,
-            "balls": [
-                {"color": "white", "points": 1, "order_priority": 1, "is_required": True},
-                {"color": "yellow", "points": 2, "order_priority": 2, "is_required": True},
-                {"color": "green", "points": 3, "order_priority": 3, "is_required": True},
-                {"color": "pink", "points": 4, "order_priority": 4, "is_required": True}
-            ],
-            "payment_direction": "clockwise",
-            "allow_queue_change": True,
-            "queue_algorithm": "always_random",
-            "calculate_net_result": True
+            "balls_total": 15,
+            "point_value_rubles": 25,
+            "queue_algorithm": "random_no_repeat",
+            "winning_condition": "last_ball_remaining",
+            "game_rules": {
+                "description": "Бюджетная версия игры Колхоз для начинающих",
+                "ball_counting": "point_based",
+                "foul_penalty_points": -1,
+                "foul_penalty_description": "Штраф за фол: -1 очко (25₽ при стоимости очка 25₽)",
+                "payment_direction": "clockwise",
+                "calculate_net_result": True
+            }
         },
         "settings": {
             "ui_theme": "modern",
+            "show_points_counter": True,
             "show_running_total": True,
-            "enable_tutorials": True
+            "enable_point_calculation": True,
+            "show_foul_warnings": True,
+            "show_payment_direction": True
         },
         "category_id": 1,
         "is_public": True,
-        "is_system": True,
-        "tags": ["бюджет", "колхоз", "новички"],
-        "usage_count": 890,
-        "rating": 4.5
+        "tags": ["бюджет", "колхоз", "новички"]
     },
     {
         "name": "Колхоз премиум (200₽ за очко)",
-        "description": "Премиум версия игры Колхоз с высокими ставками",
+        "description": "Премиум версия игры Колхоз с высокими ставками. 200₽ за очко",
         "game_type": "kolkhoz",
         "rules": {
             "game_type": "kolkhoz",
             "max_players": 6,
             "min_players": 2,
-            "point_value_rubles": 200.00,
+            "balls_total": 15,
+            "point_value_rubles": 200,
             "time_limit_minutes": 30,
-            "balls": [
-                {"color": "white", "points": 1, "order_priority": 1, "is_required": True},
-                {"color": "yellow", "points": 2, "order_priority": 2, "is_required": True},
-                {"color": "green", "points": 3, "order_priority": 3, "is_required": True},
-                {"color": "brown", "points": 4, "order_priority": 4, "is_required": True},
-                {"color": "blue", "points": 5, "order_priority": 5, "is_required": True},
-                {"color": "pink", "points": 6, "order_priority": 6, "is_required": True},
-                {"color": "black", "points": 7, "order_priority": 7, "is_required": True}
-            ],
-            "payment_direction": "clockwise",
-            "allow_queue_change": True,
             "queue_algorithm": "random_no_repeat",
-            "calculate_net_result": True
+            "winning_condition": "last_ball_remaining",
+            "game_rules": {
+                "description": "Премиум версия игры Колхоз с высокими ставками",
+                "ball_counting": "point_based",
+                "foul_penalty_points": -1,
+                "foul_penalty_description": "Штраф за фол: -1 очко (200₽ при стоимости очка 200₽)",
+                "payment_direction": "clockwise",
+                "calculate_net_result": True
+            }
         },
         "settings": {
             "ui_theme": "premium",
+            "show_points_counter": True,
             "show_running_total": True,
+            "enable_point_calculation": True,
+            "show_foul_warnings": True,
+            "show_payment_direction": True,
             "require_confirmation": True,
             "show_money_warnings": True,
             "enable_advanced_stats": True
         },
         "category_id": 1,
         "is_public": True,
-        "is_system": True,
-        "tags": ["премиум", "колхоз", "высокие ставки"],
-        "usage_count": 450,
-        "rating": 4.9
+        "tags": ["премиум", "колхоз", "высокие ставки"]
+    },
+    {
+        "name": "Американка (500₽ за партию)",
+        "description": "Русский бильярд. Игра до 8 шаров. Выигрывает тот, кто первым забьет 8 шаров",
+        "game_type": "americana",
+        "rules": {
+            "game_type": "americana",
+            "max_players": 2,
+            "min_players": 2,
+            "balls_total": 16,
+            "balls_to_win": 8,
+            "game_price_rubles": 500,
+            "queue_algorithm": "random_no_repeat",
+            "winning_condition": "first_to_8_balls",
+            "game_rules": {
+                "description": "Игра до 8 шаров. Выигрывает тот, кто первым забьет 8 шаров",
+                "ball_counting": "simple_count",
+                "no_color_values": True
+            }
+        },
+        "settings": {
+            "ui_theme": "classic",
+            "show_ball_counter": True,
+            "show_game_progress": True,
+            "enable_simple_scoring": True,
+            "show_winning_condition": True
+        },
+        "category_id": 2,
+        "is_public": True,
+        "tags": ["американка", "русский бильярд", "до 8 шаров"]
+    },
+    {
+        "name": "Московская пирамида (1000₽ за партию)",
+        "description": "Московская пирамида. Игра одним желтым шаром до 8. Всего 16 шаров",
+        "game_type": "moscow_pyramid",
+        "rules": {
+            "game_type": "moscow_pyramid",
+            "max_players": 2,
+            "min_players": 2,
+            "balls_total": 16,
+            "balls_to_win": 8,
+            "game_price_rubles": 1000,
+            "queue_algorithm": "random_no_repeat",
+            "winning_condition": "first_to_8_balls",
+            "game_rules": {
+                "description": "Московская пирамида. Игра одним желтым шаром до 8. Всего 16 шаров",
+                "ball_counting": "simple_count",
+                "no_color_values": True,
+                "special_rule": "yellow_ball_only",
+                "yellow_ball_description": "Игра ведется одним желтым шаром"
+            }
+        },
+        "settings": {
+            "ui_theme": "classic",
+            "show_ball_counter": True,
+            "show_game_progress": True,
+            "enable_simple_scoring": True,
+            "show_winning_condition": True,
+            "highlight_yellow_ball": True,
+            "show_yellow_ball_rule": True
+        },
+        "category_id": 3,
+        "is_public": True,
+        "tags": ["московская пирамида", "желтый шар", "до 8 шаров"]
     }
-]
\ No newline at end of file
+]
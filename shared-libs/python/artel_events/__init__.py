@@ -0,0 +1,7 @@
+"""
+Общие компоненты событийной шины (RabbitMQ) для сервисов Artel Billiards
+"""
+
+from .consumer import ConsumerGroup, MemoryIdempotencyStore, QueueConsumer
+
+__all__ = ["ConsumerGroup", "MemoryIdempotencyStore", "QueueConsumer"]
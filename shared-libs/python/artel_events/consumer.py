@@ -0,0 +1,389 @@
+"""
+Потребитель очередей RabbitMQ для микросервисов Artel Billiards
+
+QueueConsumer читает одну очередь на собственном канале и раздает сообщения
+пулу воркеров:
+- prefetch_count ограничивает число неподтвержденных сообщений у потребителя,
+  concurrency - число одновременно работающих обработчиков;
+- обработчик получает события пачками до batch_size, собранными не дольше
+  batch_timeout секунд (один запрос в БД на пачку вместо запроса на событие);
+- упавшая пачка повторяется через очереди задержки <queue>.retry.<сек>,
+  после max_retries попыток события уходят в <queue>.dlq;
+- повторно доставленные события с уже обработанным event_id подтверждаются
+  без вызова обработчика;
+- stats содержит счетчики, задержку обработки (lag) и пропускную способность.
+
+Подтверждение (ack) делается только после успешной обработки пачки или
+после того, как событие переложено в очередь повтора/DLQ.
+"""
+
+import asyncio
+import json
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Sequence, Set
+
+try:
+    import aio_pika
+except ImportError:  # модуль импортируется и без aio-pika (например, в тестах)
+    aio_pika = None
+
+
+Event = Dict[str, Any]
+BatchHandler = Callable[[List[Event]], Awaitable[None]]
+
+RETRY_COUNT_HEADER = "x-retry-count"
+
+
+class MemoryIdempotencyStore:
+    """Ограниченный LRU обработанных event_id в памяти процесса"""
+
+    def __init__(self, max_size: int = 100_000):
+        self.max_size = max_size
+        self._seen: "OrderedDict[str, None]" = OrderedDict()
+
+    async def seen(self, event_ids: Iterable[str]) -> Set[str]:
+        return {event_id for event_id in event_ids if event_id in self._seen}
+
+    async def mark(self, event_ids: Iterable[str]):
+        for event_id in event_ids:
+            self._seen[event_id] = None
+            self._seen.move_to_end(event_id)
+        while len(self._seen) > self.max_size:
+            self._seen.popitem(last=False)
+
+
+def _event_lag_seconds(event: Event, now: float) -> Optional[float]:
+    """Сколько секунд прошло с публикации события (timestamp события, UTC)"""
+    timestamp = event.get("timestamp")
+    if not isinstance(timestamp, str):
+        return None
+    try:
+        published = datetime.fromisoformat(timestamp)
+    except ValueError:
+        return None
+    if published.tzinfo is None:
+        published = published.replace(tzinfo=timezone.utc)
+    return max(now - published.timestamp(), 0.0)
+
+
+class QueueConsumer:
+    """Потребитель одной очереди с пулом воркеров, пачками, повторами и DLQ"""
+
+    def __init__(
+        self,
+        queue_name: str,
+        handler: BatchHandler,
+        exchange_name: Optional[str] = None,
+        routing_keys: Sequence[str] = (),
+        prefetch_count: int = 100,
+        concurrency: int = 4,
+        batch_size: int = 50,
+        batch_timeout: float = 0.05,
+        retry_delays: Sequence[float] = (1, 10, 60),
+        max_retries: Optional[int] = None,
+        idempotency=None,
+        queue_arguments: Optional[Dict[str, Any]] = None,
+        throughput_window_seconds: float = 60.0
+    ):
+        self.queue_name = queue_name
+        self.handler = handler
+        self.exchange_name = exchange_name
+        self.routing_keys = list(routing_keys)
+        self.prefetch_count = prefetch_count
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.batch_timeout = batch_timeout
+        self.retry_delays = [int(delay) for delay in retry_delays]
+        self.max_retries = len(self.retry_delays) if max_retries is None else max_retries
+        self.idempotency = idempotency if idempotency is not None else MemoryIdempotencyStore()
+        self.queue_arguments = queue_arguments or {}
+        self.throughput_window_seconds = throughput_window_seconds
+
+        self._channel = None
+        self._queue = None
+        self._consumer_tag: Optional[str] = None
+        self._buffer: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        # (время, обработано событий) по пачкам для расчета пропускной способности
+        self._processed_log: "deque" = deque()
+        self.stats = {
+            "received": 0,
+            "processed": 0,
+            "batches": 0,
+            "duplicates": 0,
+            "failed_batches": 0,
+            "retried": 0,
+            "dead_lettered": 0,
+            "in_flight": 0,
+            "last_lag_seconds": None,
+            "max_lag_seconds": 0.0,
+        }
+
+    # ==================== TOPOLOGY ====================
+
+    @property
+    def dlq_name(self) -> str:
+        return f"{self.queue_name}.dlq"
+
+    def retry_queue_name(self, delay: int) -> str:
+        return f"{self.queue_name}.retry.{delay}"
+
+    async def _declare_topology(self):
+        """Основная очередь, очереди задержки (TTL -> обратно в основную) и DLQ"""
+        channel = self._channel
+        self._queue = await channel.declare_queue(
+            self.queue_name, durable=True, arguments=self.queue_arguments
+        )
+        if self.exchange_name:
+            exchange = await channel.declare_exchange(
+                self.exchange_name, aio_pika.ExchangeType.TOPIC, durable=True
+            )
+            for routing_key in self.routing_keys:
+                await self._queue.bind(exchange, routing_key)
+
+        for delay in set(self.retry_delays):
+            await channel.declare_queue(
+                self.retry_queue_name(delay),
+                durable=True,
+                arguments={
+                    "x-message-ttl": delay * 1000,
+                    "x-dead-letter-exchange": "",
+                    "x-dead-letter-routing-key": self.queue_name,
+                }
+            )
+        await channel.declare_queue(self.dlq_name, durable=True)
+
+    # ==================== LIFECYCLE ====================
+
+    async def start(self, connection):
+        """Отдельный канал с prefetch_count, топология очередей и воркеры"""
+        self._channel = await connection.channel()
+        await self._channel.set_qos(prefetch_count=self.prefetch_count)
+        await self._declare_topology()
+        self._start_workers()
+        self._consumer_tag = await self._queue.consume(self._on_message)
+        print(
+            f"✅ Consumer {self.queue_name} started "
+            f"(prefetch={self.prefetch_count}, concurrency={self.concurrency}, batch={self.batch_size})"
+        )
+
+    def _start_workers(self):
+        self._buffer = asyncio.Queue()
+        self._workers = [
+            asyncio.get_running_loop().create_task(self._worker())
+            for _ in range(self.concurrency)
+        ]
+
+    async def stop(self, drain_timeout: float = 10.0):
+        """Прекратить прием, дообработать полученное и закрыть канал"""
+        if self._queue is not None and self._consumer_tag is not None:
+            await self._queue.cancel(self._consumer_tag)
+            self._consumer_tag = None
+
+        if self._buffer is not None:
+            try:
+                await asyncio.wait_for(self._drained(), timeout=drain_timeout)
+            except asyncio.TimeoutError:
+                # Неподтвержденные сообщения RabbitMQ доставит повторно
+                print(f"⚠️ Consumer {self.queue_name} stopped with {self.stats['in_flight']} events in flight")
+
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+        if self._channel is not None and not self._channel.is_closed:
+            await self._channel.close()
+        self._channel = None
+
+    async def _drained(self):
+        while self.stats["in_flight"]:
+            await asyncio.sleep(0.01)
+
+    # ==================== DISPATCH ====================
+
+    async def _on_message(self, message):
+        self.stats["received"] += 1
+        self.stats["in_flight"] += 1
+        await self._buffer.put(message)
+
+    async def _next_batch(self) -> list:
+        """Первое сообщение ждем без ограничения, остальные - не дольше batch_timeout"""
+        batch = [await self._buffer.get()]
+        deadline = time.monotonic() + self.batch_timeout
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._buffer.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._buffer.get(), timeout=remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _worker(self):
+        while True:
+            batch = await self._next_batch()
+            try:
+                await self._process(batch)
+            except Exception as e:
+                # Ошибка в самом потребителе (например, RabbitMQ недоступен) - не роняем воркер
+                print(f"❌ Consumer {self.queue_name} failed to settle batch: {e}")
+            finally:
+                self.stats["in_flight"] -= len(batch)
+
+    async def _process(self, messages: list):
+        decoded = []
+        for message in messages:
+            try:
+                event = json.loads(message.body)
+                if not isinstance(event, dict):
+                    raise ValueError("event is not an object")
+            except ValueError as e:
+                # Битое сообщение не станет лучше от повторов
+                await self._dead_letter(message, f"invalid payload: {e}")
+                continue
+            event.setdefault("event_id", message.message_id)
+            decoded.append((message, event))
+
+        event_ids = [event["event_id"] for _, event in decoded if event.get("event_id")]
+        duplicates = await self.idempotency.seen(event_ids) if event_ids else set()
+
+        fresh = []
+        for message, event in decoded:
+            if event.get("event_id") in duplicates:
+                self.stats["duplicates"] += 1
+                await message.ack()
+            else:
+                fresh.append((message, event))
+        if not fresh:
+            return
+
+        events = [event for _, event in fresh]
+        try:
+            await self.handler(events)
+        except Exception as e:
+            self.stats["failed_batches"] += 1
+            print(f"⚠️ Consumer {self.queue_name} handler failed on {len(events)} events: {e}")
+            for message, event in fresh:
+                await self._retry_or_dead_letter(message, str(e))
+            return
+
+        await self.idempotency.mark([event["event_id"] for event in events if event.get("event_id")])
+        for message, _ in fresh:
+            await message.ack()
+        self._record_processed(events)
+
+    def _record_processed(self, events: List[Event]):
+        now = time.time()
+        self.stats["processed"] += len(events)
+        self.stats["batches"] += 1
+
+        lags = [lag for lag in (_event_lag_seconds(event, now) for event in events) if lag is not None]
+        if lags:
+            lag = max(lags)
+            self.stats["last_lag_seconds"] = round(lag, 3)
+            self.stats["max_lag_seconds"] = round(max(self.stats["max_lag_seconds"], lag), 3)
+
+        monotonic = time.monotonic()
+        self._processed_log.append((monotonic, len(events)))
+        while self._processed_log and self._processed_log[0][0] < monotonic - self.throughput_window_seconds:
+            self._processed_log.popleft()
+
+    # ==================== RETRY / DLQ ====================
+
+    async def _publish(self, routing_key: str, message, headers: Dict[str, Any]):
+        await self._channel.default_exchange.publish(
+            aio_pika.Message(
+                message.body,
+                headers=headers,
+                content_type=message.content_type,
+                delivery_mode=aio_pika.DeliveryMode.PERSISTENT,
+                message_id=message.message_id,
+                timestamp=message.timestamp
+            ),
+            routing_key=routing_key
+        )
+
+    async def _retry_or_dead_letter(self, message, error: str):
+        headers = dict(message.headers or {})
+        attempt = int(headers.get(RETRY_COUNT_HEADER, 0))
+        if attempt >= self.max_retries or not self.retry_delays:
+            await self._dead_letter(message, error)
+            return
+
+        delay = self.retry_delays[min(attempt, len(self.retry_delays) - 1)]
+        headers[RETRY_COUNT_HEADER] = attempt + 1
+        headers["x-last-error"] = error[:500]
+        await self._publish(self.retry_queue_name(delay), message, headers)
+        await message.ack()
+        self.stats["retried"] += 1
+
+    async def _dead_letter(self, message, error: str):
+        headers = dict(message.headers or {})
+        headers["x-last-error"] = error[:500]
+        await self._publish(self.dlq_name, message, headers)
+        await message.ack()
+        self.stats["dead_lettered"] += 1
+
+    # ==================== METRICS ====================
+
+    async def queue_depth(self) -> Optional[int]:
+        """Сообщений в очереди, еще не выданных потребителям (отставание в штуках)"""
+        if self._channel is None:
+            return None
+        queue = await self._channel.declare_queue(self.queue_name, passive=True)
+        return queue.declaration_result.message_count
+
+    def metrics(self) -> Dict[str, Any]:
+        window_start = time.monotonic() - self.throughput_window_seconds
+        recent = sum(count for at, count in self._processed_log if at >= window_start)
+        return {
+            **self.stats,
+            "queue": self.queue_name,
+            "throughput_per_second": round(recent / self.throughput_window_seconds, 2),
+        }
+
+
+class ConsumerGroup:
+    """Набор потребителей сервиса: общий старт, остановка и метрики"""
+
+    def __init__(self):
+        self.consumers: Dict[str, QueueConsumer] = {}
+        self._connection = None
+
+    def add(self, consumer: QueueConsumer) -> QueueConsumer:
+        self.consumers[consumer.queue_name] = consumer
+        return consumer
+
+    async def start(self, rabbitmq_url: str):
+        if aio_pika is None:
+            raise RuntimeError("aio-pika is required to consume RabbitMQ queues")
+        self._connection = await aio_pika.connect_robust(rabbitmq_url)
+        for consumer in self.consumers.values():
+            await consumer.start(self._connection)
+
+    async def stop(self):
+        for consumer in self.consumers.values():
+            await consumer.stop()
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
+
+    async def metrics(self) -> Dict[str, Any]:
+        result = {}
+        for name, consumer in self.consumers.items():
+            metrics = consumer.metrics()
+            try:
+                metrics["queue_depth"] = await consumer.queue_depth()
+            except Exception:
+                metrics["queue_depth"] = None
+            result[name] = metrics
+        return result